@@ -0,0 +1,173 @@
+"""
+Operator endpoints under ``/admin`` (bearer-token protected).
+
+Debug targets: enable verbose (DEBUG) logging for one callSid or caller
+number without raising ``LOG_LEVEL`` for the whole process. Targets expire
+after ``ttlSeconds`` and live in this process only.
+
+Loop health: ``/admin/loop`` reports event loop lag and recent stalls with
+the sampled stack; ``/admin/tasks`` lists live asyncio tasks grouped by name
+(``twilio``, ``ultravox``, ``tool`` …) with their ages.
+
+Profiling: ``/admin/profile`` samples every thread for N seconds and returns
+collapsed stacks (flamegraph input), see :mod:`app.core.profiler`.
+
+Memory: ``/admin/memory`` reports RSS, per-call estimates and leak
+indicators; ``/admin/memory/tracemalloc/*`` starts tracing, diffs against
+the start snapshot and stops (see :mod:`app.core.memory`).
+
+Analytics: ``/admin/analytics`` summarises recent calls per direction —
+outcome counts, answer rate, duration and setup-latency percentiles (see
+:mod:`app.core.call_analytics`).
+
+Tenants: ``/admin/tenants`` lists the loaded tenants; ``POST
+/admin/tenants/reload`` re-reads ``TENANT_DIR`` without a restart (see
+:mod:`app.core.tenants`).
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, Field, model_validator
+
+from app.api.security import verify_admin_token
+from app.core import memory, tenants
+from app.core.call_analytics import call_analytics
+from app.core.config import PROFILER_MAX_SECONDS, TENANT_DIR
+from app.core.log_context import (
+    add_debug_target,
+    list_debug_targets,
+    remove_debug_target,
+)
+from app.core.loop_monitor import describe_tasks, loop_monitor
+from app.core.profiler import ProfilerBusyError, format_collapsed, sample_stacks
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/admin", dependencies=[Depends(verify_admin_token)])
+
+
+class DebugTargetRequest(BaseModel):
+    """Request body for ``POST /admin/debug-targets``."""
+
+    callSid: str | None = None
+    callerNumber: str | None = None
+    ttlSeconds: float = Field(900.0, gt=0, le=86400)
+
+    @model_validator(mode="after")
+    def _require_target(self) -> DebugTargetRequest:
+        if not self.callSid and not self.callerNumber:
+            raise ValueError("callSid or callerNumber is required")
+        return self
+
+
+@router.get("/debug-targets")
+async def get_debug_targets() -> dict[str, Any]:
+    return {"targets": list_debug_targets()}
+
+
+@router.post("/debug-targets")
+async def create_debug_target(payload: DebugTargetRequest) -> dict[str, Any]:
+    add_debug_target(call_sid=payload.callSid, caller_number=payload.callerNumber,
+                     ttl_seconds=payload.ttlSeconds)
+    logger.info("Debug logging enabled for callSid=%s callerNumber=%s (%.0fs)",
+                payload.callSid, payload.callerNumber, payload.ttlSeconds)
+    return {"targets": list_debug_targets()}
+
+
+@router.delete("/debug-targets")
+async def delete_debug_target(callSid: str | None = None,
+                              callerNumber: str | None = None) -> dict[str, Any]:
+    if not remove_debug_target(call_sid=callSid, caller_number=callerNumber):
+        raise HTTPException(status_code=404, detail="No such debug target")
+    logger.info("Debug logging disabled for callSid=%s callerNumber=%s",
+                callSid, callerNumber)
+    return {"targets": list_debug_targets()}
+
+
+@router.get("/loop")
+async def get_loop_health() -> dict[str, Any]:
+    return loop_monitor.snapshot()
+
+
+@router.get("/tasks")
+async def get_tasks(per_group: int = 50) -> dict[str, Any]:
+    return describe_tasks(per_group=max(1, per_group))
+
+
+@router.get("/profile", response_class=PlainTextResponse)
+async def get_profile(
+    seconds: float = Query(10.0, gt=0),
+    interval_ms: float = Query(10.0, ge=1, le=1000),
+) -> PlainTextResponse:
+    """Sample all threads and return collapsed stacks (``stack count`` lines)."""
+    if seconds > PROFILER_MAX_SECONDS:
+        raise HTTPException(status_code=422,
+                            detail=f"seconds must be <= {PROFILER_MAX_SECONDS:g}")
+    logger.info("Profiling for %.1fs at %.0fms interval", seconds, interval_ms)
+    try:
+        counts, ticks = await asyncio.to_thread(sample_stacks, seconds, interval_ms / 1000)
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e)) from None
+    return PlainTextResponse(format_collapsed(counts),
+                             headers={"X-Profile-Samples": str(ticks)})
+
+
+@router.get("/analytics")
+async def get_analytics() -> dict[str, Any]:
+    return call_analytics.snapshot()
+
+
+@router.get("/tenants")
+async def get_tenants() -> dict[str, Any]:
+    return {"tenants": [
+        {"id": t.id, "numbers": list(t.numbers), "companyName": t.company_name,
+         "locations": sorted(t.calendars), "promptOverrides": sorted(t.prompt_overrides)}
+        for t in tenants.get_registry()
+    ]}
+
+
+@router.post("/tenants/reload")
+async def reload_tenants() -> dict[str, Any]:
+    if not TENANT_DIR:
+        raise HTTPException(status_code=409, detail="TENANT_DIR is not set")
+    try:
+        registry = await asyncio.to_thread(tenants.load_configured)
+    except ValueError as e:
+        # The previous registry stays in place.
+        raise HTTPException(status_code=422, detail=str(e)) from None
+    return {"tenants": len(registry)}
+
+
+@router.get("/memory")
+async def get_memory(limit: int = Query(100, ge=1)) -> dict[str, Any]:
+    return memory.memory_report(limit=limit)
+
+
+@router.post("/memory/tracemalloc/start")
+async def start_tracemalloc(frames: int = Query(10, ge=1, le=100)) -> dict[str, Any]:
+    await asyncio.to_thread(memory.start_tracing, frames)
+    logger.info("tracemalloc started (%d frames)", frames)
+    return {"tracing": True}
+
+
+@router.get("/memory/tracemalloc/diff")
+async def diff_tracemalloc(
+    top: int = Query(25, ge=1, le=500),
+    key: str = Query("lineno", pattern="^(lineno|filename|traceback)$"),
+) -> dict[str, Any]:
+    try:
+        return await asyncio.to_thread(memory.snapshot_diff, top, key)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e)) from None
+
+
+@router.post("/memory/tracemalloc/stop")
+async def stop_tracemalloc() -> dict[str, Any]:
+    memory.stop_tracing()
+    logger.info("tracemalloc stopped")
+    return {"tracing": False}
@@ -3,33 +3,62 @@ API endpoints for handling Twilio calls.
 """
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
+import time
 import traceback
 from datetime import datetime
+from functools import lru_cache
 from typing import Any
+from xml.sax.saxutils import escape
 
 import httpx
 from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from pydantic import BaseModel, Field
-from twilio.rest import Client
-from twilio.twiml.voice_response import Connect, VoiceResponse
-
-from app.api.security import verify_twilio_signature
+from twilio.twiml.voice_response import VoiceResponse
 
+from app.api.security import twilio_params, verify_twilio_signature
+from app.core.admission import admission
+from app.core.call_analytics import call_analytics, normalize_direction
 from app.core.config import (
+    CALL_SHED_MESSAGE,
+    CALL_SHED_MODE,
     DEFAULT_FIRST_MESSAGE,
+    HEDGE_REQUESTS,
     HTTP_TIMEOUT_SECONDS,
+    INCOMING_CALL_BUDGET_SECONDS,
     N8N_WEBHOOK_URL,
     PUBLIC_URL,
-    TWILIO_ACCOUNT_SID,
-    TWILIO_AUTH_TOKEN,
+    STREAM_TOKEN_TTL_SECONDS,
     TWILIO_PHONE_NUMBER,
+    ULTRAVOX_PREWARM_ON_RINGING,
+)
+from app.core.deadline import deadline_scope, remaining
+from app.core.log_context import bind_call_sid, bind_caller_number
+from app.core.metrics import (
+    CALLS,
+    N8N_ROUTE_LATENCY,
+    SHED,
+    STREAM_SESSIONS,
+    deadline_exceeded_total,
+)
+from app.core.prompts import get_system_prompt
+from app.core.resilience import (
+    BulkheadFullError,
+    DependencyUnavailableError,
+    LatencyTracker,
+    hedged,
+    n8n_breaker,
+    n8n_bulkhead,
 )
 from app.core.shared_state import session_manager
-from app.core.log_context import bind_call_sid
-from app.core.metrics import calls_total
+from app.core.stream_token import issue_stream_token
+from app.core.tenants import Tenant, bind_tenant, current_tenant, get_registry
+from app.services.http_client import get_http_client
 from app.services.n8n_service import build_signed_headers
+from app.services.twilio_service import create_call
+from app.services.ultravox_service import PrewarmedCall
 
 logger = logging.getLogger(__name__)
 
@@ -42,6 +71,9 @@ N8N_ROUTE_FIRST_MESSAGE = "1"
 _TWILIO_STATUS_EVENTS: tuple[str, ...] = (
     'initiated', 'ringing', 'answered', 'completed',
 )
+# Final statuses for a call that was never answered.
+_UNANSWERED_STATUSES: frozenset[str] = frozenset({'busy', 'no-answer', 'failed', 'canceled'})
+_FINAL_STATUSES: frozenset[str] = _UNANSWERED_STATUSES | {'completed'}
 
 
 class OutgoingCallRequest(BaseModel):
@@ -52,61 +84,190 @@ class OutgoingCallRequest(BaseModel):
         description="Destination phone number in E.164-ish form."
     )
     firstMessage: str | None = None
+    tenant: str | None = Field(
+        None, description="Tenant id to call as (its first number is the caller ID).",
+    )
+
+
+# Attribute escaping as done by ElementTree (and so by the Twilio helper).
+_XML_ATTR_ENTITIES = {'"': "&quot;", "\r": "&#13;", "\n": "&#10;", "\t": "&#09;"}
+_STREAM_TWIML_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8"?><Response><Connect><Stream url="{url}">'
+)
+_STREAM_TWIML_PARAMETER = '<Parameter name="{name}" value="{value}" />'
+_STREAM_TWIML_TAIL = "</Stream></Connect></Response>"
+
+
+def _xml_attr(value: str) -> str:
+    return escape(value, _XML_ATTR_ENTITIES)
 
 
 def _build_stream_twiml(stream_url: str, first_message: str,
-                        caller_number: str, call_sid: str | None = None) -> str:
+                        caller_number: str, call_sid: str | None = None,
+                        stream_token: str | None = None) -> str:
     """Build a TwiML <Connect><Stream> response.
 
-    Uses the Twilio helper so values are properly XML-escaped (prevents
-    TwiML injection when the upstream first-message contains ``<`` / ``&`` / ``"``).
+    Rendered from a fixed template rather than a ``VoiceResponse`` tree (this
+    runs on every inbound call); every value is XML-escaped exactly as the
+    Twilio helper would, which prevents TwiML injection when the upstream
+    first-message contains ``<`` / ``&`` / ``"``.
     """
-    response = VoiceResponse()
-    connect = Connect()
-    stream = connect.stream(url=stream_url)
-    stream.parameter(name="firstMessage", value=first_message)
-    stream.parameter(name="callerNumber", value=caller_number)
+    params = [("firstMessage", first_message), ("callerNumber", caller_number)]
     if call_sid is not None:
-        stream.parameter(name="callSid", value=call_sid)
-    response.append(connect)
+        params.append(("callSid", call_sid))
+    if stream_token is not None:
+        params.append(("streamToken", stream_token))
+    return "".join((
+        _STREAM_TWIML_HEAD.format(url=_xml_attr(stream_url)),
+        *(_STREAM_TWIML_PARAMETER.format(name=name, value=_xml_attr(value))
+          for name, value in params),
+        _STREAM_TWIML_TAIL,
+    ))
+
+
+# Strong references to in-progress unclaimed-session expiries.
+_expiry_tasks: set[asyncio.Task] = set()
+
+
+async def _expire_unclaimed(call_sid: str) -> None:
+    session = await session_manager.get(call_sid)
+    if session is None or session.get('streamSid'):
+        return
+    await session_manager.pop(call_sid)
+    if (unused := session.get('uv_prewarm')) is not None:
+        unused.release()
+    STREAM_SESSIONS["expired"].inc()
+    logger.info("Session %s unclaimed when its stream token expired; freed", call_sid)
+
+
+def _schedule_unclaimed_expiry(call_sid: str) -> None:
+    """Free this process's copy of the session once its stream token expires.
+
+    With stream tokens the media stream may land on another replica, which
+    rebuilds its own session; nothing would ever free the copy here.
+    """
+    def spawn() -> None:
+        task = asyncio.create_task(_expire_unclaimed(call_sid),
+                                   name=f"expire-session:{call_sid}")
+        _expiry_tasks.add(task)
+        task.add_done_callback(_expiry_tasks.discard)
+
+    asyncio.get_running_loop().call_later(STREAM_TOKEN_TTL_SECONDS, spawn)
+
+
+@lru_cache(maxsize=4)
+def _shed_twiml(mode: str, message: str) -> str:
+    response = VoiceResponse()
+    if mode == "reject":
+        response.reject(reason="busy")
+    else:
+        response.say(message)
+        response.hangup()
     return str(response)
 
 
+def _build_shed_twiml() -> str:
+    """TwiML for a call turned away by admission control (built once)."""
+    return _shed_twiml(CALL_SHED_MODE, CALL_SHED_MESSAGE)
+
+
+# Recent first-message latencies; their p95 is the hedging delay.
+_first_message_latency = LatencyTracker()
+
+
+async def _post_first_message(body: bytes, timeout: float) -> httpx.Response:
+    """One guarded POST to n8n for the first message (one hedging attempt)."""
+    probe = n8n_breaker.before_call()
+    t0 = time.monotonic()
+    try:
+        async with n8n_bulkhead:
+            resp = await get_http_client().post(
+                N8N_WEBHOOK_URL or "",
+                content=body,
+                headers=build_signed_headers(body),
+                timeout=timeout,
+            )
+    except httpx.HTTPError:
+        n8n_breaker.record_failure()
+        raise
+    except (BulkheadFullError, asyncio.CancelledError):
+        # Refused locally, or cancelled by the deadline / a winning hedge; the
+        # caller records a blown deadline as the failure.
+        n8n_breaker.abandon(probe)
+        raise
+    elapsed = time.monotonic() - t0
+    _first_message_latency.observe(elapsed)
+    N8N_ROUTE_LATENCY[N8N_ROUTE_FIRST_MESSAGE].observe(elapsed)
+    if resp.status_code >= 500:
+        n8n_breaker.record_failure()
+    else:
+        n8n_breaker.record_success()
+    return resp
+
+
 async def _fetch_first_message_from_n8n(caller_number: str) -> str:
-    """Ask n8n for the dynamic first-message; fall back to the default on any error."""
+    """Ask n8n for the dynamic first-message; fall back to the default on any error.
+
+    Shares the n8n circuit breaker and bulkhead with ``send_to_webhook`` so an
+    n8n outage answers Twilio with the default message immediately, and is
+    bounded by the caller's deadline budget rather than ``HTTP_TIMEOUT_SECONDS``.
+    With ``HEDGE_REQUESTS`` enabled a second request is sent once the first
+    is slower than the observed p95. Calls on a tenant's number fall back to
+    the tenant's first message, and the tenant id is sent along.
+    """
+    tenant = current_tenant()
+    default = tenant.first_message if tenant else DEFAULT_FIRST_MESSAGE
     if not N8N_WEBHOOK_URL:
         logger.warning("N8N_WEBHOOK_URL not set; using DEFAULT_FIRST_MESSAGE")
-        return DEFAULT_FIRST_MESSAGE
+        return default
+
+    budget = remaining(HTTP_TIMEOUT_SECONDS)
+    if budget <= 0:
+        deadline_exceeded_total.labels(operation="first_message").inc()
+        return default
+
+    request: dict[str, str] = {
+        "route": N8N_ROUTE_FIRST_MESSAGE,
+        "number": caller_number,
+        "data": "empty",
+    }
+    if tenant is not None:
+        request["tenant"] = tenant.id
+    body = json.dumps(request).encode("utf-8")
+    hedge_delay = _first_message_latency.hedge_delay() if HEDGE_REQUESTS else None
 
     try:
-        body = json.dumps({
-            "route": N8N_ROUTE_FIRST_MESSAGE,
-            "number": caller_number,
-            "data": "empty",
-        }).encode("utf-8")
-        async with httpx.AsyncClient(timeout=HTTP_TIMEOUT_SECONDS) as client:
-            resp = await client.post(
-                N8N_WEBHOOK_URL,
-                content=body,
-                headers=build_signed_headers(body),
+        async with asyncio.timeout(budget):
+            resp = await hedged(
+                lambda: _post_first_message(body, budget), hedge_delay, "n8n",
             )
+    except DependencyUnavailableError as e:
+        logger.warning("n8n first-message skipped: %s", e)
+        return default
+    except TimeoutError:
+        # The deadline cancels the attempt before httpx can time out, so a
+        # hanging n8n is counted against the breaker here.
+        n8n_breaker.record_failure()
+        deadline_exceeded_total.labels(operation="first_message").inc()
+        logger.warning("n8n first-message exceeded %.2fs budget; using default", budget)
+        return default
     except (httpx.TimeoutException, httpx.HTTPError) as e:
         logger.warning("n8n first-message fetch failed: %s", e)
-        return DEFAULT_FIRST_MESSAGE
+        return default
 
     if resp.status_code >= 400:
         logger.warning("n8n first-message non-OK status: %d", resp.status_code)
-        return DEFAULT_FIRST_MESSAGE
+        return default
 
     text = resp.text
     try:
         data = json.loads(text)
     except json.JSONDecodeError:
-        return text.strip() or DEFAULT_FIRST_MESSAGE
+        return text.strip() or default
 
     if isinstance(data, dict) and data.get('firstMessage'):
         return str(data['firstMessage'])
-    return DEFAULT_FIRST_MESSAGE
+    return default
 
 
 @router.get("/")
@@ -120,103 +281,209 @@ async def incoming_call(request: Request) -> Response:
     """Handle the inbound call from Twilio.
 
     Fetches the first message from n8n, stores session data, and returns a
-    TwiML response that bridges the call into ``/media-stream``.
+    TwiML response that bridges the call into ``/media-stream``. The whole
+    handler runs under ``INCOMING_CALL_BUDGET_SECONDS`` so Twilio is answered
+    on time even when n8n is slow. When the process is at
+    ``MAX_CONCURRENT_CALLS`` the call is shed instead (see ``CALL_SHED_MODE``).
     """
-    form_data = await request.form()
-    twilio_params: dict[str, Any] = dict(form_data)
-    logger.info("Incoming call")
-
-    caller_number = twilio_params.get('From', 'Unknown')
-    session_id = twilio_params.get('CallSid')
-    bind_call_sid(session_id)
-    calls_total.labels(direction="inbound").inc()
-    logger.info("Caller Number: %s, CallSid: %s", caller_number, session_id)
-
-    first_message = await _fetch_first_message_from_n8n(caller_number)
-
-    if session_id:
-        await session_manager.create(
-            session_id,
-            transcript="",
-            callerNumber=caller_number,
-            callDetails=twilio_params,
-            firstMessage=first_message,
-            streamSid=None,
-            hanging_up=False,
-            transcript_sent=False,
+    with deadline_scope(INCOMING_CALL_BUDGET_SECONDS), admission.reserve() as admitted:
+        params = await twilio_params(request)
+        logger.info("Incoming call")
+
+        caller_number = params.get('From', 'Unknown')
+        session_id = params.get('CallSid')
+        tenant = get_registry().for_number(params.get('To'))
+        tenant_id = tenant.id if tenant else None
+        bind_call_sid(session_id)
+        bind_caller_number(caller_number)
+        bind_tenant(tenant)
+        CALLS["inbound"].inc()
+        logger.info("Caller Number: %s, CallSid: %s", caller_number, session_id)
+
+        if not admitted:
+            SHED["inbound"].inc()
+            logger.warning("At capacity (%d calls); shedding inbound call",
+                           admission.max_calls)
+            return Response(content=_build_shed_twiml(), media_type="text/xml")
+
+        first_message = await _fetch_first_message_from_n8n(caller_number)
+        stream_token = issue_stream_token(caller_number, first_message, "inbound",
+                                          session_id, tenant=tenant_id)
+
+        if session_id:
+            await session_manager.create(
+                session_id,
+                transcript="",
+                callerNumber=caller_number,
+                callDetails=params,
+                direction="inbound",
+                tenant=tenant_id,
+                firstMessage=first_message,
+                streamSid=None,
+                hanging_up=False,
+                transcript_sent=False,
+            )
+            if stream_token is not None:
+                _schedule_unclaimed_expiry(session_id)
+
+        host = PUBLIC_URL or ""
+        stream_url = f"{host.replace('https', 'wss')}/media-stream"
+
+        twiml = _build_stream_twiml(
+            stream_url=stream_url,
+            first_message=first_message,
+            caller_number=caller_number,
+            call_sid=session_id,
+            stream_token=stream_token,
         )
+        return Response(content=twiml, media_type="text/xml")
+
 
+async def place_outbound_call(phone_number: str, first_message: str, *,
+                              from_number: str | None = None,
+                              call_details: dict[str, Any] | None = None,
+                              tenant: Tenant | None = None) -> str:
+    """Dial ``phone_number`` into ``/media-stream`` and create its session.
+
+    Dials from ``from_number`` (default: the tenant's first number, else
+    ``TWILIO_PHONE_NUMBER``) and returns the new CallSid; Twilio errors
+    propagate. Without ``tenant`` the call belongs to whichever tenant owns
+    the caller ID. Admission is the caller's job.
+    """
+    from_number = from_number or (tenant.numbers[0] if tenant else TWILIO_PHONE_NUMBER)
+    tenant = tenant or get_registry().for_number(from_number)
+    tenant_id = tenant.id if tenant else None
     host = PUBLIC_URL or ""
     stream_url = f"{host.replace('https', 'wss')}/media-stream"
+    stream_token = issue_stream_token(phone_number, first_message, "outbound",
+                                      tenant=tenant_id)
 
     twiml = _build_stream_twiml(
         stream_url=stream_url,
         first_message=first_message,
-        caller_number=caller_number,
-        call_sid=session_id,
+        caller_number=phone_number,
+        stream_token=stream_token,
+    )
+
+    call = await create_call(
+        twiml=twiml,
+        to=phone_number,
+        from_=from_number,
+        status_callback=f"{PUBLIC_URL}/call-status",
+        status_callback_event=list(_TWILIO_STATUS_EVENTS),
+    )
+
+    logger.info("Twilio call created: %s", call.sid)
+    bind_call_sid(call.sid)
+    bind_caller_number(phone_number)
+    CALLS["outbound"].inc()
+
+    await session_manager.create(
+        call.sid,
+        transcript="",
+        callerNumber=phone_number,
+        callDetails={
+            **(call_details or {}),
+            "startTime": datetime.now().isoformat(),
+        },
+        direction="outbound",
+        tenant=tenant_id,
+        firstMessage=first_message,
+        streamSid=None,
+        hanging_up=False,
+        transcript_sent=False,
     )
-    return Response(content=twiml, media_type="text/xml")
+    if stream_token is not None:
+        _schedule_unclaimed_expiry(call.sid)
+    return str(call.sid)
 
 
 @router.post("/outgoing-call")
 async def outgoing_call(payload: OutgoingCallRequest) -> dict[str, Any]:
     """Initiate an outbound Twilio call wired into ``/media-stream``."""
     phone_number = payload.phoneNumber
-    first_message = payload.firstMessage or DEFAULT_FIRST_MESSAGE
-
-    logger.info("Initiating outbound call to %s", phone_number)
+    tenant = get_registry().get(payload.tenant)
+    if payload.tenant and tenant is None:
+        raise HTTPException(status_code=404, detail=f"Unknown tenant: {payload.tenant}")
+    first_message = payload.firstMessage or (
+        tenant.first_message if tenant else DEFAULT_FIRST_MESSAGE
+    )
 
-    try:
-        client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
+    with admission.reserve() as admitted:
+        if not admitted:
+            SHED["outbound"].inc()
+            raise HTTPException(status_code=503, detail="At call capacity; retry later")
+
+        logger.info("Initiating outbound call to %s", phone_number)
+        try:
+            call_sid = await place_outbound_call(
+                phone_number, first_message,
+                call_details={"originalRequest": payload.model_dump()},
+                tenant=tenant,
+            )
+        except Exception as error:
+            logger.exception("Error creating outbound call")
+            # Keep parity with previous error envelope so existing clients still parse it.
+            raise HTTPException(status_code=500, detail=str(error))
 
-        host = PUBLIC_URL or ""
-        stream_url = f"{host.replace('https', 'wss')}/media-stream"
+    return {"success": True, "callSid": call_sid}
 
-        twiml = _build_stream_twiml(
-            stream_url=stream_url,
-            first_message=first_message,
-            caller_number=phone_number,
-        )
 
-        call = client.calls.create(
-            twiml=twiml,
-            to=phone_number,
-            from_=TWILIO_PHONE_NUMBER,
-            status_callback=f"{PUBLIC_URL}/call-status",
-            status_callback_event=list(_TWILIO_STATUS_EVENTS),
-        )
+def _call_duration(value: str | None) -> float | None:
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
 
-        logger.info("Twilio call created: %s", call.sid)
-        bind_call_sid(call.sid)
-        calls_total.labels(direction="outbound").inc()
-
-        await session_manager.create(
-            call.sid,
-            transcript="",
-            callerNumber=phone_number,
-            callDetails={
-                "originalRequest": payload.model_dump(),
-                "startTime": datetime.now().isoformat(),
-            },
-            firstMessage=first_message,
-            streamSid=None,
-            hanging_up=False,
-            transcript_sent=False,
-        )
 
-        return {"success": True, "callSid": call.sid}
+async def _on_call_status(call_sid: str, data: dict[str, str]) -> None:
+    """Drive the session lifecycle from a Twilio status callback.
 
-    except Exception as error:
-        logger.exception("Error creating outbound call")
-        # Keep parity with previous error envelope so existing clients still parse it.
-        raise HTTPException(status_code=500, detail=str(error))
+    ``ringing`` pre-creates the Ultravox call (with
+    ``ULTRAVOX_PREWARM_ON_RINGING``). A final status records the
+    outcome in :mod:`app.core.call_analytics`, drops any pre-created call and,
+    when no media stream ever attached (unanswered, or hung up before the
+    stream started), frees the session — nothing else would. Sessions with a
+    stream are left to the media-stream cleanup, which flushes the transcript.
+    """
+    status = data.get('CallStatus')
+    if status == 'ringing' and ULTRAVOX_PREWARM_ON_RINGING:
+        session = await session_manager.get(call_sid)
+        if session is None or session.get('uv_prewarm') or session.get('streamSid'):
+            return
+        bind_tenant(get_registry().get(session.get('tenant')))
+        prewarmed = PrewarmedCall(get_system_prompt(), session['firstMessage'])
+        await session_manager.update(call_sid, uv_prewarm=prewarmed)
+        logger.info("Pre-creating Ultravox call while %s rings", call_sid)
+    elif status in _FINAL_STATUSES:
+        session = await session_manager.get(call_sid)
+        direction = (session or {}).get('direction') or normalize_direction(data.get('Direction'))
+        call_analytics.record_outcome(direction, status,
+                                      _call_duration(data.get('CallDuration')))
+        if session is None:
+            return
+        unused = session.get('uv_prewarm')
+        if unused is not None:
+            unused.release()
+            await session_manager.update(call_sid, uv_prewarm=None)
+            logger.info("Released pre-created Ultravox call (%s: %s)", call_sid, status)
+        if not session.get('streamSid'):
+            await session_manager.pop(call_sid)
+            logger.info("Call %s ended (%s) without a media stream; session freed",
+                        call_sid, status)
 
 
 @router.post("/call-status", dependencies=[Depends(verify_twilio_signature)])
 async def call_status(request: Request) -> dict[str, Any]:
-    """Receive Twilio status-callback events (currently logged only)."""
+    """Receive Twilio status-callback events.
+
+    Outbound calls subscribe to ``ringing``: with ``ULTRAVOX_PREWARM_ON_RINGING``
+    the Ultravox call is created while the phone rings and handed to the media
+    stream on pickup. Final
+    statuses feed call analytics and free sessions no stream will clean up.
+    """
     try:
-        data = await request.form()
+        data = await twilio_params(request)
         logger.info(
             "Twilio status update: status=%s duration=%s timestamp=%s callSid=%s",
             data.get('CallStatus'),
@@ -230,5 +497,9 @@ async def call_status(request: Request) -> dict[str, Any]:
         _ = traceback  # keep import live for downstream debugging
         raise HTTPException(status_code=400, detail="Invalid request")
 
+    call_sid = data.get('CallSid')
+    if call_sid:
+        bind_call_sid(call_sid)
+        await _on_call_status(call_sid, data)
     return {"success": True}
 
@@ -0,0 +1,133 @@
+"""
+Outbound campaign API under ``/campaigns`` (admin bearer token).
+
+``POST /campaigns`` queues a batch of numbers, each with an optional first
+message, and returns at once; the dispatcher in
+:mod:`app.services.campaign_service` dials them paced per caller-ID number
+and within this process's call capacity. ``GET /campaigns/{id}/status``
+streams progress as NDJSON (one JSON object per line, every ``interval``
+seconds) until nothing is left queued or dialling.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from collections.abc import AsyncIterator
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+
+from app.api.endpoints.calls import place_outbound_call
+from app.api.security import verify_admin_token
+from app.core.config import (
+    CAMPAIGN_CPS_PER_NUMBER,
+    CAMPAIGN_DB_PATH,
+    CAMPAIGN_MAX_CALLS,
+    CAMPAIGN_MAX_IN_FLIGHT,
+    DEFAULT_FIRST_MESSAGE,
+    TWILIO_PHONE_NUMBERS,
+)
+from app.services.campaign_service import CampaignDispatcher, CampaignStore, NumberPool
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/campaigns", dependencies=[Depends(verify_admin_token)])
+
+
+class CampaignCall(BaseModel):
+    phoneNumber: str = Field(..., pattern=r"^\+?[1-9]\d{7,14}$")
+    firstMessage: str | None = None
+
+
+class CampaignRequest(BaseModel):
+    """Request body for ``POST /campaigns``."""
+
+    name: str | None = None
+    calls: list[CampaignCall] = Field(..., min_length=1, max_length=CAMPAIGN_MAX_CALLS)
+
+
+async def _dial(phone_number: str, first_message: str, from_number: str) -> str:
+    return await place_outbound_call(
+        phone_number, first_message, from_number=from_number,
+        call_details={"campaign": True},
+    )
+
+
+# Process-wide dispatcher; the store is opened on first use.
+campaign_dispatcher = CampaignDispatcher(
+    lambda: CampaignStore(CAMPAIGN_DB_PATH),
+    NumberPool(TWILIO_PHONE_NUMBERS, CAMPAIGN_CPS_PER_NUMBER),
+    _dial,
+    max_in_flight=CAMPAIGN_MAX_IN_FLIGHT,
+)
+
+
+async def _progress(campaign_id: str) -> dict[str, Any]:
+    store = await campaign_dispatcher.open_store()
+    progress = await asyncio.to_thread(store.progress, campaign_id)
+    if progress is None:
+        raise HTTPException(status_code=404, detail="No such campaign")
+    return progress
+
+
+@router.post("", status_code=202)
+async def create_campaign(payload: CampaignRequest) -> dict[str, Any]:
+    if not campaign_dispatcher.pool.numbers:
+        raise HTTPException(status_code=503, detail="No TWILIO_PHONE_NUMBERS configured")
+    calls = [(c.phoneNumber, c.firstMessage or DEFAULT_FIRST_MESSAGE) for c in payload.calls]
+    store = await campaign_dispatcher.open_store()
+    campaign_id = await asyncio.to_thread(store.create_campaign, payload.name, calls)
+    await campaign_dispatcher.start()
+    campaign_dispatcher.notify()
+    logger.info("Campaign %s queued with %d calls", campaign_id, len(calls))
+    return await _progress(campaign_id)
+
+
+@router.get("")
+async def list_campaigns(limit: int = Query(50, ge=1, le=500)) -> dict[str, Any]:
+    store = await campaign_dispatcher.open_store()
+    campaigns = await asyncio.to_thread(store.list_campaigns, limit)
+    return {"dispatcherRunning": campaign_dispatcher.running, "campaigns": campaigns}
+
+
+@router.get("/{campaign_id}")
+async def get_campaign(campaign_id: str,
+                       failures: int = Query(100, ge=0, le=1000)) -> dict[str, Any]:
+    progress = await _progress(campaign_id)
+    store = await campaign_dispatcher.open_store()
+    progress["failures"] = await asyncio.to_thread(store.failures, campaign_id, failures)
+    return progress
+
+
+@router.get("/{campaign_id}/status")
+async def stream_campaign_status(
+    campaign_id: str,
+    interval: float = Query(2.0, ge=0.1, le=60),
+) -> StreamingResponse:
+    """NDJSON progress lines until the campaign is no longer running."""
+    first = await _progress(campaign_id)
+
+    async def lines() -> AsyncIterator[str]:
+        progress: dict[str, Any] | None = first
+        while progress is not None:
+            yield json.dumps(progress) + "\n"
+            if progress["status"] != "running":
+                return
+            await asyncio.sleep(interval)
+            store = await campaign_dispatcher.open_store()
+            progress = await asyncio.to_thread(store.progress, campaign_id)
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@router.post("/{campaign_id}/cancel")
+async def cancel_campaign(campaign_id: str) -> dict[str, Any]:
+    store = await campaign_dispatcher.open_store()
+    cancelled = await asyncio.to_thread(store.cancel, campaign_id)
+    if cancelled is None:
+        raise HTTPException(status_code=404, detail="No such campaign")
+    logger.info("Campaign %s cancelled (%d queued calls dropped)", campaign_id, cancelled)
+    return await _progress(campaign_id)
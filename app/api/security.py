@@ -1,5 +1,5 @@
 """
-Security dependencies for the Twilio-facing API.
+Security dependencies for the Twilio-facing and admin APIs.
 
 Twilio signs every webhook with the request's full URL + sorted POST params
 using HMAC-SHA1 keyed with the account auth token. We verify that here to
@@ -8,26 +8,85 @@ reject forged requests against `/incoming-call` and `/call-status`.
 Validation can be disabled with ``TWILIO_VALIDATE_SIGNATURE=false`` for local
 development (e.g. ngrok testing where the public URL doesn't match the
 ``Host`` header Twilio signed).
+
+The form is parsed once per request and shared with the endpoint through
+``request.state`` (:func:`twilio_params`), the ``RequestValidator`` is built
+once per auth token, and signatures that already validated are remembered for
+``TWILIO_REPLAY_WINDOW_SECONDS`` so a captured request cannot be replayed.
+A signature whose handler fails is forgotten again, so Twilio's own retry of
+a webhook that got an error still goes through.
+
+The ``/admin`` API uses a static bearer token (``ADMIN_API_TOKEN``) and is
+disabled entirely when no token is configured.
 """
 from __future__ import annotations
 
+import hmac
 import logging
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator
+from functools import lru_cache
 
 from fastapi import HTTPException, Request, status
 from twilio.request_validator import RequestValidator
 
-from app.core.config import TWILIO_AUTH_TOKEN, TWILIO_VALIDATE_SIGNATURE
+from app.core.config import (
+    ADMIN_API_TOKEN,
+    TWILIO_AUTH_TOKEN,
+    TWILIO_REPLAY_CACHE_SIZE,
+    TWILIO_REPLAY_WINDOW_SECONDS,
+    TWILIO_VALIDATE_SIGNATURE,
+)
 
 logger = logging.getLogger(__name__)
 
+# signature -> monotonic time it was accepted, oldest first.
+_seen_signatures: OrderedDict[str, float] = OrderedDict()
+
+
+@lru_cache(maxsize=4)
+def _validator(auth_token: str) -> RequestValidator:
+    return RequestValidator(auth_token)
+
+
+async def twilio_params(request: Request) -> dict[str, str]:
+    """The webhook's form fields, parsed once and cached on ``request.state``."""
+    params: dict[str, str] | None = getattr(request.state, "twilio_params", None)
+    if params is None:
+        form = await request.form()
+        params = {k: v for k, v in form.multi_items() if isinstance(v, str)}
+        request.state.twilio_params = params
+    return params
+
+
+def _is_replay(signature: str, now: float) -> bool:
+    """True if ``signature`` was already accepted within the replay window."""
+    cutoff = now - TWILIO_REPLAY_WINDOW_SECONDS
+    while _seen_signatures:
+        oldest, seen_at = next(iter(_seen_signatures.items()))
+        if seen_at >= cutoff:
+            break
+        del _seen_signatures[oldest]
+    return signature in _seen_signatures
+
+
+def _remember(signature: str, now: float) -> None:
+    _seen_signatures[signature] = now
+    while len(_seen_signatures) > TWILIO_REPLAY_CACHE_SIZE:
+        _seen_signatures.popitem(last=False)
+
 
-async def verify_twilio_signature(request: Request) -> None:
+async def verify_twilio_signature(request: Request) -> AsyncIterator[None]:
     """FastAPI dependency that rejects requests with an invalid Twilio signature.
 
     No-op when ``TWILIO_VALIDATE_SIGNATURE`` is false or the auth token is unset
-    (keeps tests and local dev usable). Raises HTTP 403 otherwise.
+    (keeps tests and local dev usable). Raises HTTP 403 on a missing, invalid
+    or replayed signature. The signature is held while the handler runs (so a
+    concurrent replay is refused too) and dropped if the handler raises.
     """
     if not TWILIO_VALIDATE_SIGNATURE or not TWILIO_AUTH_TOKEN:
+        yield
         return
 
     signature = request.headers.get("X-Twilio-Signature", "")
@@ -45,13 +104,50 @@ async def verify_twilio_signature(request: Request) -> None:
     if forwarded_proto == "https" and url.startswith("http://"):
         url = "https://" + url[len("http://"):]
 
-    form = await request.form()
-    params = {k: v for k, v in form.multi_items()}
+    params = await twilio_params(request)
+    now = time.monotonic()
+    replay_check = TWILIO_REPLAY_WINDOW_SECONDS > 0
+    if replay_check and _is_replay(signature, now):
+        logger.warning("Replayed Twilio signature on %s", request.url.path)
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Replayed Twilio request",
+        )
 
-    validator = RequestValidator(TWILIO_AUTH_TOKEN)
-    if not validator.validate(url, params, signature):
+    if not _validator(TWILIO_AUTH_TOKEN).validate(url, params, signature):
         logger.warning("Invalid Twilio signature on %s", request.url.path)
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Invalid Twilio signature",
         )
+    if not replay_check:
+        yield
+        return
+    _remember(signature, now)
+    try:
+        yield
+    except BaseException:
+        # The request failed (a 4xx/5xx); Twilio may retry it with this signature.
+        _seen_signatures.pop(signature, None)
+        raise
+
+
+async def verify_admin_token(request: Request) -> None:
+    """FastAPI dependency guarding ``/admin``: ``Authorization: Bearer <token>``.
+
+    Responds 404 when ``ADMIN_API_TOKEN`` is unset (admin API disabled) and
+    401 on a missing or wrong token.
+    """
+    if not ADMIN_API_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(
+        token.strip().encode(), ADMIN_API_TOKEN.encode(),
+    ):
+        logger.warning("Rejected admin request to %s", request.url.path)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid admin token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
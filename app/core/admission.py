@@ -0,0 +1,61 @@
+"""
+Per-process admission control.
+
+One process can only bridge so many calls before its event loop stops
+keeping up with 20 ms audio frames, and past that point every call on it
+degrades at once. :class:`AdmissionController` caps concurrent calls at
+``MAX_CONCURRENT_CALLS``: a call counts from the moment its webhook is
+admitted (a reservation, while the first message is fetched) until its
+session is removed. Webhooks that arrive when the process is full are shed
+by the caller; :meth:`AdmissionController.readiness` feeds ``/ready`` so the
+load balancer stops routing here at capacity or while the loop is lagging.
+"""
+from __future__ import annotations
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from app.core.config import MAX_CONCURRENT_CALLS, READY_MAX_LOOP_LAG_SECONDS
+from app.core.loop_monitor import loop_monitor
+from app.core.metrics import call_capacity
+from app.core.shared_state import session_manager
+
+
+class AdmissionController:
+    """Caps concurrent calls (sessions plus in-flight admissions)."""
+
+    def __init__(self, max_calls: int, max_loop_lag: float) -> None:
+        self.max_calls = max_calls
+        self.max_loop_lag = max_loop_lag
+        self._pending = 0
+        call_capacity.set(max_calls)
+
+    def in_use(self) -> int:
+        return len(session_manager) + self._pending
+
+    def at_capacity(self) -> bool:
+        return self.max_calls > 0 and self.in_use() >= self.max_calls
+
+    @contextmanager
+    def reserve(self) -> Iterator[bool]:
+        """Hold a slot until the block exits (by then the session holds it).
+
+        Yields ``False`` without reserving anything when the process is full.
+        """
+        if self.at_capacity():
+            yield False
+            return
+        self._pending += 1
+        try:
+            yield True
+        finally:
+            self._pending -= 1
+
+    def readiness(self) -> dict[str, bool]:
+        """``/ready`` checks: spare call capacity and acceptable loop lag."""
+        lag_ok = self.max_loop_lag <= 0 or loop_monitor.last_lag < self.max_loop_lag
+        return {"capacity": not self.at_capacity(), "loop_lag": lag_ok}
+
+
+# Process-wide controller used by the call webhooks and /ready.
+admission = AdmissionController(MAX_CONCURRENT_CALLS, READY_MAX_LOOP_LAG_SECONDS)
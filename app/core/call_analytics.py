@@ -0,0 +1,111 @@
+"""
+Rolling in-memory call analytics for capacity planning.
+
+Fed by Twilio status callbacks (final outcome and ``CallDuration``) and by
+the media stream (setup latency: Twilio ``start`` event to Ultravox
+connected, i.e. the silence a caller hears after pickup). Samples are kept
+per direction for ``CALL_ANALYTICS_WINDOW_SECONDS`` in bounded deques, so
+memory stays flat however busy the process is; percentiles are computed on
+read. Every sample is also exported as a Prometheus histogram/counter for
+long-term storage.
+"""
+from __future__ import annotations
+
+import time
+from collections import Counter, deque
+from typing import Any
+
+from app.core.config import CALL_ANALYTICS_MAX_SAMPLES, CALL_ANALYTICS_WINDOW_SECONDS
+from app.core.metrics import (
+    call_duration_seconds,
+    call_outcomes_total,
+    call_setup_seconds,
+)
+
+DIRECTIONS: tuple[str, ...] = ("inbound", "outbound")
+
+
+def _percentile(ordered: list[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted, non-empty list."""
+    return ordered[min(len(ordered) - 1, max(0, round(q * len(ordered)) - 1))]
+
+
+class _Series:
+    """(timestamp, value) samples inside the rolling window."""
+
+    __slots__ = ("samples",)
+
+    def __init__(self, max_samples: int) -> None:
+        self.samples: deque[tuple[float, Any]] = deque(maxlen=max_samples)
+
+    def add(self, now: float, value: Any) -> None:
+        self.samples.append((now, value))
+
+    def values(self, since: float) -> list[Any]:
+        while self.samples and self.samples[0][0] < since:
+            self.samples.popleft()
+        return [value for _, value in self.samples]
+
+
+def _summary(values: list[float]) -> dict[str, Any]:
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+    return {
+        "count": len(ordered),
+        "mean": round(sum(ordered) / len(ordered), 3),
+        "p50": _percentile(ordered, 0.50),
+        "p90": _percentile(ordered, 0.90),
+        "p99": _percentile(ordered, 0.99),
+        "max": ordered[-1],
+    }
+
+
+class CallAnalytics:
+    """Outcome counts, duration and setup-latency percentiles per direction."""
+
+    def __init__(self, window_seconds: float, max_samples: int) -> None:
+        self.window_seconds = window_seconds
+        self._outcomes = {d: _Series(max_samples) for d in DIRECTIONS}
+        self._durations = {d: _Series(max_samples) for d in DIRECTIONS}
+        self._setups = {d: _Series(max_samples) for d in DIRECTIONS}
+
+    def record_outcome(self, direction: str, outcome: str,
+                       duration: float | None = None, now: float | None = None) -> None:
+        """A call ended with Twilio status ``outcome`` after ``duration`` seconds."""
+        now = time.time() if now is None else now
+        self._outcomes[direction].add(now, outcome)
+        call_outcomes_total.labels(direction=direction, outcome=outcome).inc()
+        if duration is not None and outcome == "completed":
+            self._durations[direction].add(now, duration)
+            call_duration_seconds.labels(direction=direction).observe(duration)
+
+    def record_setup(self, direction: str, seconds: float, now: float | None = None) -> None:
+        """Time from the Twilio ``start`` event until audio was bridged."""
+        now = time.time() if now is None else now
+        self._setups[direction].add(now, seconds)
+        call_setup_seconds.labels(direction=direction).observe(seconds)
+
+    def snapshot(self, now: float | None = None) -> dict[str, Any]:
+        now = time.time() if now is None else now
+        since = now - self.window_seconds
+        directions: dict[str, Any] = {}
+        for d in DIRECTIONS:
+            outcomes = Counter(self._outcomes[d].values(since))
+            ended = sum(outcomes.values())
+            directions[d] = {
+                "outcomes": dict(outcomes),
+                "answerRate": round(outcomes["completed"] / ended, 4) if ended else None,
+                "durationSeconds": _summary(self._durations[d].values(since)),
+                "setupSeconds": _summary(self._setups[d].values(since)),
+            }
+        return {"windowSeconds": self.window_seconds, "directions": directions}
+
+
+def normalize_direction(value: str | None) -> str:
+    """Twilio ``Direction`` (``inbound``, ``outbound-api``, ``outbound-dial``) -> ours."""
+    return "outbound" if value and value.startswith("outbound") else "inbound"
+
+
+# Process-wide aggregate.
+call_analytics = CallAnalytics(CALL_ANALYTICS_WINDOW_SECONDS, CALL_ANALYTICS_MAX_SAMPLES)
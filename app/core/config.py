@@ -3,6 +3,7 @@ Application configuration settings.
 """
 import json
 import os
+
 from dotenv import load_dotenv
 
 # override=False so real environment (Docker/Heroku/etc.) wins over .env files.
@@ -12,6 +13,16 @@ load_dotenv(override=False)
 TWILIO_ACCOUNT_SID: str | None = os.environ.get('TWILIO_ACCOUNT_SID')
 TWILIO_AUTH_TOKEN: str | None = os.environ.get('TWILIO_AUTH_TOKEN')
 TWILIO_PHONE_NUMBER: str | None = os.environ.get('TWILIO_PHONE_NUMBER')
+# Caller-ID pool for outbound campaigns (comma-separated); defaults to
+# TWILIO_PHONE_NUMBER alone.
+TWILIO_PHONE_NUMBERS: list[str] = [
+    n.strip()
+    for n in os.environ.get('TWILIO_PHONE_NUMBERS', TWILIO_PHONE_NUMBER or '').split(',')
+    if n.strip()
+]
+# Worker threads for the (synchronous) Twilio REST client; keeps blocking
+# HTTP off the event loop.
+TWILIO_REST_MAX_WORKERS: int = int(os.environ.get('TWILIO_REST_MAX_WORKERS', '4'))
 
 # Ultravox credentials & tuning
 ULTRAVOX_API_KEY: str | None = os.environ.get('ULTRAVOX_API_KEY')
@@ -25,6 +36,14 @@ ULTRAVOX_TURN_ENDPOINT_DELAY: str = os.environ.get('ULTRAVOX_TURN_ENDPOINT_DELAY
 ULTRAVOX_CORPUS_ID: str = os.environ.get(
     'ULTRAVOX_CORPUS_ID', 'da6de42d-7f32-449e-a77a-9b948f834946'
 )
+# Local FAQ/policy retrieval (app.services.local_corpus). Setting either path
+# answers queryCorpus in-process; the hosted corpus above remains available as
+# queryRemoteCorpus for questions whose best local match scores below
+# LOCAL_CORPUS_MIN_SCORE (0..1). A prebuilt index file wins over the directory.
+LOCAL_CORPUS_DIR: str | None = os.environ.get('LOCAL_CORPUS_DIR') or None
+LOCAL_CORPUS_INDEX_PATH: str | None = os.environ.get('LOCAL_CORPUS_INDEX_PATH') or None
+LOCAL_CORPUS_MIN_SCORE: float = float(os.environ.get('LOCAL_CORPUS_MIN_SCORE', '0.35'))
+LOCAL_CORPUS_MAX_RESULTS: int = int(os.environ.get('LOCAL_CORPUS_MAX_RESULTS', '3'))
 
 # Webhooks
 N8N_WEBHOOK_URL: str | None = os.environ.get('N8N_WEBHOOK_URL')
@@ -32,6 +51,12 @@ N8N_WEBHOOK_URL: str | None = os.environ.get('N8N_WEBHOOK_URL')
 # Set the same value in your n8n workflow to verify the signature.
 N8N_HMAC_SECRET: str | None = os.environ.get('N8N_HMAC_SECRET')
 PUBLIC_URL: str | None = os.environ.get('PUBLIC_URL')
+# Shared secret for signed stream tokens (see app.core.stream_token). Set the
+# same value on every replica so any of them can serve /media-stream; unset
+# keeps sessions process-local. Unclaimed sessions expire with their token.
+STREAM_TOKEN_SECRET: str | None = os.environ.get('STREAM_TOKEN_SECRET') or None
+# Must cover an outbound call's ring time.
+STREAM_TOKEN_TTL_SECONDS: float = float(os.environ.get('STREAM_TOKEN_TTL_SECONDS', '300'))
 
 # Server settings
 PORT: int = int(os.environ.get('PORT', '8000'))
@@ -42,9 +67,79 @@ HTTP_TIMEOUT_SECONDS: float = float(os.environ.get('HTTP_TIMEOUT_SECONDS', '10')
 N8N_MAX_RETRIES: int = int(os.environ.get('N8N_MAX_RETRIES', '3'))
 # Base delay in seconds for exponential backoff between retries.
 N8N_RETRY_BACKOFF_SECONDS: float = float(os.environ.get('N8N_RETRY_BACKOFF_SECONDS', '0.5'))
+# Cap on the exponential backoff delay between n8n retries. Each delay is
+# drawn uniformly from [0, min(cap, base * 2**attempt)] ("full jitter").
+N8N_RETRY_MAX_BACKOFF_SECONDS: float = float(
+    os.environ.get('N8N_RETRY_MAX_BACKOFF_SECONDS', '5')
+)
+# Circuit breaker shared by n8n and Ultravox REST: open after this many
+# consecutive failures and fail fast to the fallbacks for RESET seconds.
+CIRCUIT_BREAKER_FAILURE_THRESHOLD: int = int(
+    os.environ.get('CIRCUIT_BREAKER_FAILURE_THRESHOLD', '5')
+)
+CIRCUIT_BREAKER_RESET_SECONDS: float = float(
+    os.environ.get('CIRCUIT_BREAKER_RESET_SECONDS', '30')
+)
+# Bulkheads: maximum concurrent in-flight requests per dependency, and how
+# long a request may wait for a free slot before it is rejected.
+N8N_MAX_CONCURRENCY: int = int(os.environ.get('N8N_MAX_CONCURRENCY', '32'))
+ULTRAVOX_MAX_CONCURRENCY: int = int(os.environ.get('ULTRAVOX_MAX_CONCURRENCY', '16'))
+BULKHEAD_WAIT_SECONDS: float = float(os.environ.get('BULKHEAD_WAIT_SECONDS', '0.5'))
+# Deadline budgets for latency-critical paths. Outbound n8n / Ultravox calls
+# made on these paths get whatever is left of the budget as their timeout
+# (never more than HTTP_TIMEOUT_SECONDS) and degrade to their fallback on time.
+INCOMING_CALL_BUDGET_SECONDS: float = float(
+    os.environ.get('INCOMING_CALL_BUDGET_SECONDS', '3')
+)
+CALL_SETUP_BUDGET_SECONDS: float = float(os.environ.get('CALL_SETUP_BUDGET_SECONDS', '8'))
+# Hedge the /incoming-call first-message fetch: if n8n is slower than its
+# observed p95 (but at least HEDGE_MIN_DELAY_SECONDS), send a second request
+# and use whichever answers first.
+HEDGE_REQUESTS: bool = (
+    os.environ.get('HEDGE_REQUESTS', 'false').strip().lower()
+    in ('1', 'true', 'yes', 'on')
+)
+HEDGE_MIN_DELAY_SECONDS: float = float(os.environ.get('HEDGE_MIN_DELAY_SECONDS', '0.1'))
+# Upper bound on a single client tool invocation. Also advertised to Ultravox
+# as each tool's `timeout`, so the agent and VoxFlow give up at the same time.
+TOOL_TIMEOUT_SECONDS: float = float(os.environ.get('TOOL_TIMEOUT_SECONDS', '20'))
+# Stream finalized transcript turns to n8n in small batches while the call is
+# live instead of one large POST at hang-up. Off by default: the n8n workflow
+# must handle the incremental route before this is switched on.
+N8N_TRANSCRIPT_STREAMING: bool = (
+    os.environ.get('N8N_TRANSCRIPT_STREAMING', 'false').strip().lower()
+    in ('1', 'true', 'yes', 'on')
+)
+# Flush a batch once it holds this many turns ...
+N8N_TRANSCRIPT_BATCH_TURNS: int = int(os.environ.get('N8N_TRANSCRIPT_BATCH_TURNS', '4'))
+# ... or once its oldest turn has waited this many seconds.
+N8N_TRANSCRIPT_FLUSH_SECONDS: float = float(
+    os.environ.get('N8N_TRANSCRIPT_FLUSH_SECONDS', '10')
+)
+# Maximum concurrent batch POSTs per call.
+N8N_TRANSCRIPT_MAX_IN_FLIGHT: int = int(os.environ.get('N8N_TRANSCRIPT_MAX_IN_FLIGHT', '2'))
+# Idle keep-alive connections in the shared outbound HTTP pool are kept this
+# long, so a warmed-up (or recently used) TLS connection is reused.
+HTTP_KEEPALIVE_SECONDS: float = float(os.environ.get('HTTP_KEEPALIVE_SECONDS', '30'))
+# Resolve DNS and open TLS connections to Ultravox and n8n during startup;
+# /ready stays 503 until warm-up finishes (at most WARMUP_TIMEOUT_SECONDS).
+WARMUP_ON_STARTUP: bool = (
+    os.environ.get('WARMUP_ON_STARTUP', 'false').strip().lower()
+    in ('1', 'true', 'yes', 'on')
+)
+WARMUP_TIMEOUT_SECONDS: float = float(os.environ.get('WARMUP_TIMEOUT_SECONDS', '5'))
 # Tear down a media-stream WebSocket if no Twilio message arrives for this
 # many seconds (Twilio normally sends media frames every 20ms).
 WS_IDLE_TIMEOUT_SECONDS: float = float(os.environ.get('WS_IDLE_TIMEOUT_SECONDS', '60'))
+# Tear down a call once the Ultravox socket has sent nothing for this long,
+# and any call longer than MAX_CALL_DURATION_SECONDS. Both default to 0
+# (off), so existing deployments keep their call lengths; opt in per site.
+ULTRAVOX_SILENCE_TIMEOUT_SECONDS: float = float(
+    os.environ.get('ULTRAVOX_SILENCE_TIMEOUT_SECONDS', '0'))
+MAX_CALL_DURATION_SECONDS: float = float(os.environ.get('MAX_CALL_DURATION_SECONDS', '0'))
+# How often the call watchdog scans for expired calls; timeouts above are
+# enforced to within this resolution.
+WATCHDOG_INTERVAL_SECONDS: float = float(os.environ.get('WATCHDOG_INTERVAL_SECONDS', '1'))
 
 # Reject inbound Twilio webhooks with a missing / invalid X-Twilio-Signature.
 # Set to 'false' for local development with ngrok where the signed URL may
@@ -53,11 +148,45 @@ TWILIO_VALIDATE_SIGNATURE: bool = (
     os.environ.get('TWILIO_VALIDATE_SIGNATURE', 'true').strip().lower()
     not in ('0', 'false', 'no', 'off')
 )
+# A validly signed webhook seen again within this many seconds is rejected as
+# a replay (0 = off); at most TWILIO_REPLAY_CACHE_SIZE signatures are kept.
+TWILIO_REPLAY_WINDOW_SECONDS: float = float(
+    os.environ.get('TWILIO_REPLAY_WINDOW_SECONDS', '300'))
+TWILIO_REPLAY_CACHE_SIZE: int = int(os.environ.get('TWILIO_REPLAY_CACHE_SIZE', '10000'))
+
+# Event loop lag monitor: a timer fires every LOOP_MONITOR_INTERVAL_SECONDS
+# and reports how late it woke. A watchdog thread samples the loop thread's
+# stack when it has been blocked for LOOP_SLOW_CALLBACK_SECONDS.
+# An interval of 0 disables the monitor.
+LOOP_MONITOR_INTERVAL_SECONDS: float = float(
+    os.environ.get('LOOP_MONITOR_INTERVAL_SECONDS', '0.25')
+)
+LOOP_SLOW_CALLBACK_SECONDS: float = float(os.environ.get('LOOP_SLOW_CALLBACK_SECONDS', '0.1'))
+
+# Upper bound for one /admin/profile sampling run.
+PROFILER_MAX_SECONDS: float = float(os.environ.get('PROFILER_MAX_SECONDS', '60'))
+
+# Seconds a rendered /metrics exposition is reused across scrapes (rendering
+# happens in a worker thread either way). 0 renders on every scrape.
+METRICS_CACHE_SECONDS: float = float(os.environ.get('METRICS_CACHE_SECONDS', '1'))
+
+# Bearer token for the /admin API (debug targeting and other operator
+# tooling). The admin API is disabled when unset.
+ADMIN_API_TOKEN: str | None = os.environ.get('ADMIN_API_TOKEN')
 
 # Logging
 LOG_LEVEL: str = os.environ.get('LOG_LEVEL', 'INFO').upper()
 # 'text' (default) or 'json' for structured logs (production-friendly).
 LOG_FORMAT: str = os.environ.get('LOG_FORMAT', 'text').lower()
+# Records are handed to a background writer thread through a bounded queue;
+# when it is full new records are dropped (and counted) instead of blocking
+# the event loop. 0 writes synchronously from the logging call.
+LOG_QUEUE_SIZE: int = int(os.environ.get('LOG_QUEUE_SIZE', '10000'))
+# Repeats of the same WARNING+ message from the same call are limited to this
+# many per second after an initial burst; the rest are summarized and counted.
+# 0 disables the limiter.
+LOG_RATE_LIMIT_PER_SECOND: float = float(os.environ.get('LOG_RATE_LIMIT_PER_SECOND', '1'))
+LOG_RATE_LIMIT_BURST: int = int(os.environ.get('LOG_RATE_LIMIT_BURST', '5'))
 
 # Agent identity — override to white-label VoxFlow for a different business.
 AGENT_NAME: str = os.environ.get('AGENT_NAME', 'Sara')
@@ -74,6 +203,64 @@ DEFAULT_FIRST_MESSAGE: str = os.environ.get(
     f"Hey, this is {AGENT_NAME}. How can I assist you today?",
 )
 
+# Admission control: at most MAX_CONCURRENT_CALLS calls per process (0 = no
+# limit). Excess inbound calls are shed with CALL_SHED_MESSAGE then hung up
+# ('say') or rejected with a busy signal ('reject'). /ready reports 503 at
+# capacity or when event loop lag exceeds READY_MAX_LOOP_LAG_SECONDS (0 = off).
+MAX_CONCURRENT_CALLS: int = int(os.environ.get('MAX_CONCURRENT_CALLS', '0'))
+CALL_SHED_MODE: str = os.environ.get('CALL_SHED_MODE', 'say').strip().lower()
+CALL_SHED_MESSAGE: str = os.environ.get(
+    'CALL_SHED_MESSAGE',
+    f"Thanks for calling {COMPANY_NAME}. All of our lines are busy right now. "
+    "Please call back in a few minutes.",
+)
+READY_MAX_LOOP_LAG_SECONDS: float = float(os.environ.get('READY_MAX_LOOP_LAG_SECONDS', '0.5'))
+
+# Opt-in: create the Ultravox call while an outbound call is still ringing so
+# the agent is ready at pickup. This creates a call for every ringing outbound
+# call, answered or not; unused ones lapse after
+# ULTRAVOX_PREWARM_JOIN_TIMEOUT_SECONDS (Ultravox joinTimeout).
+ULTRAVOX_PREWARM_ON_RINGING: bool = (
+    os.environ.get('ULTRAVOX_PREWARM_ON_RINGING', 'false').strip().lower()
+    in ('1', 'true', 'yes', 'on')
+)
+ULTRAVOX_PREWARM_JOIN_TIMEOUT_SECONDS: float = float(
+    os.environ.get('ULTRAVOX_PREWARM_JOIN_TIMEOUT_SECONDS', '90'))
+
+# Rolling call analytics (/admin/analytics): samples older than the window are
+# dropped, and at most CALL_ANALYTICS_MAX_SAMPLES are kept per series.
+CALL_ANALYTICS_WINDOW_SECONDS: float = float(
+    os.environ.get('CALL_ANALYTICS_WINDOW_SECONDS', '3600'))
+CALL_ANALYTICS_MAX_SAMPLES: int = int(os.environ.get('CALL_ANALYTICS_MAX_SAMPLES', '10000'))
+
+# verify tool backend (app.services.verification): 'mock' (confirm any
+# non-empty name + number), 'csv' / 'sqlite' (in-memory index of
+# VERIFY_SOURCE_PATH, refreshed when the file changes) or 'n8n' (route 5,
+# behind an LRU). VERIFY_SQLITE_QUERY must return (phone, name) rows.
+VERIFY_BACKEND: str = os.environ.get('VERIFY_BACKEND', 'mock').strip().lower()
+VERIFY_SOURCE_PATH: str | None = os.environ.get('VERIFY_SOURCE_PATH') or None
+VERIFY_SQLITE_QUERY: str = os.environ.get(
+    'VERIFY_SQLITE_QUERY', 'SELECT phone, name FROM customers')
+# Minimum similarity (0..1) between the spoken and recorded name.
+VERIFY_NAME_THRESHOLD: float = float(os.environ.get('VERIFY_NAME_THRESHOLD', '0.85'))
+VERIFY_RELOAD_INTERVAL_SECONDS: float = float(
+    os.environ.get('VERIFY_RELOAD_INTERVAL_SECONDS', '5'))
+VERIFY_CACHE_SIZE: int = int(os.environ.get('VERIFY_CACHE_SIZE', '10000'))
+VERIFY_CACHE_TTL_SECONDS: float = float(os.environ.get('VERIFY_CACHE_TTL_SECONDS', '300'))
+
+# Outbound campaigns: jobs persist in SQLite at CAMPAIGN_DB_PATH and are dialled
+# at most CAMPAIGN_CPS_PER_NUMBER calls/second from each TWILIO_PHONE_NUMBERS
+# entry (Twilio's per-number limit, 1 by default), with at most
+# CAMPAIGN_MAX_IN_FLIGHT REST requests outstanding.
+CAMPAIGN_DB_PATH: str = os.environ.get('CAMPAIGN_DB_PATH', 'campaigns.db')
+CAMPAIGN_CPS_PER_NUMBER: float = float(os.environ.get('CAMPAIGN_CPS_PER_NUMBER', '1'))
+CAMPAIGN_MAX_IN_FLIGHT: int = int(os.environ.get('CAMPAIGN_MAX_IN_FLIGHT', '4'))
+CAMPAIGN_MAX_CALLS: int = int(os.environ.get('CAMPAIGN_MAX_CALLS', '10000'))
+
+# Multi-tenant mode (app.core.tenants): one *.json per tenant, routed by the
+# called Twilio number. Numbers without a tenant use the settings above.
+TENANT_DIR: str | None = os.environ.get('TENANT_DIR') or None
+
 # Calendar settings — set CALENDARS_JSON='{"Location": "cal@email"}' to override.
 _calendars_json: str | None = os.environ.get('CALENDARS_JSON')
 CALENDARS_LIST: dict[str, str] = (
@@ -84,6 +271,22 @@ CALENDARS_LIST: dict[str, str] = (
     }
 )
 
+# schedule_meeting availability cache (app.services.calendar_cache): with it on,
+# each location's free/busy is fetched from n8n route 6, kept for
+# CALENDAR_CACHE_TTL_SECONDS and refreshed in the background, so taken or
+# out-of-hours slots are turned down locally with nearby suggestions. Datetimes
+# without an offset are read in CALENDAR_TIMEZONE.
+CALENDAR_CACHE_ENABLED: bool = (
+    os.environ.get('CALENDAR_CACHE_ENABLED', 'false').strip().lower()
+    in ('1', 'true', 'yes', 'on')
+)
+CALENDAR_CACHE_TTL_SECONDS: float = float(os.environ.get('CALENDAR_CACHE_TTL_SECONDS', '60'))
+CALENDAR_HORIZON_DAYS: int = int(os.environ.get('CALENDAR_HORIZON_DAYS', '14'))
+CALENDAR_SLOT_MINUTES: int = int(os.environ.get('CALENDAR_SLOT_MINUTES', '30'))
+CALENDAR_BUSINESS_HOURS: str = os.environ.get('CALENDAR_BUSINESS_HOURS', '09:00-17:00')
+CALENDAR_BUSINESS_DAYS: str = os.environ.get('CALENDAR_BUSINESS_DAYS', 'mon,tue,wed,thu,fri')
+CALENDAR_TIMEZONE: str = os.environ.get('CALENDAR_TIMEZONE', 'UTC')
+
 # Logging event types we surface from Ultravox
 LOG_EVENT_TYPES: list[str] = [
     'response.content.done',
@@ -0,0 +1,57 @@
+"""
+Per-request deadline budgets.
+
+An endpoint binds its budget once with :func:`deadline_scope`; every
+outbound client call made from that asyncio task chain (n8n, Ultravox) sizes
+its timeout with :func:`remaining` instead of the generic
+``HTTP_TIMEOUT_SECONDS``. Like ``call_sid`` in :mod:`app.core.log_context`,
+the deadline travels in a contextvar, so no call site needs an extra
+``timeout=`` argument.
+
+Nested scopes can only shorten the deadline, never extend it.
+"""
+from __future__ import annotations
+
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Absolute ``time.monotonic()`` deadline, or None when unbounded.
+_deadline_var: ContextVar[float | None] = ContextVar("deadline", default=None)
+
+
+@contextmanager
+def deadline_scope(seconds: float | None) -> Iterator[None]:
+    """Bind a deadline ``seconds`` from now for the enclosed block.
+
+    ``None`` or a non-positive value leaves the current deadline unchanged.
+    """
+    if seconds is None or seconds <= 0:
+        yield
+        return
+    deadline = time.monotonic() + seconds
+    current = _deadline_var.get()
+    if current is not None:
+        deadline = min(deadline, current)
+    token = _deadline_var.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline_var.reset(token)
+
+
+def remaining(default: float) -> float:
+    """Seconds left in the current budget, capped at ``default``.
+
+    Returns ``default`` when no deadline is bound and ``0.0`` once the
+    deadline has passed.
+    """
+    deadline = _deadline_var.get()
+    if deadline is None:
+        return default
+    return max(0.0, min(default, deadline - time.monotonic()))
+
+
+def get_deadline() -> float | None:
+    return _deadline_var.get()
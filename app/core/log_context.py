@@ -7,13 +7,26 @@ asyncio task chain will carry the value automatically.
 
 Text format gets a ``[CAxxxx]`` prefix; JSON format gets a ``call_sid``
 field. No call site needs to pass ``extra={...}`` explicitly.
+
+Per-call debug targeting: :func:`add_debug_target` marks a callSid or caller
+number (for a limited time) as "verbose". :func:`call_debug` then emits
+DEBUG records for matching calls even when the process runs at ``INFO``.
+For untargeted calls the check is a single empty-dict test, so it is safe to
+leave on under full load. Targets are per process.
 """
 from __future__ import annotations
 
 import logging
+import time
 from contextvars import ContextVar
+from typing import Any
 
 _call_sid_var: ContextVar[str | None] = ContextVar("call_sid", default=None)
+_caller_number_var: ContextVar[str | None] = ContextVar("caller_number", default=None)
+
+# target value -> monotonic expiry
+_debug_call_sids: dict[str, float] = {}
+_debug_numbers: dict[str, float] = {}
 
 
 def bind_call_sid(call_sid: str | None) -> None:
@@ -25,8 +38,86 @@ def get_call_sid() -> str | None:
     return _call_sid_var.get()
 
 
+def bind_caller_number(caller_number: str | None) -> None:
+    """Bind the caller's number (used only for debug targeting)."""
+    _caller_number_var.set(caller_number)
+
+
 def clear_call_sid() -> None:
     _call_sid_var.set(None)
+    _caller_number_var.set(None)
+
+
+def add_debug_target(*, call_sid: str | None = None,
+                     caller_number: str | None = None,
+                     ttl_seconds: float = 900.0) -> None:
+    """Enable verbose logging for ``call_sid`` and/or ``caller_number``."""
+    expires = time.monotonic() + ttl_seconds
+    if call_sid:
+        _debug_call_sids[call_sid] = expires
+    if caller_number:
+        _debug_numbers[caller_number] = expires
+
+
+def remove_debug_target(*, call_sid: str | None = None,
+                        caller_number: str | None = None) -> bool:
+    """Drop a target; returns whether anything was removed."""
+    removed = False
+    if call_sid:
+        removed = _debug_call_sids.pop(call_sid, None) is not None
+    if caller_number:
+        removed = _debug_numbers.pop(caller_number, None) is not None or removed
+    return removed
+
+
+def list_debug_targets() -> list[dict[str, Any]]:
+    """Active targets with their remaining TTL (expired ones are pruned)."""
+    now = time.monotonic()
+    targets: list[dict[str, Any]] = []
+    for kind, registry in (("callSid", _debug_call_sids),
+                           ("callerNumber", _debug_numbers)):
+        for value, expires in list(registry.items()):
+            if expires <= now:
+                registry.pop(value, None)
+                continue
+            targets.append({kind: value, "expiresIn": round(expires - now, 1)})
+    return targets
+
+
+def _targeted(registry: dict[str, float], value: str | None, now: float) -> bool:
+    if value is None:
+        return False
+    expires = registry.get(value)
+    if expires is None:
+        return False
+    if expires <= now:
+        registry.pop(value, None)
+        return False
+    return True
+
+
+def is_call_debug_enabled() -> bool:
+    """True when the current call is a debug target."""
+    if not _debug_call_sids and not _debug_numbers:
+        return False
+    now = time.monotonic()
+    return (_targeted(_debug_call_sids, _call_sid_var.get(), now)
+            or _targeted(_debug_numbers, _caller_number_var.get(), now))
+
+
+def call_debug(logger: logging.Logger, msg: str, *args: Any) -> None:
+    """``logger.debug`` that also fires for debug-targeted calls.
+
+    Targeted records bypass the logger's level (not the handlers' filters)
+    so one call can be traced without turning on DEBUG process-wide.
+    """
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(msg, *args, stacklevel=2)
+    elif is_call_debug_enabled():
+        fn, lno, func, _ = logger.findCaller(stacklevel=2)
+        logger.handle(logger.makeRecord(
+            logger.name, logging.DEBUG, fn, lno, msg, args, None, func,
+        ))
 
 
 class CallSidFilter(logging.Filter):
@@ -4,15 +4,37 @@ Logging configuration.
 Switch between plain text and JSON output via ``LOG_FORMAT=json|text``
 (default ``text``). JSON mode is intended for production where logs are
 shipped to an aggregator that parses structured fields.
+
+Records are not written on the event loop: the root logger gets a
+:class:`~logging.handlers.QueueHandler` that only enqueues, and a background
+:class:`~logging.handlers.QueueListener` thread formats and writes to stdout.
+The queue is bounded (``LOG_QUEUE_SIZE``); when a slow log collector lets it
+fill up, new records are dropped and counted in
+``voxflow_log_records_dropped_total`` rather than stalling audio. Set
+``LOG_QUEUE_SIZE=0`` to write synchronously.
+
+Repeated WARNING+ records from the same call and message template are
+rate-limited by :class:`RateLimitFilter` (a per-key token bucket), so a broken
+peer socket logging one traceback per 20ms frame costs a handful of lines,
+not fifty per second. Suppressed repeats are summarized on the next record
+let through for that key, or by a background timer once the key has gone
+quiet or been evicted, and counted in ``voxflow_log_messages_suppressed_total``.
 """
 from __future__ import annotations
 
+import atexit
 import json
 import logging
+import queue
 import sys
+import threading
+import time
+from collections import OrderedDict
+from logging.handlers import QueueHandler, QueueListener
 from typing import Any
 
 from app.core.log_context import CallSidFilter
+from app.core.metrics import log_messages_suppressed_total, log_records_dropped_total
 
 # Keys that the LogRecord ships by default — anything else we treat as "extra".
 _RESERVED_RECORD_KEYS = {
@@ -22,48 +44,258 @@ _RESERVED_RECORD_KEYS = {
     "processName", "process", "message", "asctime", "taskName",
 }
 
+_TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s [%(call_sid)s] %(message)s"
+
+_listener: QueueListener | None = None
+_summary_timer: _SummaryTimer | None = None
+
+# How often (seconds) the summary timer looks for keys that went quiet.
+_SUMMARY_INTERVAL = 1.0
+
 
 class JsonFormatter(logging.Formatter):
     """Minimal stdlib-only JSON formatter (no external deps).
 
     Emits one JSON object per line with the standard fields plus any ``extra=``
-    keyword arguments the caller passed to the logging call.
+    keyword arguments the caller passed to the logging call. Serializes in a
+    single ``json.dumps`` pass (non-serializable extras fall back to
+    ``repr``) and renders the timestamp at most once per second.
     """
 
+    _DATEFMT = "%Y-%m-%dT%H:%M:%S%z"
+
+    def __init__(self) -> None:
+        super().__init__()
+        # (epoch second, rendered timestamp); one tuple so readers never see
+        # a half-updated cache.
+        self._ts_cache: tuple[int, str] = (-1, "")
+
+    def _timestamp(self, created: float) -> str:
+        second = int(created)
+        cached_second, rendered = self._ts_cache
+        if cached_second != second:
+            rendered = time.strftime(self._DATEFMT, self.converter(second))
+            self._ts_cache = (second, rendered)
+        return rendered
+
     def format(self, record: logging.LogRecord) -> str:
         payload: dict[str, Any] = {
-            "ts": self.formatTime(record, datefmt="%Y-%m-%dT%H:%M:%S%z"),
+            "ts": self._timestamp(record.created),
             "level": record.levelname,
             "logger": record.name,
             "msg": record.getMessage(),
         }
-        if record.exc_info:
-            payload["exc_info"] = self.formatException(record.exc_info)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload["exc_info"] = record.exc_text
 
         for key, value in record.__dict__.items():
             if key in _RESERVED_RECORD_KEYS or key.startswith("_"):
                 continue
+            payload[key] = value
+
+        try:
+            return json.dumps(payload, ensure_ascii=False, default=repr)
+        except (TypeError, ValueError):
+            # e.g. a circular structure in an extra; degrade that value only.
+            for key, value in payload.items():
+                try:
+                    json.dumps(value, default=repr)
+                except (TypeError, ValueError):
+                    payload[key] = repr(value)
+            return json.dumps(payload, ensure_ascii=False, default=repr)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """``QueueHandler`` that never blocks: a full queue drops and counts."""
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            log_records_dropped_total.inc()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge args now so later mutation of the arguments can't change the
+        # message; leave the expensive formatting (JSON, tracebacks) to the
+        # writer thread.
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class _Bucket:
+    __slots__ = ("args", "suppressed", "tokens", "updated")
+
+    def __init__(self, tokens: float, now: float) -> None:
+        self.tokens = tokens
+        self.updated = now
+        self.suppressed = 0
+        self.args: Any = None  # of the last suppressed record, for its summary
+
+
+class RateLimitFilter(logging.Filter):
+    """Token-bucket limiter keyed by (call_sid, logger, level, message template).
+
+    Each key may emit ``burst`` records at once and then ``rate`` per second.
+    Records below ``level`` pass untouched. When a key is let through again
+    after suppressing repeats, its message gains a
+    ``(N similar messages suppressed)`` suffix and a ``suppressed`` attribute.
+    A key that goes quiet instead, or is evicted (at most ``max_keys`` are
+    tracked, least recently used first), is left to :meth:`summaries`.
+    """
+
+    def __init__(self, rate: float, burst: int, level: int = logging.WARNING,
+                 max_keys: int = 2048) -> None:
+        super().__init__()
+        self._rate = rate
+        self._burst = max(1, burst)
+        self._level = level
+        self._max_keys = max_keys
+        self._buckets: OrderedDict[tuple[Any, ...], _Bucket] = OrderedDict()
+        self._evicted: list[tuple[tuple[Any, ...], int, Any]] = []
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < self._level:
+            return True
+        key = (getattr(record, "call_sid", None), record.name, record.levelno,
+               record.msg if isinstance(record.msg, str) else repr(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = _Bucket(self._burst, now)
+                self._buckets[key] = bucket
+                if len(self._buckets) > self._max_keys:
+                    old_key, old = self._buckets.popitem(last=False)
+                    if old.suppressed:
+                        self._evicted.append((old_key, old.suppressed, old.args))
+            else:
+                self._buckets.move_to_end(key)
+                bucket.tokens = min(self._burst,
+                                    bucket.tokens + (now - bucket.updated) * self._rate)
+                bucket.updated = now
+            allowed = bucket.tokens >= 1
+            if allowed:
+                bucket.tokens -= 1
+                suppressed, bucket.suppressed = bucket.suppressed, 0
+            else:
+                bucket.suppressed += 1
+                bucket.args = record.args
+        if not allowed:
+            log_messages_suppressed_total.labels(logger=record.name).inc()
+            return False
+        if not suppressed:
+            return True
+        record.msg = f"{record.msg} ({suppressed} similar messages suppressed)"
+        record.suppressed = suppressed
+        return True
+
+    def summaries(self, flush: bool = False) -> list[logging.LogRecord]:
+        """Summary records for evicted keys and keys idle for a refill period.
+
+        ``flush`` summarizes every key with suppressed repeats (shutdown).
+        Each summary is reported once; the caller writes it past this filter.
+        """
+        now = time.monotonic()
+        idle = 1 / self._rate if self._rate > 0 else 0.0
+        with self._lock:
+            due, self._evicted = self._evicted, []
+            for key, bucket in self._buckets.items():
+                if bucket.suppressed and (flush or now - bucket.updated >= idle):
+                    due.append((key, bucket.suppressed, bucket.args))
+                    bucket.suppressed = 0
+        records = []
+        for (call_sid, name, levelno, template), suppressed, args in due:
+            record = logging.LogRecord(name, levelno, "", 0, template, args, None)
+            record.msg = f"{record.getMessage()} ({suppressed} similar messages suppressed)"
+            record.args = None
+            record.call_sid = call_sid
+            record.suppressed = suppressed
+            records.append(record)
+        return records
+
+
+class _SummaryTimer:
+    """Writes :meth:`RateLimitFilter.summaries` every ``interval`` seconds."""
+
+    def __init__(self, limiter: RateLimitFilter, handler: logging.Handler,
+                 interval: float) -> None:
+        self._limiter = limiter
+        self._handler = handler
+        self._interval = interval
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="log-summary", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self._interval):
+            self._emit(self._limiter.summaries())
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._thread.join()
+        self._emit(self._limiter.summaries(flush=True))
+
+    def _emit(self, records: list[logging.LogRecord]) -> None:
+        # Past the handler's filters: they would re-tag call_sid and re-limit.
+        for record in records:
+            self._handler.acquire()
             try:
-                json.dumps(value)
-                payload[key] = value
-            except (TypeError, ValueError):
-                payload[key] = repr(value)
+                self._handler.emit(record)
+            finally:
+                self._handler.release()
 
-        return json.dumps(payload, ensure_ascii=False)
 
+def _stop_listener() -> None:
+    global _listener, _summary_timer
+    if _summary_timer is not None:
+        _summary_timer.stop()  # its last summaries go into the queue below
+        _summary_timer = None
+    if _listener is not None:
+        _listener.stop()  # drains whatever is already queued
+        _listener = None
 
-def configure_logging(level: str, fmt: str) -> None:
-    """Configure the root logger. Idempotent — replaces existing handlers."""
-    handler = logging.StreamHandler(sys.stdout)
-    handler.addFilter(CallSidFilter())
+
+atexit.register(_stop_listener)
+
+
+def configure_logging(level: str, fmt: str, queue_size: int = 10000,
+                      rate_limit: float = 0.0, rate_limit_burst: int = 5) -> None:
+    """Configure the root logger. Idempotent — replaces existing handlers.
+
+    ``queue_size > 0`` routes records through a bounded queue to a writer
+    thread; ``0`` attaches the stdout handler directly (synchronous writes).
+    ``rate_limit > 0`` installs :class:`RateLimitFilter` at that many
+    repeats per second per key (after an initial ``rate_limit_burst``), and a
+    timer thread that summarizes repeats suppressed by keys gone quiet.
+    """
+    global _listener, _summary_timer
+    _stop_listener()
+
+    stream_handler = logging.StreamHandler(sys.stdout)
     if fmt.strip().lower() == "json":
-        handler.setFormatter(JsonFormatter())
+        stream_handler.setFormatter(JsonFormatter())
     else:
-        handler.setFormatter(
-            logging.Formatter(
-                "%(asctime)s %(levelname)s %(name)s [%(call_sid)s] %(message)s"
-            )
-        )
+        stream_handler.setFormatter(logging.Formatter(_TEXT_FORMAT))
+
+    handler: logging.Handler
+    if queue_size > 0:
+        log_queue: queue.Queue[logging.LogRecord] = queue.Queue(maxsize=queue_size)
+        handler = DroppingQueueHandler(log_queue)
+        _listener = QueueListener(log_queue, stream_handler)
+        _listener.start()
+    else:
+        handler = stream_handler
+    # Filters run in the caller's thread/context, where the call_sid
+    # contextvar is visible — so they go on the front handler.
+    handler.addFilter(CallSidFilter())
+    if rate_limit > 0:
+        limiter = RateLimitFilter(rate_limit, rate_limit_burst)
+        handler.addFilter(limiter)
+        _summary_timer = _SummaryTimer(limiter, handler, _SUMMARY_INTERVAL)
 
     root = logging.getLogger()
     root.setLevel(level)
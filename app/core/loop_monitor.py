@@ -0,0 +1,201 @@
+"""
+Event loop lag monitor and asyncio task introspection.
+
+Every call in the process shares one event loop, so any blocking work (a sync
+HTTP client, a large ``json.dumps``, a slow log write) adds audio jitter to
+all of them. :class:`LoopMonitor` makes that visible:
+
+* a coroutine sleeps ``interval`` seconds in a loop and records how late it
+  woke up in ``voxflow_event_loop_lag_seconds``;
+* a watchdog thread notices when that coroutine's heartbeat is overdue by
+  more than ``slow_threshold`` — i.e. the loop is blocked *right now* — and
+  samples the loop thread's stack (``sys._current_frames``), so the stall is
+  reported with the offending code path and the task that was running.
+
+The monitor also installs a task factory that stamps each task with its
+creation time and the ``call_sid`` bound when it was created, which
+:func:`describe_tasks` uses to group live tasks by name with their ages.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+import weakref
+from collections import deque
+from collections.abc import Coroutine, Generator
+from contextvars import Context
+from typing import Any
+
+from app.core.config import LOOP_MONITOR_INTERVAL_SECONDS, LOOP_SLOW_CALLBACK_SECONDS
+from app.core.log_context import _call_sid_var
+from app.core.metrics import (
+    event_loop_lag_last_seconds,
+    event_loop_lag_seconds,
+    event_loop_stalls_total,
+)
+
+logger = logging.getLogger(__name__)
+
+# task -> (monotonic creation time, call_sid at creation)
+_task_info: weakref.WeakKeyDictionary[asyncio.Task, tuple[float, str | None]] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _task_factory(loop: asyncio.AbstractEventLoop,
+                  coro: Coroutine[Any, Any, Any] | Generator[Any, None, Any],
+                  context: Context | None = None) -> asyncio.Task:
+    task: asyncio.Task = asyncio.Task(coro, loop=loop, context=context)
+    call_sid = context.get(_call_sid_var) if context is not None else _call_sid_var.get()
+    _task_info[task] = (time.monotonic(), call_sid)
+    return task
+
+
+def _task_group(name: str) -> str:
+    """``tool:verify`` -> ``tool``; ``Task-42`` -> ``Task``."""
+    for sep in (":", "-"):
+        if sep in name:
+            return name.split(sep, 1)[0]
+    return name
+
+
+def describe_tasks(loop: asyncio.AbstractEventLoop | None = None,
+                   per_group: int = 50) -> dict[str, Any]:
+    """Live tasks grouped by name prefix, oldest first within each group."""
+    now = time.monotonic()
+    groups: dict[str, list[dict[str, Any]]] = {}
+    for task in asyncio.all_tasks(loop):
+        created, call_sid = _task_info.get(task, (None, None))
+        coro = task.get_coro()
+        groups.setdefault(_task_group(task.get_name()), []).append({
+            "name": task.get_name(),
+            "ageSeconds": round(now - created, 3) if created is not None else None,
+            "callSid": call_sid,
+            "coro": getattr(coro, "__qualname__", repr(coro)),
+        })
+    result: dict[str, Any] = {}
+    for group, tasks in sorted(groups.items()):
+        tasks.sort(key=lambda t: -(t["ageSeconds"] or 0.0))
+        result[group] = {
+            "count": len(tasks),
+            "oldestSeconds": tasks[0]["ageSeconds"],
+            "tasks": tasks[:per_group],
+        }
+    return {"total": sum(g["count"] for g in result.values()), "groups": result}
+
+
+class LoopMonitor:
+    """Measures event loop lag and captures stacks of stalls (see module doc)."""
+
+    def __init__(self, interval: float, slow_threshold: float,
+                 history: int = 20) -> None:
+        self.interval = interval
+        self.slow_threshold = slow_threshold
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.stalls: deque[dict[str, Any]] = deque(maxlen=history)
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread_id: int | None = None
+        self._heartbeat = 0.0
+        self._pending_sample: dict[str, Any] | None = None
+        self._task: asyncio.Task | None = None
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start on the running loop; no-op when disabled or already running."""
+        if self.interval <= 0 or self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        if self._loop.get_task_factory() is None:
+            self._loop.set_task_factory(_task_factory)
+        self._heartbeat = time.monotonic()
+        self._stop.clear()
+        self._task = self._loop.create_task(self._run(), name="loop-monitor")
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog",
+                                        daemon=True)
+        self._thread.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._thread is not None:
+            await asyncio.to_thread(self._thread.join, 1.0)
+            self._thread = None
+        if self._loop is not None and self._loop.get_task_factory() is _task_factory:
+            self._loop.set_task_factory(None)
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "running": self.running,
+            "intervalSeconds": self.interval,
+            "slowThresholdSeconds": self.slow_threshold,
+            "lastLagSeconds": round(self.last_lag, 4),
+            "maxLagSeconds": round(self.max_lag, 4),
+            "recentStalls": list(self.stalls),
+        }
+
+    async def _run(self) -> None:
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._heartbeat = now
+            lag = max(0.0, now - started - self.interval)
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            event_loop_lag_seconds.observe(lag)
+            event_loop_lag_last_seconds.set(lag)
+            if lag >= self.slow_threshold:
+                self._report_stall(lag)
+
+    def _report_stall(self, lag: float) -> None:
+        sample, self._pending_sample = self._pending_sample, None
+        event_loop_stalls_total.inc()
+        stall: dict[str, Any] = {"at": time.time(), "blockedSeconds": round(lag, 4)}
+        if sample is not None:
+            stall.update(sample)
+            logger.warning(
+                "Event loop blocked for %.3fs in task %s (CallSid=%s):\n%s",
+                lag, sample["task"], sample["callSid"], sample["stack"],
+            )
+        else:
+            logger.warning("Event loop blocked for %.3fs", lag)
+        self.stalls.append(stall)
+
+    def _watch(self) -> None:
+        """Watchdog thread: sample the loop thread's stack while it is stuck."""
+        poll = max(0.01, min(self.interval, self.slow_threshold) / 2)
+        sampled_for = 0.0
+        while not self._stop.wait(poll):
+            heartbeat = self._heartbeat
+            overdue = time.monotonic() - heartbeat - self.interval
+            if overdue < self.slow_threshold or heartbeat == sampled_for:
+                continue
+            sampled_for = heartbeat  # one sample per stall
+            frame = sys._current_frames().get(self._loop_thread_id or 0)
+            if frame is None:
+                continue
+            task = asyncio.current_task(self._loop) if self._loop is not None else None
+            _created, call_sid = _task_info.get(task, (None, None)) if task else (None, None)
+            self._pending_sample = {
+                "task": task.get_name() if task is not None else None,
+                "callSid": call_sid,
+                "stack": "".join(traceback.format_stack(frame)),
+            }
+
+
+# Process-wide monitor, started from the app lifespan.
+loop_monitor = LoopMonitor(LOOP_MONITOR_INTERVAL_SECONDS, LOOP_SLOW_CALLBACK_SECONDS)
@@ -0,0 +1,151 @@
+"""
+Memory accounting and leak diagnostics.
+
+* Process RSS (``voxflow_process_rss_bytes``) and RSS divided by bridged
+  calls (``voxflow_rss_per_active_call_bytes``), both read at scrape time.
+  A call is bridged while its session has a live Ultravox socket.
+* :func:`estimate_session` — approximate per-call footprint: session dict,
+  transcript bytes, pending transcript-stream turns and bytes queued in the
+  Ultravox socket's write buffer (the only place outbound audio queues up).
+* :func:`memory_report` — all sessions, plus leak indicators: per-call locks
+  without a session, and sessions still referencing closed websockets.
+* tracemalloc control (:func:`start_tracing` / :func:`snapshot_diff` /
+  :func:`stop_tracing`) to diff allocations against a baseline taken at
+  start. Tracing slows allocation noticeably; leave it off except while
+  investigating.
+"""
+from __future__ import annotations
+
+import os
+import resource
+import sys
+import tracemalloc
+from typing import Any
+
+from app.core.metrics import process_rss_bytes, rss_per_active_call_bytes
+from app.core.shared_state import Session, session_manager
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+_baseline: tracemalloc.Snapshot | None = None
+
+
+def rss_bytes() -> int:
+    """Current resident set size; falls back to peak RSS off Linux."""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def active_calls(sessions: list[tuple[str, Session]] | None = None) -> int:
+    """Calls with audio bridged to Ultravox, counted from the sessions."""
+    if sessions is None:
+        sessions = session_manager.snapshot()
+    return sum(1 for _, s in sessions if s.get("ultravox_ws_active"))
+
+
+def _rss_per_active_call() -> float:
+    active = active_calls()
+    return rss_bytes() / active if active > 0 else 0.0
+
+
+def _write_buffer_size(ws: Any) -> int:
+    transport = getattr(ws, "transport", None)
+    try:
+        return int(transport.get_write_buffer_size()) if transport is not None else 0
+    except (AttributeError, RuntimeError):
+        return 0
+
+
+def _is_closed(ws: Any) -> bool:
+    state = getattr(ws, "state", None)
+    return getattr(state, "name", None) == "CLOSED"
+
+
+def estimate_session(session: Session) -> dict[str, int]:
+    """Approximate bytes held for one call (shallow sizes; sockets excluded)."""
+    transcript = session.get("transcript") or ""
+    stream = session.get("transcript_stream")
+    pending = getattr(stream, "_pending", None) or []
+    uv_ws = session.get("uv_ws")
+    session_bytes = sys.getsizeof(session) + sum(
+        sys.getsizeof(k) + sys.getsizeof(v)
+        for k, v in session.items() if k not in ("uv_ws", "transcript_stream")
+    )
+    return {
+        "sessionBytes": session_bytes,
+        "transcriptBytes": len(transcript.encode("utf-8")),
+        "pendingTranscriptBytes": sum(len(turn) for turn in pending),
+        "queuedAudioBytes": _write_buffer_size(uv_ws),
+    }
+
+
+def memory_report(limit: int = 100) -> dict[str, Any]:
+    """Process RSS, per-call estimates (largest first) and leak indicators."""
+    sessions = session_manager.snapshot()
+    estimates = [(sid, estimate_session(s)) for sid, s in sessions]
+    estimates.sort(key=lambda e: -(e[1]["sessionBytes"] + e[1]["transcriptBytes"]))
+    per_call: list[dict[str, Any]] = [{"callSid": sid, **est} for sid, est in estimates]
+    active = active_calls(sessions)
+    rss = rss_bytes()
+    return {
+        "rssBytes": rss,
+        "activeCalls": active,
+        "rssPerActiveCallBytes": rss // active if active else None,
+        "sessions": len(sessions),
+        "locks": session_manager.lock_count(),
+        "orphanLocks": session_manager.lock_count() - len(sessions),
+        "sessionsWithClosedSockets": sum(
+            1 for _, s in sessions if _is_closed(s.get("uv_ws"))
+        ),
+        "totals": {
+            key: sum(est[key] for _, est in estimates)
+            for key in ("sessionBytes", "transcriptBytes",
+                        "pendingTranscriptBytes", "queuedAudioBytes")
+        },
+        "calls": per_call[:limit],
+    }
+
+
+def start_tracing(frames: int = 10) -> None:
+    """Start tracemalloc (if needed) and take the baseline snapshot."""
+    global _baseline
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+    _baseline = tracemalloc.take_snapshot()
+
+
+def snapshot_diff(top: int = 25, key_type: str = "lineno") -> dict[str, Any]:
+    """Top allocation growth since :func:`start_tracing`. Blocking — run in a thread."""
+    if not tracemalloc.is_tracing() or _baseline is None:
+        raise RuntimeError("tracemalloc is not running; start it first")
+    current = tracemalloc.take_snapshot()
+    stats = current.compare_to(_baseline, key_type)
+    traced, peak = tracemalloc.get_traced_memory()
+    return {
+        "tracedBytes": traced,
+        "peakTracedBytes": peak,
+        "top": [
+            {
+                "location": str(stat.traceback[0]) if stat.traceback else "?",
+                "sizeDiffBytes": stat.size_diff,
+                "sizeBytes": stat.size,
+                "countDiff": stat.count_diff,
+            }
+            for stat in stats[:top]
+        ],
+    }
+
+
+def stop_tracing() -> None:
+    global _baseline
+    _baseline = None
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+process_rss_bytes.set_function(rss_bytes)
+rss_per_active_call_bytes.set_function(_rss_per_active_call)
@@ -4,17 +4,33 @@ Prometheus metrics for VoxFlow.
 Lightweight counters/histograms exposed at ``GET /metrics`` in the standard
 Prometheus text exposition format. Scrape with any Prometheus-compatible
 collector (Prometheus, Grafana Agent, Vector, OpenTelemetry Collector …).
+
+Hot paths use label children bound once at import (``CALLS``, ``DISCONNECTS``,
+``N8N_OUTCOMES`` …) instead of calling ``.labels()`` per event, which hashes
+the label values and takes a lock every time. Binding up front also makes
+zero-valued series visible before the first event.
+
+The exposition is rendered off the event loop and cached for
+``METRICS_CACHE_SECONDS`` (see :func:`render_metrics_cached`).
 """
 from __future__ import annotations
 
+import asyncio
+import time
+from collections.abc import Iterable
+from typing import Any
+
 from prometheus_client import (
     CONTENT_TYPE_LATEST,
     CollectorRegistry,
     Counter,
+    Gauge,
     Histogram,
     generate_latest,
 )
 
+from app.core.config import METRICS_CACHE_SECONDS
+
 # Dedicated registry keeps VoxFlow's metrics separate from the default
 # registry's process/python collectors when running embedded in tests.
 REGISTRY = CollectorRegistry()
@@ -36,25 +52,313 @@ call_disconnects_total = Counter(
 tool_invocations_total = Counter(
     "voxflow_tool_invocations_total",
     "Number of Ultravox tool invocations by tool name and outcome.",
-    labelnames=("tool", "outcome"),  # outcome: ok | invalid_params | unknown | error
+    labelnames=("tool", "outcome"),  # outcome: ok | invalid_params | unknown | error | timeout
     registry=REGISTRY,
 )
 
+tool_in_flight = Gauge(
+    "voxflow_tool_in_flight",
+    "Tool invocations currently running, by tool name.",
+    labelnames=("tool",),
+    registry=REGISTRY,
+)
+
+tool_duration_seconds = Histogram(
+    "voxflow_tool_duration_seconds",
+    "Wall-clock duration of tool invocations (seconds).",
+    labelnames=("tool",),
+    registry=REGISTRY,
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0),
+)
+
 n8n_requests_total = Counter(
     "voxflow_n8n_requests_total",
     "Number of outbound n8n webhook requests by outcome.",
-    labelnames=("outcome",),  # 2xx | 4xx | 5xx | timeout | transport_error
+    labelnames=("outcome",),  # 2xx | 4xx | 5xx | timeout | transport_error | rejected
     registry=REGISTRY,
 )
 
 n8n_request_duration_seconds = Histogram(
     "voxflow_n8n_request_duration_seconds",
-    "Latency of outbound n8n webhook calls (seconds).",
+    "Latency of outbound n8n webhook calls (seconds), by n8n route.",
+    labelnames=("route",),  # 1 first message | 2 transcript | 3 schedule | 4 transcript chunk
     registry=REGISTRY,
     buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
 )
 
+circuit_breaker_state = Gauge(
+    "voxflow_circuit_breaker_state",
+    "Circuit breaker state per dependency (0=closed, 1=half_open, 2=open).",
+    labelnames=("dependency",),  # n8n | ultravox
+    registry=REGISTRY,
+)
+
+dependency_rejections_total = Counter(
+    "voxflow_dependency_rejections_total",
+    "Requests failed fast without contacting the dependency.",
+    labelnames=("dependency", "reason"),  # reason: circuit_open | bulkhead_full
+    registry=REGISTRY,
+)
+
+hedged_requests_total = Counter(
+    "voxflow_hedged_requests_total",
+    "Hedged (duplicated) requests by dependency and which attempt answered first.",
+    labelnames=("dependency", "winner"),  # winner: primary | hedge
+    registry=REGISTRY,
+)
+
+deadline_exceeded_total = Counter(
+    "voxflow_deadline_exceeded_total",
+    "Operations that ran out of their deadline budget and degraded.",
+    labelnames=("operation",),  # first_message | ultravox_create_call | n8n_webhook
+    registry=REGISTRY,
+)
+
+twilio_rest_duration_seconds = Histogram(
+    "voxflow_twilio_rest_duration_seconds",
+    "Latency of Twilio REST operations (seconds).",
+    labelnames=("operation", "outcome"),  # operation: calls.create | calls.fetch | calls.update
+    registry=REGISTRY,
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+
+log_records_dropped_total = Counter(
+    "voxflow_log_records_dropped_total",
+    "Log records dropped because the async log queue was full.",
+    registry=REGISTRY,
+)
+
+log_messages_suppressed_total = Counter(
+    "voxflow_log_messages_suppressed_total",
+    "Repeated WARNING+ log records suppressed by the per-call rate limiter.",
+    labelnames=("logger",),
+    registry=REGISTRY,
+)
+
+# -------- Call lifecycle (status callbacks) ------------------------------------------
+
+call_outcomes_total = Counter(
+    "voxflow_call_outcomes_total",
+    "Calls ended, by direction and final Twilio status.",
+    labelnames=("direction", "outcome"),  # completed | busy | no-answer | failed | canceled
+    registry=REGISTRY,
+)
+
+call_duration_seconds = Histogram(
+    "voxflow_call_duration_seconds",
+    "Duration of completed calls as reported by Twilio (CallDuration).",
+    labelnames=("direction",),
+    registry=REGISTRY,
+    buckets=(10, 30, 60, 120, 180, 300, 600, 900, 1800, 3600),
+)
+
+call_setup_seconds = Histogram(
+    "voxflow_call_setup_seconds",
+    "Twilio media-stream start until the Ultravox socket is connected.",
+    labelnames=("direction",),
+    registry=REGISTRY,
+    buckets=(0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 8.0),
+)
+
+# -------- Capacity gauges (autoscaling signals) --------------------------------------
+
+calls_active = Gauge(
+    "voxflow_calls_active",
+    "Calls with audio currently bridged between Twilio and Ultravox.",
+    registry=REGISTRY,
+)
+
+websockets_active = Gauge(
+    "voxflow_websockets_active",
+    "Open WebSocket connections by peer.",
+    labelnames=("peer",),  # twilio | ultravox
+    registry=REGISTRY,
+)
+
+sessions_active = Gauge(
+    "voxflow_sessions_active",
+    "Call sessions currently held in the session manager.",
+    registry=REGISTRY,
+)
+
+dependency_in_flight = Gauge(
+    "voxflow_dependency_in_flight",
+    "Requests currently holding a bulkhead slot, per dependency.",
+    labelnames=("dependency",),
+    registry=REGISTRY,
+)
+
+dependency_capacity = Gauge(
+    "voxflow_dependency_capacity",
+    "Bulkhead size (maximum concurrent requests) per dependency.",
+    labelnames=("dependency",),
+    registry=REGISTRY,
+)
+
+call_capacity = Gauge(
+    "voxflow_call_capacity",
+    "MAX_CONCURRENT_CALLS for this process (0 = unlimited).",
+    registry=REGISTRY,
+)
+
+calls_shed_total = Counter(
+    "voxflow_calls_shed_total",
+    "Calls turned away by admission control because the process was full.",
+    labelnames=("direction",),
+    registry=REGISTRY,
+)
+
+campaign_dials_total = Counter(
+    "voxflow_campaign_dials_total",
+    "Outbound campaign dial attempts by outcome.",
+    labelnames=("outcome",),  # dialed | failed
+    registry=REGISTRY,
+)
+
+verify_lookup_seconds = Histogram(
+    "voxflow_verify_lookup_seconds",
+    "Customer verification lookup latency, by backend.",
+    labelnames=("backend",),  # mock | csv | sqlite | n8n
+    registry=REGISTRY,
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.005, 0.025, 0.1, 0.5, 2.0),
+)
+
+verify_results_total = Counter(
+    "voxflow_verify_results_total",
+    "verify tool outcomes.",
+    labelnames=("result",),  # confirmed | not_confirmed | error
+    registry=REGISTRY,
+)
+
+schedule_requests_total = Counter(
+    "voxflow_schedule_requests_total",
+    "schedule_meeting outcomes.",
+    labelnames=("outcome",),  # booked | failed | unavailable | replayed
+    registry=REGISTRY,
+)
+
+local_corpus_queries_total = Counter(
+    "voxflow_local_corpus_queries_total",
+    "queryCorpus answered from the local index, or handed to the remote corpus.",
+    labelnames=("outcome",),  # hit | fallback
+    registry=REGISTRY,
+)
+
+stream_sessions_total = Counter(
+    "voxflow_stream_sessions_total",
+    "Sessions rebuilt from (or refused on) a signed stream token, or left unclaimed.",
+    labelnames=("outcome",),  # rebuilt | rejected | shed | expired
+    registry=REGISTRY,
+)
+
+ultravox_prewarm_total = Counter(
+    "voxflow_ultravox_prewarm_total",
+    "Ultravox calls pre-created while an outbound call rang, by outcome.",
+    labelnames=("outcome",),  # started | used | expired | failed | released
+    registry=REGISTRY,
+)
+
+process_rss_bytes = Gauge(
+    "voxflow_process_rss_bytes",
+    "Resident set size of this process (bytes).",
+    registry=REGISTRY,
+)
+
+rss_per_active_call_bytes = Gauge(
+    "voxflow_rss_per_active_call_bytes",
+    "Process RSS divided by bridged calls (0 when idle).",
+    registry=REGISTRY,
+)
+
+# -------- Event loop health ----------------------------------------------------------
+
+event_loop_lag_seconds = Histogram(
+    "voxflow_event_loop_lag_seconds",
+    "How late the event loop woke a periodic timer (seconds).",
+    registry=REGISTRY,
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+
+event_loop_lag_last_seconds = Gauge(
+    "voxflow_event_loop_lag_last_seconds",
+    "Most recent event loop lag sample (seconds).",
+    registry=REGISTRY,
+)
+
+event_loop_stalls_total = Counter(
+    "voxflow_event_loop_stalls_total",
+    "Times the event loop was blocked longer than LOOP_SLOW_CALLBACK_SECONDS.",
+    registry=REGISTRY,
+)
+
+# -------- Pre-bound children ---------------------------------------------------------
+
+def bind_children(metric: Any, label: str, values: Iterable[str]) -> dict[str, Any]:
+    """Return ``{value: metric.labels(label=value)}`` for a fixed label set."""
+    return {value: metric.labels(**{label: value}) for value in values}
+
+
+CALLS = bind_children(calls_total, "direction", ("inbound", "outbound"))
+DISCONNECTS = bind_children(call_disconnects_total, "reason",
+                            ("normal", "idle_timeout", "ultravox_silence",
+                             "max_duration", "error"))
+N8N_OUTCOMES = bind_children(n8n_requests_total, "outcome",
+                             ("2xx", "4xx", "5xx", "timeout", "transport_error", "rejected"))
+N8N_ROUTE_LATENCY = bind_children(n8n_request_duration_seconds, "route",
+                                  ("1", "2", "3", "4", "5", "6"))
+WEBSOCKETS = bind_children(websockets_active, "peer", ("twilio", "ultravox"))
+SHED = bind_children(calls_shed_total, "direction", ("inbound", "outbound"))
+VERIFY_RESULTS = bind_children(verify_results_total, "result",
+                               ("confirmed", "not_confirmed", "error"))
+VERIFY_LOOKUP_SECONDS = bind_children(verify_lookup_seconds, "backend",
+                                      ("mock", "csv", "sqlite", "n8n"))
+SCHEDULE_OUTCOMES = bind_children(schedule_requests_total, "outcome",
+                                  ("booked", "failed", "unavailable", "replayed"))
+CORPUS_QUERIES = bind_children(local_corpus_queries_total, "outcome", ("hit", "fallback"))
+STREAM_SESSIONS = bind_children(stream_sessions_total, "outcome",
+                                ("rebuilt", "rejected", "shed", "expired"))
+PREWARM = bind_children(ultravox_prewarm_total, "outcome",
+                        ("started", "used", "expired", "failed", "released"))
+CAMPAIGN_DIALS = bind_children(campaign_dials_total, "outcome", ("dialed", "failed"))
+
+
+def n8n_route_latency(route: Any) -> Any:
+    """Histogram child for ``route``; unknown routes share the ``other`` series."""
+    child = N8N_ROUTE_LATENCY.get(str(route))
+    if child is None:
+        child = N8N_ROUTE_LATENCY.setdefault(
+            "other", n8n_request_duration_seconds.labels(route="other"))
+    return child
+
+
+# -------- Exposition -----------------------------------------------------------------
 
 def render_metrics() -> tuple[bytes, str]:
     """Return (body, content_type) for the /metrics endpoint."""
     return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+_cache_body: bytes = b""
+_cache_expires: float = 0.0
+_render_lock: asyncio.Lock | None = None
+
+
+async def render_metrics_cached(ttl: float = METRICS_CACHE_SECONDS) -> tuple[bytes, str]:
+    """Like :func:`render_metrics`, but rendered in a worker thread and cached.
+
+    Concurrent scrapes within ``ttl`` seconds share one rendering, so several
+    Prometheus replicas scraping at once cost a single ``generate_latest``.
+    ``ttl <= 0`` renders every time (still off the loop).
+    """
+    global _cache_body, _cache_expires, _render_lock
+    if ttl > 0 and time.monotonic() < _cache_expires:
+        return _cache_body, CONTENT_TYPE_LATEST
+    if _render_lock is None:
+        _render_lock = asyncio.Lock()
+    async with _render_lock:
+        # Another scrape may have refreshed the cache while we waited.
+        if ttl > 0 and time.monotonic() < _cache_expires:
+            return _cache_body, CONTENT_TYPE_LATEST
+        body = await asyncio.to_thread(generate_latest, REGISTRY)
+        _cache_body, _cache_expires = body, time.monotonic() + ttl
+    return body, CONTENT_TYPE_LATEST
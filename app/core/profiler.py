@@ -0,0 +1,78 @@
+"""
+In-process sampling profiler (stdlib only).
+
+For containers where py-spy cannot attach (non-root user, no ptrace), this
+samples every thread's Python stack via ``sys._current_frames()`` from a
+background thread at a fixed interval and aggregates the samples as
+*collapsed stacks* — one ``thread;outer;...;inner count`` line per unique
+stack — the input format of ``flamegraph.pl``, speedscope and inferno.
+
+Overhead is one stack walk per thread per tick (100 Hz by default) done by
+the sampler thread; the sampled threads are never paused or instrumented,
+so it is safe to run against a pod carrying live calls. Only one profile
+runs at a time.
+"""
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from types import CodeType, FrameType
+
+_run_lock = threading.Lock()
+
+
+class ProfilerBusyError(RuntimeError):
+    """Raised when a profile is requested while another is running."""
+
+
+def _frame_label(code: CodeType, cache: dict[CodeType, str]) -> str:
+    label = cache.get(code)
+    if label is None:
+        label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+        cache[code] = label
+    return label
+
+
+def _collapse(frame: FrameType | None, cache: dict[CodeType, str]) -> list[str]:
+    stack: list[str] = []
+    while frame is not None:
+        stack.append(_frame_label(frame.f_code, cache))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+def sample_stacks(seconds: float, interval: float) -> tuple[Counter[str], int]:
+    """Sample all threads for ``seconds``; return (collapsed stacks, ticks).
+
+    Blocking — run it in a worker thread. Raises :class:`ProfilerBusyError`
+    if another profile is already running.
+    """
+    if not _run_lock.acquire(blocking=False):
+        raise ProfilerBusyError("a profile is already running")
+    try:
+        me = threading.get_ident()
+        counts: Counter[str] = Counter()
+        cache: dict[CodeType, str] = {}
+        ticks = 0
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                thread = names.get(ident, f"thread-{ident}").replace(";", ":")
+                counts[";".join([thread, *_collapse(frame, cache)])] += 1
+            ticks += 1
+            time.sleep(interval)
+        return counts, ticks
+    finally:
+        _run_lock.release()
+
+
+def format_collapsed(counts: Counter[str]) -> str:
+    """Render collapsed stacks, most frequent first."""
+    return "".join(f"{stack} {n}\n" for stack, n in counts.most_common())
@@ -9,12 +9,17 @@ Templates can be overridden without code changes by setting ``PROMPT_DIR``
 to a directory containing ``system.md``, ``main_convo.md``, and/or
 ``call_summary.md``. Any missing file falls back to the built-in default.
 Available placeholders: ``{agent_name}``, ``{company_name}``, ``{now}``.
+
+With tenants configured (:mod:`app.core.tenants`), the prompts follow the
+tenant of the current call: its identity, and its ``promptDir`` templates
+in place of these.
 """
 import datetime
 import logging
 from pathlib import Path
 
 from app.core.config import AGENT_NAME, COMPANY_NAME, PROMPT_DIR
+from app.core.tenants import Tenant, current_tenant
 
 logger = logging.getLogger(__name__)
 
@@ -219,9 +224,65 @@ def _load_template(name: str, default: str) -> str:
         return default
 
 
-_SYSTEM_MESSAGE_TEMPLATE = _load_template("system", _DEFAULT_SYSTEM_TEMPLATE)
-_MAINCONVO_STAGE_TEMPLATE = _load_template("main_convo", _DEFAULT_MAINCONVO_TEMPLATE)
-_CALL_SUMMARY_STAGE_TEMPLATE = _load_template("call_summary", _DEFAULT_CALL_SUMMARY_TEMPLATE)
+_DEFAULT_TEMPLATES: dict[str, str] = {
+    "system": _load_template("system", _DEFAULT_SYSTEM_TEMPLATE),
+    "main_convo": _load_template("main_convo", _DEFAULT_MAINCONVO_TEMPLATE),
+    "call_summary": _load_template("call_summary", _DEFAULT_CALL_SUMMARY_TEMPLATE),
+}
+# The templates a prompt directory may override (``<name>.md``).
+TEMPLATE_NAMES = tuple(_DEFAULT_TEMPLATES)
+
+# Stands in for {now} while a template is compiled; never appears in prompts.
+_NOW = "\x00"
+
+
+class PromptSet:
+    """Templates with the tenant identity substituted once.
+
+    Only ``{now}`` is left per call: each prompt is stored split around it,
+    so rendering is a join rather than a ``str.format`` of the whole text.
+    """
+
+    __slots__ = ("_parts",)
+
+    def __init__(self, templates: dict[str, str], agent_name: str, company_name: str) -> None:
+        self._parts: dict[str, tuple[str, ...]] = {}
+        for name, template in templates.items():
+            try:
+                text = template.format(now=_NOW, agent_name=agent_name,
+                                       company_name=company_name)
+            except (KeyError, IndexError, ValueError) as e:
+                # Unknown placeholder or a stray brace; literal braces are {{ }}.
+                raise ValueError(f"prompt template {name!r}: {e!r}") from None
+            self._parts[name] = tuple(text.split(_NOW))
+
+    def render(self, name: str, now: str) -> str:
+        return now.join(self._parts[name])
+
+
+_DEFAULT_PROMPTS = PromptSet(_DEFAULT_TEMPLATES, AGENT_NAME, COMPANY_NAME)
+
+
+def compile_prompts(tenant: Tenant) -> PromptSet:
+    """Compile ``tenant``'s prompts and memoise them on the tenant.
+
+    Raises ``ValueError`` for a template that cannot be rendered; tenant
+    loading calls this so a bad override is rejected before any call uses it.
+    """
+    prompts = tenant.cache["prompts"] = PromptSet(
+        {**_DEFAULT_TEMPLATES, **tenant.prompt_overrides},
+        tenant.agent_name, tenant.company_name,
+    )
+    return prompts
+
+
+def _prompts() -> PromptSet:
+    """Compiled prompts of the current tenant (memoised on the tenant)."""
+    tenant = current_tenant()
+    if tenant is None:
+        return _DEFAULT_PROMPTS
+    prompts = tenant.cache.get("prompts")
+    return prompts if prompts is not None else compile_prompts(tenant)
 
 
 def get_stage_prompt(stage_type, current_time=None):
@@ -238,25 +299,17 @@ def get_stage_prompt(stage_type, current_time=None):
     """
     if current_time is None:
         current_time = datetime.datetime.now(datetime.UTC).strftime('%Y-%m-%d %H:%M:%S')
-        
-    if stage_type.lower() == "main_convo":
-        return _MAINCONVO_STAGE_TEMPLATE.format(
-            now=current_time, agent_name=AGENT_NAME, company_name=COMPANY_NAME
-        )
-    elif stage_type.lower() == "call_summary":
-        return _CALL_SUMMARY_STAGE_TEMPLATE.format(
-            now=current_time, agent_name=AGENT_NAME, company_name=COMPANY_NAME
-        )
-    else:
+
+    stage = stage_type.lower()
+    if stage not in ("main_convo", "call_summary"):
         raise ValueError(f"Unknown stage type: {stage_type}")
+    return _prompts().render(stage, current_time)
 
 
 def get_system_prompt() -> str:
     """Return the Stage 1 system prompt rendered with the current time and tenant identity."""
     now = datetime.datetime.now(datetime.UTC).strftime('%Y-%m-%d %H:%M:%S')
-    return _SYSTEM_MESSAGE_TEMPLATE.format(
-        now=now, agent_name=AGENT_NAME, company_name=COMPANY_NAME
-    )
+    return _prompts().render("system", now)
 
 # Map of stage types to voice options
 STAGE_VOICES = {
@@ -0,0 +1,270 @@
+"""
+Resilience primitives shared by outbound dependency clients (n8n, Ultravox).
+
+* :class:`CircuitBreaker` — after ``failure_threshold`` consecutive failures
+  the breaker opens and callers fail fast to their existing fallbacks for
+  ``reset_timeout`` seconds; then a single half-open probe decides whether
+  to close again.
+* :class:`Bulkhead` — caps in-flight requests per dependency so one slow
+  upstream cannot absorb every connection and coroutine in the process.
+* :func:`full_jitter_backoff` — "full jitter" exponential backoff
+  (``uniform(0, min(cap, base * 2**n))``) so retries from many concurrent
+  calls spread out instead of arriving in synchronized waves.
+* :func:`hedged` + :class:`LatencyTracker` — for idempotent, latency-critical
+  reads, send a second request once the first is slower than the observed
+  p95 and take whichever answers first.
+
+Use the per-dependency singletons :data:`n8n_breaker`, :data:`n8n_bulkhead`,
+:data:`ultravox_breaker` and :data:`ultravox_bulkhead`.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import random
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from typing import Self, TypeVar
+
+from app.core.config import (
+    BULKHEAD_WAIT_SECONDS,
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+    CIRCUIT_BREAKER_RESET_SECONDS,
+    HEDGE_MIN_DELAY_SECONDS,
+    N8N_MAX_CONCURRENCY,
+    ULTRAVOX_MAX_CONCURRENCY,
+)
+from app.core.metrics import (
+    circuit_breaker_state,
+    dependency_capacity,
+    dependency_in_flight,
+    dependency_rejections_total,
+    hedged_requests_total,
+)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Numeric encoding for the state gauge.
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class DependencyUnavailableError(Exception):
+    """Raised instead of calling a dependency that is known to be unhealthy."""
+
+    def __init__(self, dependency: str, reason: str) -> None:
+        super().__init__(f"{dependency} unavailable: {reason}")
+        self.dependency = dependency
+        self.reason = reason
+
+
+class CircuitOpenError(DependencyUnavailableError):
+    def __init__(self, dependency: str) -> None:
+        super().__init__(dependency, "circuit open")
+
+
+class BulkheadFullError(DependencyUnavailableError):
+    def __init__(self, dependency: str) -> None:
+        super().__init__(dependency, "too many in-flight requests")
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a single half-open probe.
+
+    Not a context manager on purpose: what counts as a failure (timeout,
+    5xx, but not 4xx) is decided by the caller, which reports it through
+    :meth:`record_success` / :meth:`record_failure`. An attempt that ends
+    with no verdict (cancelled, or refused by the bulkhead) reports
+    :meth:`abandon` instead, so a half-open probe slot is not left taken.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+                 reset_timeout: float = CIRCUIT_BREAKER_RESET_SECONDS) -> None:
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._probe_started = 0.0
+        self._gauge = circuit_breaker_state.labels(dependency=name)
+        self._rejections = dependency_rejections_total.labels(
+            dependency=name, reason="circuit_open"
+        )
+        self._gauge.set(_STATE_VALUES[CLOSED])
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._set_state(HALF_OPEN)
+        return self._state
+
+    def before_call(self) -> bool:
+        """Raise :class:`CircuitOpenError` unless a request may go out now.
+
+        Returns ``True`` when this request is the half-open probe.
+        """
+        state = self.state
+        if state == CLOSED:
+            return False
+        now = time.monotonic()
+        # A probe that never reported back (e.g. cancelled) must not wedge
+        # the breaker half-open forever; allow a new one after reset_timeout.
+        if state == HALF_OPEN and (not self._probe_in_flight
+                                   or now - self._probe_started >= self.reset_timeout):
+            self._probe_in_flight = True
+            self._probe_started = now
+            return True
+        self._rejections.inc()
+        raise CircuitOpenError(self.name)
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._probe_in_flight = False
+        if self._state != CLOSED:
+            logger.info("Circuit for %s closed", self.name)
+            self._set_state(CLOSED)
+
+    def abandon(self, probe: bool) -> None:
+        """The request allowed by :meth:`before_call` ended without a verdict."""
+        if probe and self._state == HALF_OPEN:
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        self._probe_in_flight = False
+        if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+            if self._state != OPEN:
+                logger.warning(
+                    "Circuit for %s opened after %d consecutive failures",
+                    self.name, self._failures,
+                )
+            self._opened_at = time.monotonic()
+            self._set_state(OPEN)
+
+    def reset(self) -> None:
+        self._failures = 0
+        self._probe_in_flight = False
+        self._set_state(CLOSED)
+
+    def _set_state(self, state: str) -> None:
+        self._state = state
+        self._gauge.set(_STATE_VALUES[state])
+
+
+class Bulkhead:
+    """Async context manager bounding concurrent requests to one dependency.
+
+    Waits at most ``wait_timeout`` seconds for a slot, then raises
+    :class:`BulkheadFullError` so the caller degrades instead of queueing.
+    """
+
+    def __init__(self, name: str, max_concurrent: int,
+                 wait_timeout: float = BULKHEAD_WAIT_SECONDS) -> None:
+        self.name = name
+        self.max_concurrent = max(1, max_concurrent)
+        self.wait_timeout = wait_timeout
+        self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        self.in_flight = 0
+        self._rejections = dependency_rejections_total.labels(
+            dependency=name, reason="bulkhead_full"
+        )
+        dependency_capacity.labels(dependency=name).set(self.max_concurrent)
+        dependency_in_flight.labels(dependency=name).set_function(lambda: self.in_flight)
+
+    async def __aenter__(self) -> Self:
+        if self._semaphore.locked():
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(),
+                                       timeout=self.wait_timeout)
+            except TimeoutError:
+                self._rejections.inc()
+                raise BulkheadFullError(self.name) from None
+        else:
+            await self._semaphore.acquire()
+        self.in_flight += 1
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        self.in_flight -= 1
+        self._semaphore.release()
+
+
+def full_jitter_backoff(attempt: int, base: float, cap: float) -> float:
+    """Delay before retry number ``attempt`` (1-based) using full jitter."""
+    ceiling = min(cap, base * (2 ** (attempt - 1)))
+    return random.uniform(0.0, max(0.0, ceiling))
+
+
+class LatencyTracker:
+    """Sliding window of recent latencies used to pick a hedging delay."""
+
+    def __init__(self, window: int = 256, min_samples: int = 20,
+                 quantile: float = 0.95) -> None:
+        self._samples: deque[float] = deque(maxlen=window)
+        self.min_samples = min_samples
+        self.quantile = quantile
+
+    def observe(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self) -> float | None:
+        """The configured quantile, or None until ``min_samples`` are seen."""
+        if len(self._samples) < self.min_samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, math.ceil(self.quantile * len(ordered)) - 1)
+        return ordered[index]
+
+    def hedge_delay(self, floor: float = HEDGE_MIN_DELAY_SECONDS) -> float | None:
+        """How long to wait before hedging; None means "do not hedge yet"."""
+        p = self.percentile()
+        return None if p is None else max(floor, p)
+
+
+async def hedged(factory: Callable[[], Awaitable[T]], delay: float | None,
+                 dependency: str) -> T:
+    """Await ``factory()``, duplicating the request once after ``delay`` seconds.
+
+    Only use for idempotent requests. The first *successful* result wins and
+    the other attempt is cancelled; if both fail, the last error is raised.
+    With ``delay=None`` this is a plain ``await factory()``.
+    """
+    if delay is None:
+        return await factory()
+
+    primary = asyncio.ensure_future(factory())
+    pending = {primary}
+    error: BaseException | None = None
+    try:
+        # Cancelling the caller at any await below cancels whatever is in flight.
+        done, pending = await asyncio.wait(pending, timeout=delay)
+        if done:
+            return primary.result()
+
+        hedge = asyncio.ensure_future(factory())
+        pending = {primary, hedge}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    winner = "hedge" if task is hedge else "primary"
+                    hedged_requests_total.labels(dependency=dependency, winner=winner).inc()
+                    return task.result()
+                error = task.exception()
+        assert error is not None
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+n8n_breaker = CircuitBreaker("n8n")
+n8n_bulkhead = Bulkhead("n8n", N8N_MAX_CONCURRENCY)
+ultravox_breaker = CircuitBreaker("ultravox")
+ultravox_bulkhead = Bulkhead("ultravox", ULTRAVOX_MAX_CONCURRENCY)
@@ -11,6 +11,7 @@ import asyncio
 from contextlib import asynccontextmanager
 from typing import Any, AsyncIterator
 
+from app.core.metrics import sessions_active
 
 Session = dict[str, Any]
 
@@ -23,12 +24,25 @@ class SessionManager:
         self._global_lock = asyncio.Lock()
         self._locks: dict[str, asyncio.Lock] = {}
 
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def snapshot(self) -> list[tuple[str, Session]]:
+        """Point-in-time ``(call_sid, session)`` list for diagnostics (no lock)."""
+        return list(self._sessions.items())
+
+    def lock_count(self) -> int:
+        return len(self._locks)
+
     async def _get_lock(self, call_sid: str) -> asyncio.Lock:
         async with self._global_lock:
             lock = self._locks.get(call_sid)
             if lock is None:
                 lock = asyncio.Lock()
-                self._locks[call_sid] = lock
+                # Only register locks for live sessions: a late update() after
+                # pop() must not leave an entry behind forever.
+                if call_sid in self._sessions:
+                    self._locks[call_sid] = lock
             return lock
 
     async def create(self, call_sid: str, **fields: Any) -> Session:
@@ -75,3 +89,5 @@ class SessionManager:
 
 # Single process-wide instance.
 session_manager = SessionManager()
+# Read at scrape time; nothing to update on the hot path.
+sessions_active.set_function(session_manager.__len__)
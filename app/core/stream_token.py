@@ -0,0 +1,118 @@
+"""
+Signed stream tokens: session bootstrap data carried in the TwiML itself.
+
+With ``STREAM_TOKEN_SECRET`` set, the ``<Stream>`` rendered by the call
+webhooks carries a ``streamToken`` parameter next to ``firstMessage`` and
+``callerNumber``. When ``/media-stream`` lands on a replica that never saw
+the webhook, :func:`verify_stream_token` lets it rebuild the session from
+the ``start`` event alone — no sticky routing, no shared session store.
+
+Format: ``<claims>.<signature>``, both unpadded base64url. ``claims`` is
+compact JSON — direction ``d``, expiry ``e`` (epoch seconds), the tenant
+id ``t`` for calls on a tenant's number and, for inbound calls, the CallSid
+``c`` (outbound TwiML is rendered before Twilio assigns one). Outbound
+tokens carry a random nonce ``n`` instead. Each process accepts a nonce
+once, but replicas do not share that record, so the media stream also
+checks an outbound token's CallSid against Twilio's call record before
+rebuilding a session. The signature is HMAC-SHA256 over the encoded claims,
+the caller number and the first message, so none of the plain parameters
+can be altered either.
+"""
+from __future__ import annotations
+
+import base64
+import binascii
+import hashlib
+import heapq
+import hmac
+import json
+import secrets
+import time
+from typing import Any
+
+from app.core.config import STREAM_TOKEN_SECRET, STREAM_TOKEN_TTL_SECONDS
+
+
+class InvalidStreamTokenError(ValueError):
+    """The stream token is malformed, forged, expired or for another call."""
+
+
+# Nonces of accepted outbound tokens -> token expiry (epoch seconds), plus a
+# heap of (expiry, nonce) to forget them soonest-expiring first. At most
+# _MAX_NONCES are remembered; past that the soonest-expiring is dropped early.
+_MAX_NONCES = 10_000
+_used_nonces: dict[str, int] = {}
+_nonce_expiry: list[tuple[int, str]] = []
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _signature(secret: str, claims: str, caller_number: str, first_message: str) -> str:
+    message = f"{claims}\n{caller_number}\n{first_message}".encode()
+    return _b64encode(hmac.new(secret.encode("utf-8"), message, hashlib.sha256).digest())
+
+
+def issue_stream_token(caller_number: str, first_message: str, direction: str,
+                       call_sid: str | None = None, *, tenant: str | None = None,
+                       now: float | None = None) -> str | None:
+    """Token for a ``<Stream>``; ``None`` when ``STREAM_TOKEN_SECRET`` is unset."""
+    if not STREAM_TOKEN_SECRET:
+        return None
+    now = time.time() if now is None else now
+    payload: dict[str, Any] = {"d": direction, "e": int(now + STREAM_TOKEN_TTL_SECONDS)}
+    if call_sid:
+        payload["c"] = call_sid
+    else:
+        payload["n"] = secrets.token_urlsafe(12)
+    if tenant:
+        payload["t"] = tenant
+    claims = _b64encode(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+    return f"{claims}.{_signature(STREAM_TOKEN_SECRET, claims, caller_number, first_message)}"
+
+
+def verify_stream_token(token: str, caller_number: str, first_message: str,
+                        call_sid: str | None, *, now: float | None = None) -> dict[str, Any]:
+    """Return the token's claims, or raise :class:`InvalidStreamTokenError`."""
+    if not STREAM_TOKEN_SECRET:
+        raise InvalidStreamTokenError("stream tokens are not enabled")
+    claims, _, signature = token.partition(".")
+    expected = _signature(STREAM_TOKEN_SECRET, claims, caller_number, first_message)
+    if not signature or not hmac.compare_digest(signature, expected):
+        raise InvalidStreamTokenError("bad signature")
+    try:
+        payload = json.loads(_b64decode(claims))
+    except (binascii.Error, ValueError):
+        raise InvalidStreamTokenError("malformed claims") from None
+    if not isinstance(payload, dict) or not isinstance(payload.get("e"), int):
+        raise InvalidStreamTokenError("malformed claims")
+    now = time.time() if now is None else now
+    if payload["e"] < now:
+        raise InvalidStreamTokenError("expired")
+    if "c" in payload and payload["c"] != call_sid:
+        raise InvalidStreamTokenError("issued for another call")
+    if "c" not in payload:
+        nonce = payload.get("n")
+        if not isinstance(nonce, str):
+            raise InvalidStreamTokenError("not bound to a call")
+        if not _consume_nonce(nonce, payload["e"], now):
+            raise InvalidStreamTokenError("already used")
+    return payload
+
+
+def _consume_nonce(nonce: str, expires: int, now: float) -> bool:
+    """Record ``nonce``; ``False`` if it was already used by an unexpired token."""
+    while _nonce_expiry and _nonce_expiry[0][0] < now:
+        _used_nonces.pop(heapq.heappop(_nonce_expiry)[1], None)
+    if nonce in _used_nonces:
+        return False
+    while len(_used_nonces) >= _MAX_NONCES:
+        _used_nonces.pop(heapq.heappop(_nonce_expiry)[1], None)
+    _used_nonces[nonce] = expires
+    heapq.heappush(_nonce_expiry, (expires, nonce))
+    return True
@@ -0,0 +1,197 @@
+"""
+Tenant registry: several white-label receptionists in one process pool.
+
+Each ``*.json`` file in ``TENANT_DIR`` describes one tenant::
+
+    {
+      "id": "acme",                          # default: the file name
+      "numbers": ["+15551230000"],           # Twilio numbers it answers on
+      "agentName": "Sara",
+      "companyName": "Acme Dental",
+      "firstMessage": "Hi, Acme Dental, this is Sara.",
+      "promptDir": "acme-prompts",           # relative to TENANT_DIR
+      "calendars": {"Downtown": "downtown@acme.example"},
+      "ultravox": {"model": "...", "voice": "...", "temperature": 0.2,
+                   "corpusId": "..."}
+    }
+
+Every key but ``numbers`` is optional and falls back to the process-wide
+setting (``AGENT_NAME``, ``PROMPT_DIR``, ``CALENDARS_JSON``, ``ULTRAVOX_*`` …).
+Inbound calls are routed by the called number (Twilio ``To``), outbound
+calls by the caller ID they are placed from. A number that belongs to no
+tenant is served with the process-wide settings, which is also all that
+happens while ``TENANT_DIR`` is unset.
+
+The tenant of the call being handled is bound to a context variable
+(:func:`bind_tenant` / :func:`current_tenant`) and follows the call's tasks.
+Per-tenant derived artifacts are memoised in :attr:`Tenant.cache`, so
+memory grows with the number of tenants, not with the number of calls.
+Prompts are compiled when the tenant is loaded, so a template that cannot
+be rendered fails the load; the Ultravox tool list is built on first use.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import re
+from collections.abc import Iterator
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from app.core.config import (
+    AGENT_NAME,
+    CALENDARS_LIST,
+    COMPANY_NAME,
+    DEFAULT_FIRST_MESSAGE,
+    TENANT_DIR,
+    ULTRAVOX_CORPUS_ID,
+    ULTRAVOX_MODEL,
+    ULTRAVOX_TEMPERATURE,
+    ULTRAVOX_VOICE,
+)
+
+logger = logging.getLogger(__name__)
+
+_NON_DIGITS = re.compile(r"\D")
+
+
+def number_key(number: str) -> str:
+    """Twilio numbers compared on their digits (``+1 555-…`` == ``1555…``)."""
+    return _NON_DIGITS.sub("", number)
+
+
+@dataclass(frozen=True)
+class Tenant:
+    id: str
+    numbers: tuple[str, ...]
+    agent_name: str = AGENT_NAME
+    company_name: str = COMPANY_NAME
+    first_message: str = DEFAULT_FIRST_MESSAGE
+    calendars: dict[str, str] = field(default_factory=lambda: dict(CALENDARS_LIST))
+    ultravox_model: str = ULTRAVOX_MODEL
+    ultravox_voice: str = ULTRAVOX_VOICE
+    ultravox_temperature: float = ULTRAVOX_TEMPERATURE
+    corpus_id: str = ULTRAVOX_CORPUS_ID
+    # Prompt templates from the tenant's promptDir, by name (system, main_convo …).
+    prompt_overrides: dict[str, str] = field(default_factory=dict, repr=False)
+    # Memoised derived artifacts; owned by the modules that fill them.
+    cache: dict[str, Any] = field(default_factory=dict, repr=False, compare=False)
+
+    @classmethod
+    def from_json(cls, data: dict[str, Any], *, default_id: str,
+                  base_dir: Path) -> Tenant:
+        numbers = data.get("numbers")
+        if not isinstance(numbers, list) or not numbers:
+            raise ValueError("'numbers' must be a non-empty list")
+        fields: dict[str, Any] = {}
+        for key, name in (("agentName", "agent_name"), ("companyName", "company_name"),
+                          ("firstMessage", "first_message"), ("calendars", "calendars")):
+            if data.get(key):
+                fields[name] = data[key]
+        if "calendars" in fields and not isinstance(fields["calendars"], dict):
+            raise ValueError("'calendars' must map location names to calendar ids")
+        if "agent_name" in fields and "first_message" not in fields:
+            fields["first_message"] = (f"Hey, this is {fields['agent_name']}. "
+                                       "How can I assist you today?")
+        ultravox = data.get("ultravox") or {}
+        for key, name in (("model", "ultravox_model"), ("voice", "ultravox_voice"),
+                          ("corpusId", "corpus_id")):
+            if ultravox.get(key):
+                fields[name] = str(ultravox[key])
+        if ultravox.get("temperature") is not None:
+            fields["ultravox_temperature"] = float(ultravox["temperature"])
+        # prompts imports this module; import it here, once tenants are loaded.
+        from app.core.prompts import TEMPLATE_NAMES, compile_prompts
+
+        if data.get("promptDir"):
+            prompt_dir = base_dir / data["promptDir"]
+            fields["prompt_overrides"] = {
+                name: path.read_text(encoding="utf-8")
+                for name in TEMPLATE_NAMES
+                if (path := prompt_dir / f"{name}.md").is_file()
+            }
+        tenant = cls(id=str(data.get("id") or default_id),
+                     numbers=tuple(str(n) for n in numbers), **fields)
+        # Compile now so a broken template fails the load, not a live call.
+        compile_prompts(tenant)
+        return tenant
+
+
+class TenantRegistry:
+    """Tenants by id and by Twilio number; immutable, swapped whole on reload."""
+
+    def __init__(self, tenants: list[Tenant] | tuple[Tenant, ...] = ()) -> None:
+        self._by_id: dict[str, Tenant] = {}
+        self._by_number: dict[str, Tenant] = {}
+        for tenant in tenants:
+            if tenant.id in self._by_id:
+                raise ValueError(f"duplicate tenant id {tenant.id!r}")
+            self._by_id[tenant.id] = tenant
+            for number in tenant.numbers:
+                key = number_key(number)
+                other = self._by_number.setdefault(key, tenant)
+                if other is not tenant:
+                    raise ValueError(f"number {number} belongs to both "
+                                     f"{other.id!r} and {tenant.id!r}")
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def __iter__(self) -> Iterator[Tenant]:
+        return iter(self._by_id.values())
+
+    def get(self, tenant_id: str | None) -> Tenant | None:
+        return self._by_id.get(tenant_id) if tenant_id else None
+
+    def for_number(self, number: str | None) -> Tenant | None:
+        """The tenant answering on ``number``; ``None`` for process-wide settings."""
+        if not number or not self._by_number:
+            return None
+        return self._by_number.get(number_key(number))
+
+    @classmethod
+    def from_directory(cls, directory: str | Path) -> TenantRegistry:
+        """Parse every ``*.json`` in ``directory``. Blocking."""
+        root = Path(directory)
+        tenants = []
+        for path in sorted(root.glob("*.json")):
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+                tenants.append(Tenant.from_json(data, default_id=path.stem, base_dir=root))
+            except (OSError, ValueError, TypeError) as e:
+                raise ValueError(f"{path}: {e}") from e
+        return cls(tenants)
+
+
+registry = TenantRegistry()
+
+
+def load_configured() -> TenantRegistry:
+    """(Re)load ``TENANT_DIR`` and swap the registry in. Blocking.
+
+    A broken file fails the whole reload and leaves the current registry in
+    place.
+    """
+    global registry
+    if TENANT_DIR:
+        registry = TenantRegistry.from_directory(TENANT_DIR)
+        logger.info("Loaded %d tenants from %s", len(registry), TENANT_DIR)
+    return registry
+
+
+def get_registry() -> TenantRegistry:
+    return registry
+
+
+_tenant_var: ContextVar[Tenant | None] = ContextVar("tenant", default=None)
+
+
+def bind_tenant(tenant: Tenant | None) -> None:
+    """Bind ``tenant`` to the current asyncio context (``None``: process-wide)."""
+    _tenant_var.set(tenant)
+
+
+def current_tenant() -> Tenant | None:
+    return _tenant_var.get()
@@ -0,0 +1,85 @@
+"""
+Startup warm-up of outbound dependencies.
+
+A fresh replica otherwise pays DNS resolution, TCP connect and the TLS
+handshake to Ultravox and n8n — plus the lazy import of the Twilio REST
+client — on its first call, which lands as silence on that caller's line.
+:func:`warm_up` pays those costs from the lifespan instead: it opens a pooled
+connection to each origin through the shared HTTP client (the ``HEAD``
+response itself is ignored) and builds the Twilio client off the loop.
+
+Failures are logged and never block startup; ``/ready`` reports the replica
+ready once warm-up has finished or timed out.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.core.config import N8N_WEBHOOK_URL, WARMUP_TIMEOUT_SECONDS
+from app.services import twilio_service
+from app.services.http_client import get_http_client
+from app.services.ultravox_service import ULTRAVOX_CALLS_URL
+
+logger = logging.getLogger(__name__)
+
+_done = asyncio.Event()
+results: dict[str, str] = {}
+
+
+def is_done() -> bool:
+    return _done.is_set()
+
+
+def _origin(url: str) -> str | None:
+    parts = urlsplit(url)
+    if not parts.scheme or not parts.netloc:
+        return None
+    return f"{parts.scheme}://{parts.netloc}/"
+
+
+async def _open_connection(name: str, url: str) -> None:
+    t0 = time.monotonic()
+    try:
+        await get_http_client().head(url)
+    except httpx.HTTPError as e:
+        results[name] = f"error: {type(e).__name__}"
+        logger.warning("Warm-up of %s (%s) failed: %s", name, url, e)
+        return
+    results[name] = f"ok {time.monotonic() - t0:.3f}s"
+
+
+async def _build_twilio_client() -> None:
+    t0 = time.monotonic()
+    await asyncio.to_thread(twilio_service.get_twilio_client)
+    results["twilio"] = f"ok {time.monotonic() - t0:.3f}s"
+
+
+async def warm_up(timeout: float = WARMUP_TIMEOUT_SECONDS) -> None:
+    """Pre-connect to Ultravox and n8n and build the Twilio client; never raises."""
+    jobs = [_build_twilio_client()]
+    for name, url in (("ultravox", ULTRAVOX_CALLS_URL), ("n8n", N8N_WEBHOOK_URL or "")):
+        origin = _origin(url)
+        if origin is not None:
+            jobs.append(_open_connection(name, origin))
+    t0 = time.monotonic()
+    try:
+        async with asyncio.timeout(timeout):
+            await asyncio.gather(*jobs)
+    except TimeoutError:
+        logger.warning("Warm-up did not finish within %.1fs; continuing", timeout)
+    except Exception:
+        logger.exception("Warm-up failed; continuing")
+    finally:
+        _done.set()
+    logger.info("Warm-up finished in %.3fs: %s", time.monotonic() - t0, results)
+
+
+def reset() -> None:
+    """Forget a previous warm-up (tests)."""
+    _done.clear()
+    results.clear()
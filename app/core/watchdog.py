@@ -0,0 +1,137 @@
+"""
+Per-process call watchdog.
+
+Rather than arming a timer per received frame (``asyncio.wait_for`` around
+every ``receive_text()`` costs a timeout handle and a cancel scope each
+20 ms, per call), each call registers a :class:`CallWatch` whose activity
+counters the media handlers bump with a plain integer increment. One
+scanner task per process wakes every ``interval`` seconds, notes which
+counters moved, and expires calls that have been quiet too long:
+
+* ``idle_timeout`` — no Twilio message for ``twilio_idle`` seconds;
+* ``ultravox_silence`` — no Ultravox message for ``ultravox_silence``
+  seconds once the agent socket is connected;
+* ``max_duration`` — the call has been up longer than ``max_duration``.
+
+Expiry records the reason on the watch and cancels the watched task; the
+handler turns that cancellation into its normal disconnect path. Timeouts
+are enforced to within one ``interval``; a value of 0 disables that check.
+The scanner only runs while at least one call is registered.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+
+from app.core.config import (
+    MAX_CALL_DURATION_SECONDS,
+    ULTRAVOX_SILENCE_TIMEOUT_SECONDS,
+    WATCHDOG_INTERVAL_SECONDS,
+    WS_IDLE_TIMEOUT_SECONDS,
+)
+from app.core.metrics import DISCONNECTS
+
+logger = logging.getLogger(__name__)
+
+
+class CallWatch:
+    """Activity counters for one call; bump ``twilio`` / ``ultravox`` per message."""
+
+    __slots__ = ("_twilio_at", "_twilio_seen", "_ultravox_at", "_ultravox_seen",
+                 "call_sid", "reason", "started", "task", "twilio", "ultravox")
+
+    def __init__(self, task: asyncio.Task, call_sid: str | None) -> None:
+        now = time.monotonic()
+        self.task = task
+        self.call_sid = call_sid
+        self.started = now
+        self.reason: str | None = None
+        self.twilio = 0
+        self.ultravox: int | None = None  # None until the agent socket is up
+        self._twilio_seen = 0
+        self._twilio_at = now
+        self._ultravox_seen: int | None = None
+        self._ultravox_at = now
+
+    def arm_ultravox(self) -> None:
+        """Start enforcing the Ultravox silence timeout from now."""
+        if self.ultravox is None:
+            self.ultravox = 0
+
+
+class CallWatchdog:
+    """Scans registered calls on a coarse timer (see module doc)."""
+
+    def __init__(self, interval: float, twilio_idle: float,
+                 ultravox_silence: float, max_duration: float) -> None:
+        self.interval = interval
+        self.twilio_idle = twilio_idle
+        self.ultravox_silence = ultravox_silence
+        self.max_duration = max_duration
+        self._watches: set[CallWatch] = set()
+        self._task: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        return len(self._watches)
+
+    def register(self, task: asyncio.Task, call_sid: str | None = None) -> CallWatch:
+        watch = CallWatch(task, call_sid)
+        self._watches.add(watch)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(
+                self._run(), name="call-watchdog")
+        return watch
+
+    def unregister(self, watch: CallWatch) -> None:
+        self._watches.discard(watch)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while self._watches:
+            await asyncio.sleep(self.interval)
+            self.scan(time.monotonic())
+
+    def scan(self, now: float) -> None:
+        """Expire every watch past one of its limits."""
+        for watch in list(self._watches):
+            reason = self._check(watch, now)
+            if reason is not None:
+                self._expire(watch, reason, now)
+
+    def _check(self, watch: CallWatch, now: float) -> str | None:
+        if self.max_duration > 0 and now - watch.started > self.max_duration:
+            return "max_duration"
+        if watch.twilio != watch._twilio_seen:
+            watch._twilio_seen, watch._twilio_at = watch.twilio, now
+        elif self.twilio_idle > 0 and now - watch._twilio_at > self.twilio_idle:
+            return "idle_timeout"
+        if watch.ultravox is not None:
+            if watch.ultravox != watch._ultravox_seen:
+                watch._ultravox_seen, watch._ultravox_at = watch.ultravox, now
+            elif (self.ultravox_silence > 0
+                  and now - watch._ultravox_at > self.ultravox_silence):
+                return "ultravox_silence"
+        return None
+
+    def _expire(self, watch: CallWatch, reason: str, now: float) -> None:
+        self._watches.discard(watch)
+        if watch.task.done():
+            return
+        watch.reason = reason
+        DISCONNECTS[reason].inc()
+        logger.warning("Call %s expired by watchdog (%s) after %.0fs; tearing down",
+                       watch.call_sid, reason, now - watch.started)
+        watch.task.cancel()
+
+
+# Process-wide watchdog shared by every media stream.
+call_watchdog = CallWatchdog(
+    WATCHDOG_INTERVAL_SECONDS, WS_IDLE_TIMEOUT_SECONDS,
+    ULTRAVOX_SILENCE_TIMEOUT_SECONDS, MAX_CALL_DURATION_SECONDS,
+)
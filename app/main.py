@@ -3,28 +3,47 @@ Main FastAPI application entry point for VoxFlow AI Receptionist.
 """
 from __future__ import annotations
 
+import asyncio
 import logging
+import os
 from contextlib import asynccontextmanager
 from typing import AsyncIterator
 
 from fastapi import FastAPI, Response, WebSocket
 
+from app.api.endpoints.admin import router as admin_router
 from app.api.endpoints.calls import router as calls_router
+from app.api.endpoints.campaigns import campaign_dispatcher
+from app.api.endpoints.campaigns import router as campaigns_router
+from app.core import tenants, warmup
+from app.core.admission import admission
 from app.core.config import (
+    CAMPAIGN_DB_PATH,
     LOG_FORMAT,
     LOG_LEVEL,
+    LOG_QUEUE_SIZE,
+    LOG_RATE_LIMIT_BURST,
+    LOG_RATE_LIMIT_PER_SECOND,
     N8N_WEBHOOK_URL,
     PORT,
     PUBLIC_URL,
     TWILIO_ACCOUNT_SID,
     ULTRAVOX_API_KEY,
+    WARMUP_ON_STARTUP,
     validate_config,
 )
 from app.core.logging_config import configure_logging
-from app.core.metrics import render_metrics
+from app.core.loop_monitor import loop_monitor
+from app.core.metrics import render_metrics_cached
+from app.core.watchdog import call_watchdog
+from app.services import calendar_cache, local_corpus, twilio_service, verification
+from app.services.http_client import close_http_client
 from app.websockets.media_stream import media_stream
 
-configure_logging(LOG_LEVEL, LOG_FORMAT)
+configure_logging(
+    LOG_LEVEL, LOG_FORMAT, LOG_QUEUE_SIZE,
+    rate_limit=LOG_RATE_LIMIT_PER_SECOND, rate_limit_burst=LOG_RATE_LIMIT_BURST,
+)
 logger = logging.getLogger(__name__)
 
 
@@ -33,9 +52,34 @@ async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
     """Startup/shutdown lifecycle: fail-fast on missing required config."""
     logger.info("Validating configuration...")
     validate_config()
+    loop_monitor.start()
+    warmup_task = (
+        asyncio.create_task(warmup.warm_up(), name="warmup")
+        if WARMUP_ON_STARTUP else None
+    )
+    await asyncio.to_thread(tenants.load_configured)
+    await asyncio.to_thread(verification.load)
+    if local_corpus.enabled():
+        await asyncio.to_thread(local_corpus.load_configured)
+    availability = calendar_cache.get_cache()
+    if availability is not None:
+        availability.start()
+    if os.path.exists(CAMPAIGN_DB_PATH):
+        # Resume campaigns queued before a restart.
+        await campaign_dispatcher.start()
     logger.info("VoxFlow AI Receptionist started successfully")
     yield
     logger.info("VoxFlow AI Receptionist shutting down")
+    if warmup_task is not None:
+        warmup_task.cancel()
+        await asyncio.gather(warmup_task, return_exceptions=True)
+    if availability is not None:
+        await availability.stop()
+    await campaign_dispatcher.stop()
+    await loop_monitor.stop()
+    await call_watchdog.stop()
+    await close_http_client()
+    twilio_service.shutdown()
 
 
 app = FastAPI(
@@ -46,6 +90,8 @@ app = FastAPI(
 )
 
 app.include_router(calls_router)
+app.include_router(admin_router)
+app.include_router(campaigns_router)
 
 
 @app.websocket("/media-stream")
@@ -60,7 +106,9 @@ async def health_check() -> dict[str, str]:
 
 @app.get("/ready")
 async def readiness_check(response: Response) -> dict[str, object]:
-    """Readiness probe: 200 only when required config is populated.
+    """Readiness probe: 200 only when required config is populated, the
+    process has spare call capacity and its event loop is keeping up, and
+    (with ``WARMUP_ON_STARTUP``) once the dependency warm-up has finished.
 
     Distinct from ``/health`` (which just confirms the process is up).
     Container orchestrators should send traffic only when this returns 200.
@@ -70,6 +118,8 @@ async def readiness_check(response: Response) -> dict[str, object]:
         "ultravox": bool(ULTRAVOX_API_KEY),
         "n8n": bool(N8N_WEBHOOK_URL),
         "public_url": bool(PUBLIC_URL),
+        "warmup": warmup.is_done() or not WARMUP_ON_STARTUP,
+        **admission.readiness(),
     }
     ready = all(checks.values())
     if not ready:
@@ -79,8 +129,8 @@ async def readiness_check(response: Response) -> dict[str, object]:
 
 @app.get("/metrics")
 async def metrics_endpoint() -> Response:
-    """Prometheus text-format metrics for scraping."""
-    body, content_type = render_metrics()
+    """Prometheus text-format metrics for scraping (rendered off the loop, cached)."""
+    body, content_type = await render_metrics_cached()
     return Response(content=body, media_type=content_type)
 
 
@@ -0,0 +1,361 @@
+"""
+Free/busy cache and booking ledger for the ``schedule_meeting`` tool.
+
+Every booking attempt used to be a round trip to n8n (route 3), even when the
+requested slot was already taken and the only possible answer was "try
+another time". With ``CALENDAR_CACHE_ENABLED`` each calendar in
+``CALENDARS_LIST`` (and in every tenant's ``calendars``) has a free/busy
+snapshot fetched from n8n route ``6``:
+
+    request:  {"route": "6", "number": "<calendar id>",
+               "data": "{\\"calendar_id\\": ..., \\"from\\": <ISO>, \\"to\\": <ISO>}"}
+    response: {"busy": [{"start": <ISO>, "end": <ISO>}, ...]}
+
+covering the next ``CALENDAR_HORIZON_DAYS``. Snapshots are refreshed in the
+background every half ``CALENDAR_CACHE_TTL_SECONDS`` and on demand once
+stale. A request for a taken, past or out-of-hours slot is answered locally
+with the nearest free ones; only bookable slots go to n8n. While a booking
+is in flight its slot is held, so two callers on this process cannot both be
+sent for it, and a confirmed booking stays held until a snapshot fetched
+after it arrives. When no snapshot can be had (n8n down, unparsable
+datetime, slot beyond the horizon) the request goes to n8n unchecked, as
+before — n8n stays the authority.
+
+Independently of the cache, :data:`bookings` makes a booking idempotent on
+the tool ``invocationId``: a repeated invocation waits for, and answers
+with, the first one's result instead of booking twice. The id is also sent
+to n8n as ``idempotency_key`` so a workflow can dedupe across replicas.
+"""
+from __future__ import annotations
+
+import asyncio
+import bisect
+import json
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, tzinfo
+from datetime import time as dt_time
+from zoneinfo import ZoneInfo
+
+from app.core.config import (
+    CALENDAR_BUSINESS_DAYS,
+    CALENDAR_BUSINESS_HOURS,
+    CALENDAR_CACHE_ENABLED,
+    CALENDAR_CACHE_TTL_SECONDS,
+    CALENDAR_HORIZON_DAYS,
+    CALENDAR_SLOT_MINUTES,
+    CALENDAR_TIMEZONE,
+    CALENDARS_LIST,
+)
+from app.core.resilience import DependencyUnavailableError
+from app.core.tenants import get_registry
+from app.services.n8n_service import send_to_webhook
+
+logger = logging.getLogger(__name__)
+
+N8N_ROUTE_AVAILABILITY = "6"
+
+_WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+_LEDGER_SIZE = 1024
+
+Interval = tuple[datetime, datetime]
+# (calendar_id, start, end) -> busy intervals
+FetchFn = Callable[[str, datetime, datetime], Awaitable[list[Interval]]]
+
+
+def parse_business_hours(spec: str) -> tuple[dt_time, dt_time]:
+    """``"09:00-17:00"`` -> (opening, closing)."""
+    opening, _, closing = spec.partition("-")
+    return dt_time.fromisoformat(opening.strip()), dt_time.fromisoformat(closing.strip())
+
+
+def parse_business_days(spec: str) -> frozenset[int]:
+    """``"mon,tue"`` -> ``{0, 1}`` (``datetime.weekday()`` numbering)."""
+    return frozenset(_WEEKDAYS.index(day.strip().lower()[:3])
+                     for day in spec.split(",") if day.strip())
+
+
+def parse_slot(text: str, tz: tzinfo) -> datetime | None:
+    """The requested start as an aware datetime; ``None`` without a time of day."""
+    text = text.strip()
+    if len(text) <= 10:  # a bare date says nothing about the slot
+        return None
+    try:
+        value = datetime.fromisoformat(text)
+    except ValueError:
+        return None
+    return _aware(value, tz)
+
+
+def _aware(value: datetime, tz: tzinfo) -> datetime:
+    return value if value.tzinfo is not None else value.replace(tzinfo=tz)
+
+
+def _merge(intervals: list[Interval]) -> list[Interval]:
+    merged: list[Interval] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+@dataclass
+class _Snapshot:
+    fetched_at: float  # monotonic, when the fetch was started
+    window: Interval
+    busy: list[Interval]  # merged and sorted
+    starts: list[datetime] = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.starts = [start for start, _ in self.busy]
+
+    def is_free(self, start: datetime, end: datetime) -> bool:
+        i = bisect.bisect_left(self.starts, end)
+        return i == 0 or self.busy[i - 1][1] <= start
+
+
+@dataclass(frozen=True)
+class SlotCheck:
+    """Outcome of :meth:`AvailabilityCache.claim`.
+
+    ``available`` is also true when the slot could not be checked;
+    ``checked`` tells the two apart. A slot in the past is always refused. ``suggestions`` is only filled when the
+    slot was turned down.
+    """
+
+    available: bool
+    checked: bool
+    suggestions: tuple[datetime, ...] = ()
+
+
+async def fetch_busy(calendar_id: str, start: datetime, end: datetime) -> list[Interval]:
+    """Busy intervals of ``calendar_id`` between ``start`` and ``end`` (n8n route 6)."""
+    text = await send_to_webhook({
+        "route": N8N_ROUTE_AVAILABILITY,
+        "number": calendar_id,
+        "data": json.dumps({
+            "calendar_id": calendar_id,
+            "from": start.isoformat(),
+            "to": end.isoformat(),
+        }),
+    })
+    try:
+        body = json.loads(text)
+    except json.JSONDecodeError:
+        raise DependencyUnavailableError("n8n", "non-JSON availability response") from None
+    if not isinstance(body, dict) or not isinstance(body.get("busy"), list):
+        reason = body.get("error") if isinstance(body, dict) else None
+        raise DependencyUnavailableError("n8n", str(reason or "malformed availability response"))
+    try:
+        return [(datetime.fromisoformat(b["start"]), datetime.fromisoformat(b["end"]))
+                for b in body["busy"]]
+    except (KeyError, TypeError, ValueError):
+        raise DependencyUnavailableError("n8n", "malformed busy interval") from None
+
+
+class AvailabilityCache:
+    """Free/busy snapshots and local holds per calendar id (see module doc)."""
+
+    def __init__(self, calendar_ids: Iterable[str], *, fetch: FetchFn = fetch_busy,
+                 ttl: float = CALENDAR_CACHE_TTL_SECONDS,
+                 horizon_days: int = CALENDAR_HORIZON_DAYS,
+                 slot_minutes: int = CALENDAR_SLOT_MINUTES,
+                 business_hours: str = CALENDAR_BUSINESS_HOURS,
+                 business_days: str = CALENDAR_BUSINESS_DAYS,
+                 timezone: str = CALENDAR_TIMEZONE) -> None:
+        # Prefetched by the background task; ids first seen in claim() join it.
+        self.calendar_ids = dict.fromkeys(calendar_ids)
+        self.fetch = fetch
+        self.ttl = ttl
+        self.horizon = timedelta(days=horizon_days)
+        self.slot = timedelta(minutes=slot_minutes)
+        self.opening, self.closing = parse_business_hours(business_hours)
+        self.days = parse_business_days(business_days)
+        self.tz = ZoneInfo(timezone)
+        self._snapshots: dict[str, _Snapshot] = {}
+        self._inflight: dict[str, asyncio.Task[_Snapshot]] = {}
+        # calendar id -> {slot: monotonic confirmation time, or None while pending}
+        self._holds: dict[str, dict[Interval, float | None]] = {}
+        self._task: asyncio.Task | None = None
+
+    # -- snapshots ---------------------------------------------------------------
+
+    async def refresh(self, calendar_id: str) -> _Snapshot:
+        """Fetch a calendar's free/busy now; concurrent callers share one fetch."""
+        task = self._inflight.get(calendar_id)
+        if task is None:
+            task = asyncio.create_task(self._fetch(calendar_id),
+                                       name=f"calendar-fetch:{calendar_id}")
+            self._inflight[calendar_id] = task
+            task.add_done_callback(lambda _t: self._inflight.pop(calendar_id, None))
+        return await asyncio.shield(task)
+
+    async def _fetch(self, calendar_id: str) -> _Snapshot:
+        fetched_at = time.monotonic()
+        start = datetime.now(self.tz)
+        end = start + self.horizon
+        busy = await self.fetch(calendar_id, start, end)
+        busy = [(_aware(b_start, self.tz), _aware(b_end, self.tz)) for b_start, b_end in busy]
+        snapshot = _Snapshot(fetched_at, (start, end), _merge(busy))
+        self._snapshots[calendar_id] = snapshot
+        holds = self._holds.get(calendar_id)
+        if holds:
+            # Confirmed bookings made before this fetch began are in ``busy`` now.
+            for slot in [s for s, confirmed in holds.items()
+                         if confirmed is not None and confirmed < fetched_at]:
+                del holds[slot]
+        return snapshot
+
+    async def snapshot(self, calendar_id: str) -> _Snapshot | None:
+        """A snapshot younger than the TTL, fetching one if needed; ``None`` on failure."""
+        current = self._snapshots.get(calendar_id)
+        if current is not None and time.monotonic() - current.fetched_at < self.ttl:
+            return current
+        try:
+            return await self.refresh(calendar_id)
+        except Exception as e:  # noqa: BLE001 — an unchecked slot still goes to n8n
+            logger.warning("Calendar availability for %s unavailable: %s", calendar_id, e)
+            return None
+
+    # -- slots -------------------------------------------------------------------
+
+    def _bookable(self, snapshot: _Snapshot, calendar_id: str, start: datetime) -> bool:
+        end = start + self.slot
+        local_start, local_end = start.astimezone(self.tz), end.astimezone(self.tz)
+        if (start < snapshot.window[0] or end > snapshot.window[1]
+                or local_start.weekday() not in self.days
+                or local_start.date() != local_end.date()
+                or local_start.time() < self.opening or local_end.time() > self.closing):
+            return False
+        holds = self._holds.get(calendar_id, {})
+        return snapshot.is_free(start, end) and all(
+            end <= held_start or start >= held_end for held_start, held_end in holds
+        )
+
+    def suggest(self, snapshot: _Snapshot, calendar_id: str, start: datetime,
+                limit: int = 3) -> tuple[datetime, ...]:
+        """Up to ``limit`` bookable slots on the slot grid, nearest to ``start`` first."""
+        local = start.astimezone(self.tz)
+        step = self.slot.total_seconds()
+        midnight = local.replace(hour=0, minute=0, second=0, microsecond=0)
+        offset = (local - midnight).total_seconds() // step * step
+        anchor = midnight + timedelta(seconds=offset)
+        found: list[datetime] = []
+        for k in range(int(self.horizon / self.slot) + 1):
+            later, earlier = anchor + k * self.slot, anchor - k * self.slot
+            for candidate in (later, earlier) if k else (later,):
+                if self._bookable(snapshot, calendar_id, candidate):
+                    found.append(candidate)
+            if len(found) >= limit:
+                break
+        return tuple(sorted(found[:limit], key=lambda c: abs(c - start)))
+
+    async def claim(self, calendar_id: str, start: datetime) -> SlotCheck:
+        """Check ``start`` and, if bookable, hold it until :meth:`settle`."""
+        self.calendar_ids.setdefault(calendar_id)
+        snapshot = await self.snapshot(calendar_id)
+        now = datetime.now(self.tz)
+        if start < now:
+            # Needs no calendar data; suggest upcoming times when we have it.
+            suggestions = self.suggest(snapshot, calendar_id, now) if snapshot else ()
+            return SlotCheck(available=False, checked=True, suggestions=suggestions)
+        if snapshot is None or not snapshot.window[0] <= start < snapshot.window[1]:
+            return SlotCheck(available=True, checked=False)
+        if not self._bookable(snapshot, calendar_id, start):
+            return SlotCheck(available=False, checked=True,
+                             suggestions=self.suggest(snapshot, calendar_id, start))
+        self._holds.setdefault(calendar_id, {})[(start, start + self.slot)] = None
+        return SlotCheck(available=True, checked=True)
+
+    def settle(self, calendar_id: str, start: datetime, booked: bool) -> None:
+        """Release a :meth:`claim` hold, or keep it as confirmed until the next fetch."""
+        holds = self._holds.get(calendar_id, {})
+        slot = (start, start + self.slot)
+        if slot not in holds:
+            return
+        if booked:
+            holds[slot] = time.monotonic()
+        else:
+            del holds[slot]
+
+    # -- background prefetch -------------------------------------------------------
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="calendar-prefetch")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            ids = list(self.calendar_ids)
+            results = await asyncio.gather(
+                *(self.refresh(calendar_id) for calendar_id in ids),
+                return_exceptions=True,
+            )
+            for calendar_id, result in zip(ids, results, strict=True):
+                if isinstance(result, Exception):
+                    logger.warning("Calendar prefetch for %s failed: %s", calendar_id, result)
+            await asyncio.sleep(self.ttl / 2)
+
+
+class BookingLedger:
+    """Results of recent bookings by idempotency key (bounded, oldest evicted)."""
+
+    def __init__(self, size: int = _LEDGER_SIZE) -> None:
+        self.size = size
+        self._tasks: OrderedDict[str, asyncio.Task[str]] = OrderedDict()
+
+    async def run(self, key: str, book: Callable[[], Awaitable[str]]) -> tuple[str, bool]:
+        """``(result, replayed)``; a key seen before waits for the first booking.
+
+        The booking runs as its own task, so it completes (and its result is
+        kept for a retry) even if the invocation that started it times out.
+        A booking that raised is forgotten, so a retry makes a fresh attempt.
+        """
+        task = self._tasks.get(key)
+        if task is not None:
+            self._tasks.move_to_end(key)
+            return await asyncio.shield(task), True
+        task = asyncio.ensure_future(book())
+        self._tasks[key] = task
+        task.add_done_callback(lambda t: self._forget_failed(key, t))
+        while len(self._tasks) > self.size:
+            self._tasks.popitem(last=False)
+        return await asyncio.shield(task), False
+
+    def _forget_failed(self, key: str, task: asyncio.Task[str]) -> None:
+        if not task.cancelled() and task.exception() is None:
+            return
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+
+
+bookings = BookingLedger()
+
+_cache: AvailabilityCache | None = None
+
+
+def get_cache() -> AvailabilityCache | None:
+    """The process-wide cache, or ``None`` with ``CALENDAR_CACHE_ENABLED`` off."""
+    global _cache
+    if _cache is None and CALENDAR_CACHE_ENABLED:
+        tenant_calendars = (cal for t in get_registry() for cal in t.calendars.values())
+        _cache = AvailabilityCache([*CALENDARS_LIST.values(), *tenant_calendars])
+    return _cache
+
+
+def describe(slot: datetime, tz: tzinfo) -> str:
+    """Speakable slot plus its ISO form, which the agent can pass straight back."""
+    local = slot.astimezone(tz)
+    return f"{local:%A} {local.day} {local:%B} at {local:%H:%M} ({local:%Y-%m-%dT%H:%M})"
@@ -0,0 +1,367 @@
+"""
+Outbound call campaigns: a persistent job queue plus a paced dispatcher.
+
+* :class:`CampaignStore` keeps campaigns and their per-number jobs in SQLite
+  (``CAMPAIGN_DB_PATH``), so a restart resumes where the wave left off. A
+  job moves ``queued`` -> ``dialing`` -> ``dialed`` | ``failed``, or to
+  ``cancelled``. Jobs found ``dialing`` at startup go back to ``queued``
+  unless a CallSid was recorded for them; those reached Twilio and are marked
+  ``failed`` (``interrupted``) rather than redialled.
+* :class:`NumberPool` paces dials per caller-ID number. Twilio enforces a
+  calls-per-second limit on each number (1 CPS by default), so every number
+  in ``TWILIO_PHONE_NUMBERS`` gets its own ``CAMPAIGN_CPS_PER_NUMBER`` token
+  bucket and a dial goes out on whichever number frees up first.
+* :class:`CampaignDispatcher` pulls jobs in submission order, waits for
+  process call capacity (:mod:`app.core.admission`) and a number, then dials
+  via the injected ``dial`` coroutine with at most ``max_in_flight`` REST
+  requests outstanding.
+
+SQLite access is synchronous; the dispatcher and the API call the store via
+``asyncio.to_thread``.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass
+from typing import Any
+
+from app.core.admission import admission
+from app.core.metrics import CAMPAIGN_DIALS
+
+logger = logging.getLogger(__name__)
+
+# (phone_number, first_message, from_number) -> CallSid
+DialFn = Callable[[str, str, str], Awaitable[str]]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS campaigns (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    created_at REAL NOT NULL,
+    cancelled INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    campaign_id TEXT NOT NULL REFERENCES campaigns(id),
+    phone_number TEXT NOT NULL,
+    first_message TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    from_number TEXT,
+    call_sid TEXT,
+    error TEXT,
+    updated_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id);
+CREATE INDEX IF NOT EXISTS jobs_campaign ON jobs (campaign_id, status);
+"""
+
+JOB_STATUSES: tuple[str, ...] = ("queued", "dialing", "dialed", "failed", "cancelled")
+
+
+@dataclass(frozen=True)
+class Job:
+    id: int
+    campaign_id: str
+    phone_number: str
+    first_message: str
+
+
+class CampaignStore:
+    """SQLite-backed campaigns and jobs; every method is blocking and thread-safe."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def create_campaign(self, name: str | None,
+                        calls: Iterable[tuple[str, str]]) -> str:
+        """Persist a campaign and its (phone_number, first_message) jobs."""
+        campaign_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute(
+                    "INSERT INTO campaigns (id, name, created_at) VALUES (?, ?, ?)",
+                    (campaign_id, name, now),
+                )
+                self._conn.executemany(
+                    "INSERT INTO jobs (campaign_id, phone_number, first_message, updated_at)"
+                    " VALUES (?, ?, ?, ?)",
+                    ((campaign_id, number, message, now) for number, message in calls),
+                )
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+        return campaign_id
+
+    def claim_next(self) -> Job | None:
+        """Move the oldest queued job to ``dialing`` and return it."""
+        with self._lock:
+            row = self._conn.execute(
+                "UPDATE jobs SET status = 'dialing', updated_at = ?"
+                " WHERE id = (SELECT id FROM jobs WHERE status = 'queued'"
+                "             ORDER BY id LIMIT 1)"
+                " RETURNING id, campaign_id, phone_number, first_message",
+                (time.time(),),
+            ).fetchone()
+        return Job(*row) if row is not None else None
+
+    def requeue(self, job_id: int) -> None:
+        self._set(job_id, "queued")
+
+    def mark_dialed(self, job_id: int, call_sid: str, from_number: str) -> None:
+        self._set(job_id, "dialed", call_sid=call_sid, from_number=from_number)
+
+    def mark_failed(self, job_id: int, error: str, from_number: str | None = None) -> None:
+        self._set(job_id, "failed", error=error[:500], from_number=from_number)
+
+    def _set(self, job_id: int, status: str, **fields: Any) -> None:
+        columns = "".join(f", {name} = ?" for name in fields)
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE jobs SET status = ?, updated_at = ?{columns} WHERE id = ?",
+                (status, time.time(), *fields.values(), job_id),
+            )
+
+    def recover(self) -> tuple[int, int]:
+        """Settle jobs left ``dialing`` by a previous process.
+
+        Jobs with no CallSid are requeued; jobs with one are failed
+        (``interrupted``). Returns ``(requeued, failed)``.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                requeued = self._conn.execute(
+                    "UPDATE jobs SET status = 'queued', updated_at = ?"
+                    " WHERE status = 'dialing' AND call_sid IS NULL",
+                    (now,),
+                ).rowcount
+                failed = self._conn.execute(
+                    "UPDATE jobs SET status = 'failed', error = 'interrupted', updated_at = ?"
+                    " WHERE status = 'dialing'",
+                    (now,),
+                ).rowcount
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+        return requeued, failed
+
+    def cancel(self, campaign_id: str) -> int | None:
+        """Cancel a campaign's queued jobs; ``None`` if the campaign is unknown."""
+        with self._lock:
+            found = self._conn.execute(
+                "UPDATE campaigns SET cancelled = 1 WHERE id = ?", (campaign_id,),
+            ).rowcount
+            if not found:
+                return None
+            return self._conn.execute(
+                "UPDATE jobs SET status = 'cancelled', updated_at = ?"
+                " WHERE campaign_id = ? AND status = 'queued'",
+                (time.time(), campaign_id),
+            ).rowcount
+
+    def progress(self, campaign_id: str) -> dict[str, Any] | None:
+        """Counts per job status plus an overall campaign status."""
+        with self._lock:
+            campaign = self._conn.execute(
+                "SELECT name, created_at, cancelled FROM campaigns WHERE id = ?",
+                (campaign_id,),
+            ).fetchone()
+            if campaign is None:
+                return None
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) FROM jobs WHERE campaign_id = ? GROUP BY status",
+                (campaign_id,),
+            ).fetchall()
+        counts = dict.fromkeys(JOB_STATUSES, 0) | dict(rows)
+        name, created_at, cancelled = campaign
+        if counts["queued"] or counts["dialing"]:
+            status = "running"
+        else:
+            status = "cancelled" if cancelled else "completed"
+        return {
+            "campaignId": campaign_id,
+            "name": name,
+            "createdAt": created_at,
+            "status": status,
+            "total": sum(counts.values()),
+            "counts": counts,
+        }
+
+    def list_campaigns(self, limit: int = 50) -> list[dict[str, Any]]:
+        with self._lock:
+            ids = [row[0] for row in self._conn.execute(
+                "SELECT id FROM campaigns ORDER BY created_at DESC LIMIT ?", (limit,),
+            )]
+        return [p for p in map(self.progress, ids) if p is not None]
+
+    def failures(self, campaign_id: str, limit: int = 100) -> list[dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT phone_number, from_number, error FROM jobs"
+                " WHERE campaign_id = ? AND status = 'failed' ORDER BY id LIMIT ?",
+                (campaign_id, limit),
+            ).fetchall()
+        return [{"phoneNumber": p, "fromNumber": f, "error": e} for p, f, e in rows]
+
+
+class NumberPool:
+    """Per-number token buckets (burst 1) pacing dials to ``cps`` per number."""
+
+    def __init__(self, numbers: Iterable[str], cps: float) -> None:
+        self.numbers = list(dict.fromkeys(n for n in numbers if n))
+        self.interval = 1.0 / cps if cps > 0 else 0.0
+        self._next_at = dict.fromkeys(self.numbers, 0.0)
+
+    async def acquire(self) -> str:
+        """Wait for the number whose next slot is soonest, take that slot."""
+        if not self._next_at:
+            raise RuntimeError("no caller-ID numbers configured")
+        number = min(self._next_at, key=self._next_at.__getitem__)
+        now = time.monotonic()
+        slot = max(now, self._next_at[number])
+        # Book the slot before sleeping so concurrent acquirers spread out.
+        self._next_at[number] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+        return number
+
+
+class CampaignDispatcher:
+    """Background task draining the job store (see module doc)."""
+
+    def __init__(self, store_factory: Callable[[], CampaignStore], pool: NumberPool,
+                 dial: DialFn, *, max_in_flight: int = 4, idle_poll: float = 5.0,
+                 capacity_poll: float = 0.5) -> None:
+        self._store_factory = store_factory
+        self._store: CampaignStore | None = None
+        self.pool = pool
+        self.dial = dial
+        self.max_in_flight = max(1, max_in_flight)
+        self.idle_poll = idle_poll
+        self.capacity_poll = capacity_poll
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._in_flight: set[asyncio.Task] = set()
+
+    @property
+    def store(self) -> CampaignStore:
+        """The store, opened on first use; async code uses :meth:`open_store`."""
+        if self._store is None:
+            self._store = self._store_factory()
+        return self._store
+
+    async def open_store(self) -> CampaignStore:
+        """The store, opening the SQLite connection off the event loop."""
+        if self._store is None:
+            store = await asyncio.to_thread(self._store_factory)
+            if self._store is None:
+                self._store = store
+            else:  # another caller opened it while we waited
+                await asyncio.to_thread(store.close)
+        return self._store
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        """Recover interrupted jobs and start dispatching; idempotent."""
+        if self.running:
+            return
+        store = await self.open_store()
+        requeued, failed = await asyncio.to_thread(store.recover)
+        if requeued or failed:
+            logger.warning("Recovered interrupted campaign jobs: %d requeued, %d failed",
+                           requeued, failed)
+        if self.running:  # started concurrently while we recovered
+            return
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run(store), name="campaign-dispatcher")
+        self._task.add_done_callback(_log_crash)
+
+    def notify(self) -> None:
+        """New jobs were queued; stop idling."""
+        self._wake.set()
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+        if self._store is not None:
+            await asyncio.to_thread(self._store.close)
+            self._store = None
+
+    async def _run(self, store: CampaignStore) -> None:
+        slots = asyncio.Semaphore(self.max_in_flight)
+        while True:
+            while admission.at_capacity():
+                await asyncio.sleep(self.capacity_poll)
+            await slots.acquire()
+            job = await asyncio.to_thread(store.claim_next)
+            if job is None:
+                slots.release()
+                self._wake.clear()
+                try:
+                    async with asyncio.timeout(self.idle_poll):
+                        await self._wake.wait()
+                except TimeoutError:
+                    pass
+                continue
+            try:
+                from_number = await self.pool.acquire()
+            except BaseException:
+                # Stopped (or misconfigured) before dialing: leave the job queued.
+                slots.release()
+                await asyncio.shield(asyncio.to_thread(store.requeue, job.id))
+                raise
+            task = asyncio.create_task(self._dial(store, job, from_number),
+                                       name=f"campaign-dial:{job.id}")
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+            task.add_done_callback(lambda _t: slots.release())
+
+    async def _dial(self, store: CampaignStore, job: Job, from_number: str) -> None:
+        with admission.reserve() as admitted:
+            if not admitted:
+                # Lost a race for the last slot; try again later.
+                await asyncio.to_thread(store.requeue, job.id)
+                return
+            try:
+                call_sid = await self.dial(job.phone_number, job.first_message, from_number)
+            except Exception as e:  # noqa: BLE001 — any dial error fails just this job
+                logger.warning("Campaign %s: dialing %s from %s failed: %s",
+                               job.campaign_id, job.phone_number, from_number, e)
+                CAMPAIGN_DIALS["failed"].inc()
+                await asyncio.to_thread(store.mark_failed, job.id, str(e), from_number)
+                return
+        CAMPAIGN_DIALS["dialed"].inc()
+        await asyncio.to_thread(store.mark_dialed, job.id, call_sid, from_number)
+
+
+def _log_crash(task: asyncio.Task) -> None:
+    if not task.cancelled() and (exc := task.exception()) is not None:
+        logger.error("Campaign dispatcher crashed; queued jobs wait for the next start",
+                     exc_info=exc)
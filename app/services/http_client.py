@@ -0,0 +1,42 @@
+"""
+Process-wide ``httpx.AsyncClient`` for outbound calls (n8n, Ultravox).
+
+One pooled client instead of a new client per request means DNS lookups,
+TCP connects and TLS handshakes are paid once per origin and reused while
+the connection stays alive (``HTTP_KEEPALIVE_SECONDS``) — which is also what
+lets the startup warm-up in :mod:`app.core.warmup` pay them before the
+first call. Per-request timeouts are passed to each request.
+"""
+from __future__ import annotations
+
+import asyncio
+
+import httpx
+
+from app.core.config import HTTP_KEEPALIVE_SECONDS, HTTP_TIMEOUT_SECONDS
+
+_client: httpx.AsyncClient | None = None
+_client_loop: asyncio.AbstractEventLoop | None = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared client, creating it on first use on this event loop."""
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        # Pooled connections belong to one loop; a new loop (tests, reload)
+        # gets a fresh client.
+        _client = httpx.AsyncClient(
+            timeout=HTTP_TIMEOUT_SECONDS,
+            limits=httpx.Limits(keepalive_expiry=HTTP_KEEPALIVE_SECONDS),
+        )
+        _client_loop = loop
+    return _client
+
+
+async def close_http_client() -> None:
+    """Close the shared client (lifespan shutdown)."""
+    global _client, _client_loop
+    client, _client, _client_loop = _client, None, None
+    if client is not None and not client.is_closed:
+        await client.aclose()
@@ -0,0 +1,245 @@
+"""
+Local BM25 index over FAQ / policy documents.
+
+Every ``queryCorpus`` tool call used to go out to Ultravox's hosted corpus,
+which puts a visible pause into the conversation. With ``LOCAL_CORPUS_DIR``
+(or a prebuilt ``LOCAL_CORPUS_INDEX_PATH``) configured, ``queryCorpus`` is
+registered as a client tool answered from this in-process index in well
+under a millisecond. The hosted corpus stays registered as
+``queryRemoteCorpus``, and the tool result points the agent at it when the
+best local match is weak (``LOCAL_CORPUS_MIN_SCORE``).
+
+Documents (``*.md`` / ``*.txt``, recursively) are split into passages of
+about ``_PASSAGE_CHARS`` characters at paragraph boundaries, each prefixed
+with its nearest Markdown heading. BM25 is query-independent per
+(term, passage), so every posting stores its final impact weight and a
+search is a sum over the query terms' posting lists. Scores are normalised
+by what an average-length passage containing every query term once would
+score (capped at 1; words missing from the corpus count at the highest
+IDF), so the threshold is comparable across queries.
+
+The index can be built once and saved as JSON::
+
+    python -m app.services.local_corpus build docs/faq corpus-index.json
+"""
+from __future__ import annotations
+
+import json
+import logging
+import math
+import re
+import sys
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from app.core.config import (
+    LOCAL_CORPUS_DIR,
+    LOCAL_CORPUS_INDEX_PATH,
+    LOCAL_CORPUS_MAX_RESULTS,
+    LOCAL_CORPUS_MIN_SCORE,
+)
+
+logger = logging.getLogger(__name__)
+
+_INDEX_VERSION = 1
+_PASSAGE_CHARS = 600
+_K1 = 1.2
+_B = 0.75
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset((
+    "a", "about", "an", "and", "any", "are", "as", "at", "be", "by", "can",
+    "could", "do", "does", "for", "from", "have", "how", "i", "if", "in", "is",
+    "it", "me", "much", "my", "of", "on", "or", "our", "please", "should", "so",
+    "that", "the", "their", "there", "this", "to", "was", "we", "what", "when",
+    "where", "which", "who", "why", "will", "with", "would", "you", "your",
+))
+
+
+def tokenize(text: str) -> list[str]:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS]
+
+
+@dataclass(frozen=True)
+class Hit:
+    score: float  # normalised to 0..1
+    source: str
+    text: str
+
+
+def split_passages(text: str, max_chars: int = _PASSAGE_CHARS) -> list[str]:
+    """Paragraph-aligned passages, each carrying its section heading."""
+    passages: list[str] = []
+    heading = ""
+    current: list[str] = []
+
+    def flush() -> None:
+        if current:
+            body = "\n\n".join(current)
+            passages.append(f"{heading}\n{body}" if heading else body)
+            current.clear()
+
+    for block in re.split(r"\n\s*\n", text):
+        block = block.strip()
+        if not block:
+            continue
+        if block.startswith("#"):
+            flush()
+            first, _, rest = block.partition("\n")
+            heading = first.lstrip("#").strip()
+            block = rest.strip()
+            if not block:
+                continue
+        if current and sum(map(len, current)) + len(block) > max_chars:
+            flush()
+        current.append(block)
+    flush()
+    return passages
+
+
+class CorpusIndex:
+    """Immutable BM25 index; build with :meth:`from_documents` or :meth:`load`."""
+
+    def __init__(self, passages: list[tuple[str, str]], idf: dict[str, float],
+                 postings: dict[str, list[tuple[int, float]]], max_idf: float) -> None:
+        self.passages = passages  # (source, text)
+        self.idf = idf
+        self.postings = postings
+        self.max_idf = max_idf
+
+    def __len__(self) -> int:
+        return len(self.passages)
+
+    @classmethod
+    def from_documents(cls, documents: list[tuple[str, str]]) -> CorpusIndex:
+        """Index ``(source, text)`` documents."""
+        passages = [(source, p) for source, text in documents for p in split_passages(text)]
+        term_counts = [Counter(tokenize(text)) for _, text in passages]
+        lengths = [sum(c.values()) for c in term_counts]
+        n = len(passages)
+        avgdl = (sum(lengths) / n) if n else 1.0
+        df: Counter[str] = Counter()
+        for counts in term_counts:
+            df.update(counts.keys())
+        idf = {t: math.log(1 + (n - d + 0.5) / (d + 0.5)) for t, d in df.items()}
+        postings: dict[str, list[tuple[int, float]]] = defaultdict(list)
+        for doc, (counts, length) in enumerate(zip(term_counts, lengths, strict=True)):
+            norm = _K1 * (1 - _B + _B * length / avgdl)
+            for term, tf in counts.items():
+                weight = idf[term] * tf * (_K1 + 1) / (tf + norm)
+                postings[term].append((doc, round(weight, 4)))
+        return cls(passages, idf, dict(postings), math.log(1 + (n + 0.5) / 0.5))
+
+    @classmethod
+    def from_directory(cls, directory: str | Path) -> CorpusIndex:
+        root = Path(directory)
+        documents = [
+            (str(path.relative_to(root)), path.read_text(encoding="utf-8"))
+            for path in sorted(root.rglob("*"))
+            if path.suffix.lower() in (".md", ".txt") and path.is_file()
+        ]
+        return cls.from_documents(documents)
+
+    def search(self, query: str, k: int = 3) -> list[Hit]:
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+        scores: dict[int, float] = defaultdict(float)
+        for term in terms:
+            for doc, weight in self.postings.get(term, ()):
+                scores[doc] += weight
+        ceiling = sum(self.idf.get(t, self.max_idf) for t in terms)
+        best = sorted(scores.items(), key=lambda item: -item[1])[:k]
+        return [Hit(round(min(1.0, score / ceiling), 4), *self.passages[doc])
+                for doc, score in best]
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "version": _INDEX_VERSION,
+            "maxIdf": self.max_idf,
+            "passages": self.passages,
+            "idf": self.idf,
+            "postings": self.postings,
+        }
+
+    @classmethod
+    def from_json(cls, data: dict[str, Any]) -> CorpusIndex:
+        if data.get("version") != _INDEX_VERSION:
+            raise ValueError(f"unsupported corpus index version {data.get('version')!r}")
+        return cls(
+            [(source, text) for source, text in data["passages"]],
+            data["idf"],
+            {t: [(doc, w) for doc, w in plist] for t, plist in data["postings"].items()},
+            data["maxIdf"],
+        )
+
+    def save(self, path: str | Path) -> None:
+        Path(path).write_text(json.dumps(self.to_json(), separators=(",", ":")),
+                              encoding="utf-8")
+
+    @classmethod
+    def load(cls, path: str | Path) -> CorpusIndex:
+        return cls.from_json(json.loads(Path(path).read_text(encoding="utf-8")))
+
+
+_index: CorpusIndex | None = None
+
+
+def enabled() -> bool:
+    """Whether ``queryCorpus`` is answered locally (decides tool registration)."""
+    return bool(LOCAL_CORPUS_DIR or LOCAL_CORPUS_INDEX_PATH)
+
+
+def get_index() -> CorpusIndex | None:
+    return _index
+
+
+def load_configured() -> CorpusIndex | None:
+    """Load the prebuilt index, else build from the directory. Blocking.
+
+    A configured index that is missing or unreadable is logged, not raised:
+    the directory is indexed instead if set, else every ``queryCorpus`` call
+    is pointed at ``queryRemoteCorpus``.
+    """
+    global _index
+    if LOCAL_CORPUS_INDEX_PATH:
+        try:
+            _index = CorpusIndex.load(LOCAL_CORPUS_INDEX_PATH)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning("Cannot load LOCAL_CORPUS_INDEX_PATH=%s: %s",
+                           LOCAL_CORPUS_INDEX_PATH, e)
+        else:
+            logger.info("Loaded local corpus index %s (%d passages)",
+                        LOCAL_CORPUS_INDEX_PATH, len(_index))
+            return _index
+    if LOCAL_CORPUS_DIR:
+        _index = CorpusIndex.from_directory(LOCAL_CORPUS_DIR)
+        logger.info("Indexed local corpus %s (%d passages)", LOCAL_CORPUS_DIR, len(_index))
+    elif _index is None:
+        logger.warning("No local corpus loaded; queryCorpus will defer to queryRemoteCorpus")
+    return _index
+
+
+def answer(question: str) -> tuple[list[Hit], bool]:
+    """Top passages for ``question`` and whether they clear the score bar."""
+    if _index is None:
+        return [], False
+    hits = _index.search(question, LOCAL_CORPUS_MAX_RESULTS)
+    return hits, bool(hits) and hits[0].score >= LOCAL_CORPUS_MIN_SCORE
+
+
+def _main(argv: list[str]) -> int:
+    if len(argv) != 3 or argv[0] != "build":
+        print("usage: python -m app.services.local_corpus build DOCS_DIR INDEX.json",
+              file=sys.stderr)
+        return 2
+    index = CorpusIndex.from_directory(argv[1])
+    index.save(argv[2])
+    print(f"indexed {len(index)} passages, {len(index.postings)} terms -> {argv[2]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main(sys.argv[1:]))
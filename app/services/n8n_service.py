@@ -18,9 +18,23 @@ from app.core.config import (
     N8N_HMAC_SECRET,
     N8N_MAX_RETRIES,
     N8N_RETRY_BACKOFF_SECONDS,
+    N8N_RETRY_MAX_BACKOFF_SECONDS,
     N8N_WEBHOOK_URL,
 )
-from app.core.metrics import n8n_request_duration_seconds, n8n_requests_total
+from app.core.deadline import remaining
+from app.core.log_context import call_debug
+from app.core.metrics import (
+    N8N_OUTCOMES,
+    deadline_exceeded_total,
+    n8n_route_latency,
+)
+from app.core.resilience import (
+    DependencyUnavailableError,
+    full_jitter_backoff,
+    n8n_breaker,
+    n8n_bulkhead,
+)
+from app.services.http_client import get_http_client
 
 logger = logging.getLogger(__name__)
 
@@ -42,7 +56,20 @@ def build_signed_headers(body: bytes) -> dict[str, str]:
 
 
 async def send_transcript_to_n8n(session: dict[str, Any]) -> None:
-    """Forward the full call transcript to the n8n workflow."""
+    """Forward the full call transcript to the n8n workflow.
+
+    When the session carries a ``transcript_stream`` (incremental streaming
+    enabled), the turns have already been shipped and only the completion
+    marker is sent; the full upload is kept as a fallback if streaming lost
+    a batch.
+    """
+    stream = session.get('transcript_stream')
+    if stream is not None:
+        if await stream.close():
+            session['transcript_sent'] = True
+            return
+        logger.warning("Transcript streaming incomplete; falling back to full upload")
+
     logger.info("Sending full transcript to n8n (length=%d)", len(session.get('transcript', '')))
     await send_to_webhook({
         "route": "2",
@@ -56,9 +83,14 @@ async def send_to_webhook(payload: dict[str, Any]) -> str:
     """POST ``payload`` to the configured n8n webhook and return the body text.
 
     Retries up to ``N8N_MAX_RETRIES`` times on timeouts, transport errors, and
-    5xx responses with exponential backoff. Returns a JSON-encoded error
-    string on terminal failure rather than raising, so callers (which often
-    forward the result to the agent) can keep running.
+    5xx responses with full-jitter exponential backoff, and fails fast while
+    the n8n circuit breaker is open or its bulkhead is full. Returns a
+    JSON-encoded error string on terminal failure rather than raising, so
+    callers (which often forward the result to the agent) can keep running.
+
+    Per-attempt timeouts come from the caller's deadline budget (see
+    :mod:`app.core.deadline`), capped at ``HTTP_TIMEOUT_SECONDS``; retries
+    stop early when the budget cannot cover another attempt.
     """
     if not N8N_WEBHOOK_URL:
         logger.error("N8N_WEBHOOK_URL is not configured")
@@ -68,24 +100,41 @@ async def send_to_webhook(payload: dict[str, Any]) -> str:
     headers = build_signed_headers(body)
     attempts = max(1, N8N_MAX_RETRIES)
     last_error: str = "unknown error"
+    latency = n8n_route_latency(payload.get("route"))
 
     for attempt in range(1, attempts + 1):
+        timeout = remaining(HTTP_TIMEOUT_SECONDS)
+        if timeout <= 0:
+            last_error = "timeout: deadline exceeded"
+            deadline_exceeded_total.labels(operation="n8n_webhook").inc()
+            break
+        probe = False
         try:
-            logger.debug(
-                "POST %s payload=%s attempt=%d/%d",
+            probe = n8n_breaker.before_call()
+            call_debug(
+                logger, "POST %s payload=%s attempt=%d/%d",
                 N8N_WEBHOOK_URL, payload, attempt, attempts,
             )
-            t0 = time.monotonic()
-            async with httpx.AsyncClient(timeout=HTTP_TIMEOUT_SECONDS) as client:
-                response = await client.post(
-                    N8N_WEBHOOK_URL, content=body, headers=headers,
-                )
-            n8n_request_duration_seconds.observe(time.monotonic() - t0)
+            async with n8n_bulkhead:
+                t0 = time.monotonic()
+                async with asyncio.timeout(timeout):
+                    response = await get_http_client().post(
+                        N8N_WEBHOOK_URL, content=body, headers=headers,
+                        timeout=timeout,
+                    )
+                latency.observe(time.monotonic() - t0)
 
             if response.status_code == 200:
-                n8n_requests_total.labels(outcome="2xx").inc()
+                n8n_breaker.record_success()
+                N8N_OUTCOMES["2xx"].inc()
                 return response.text
 
+            # 4xx means n8n is up and answering; only 5xx counts against the breaker.
+            if response.status_code >= 500:
+                n8n_breaker.record_failure()
+            else:
+                n8n_breaker.record_success()
+
             # Retry on 5xx; surface 4xx immediately (won't succeed on retry).
             if 500 <= response.status_code < 600 and attempt < attempts:
                 last_error = f"status {response.status_code}"
@@ -95,7 +144,7 @@ async def send_to_webhook(payload: dict[str, Any]) -> str:
                 )
             else:
                 bucket = "5xx" if response.status_code >= 500 else "4xx"
-                n8n_requests_total.labels(outcome=bucket).inc()
+                N8N_OUTCOMES[bucket].inc()
                 logger.warning(
                     "n8n webhook returned %d: %s",
                     response.status_code, response.text,
@@ -104,29 +153,48 @@ async def send_to_webhook(payload: dict[str, Any]) -> str:
                     {"error": f"N8N webhook returned status {response.status_code}"}
                 )
 
-        except httpx.TimeoutException as e:
+        except DependencyUnavailableError as e:
+            # Breaker open or bulkhead full: fail fast, do not retry.
+            n8n_breaker.abandon(probe)
+            N8N_OUTCOMES["rejected"].inc()
+            logger.warning("n8n webhook skipped: %s", e)
+            return json.dumps({"error": f"N8N webhook unavailable: {e.reason}"})
+        except asyncio.CancelledError:
+            n8n_breaker.abandon(probe)
+            raise
+        except (httpx.TimeoutException, TimeoutError) as e:
+            n8n_breaker.record_failure()
             last_error = f"timeout: {e}"
             logger.warning(
                 "Timeout calling n8n webhook (attempt %d/%d): %s",
                 attempt, attempts, e,
             )
         except httpx.TransportError as e:
+            n8n_breaker.record_failure()
             last_error = f"transport error: {e}"
             logger.warning(
                 "Transport error calling n8n webhook (attempt %d/%d): %s",
                 attempt, attempts, e,
             )
         except httpx.HTTPError as e:
-            n8n_requests_total.labels(outcome="transport_error").inc()
+            n8n_breaker.record_failure()
+            N8N_OUTCOMES["transport_error"].inc()
             logger.exception("HTTP error calling n8n webhook")
             return json.dumps({"error": f"N8N webhook HTTP error: {e}"})
 
         if attempt < attempts:
-            await asyncio.sleep(N8N_RETRY_BACKOFF_SECONDS * (2 ** (attempt - 1)))
+            delay = full_jitter_backoff(
+                attempt, N8N_RETRY_BACKOFF_SECONDS, N8N_RETRY_MAX_BACKOFF_SECONDS,
+            )
+            if delay >= remaining(HTTP_TIMEOUT_SECONDS + delay):
+                # Not enough budget left for another attempt after sleeping.
+                deadline_exceeded_total.labels(operation="n8n_webhook").inc()
+                break
+            await asyncio.sleep(delay)
 
     # Final classification of terminal failure for metrics.
     outcome = "timeout" if "timeout" in last_error else "transport_error"
-    n8n_requests_total.labels(outcome=outcome).inc()
-    logger.error("n8n webhook failed after %d attempts: %s", attempts, last_error)
-    return json.dumps({"error": f"N8N webhook failed after {attempts} attempts: {last_error}"})
+    N8N_OUTCOMES[outcome].inc()
+    logger.error("n8n webhook failed after %d attempts: %s", attempt, last_error)
+    return json.dumps({"error": f"N8N webhook failed after {attempt} attempts: {last_error}"})
 
@@ -7,23 +7,30 @@ the full traceback and returns a generic message to the agent.
 """
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
+import time
 from typing import Any, Awaitable, Callable
 
 from pydantic import BaseModel, Field, ValidationError
-from twilio.rest import Client
 from websockets.protocol import State
 
-from app.core.config import (
-    CALENDARS_LIST,
-    TWILIO_ACCOUNT_SID,
-    TWILIO_AUTH_TOKEN,
-)
+from app.core.config import CALENDARS_LIST, TOOL_TIMEOUT_SECONDS
+from app.core.deadline import deadline_scope
 from app.core.prompts import get_stage_prompt, get_stage_voice
 from app.core.shared_state import session_manager
-from app.core.metrics import tool_invocations_total
+from app.core.tenants import current_tenant
+from app.core.metrics import (
+    CORPUS_QUERIES,
+    SCHEDULE_OUTCOMES,
+    tool_duration_seconds,
+    tool_in_flight,
+    tool_invocations_total,
+)
+from app.services import calendar_cache, local_corpus, verification
 from app.services.n8n_service import send_to_webhook, send_transcript_to_n8n
+from app.services.twilio_service import complete_call
 from app.utils.websocket_utils import safe_close_websocket
 
 logger = logging.getLogger(__name__)
@@ -85,56 +92,110 @@ async def _send_tool_error(uv_ws: Any, invocation_id: str, message: str) -> None
 
 # -------- Individual handlers --------------------------------------------------------
 
+_REMOTE_CORPUS_HINT = (
+    "No confident answer in the local knowledge base. "
+    "Call the queryRemoteCorpus tool with the same question."
+)
+
+
 async def handle_queryCorpus(uv_ws: Any, invocation_id: str, params: QueryCorpusParams) -> None:
-    # Ultravox performs the actual corpus query; this client-side hook just logs.
-    logger.info("[Q&A] question=%s", params.question)
+    # Only registered as a client tool with a local corpus; otherwise Ultravox
+    # answers queryCorpus itself and this is never invoked.
+    hits, confident = local_corpus.answer(params.question or "")
+    logger.info("[Q&A] question=%s local_score=%s", params.question,
+                hits[0].score if hits else None)
+    if not confident:
+        CORPUS_QUERIES["fallback"].inc()
+        await _send_tool_result(uv_ws, invocation_id, _REMOTE_CORPUS_HINT)
+        return
+    CORPUS_QUERIES["hit"].inc()
+    result = "\n\n".join(f"[{hit.source}] {hit.text}" for hit in hits)
+    await _send_tool_result(uv_ws, invocation_id, result)
 
 
 async def handle_verify(uv_ws: Any, invocation_id: str, params: VerifyParams) -> None:
-    # Mock verification: a real system would query a database here.
-    confirmed = bool(params.full_name) and bool(params.phone_number)
+    # Backend errors reach the dispatcher's error boundary: "could not check"
+    # must not be reported to the caller as "details do not match".
+    confirmed = await verification.verify(params.full_name, params.phone_number)
     result = "Confirmed" if confirmed else "Not Confirmed"
     logger.info("Verification result for %s: %s", params.full_name, result)
     await _send_tool_result(uv_ws, invocation_id, result)
 
 
+_BOOKING_FAILED = "I'm sorry, I couldn't schedule the meeting at this time."
+
+
 async def handle_schedule_meeting(uv_ws: Any, invocation_id: str,
                                   params: ScheduleMeetingParams) -> None:
-    calendar_id = CALENDARS_LIST.get(params.location)
+    tenant = current_tenant()
+    calendar_id = (tenant.calendars if tenant else CALENDARS_LIST).get(params.location)
     if not calendar_id:
         await _send_tool_error(uv_ws, invocation_id,
                                f"Invalid location: {params.location}")
         return
 
-    # Resolve callerNumber from the active session if we can find it.
-    call_sid, session = await session_manager.find_by_uv_ws(uv_ws)
-    caller_number = session.get("callerNumber", "Unknown") if session else "Unknown"
-
-    payload = {
-        "route": "3",
-        "number": caller_number,
-        "data": json.dumps({
-            "name": params.name,
-            "email": params.email,
-            "purpose": params.purpose,
-            "datetime": params.datetime,
-            "calendar_id": calendar_id,
-        }),
-    }
-    logger.info("Scheduling meeting for callSid=%s", call_sid)
-    webhook_response = await send_to_webhook(payload)
-    try:
-        parsed = json.loads(webhook_response)
-        booking_message = parsed.get(
-            "message", "I'm sorry, I couldn't schedule the meeting at this time."
-        )
-    except json.JSONDecodeError:
-        logger.warning("n8n schedule_meeting returned non-JSON: %s", webhook_response)
-        booking_message = "I'm sorry, I couldn't schedule the meeting at this time."
-
+    # A retried invocation gets the first attempt's answer instead of a second booking.
+    booking_message, replayed = await calendar_cache.bookings.run(
+        invocation_id, lambda: _book_meeting(uv_ws, invocation_id, params, calendar_id),
+    )
+    if replayed:
+        SCHEDULE_OUTCOMES["replayed"].inc()
+        logger.info("schedule_meeting %s replayed from the booking ledger", invocation_id)
     await _send_tool_result(uv_ws, invocation_id, booking_message)
 
 
+async def _book_meeting(uv_ws: Any, invocation_id: str, params: ScheduleMeetingParams,
+                        calendar_id: str) -> str:
+    cache = calendar_cache.get_cache()
+    start = calendar_cache.parse_slot(params.datetime, cache.tz) if cache else None
+    if cache is not None and start is not None:
+        check = await cache.claim(calendar_id, start)
+        if not check.available:
+            SCHEDULE_OUTCOMES["unavailable"].inc()
+            if not check.suggestions:
+                return (f"{params.datetime} is not available at {params.location}, "
+                        "and there are no open times nearby. Ask for another day.")
+            options = "; ".join(calendar_cache.describe(s, cache.tz) for s in check.suggestions)
+            return (f"{params.datetime} is not available at {params.location}. "
+                    f"The nearest open times are: {options}.")
+
+    # From here on the slot may be held; whatever happens, settle it below.
+    booked = False
+    try:
+        # Resolve callerNumber from the active session if we can find it.
+        call_sid, session = await session_manager.find_by_uv_ws(uv_ws)
+        caller_number = session.get("callerNumber", "Unknown") if session else "Unknown"
+
+        payload = {
+            "route": "3",
+            "number": caller_number,
+            "data": json.dumps({
+                "name": params.name,
+                "email": params.email,
+                "purpose": params.purpose,
+                "datetime": params.datetime,
+                "calendar_id": calendar_id,
+                "idempotency_key": invocation_id,
+            }),
+        }
+        logger.info("Scheduling meeting for callSid=%s", call_sid)
+        webhook_response = await send_to_webhook(payload)
+        try:
+            parsed = json.loads(webhook_response)
+        except json.JSONDecodeError:
+            logger.warning("n8n schedule_meeting returned non-JSON: %s", webhook_response)
+            return _BOOKING_FAILED
+        if not isinstance(parsed, dict):
+            logger.warning("n8n schedule_meeting returned a non-object: %s", webhook_response)
+            return _BOOKING_FAILED
+        booked = "error" not in parsed and parsed.get("booked", True) is not False
+        return str(parsed.get("message", _BOOKING_FAILED))
+    finally:
+        SCHEDULE_OUTCOMES["booked" if booked else "failed"].inc()
+        if cache is not None and start is not None:
+            cache.settle(calendar_id, start, booked)
+
+
 async def handle_move_to_main_convo(uv_ws: Any, invocation_id: str,
                                     params: MoveToMainConvoParams) -> None:
     prompt = get_stage_prompt('main_convo')
@@ -196,8 +257,6 @@ async def handle_hangUp(uv_ws: Any, invocation_id: str, params: HangUpParams) ->
 
     try:
         if call_sid:
-            client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
-
             # Defensive: extract canonical 34-char Twilio CallSid if it was wrapped.
             call_sid_str = str(call_sid)
             if len(call_sid_str) > 34 and 'CA' in call_sid_str:
@@ -206,8 +265,9 @@ async def handle_hangUp(uv_ws: Any, invocation_id: str, params: HangUpParams) ->
                 if len(extracted) == 34:
                     call_sid = extracted
 
-            client.calls(call_sid).fetch()
-            client.calls(call_sid).update(status='completed')
+            # A single update is enough: Twilio answers 404 for unknown calls,
+            # so the old fetch() before it was a redundant blocking round trip.
+            await complete_call(call_sid)
             logger.info("Twilio call %s marked completed", call_sid)
 
             if session is not None and not session.get('transcript_sent', False):
@@ -235,6 +295,32 @@ TOOL_HANDLERS: dict[str, tuple[type[BaseModel], ToolHandler]] = {
 }
 
 
+class _ToolMetrics:
+    """Metric children for one tool, bound once instead of per invocation."""
+
+    __slots__ = ("duration", "in_flight", "outcomes")
+
+    _OUTCOMES = ("ok", "invalid_params", "unknown", "error", "timeout")
+
+    def __init__(self, tool: str) -> None:
+        self.outcomes = {
+            outcome: tool_invocations_total.labels(tool=tool, outcome=outcome)
+            for outcome in self._OUTCOMES
+        }
+        self.in_flight = tool_in_flight.labels(tool=tool)
+        self.duration = tool_duration_seconds.labels(tool=tool)
+
+
+_TOOL_METRICS: dict[str, _ToolMetrics] = {name: _ToolMetrics(name) for name in TOOL_HANDLERS}
+# Tool names come from the model; any name outside the registry shares one
+# "unknown" series so a misbehaving model cannot add label values.
+_UNKNOWN_TOOL_METRICS = _ToolMetrics("unknown")
+
+
+def _tool_metrics(toolName: str) -> _ToolMetrics:
+    return _TOOL_METRICS.get(toolName) or _UNKNOWN_TOOL_METRICS
+
+
 async def handle_tool_invocation(uv_ws: Any, toolName: str, invocationId: str,
                                  parameters: dict[str, Any]) -> None:
     """Validate params for ``toolName`` and dispatch to the registered handler."""
@@ -243,16 +329,17 @@ async def handle_tool_invocation(uv_ws: Any, toolName: str, invocationId: str,
     entry = TOOL_HANDLERS.get(toolName)
     if entry is None:
         logger.warning("Unknown tool: %s", toolName)
-        tool_invocations_total.labels(tool=toolName, outcome="unknown").inc()
+        _UNKNOWN_TOOL_METRICS.outcomes["unknown"].inc()
         await _send_tool_error(uv_ws, invocationId, f"Unknown tool: {toolName}")
         return
 
     model_cls, handler = entry
+    outcomes = _tool_metrics(toolName).outcomes
     try:
         validated = model_cls(**(parameters or {}))
     except ValidationError as e:
         logger.warning("Invalid parameters for tool %s: %s", toolName, e)
-        tool_invocations_total.labels(tool=toolName, outcome="invalid_params").inc()
+        outcomes["invalid_params"].inc()
         # Match the legacy behavior for schedule_meeting: ask the agent for the
         # missing fields instead of returning a hard error.
         if toolName == "schedule_meeting":
@@ -269,10 +356,10 @@ async def handle_tool_invocation(uv_ws: Any, toolName: str, invocationId: str,
 
     try:
         await handler(uv_ws, invocationId, validated)
-        tool_invocations_total.labels(tool=toolName, outcome="ok").inc()
+        outcomes["ok"].inc()
     except Exception:
         logger.exception("Handler for tool %s raised", toolName)
-        tool_invocations_total.labels(tool=toolName, outcome="error").inc()
+        outcomes["error"].inc()
         try:
             await _send_tool_error(
                 uv_ws, invocationId, f"An error occurred while processing {toolName}."
@@ -280,3 +367,32 @@ async def handle_tool_invocation(uv_ws: Any, toolName: str, invocationId: str,
         except Exception:
             logger.exception("Failed to send error result for tool %s", toolName)
 
+
+async def run_tool_invocation(uv_ws: Any, toolName: str, invocationId: str,
+                              parameters: dict[str, Any],
+                              timeout: float = TOOL_TIMEOUT_SECONDS) -> None:
+    """Supervised entry point for running a tool as its own task.
+
+    Bounds :func:`handle_tool_invocation` by ``timeout`` (the same value
+    advertised to Ultravox), which is also the deadline budget for any n8n
+    call the handler makes. Tracks in-flight count and duration per tool.
+    """
+    metrics = _tool_metrics(toolName)
+    metrics.in_flight.inc()
+    t0 = time.monotonic()
+    try:
+        with deadline_scope(timeout):
+            async with asyncio.timeout(timeout):
+                await handle_tool_invocation(uv_ws, toolName, invocationId, parameters)
+    except TimeoutError:
+        logger.warning("Tool %s timed out after %.1fs", toolName, timeout)
+        metrics.outcomes["timeout"].inc()
+        try:
+            await _send_tool_error(
+                uv_ws, invocationId, f"{toolName} took too long to respond."
+            )
+        except Exception:
+            logger.exception("Failed to send timeout result for tool %s", toolName)
+    finally:
+        metrics.in_flight.dec()
+        metrics.duration.observe(time.monotonic() - t0)
@@ -0,0 +1,155 @@
+"""
+Incremental transcript streaming to n8n.
+
+When ``N8N_TRANSCRIPT_STREAMING`` is enabled, finalized turns are batched and
+POSTed to n8n on route ``4`` while the call is still live, so downstream work
+(CRM notes, summaries) can start before hang-up. Every batch carries a
+monotonically increasing ``seq``; up to ``N8N_TRANSCRIPT_MAX_IN_FLIGHT`` batches
+may be in flight at once, so the workflow should order by ``seq`` rather than
+by arrival. At the end of the call only a small completion marker
+(``final: true``) is sent instead of the full transcript.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from typing import Any
+
+from app.core.config import (
+    N8N_TRANSCRIPT_BATCH_TURNS,
+    N8N_TRANSCRIPT_FLUSH_SECONDS,
+    N8N_TRANSCRIPT_MAX_IN_FLIGHT,
+)
+from app.services.n8n_service import send_to_webhook
+
+logger = logging.getLogger(__name__)
+
+# n8n route identifier for incremental transcript batches and the final marker.
+N8N_ROUTE_TRANSCRIPT_CHUNK = "4"
+
+
+def _is_error_result(result: str) -> bool:
+    """True when ``send_to_webhook`` reported a terminal failure."""
+    try:
+        parsed = json.loads(result)
+    except (TypeError, json.JSONDecodeError):
+        return False
+    return isinstance(parsed, dict) and set(parsed) == {"error"}
+
+
+class TranscriptStreamer:
+    """Per-call batcher that ships finalized turns to n8n as they happen.
+
+    ``add_turn`` is synchronous and never blocks the media path: full batches
+    are handed to background tasks bounded by a per-call semaphore. A timer
+    armed by the first buffered turn flushes a partial batch after
+    ``flush_seconds``, even if no further turn arrives. Call :meth:`close`
+    once at the end of the call.
+    """
+
+    def __init__(self, call_sid: str | None, caller_number: str, *,
+                 batch_turns: int = N8N_TRANSCRIPT_BATCH_TURNS,
+                 flush_seconds: float = N8N_TRANSCRIPT_FLUSH_SECONDS,
+                 max_in_flight: int = N8N_TRANSCRIPT_MAX_IN_FLIGHT) -> None:
+        self.call_sid = call_sid
+        self.caller_number = caller_number
+        self._batch_turns = max(1, batch_turns)
+        self._flush_seconds = flush_seconds
+        self._semaphore = asyncio.Semaphore(max(1, max_in_flight))
+        self._pending: list[str] = []
+        self._flush_timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+        self.seq = 0
+        self.turns_sent = 0
+        self.failed = False
+        self.closed = False
+        self._closing: asyncio.Future[bool] | None = None
+
+    def add_turn(self, role: str, text: str) -> None:
+        """Buffer one finalized turn, flushing when the batch is full or stale."""
+        if self.closed:
+            return
+        self._pending.append(f"{role}: {text}\n")
+        if len(self._pending) >= self._batch_turns or self._flush_seconds <= 0:
+            self.flush()
+        elif self._flush_timer is None:
+            self._flush_timer = asyncio.get_running_loop().call_later(
+                self._flush_seconds, self.flush)
+
+    def flush(self) -> None:
+        """Dispatch whatever is buffered as the next sequenced batch."""
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        if not self._pending:
+            return
+        self.seq += 1
+        payload = self._payload(seq=self.seq, data="".join(self._pending),
+                                turns=len(self._pending), final=False)
+        self.turns_sent += len(self._pending)
+        self._pending = []
+        task = asyncio.create_task(self._send(payload), name="transcript-batch")
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def close(self) -> bool:
+        """Flush, wait for in-flight batches, then send the completion marker.
+
+        Returns ``True`` only if every batch and the marker were accepted, so
+        the caller can fall back to a full-transcript upload otherwise. Safe
+        to call more than once, and shielded: if the caller (e.g. a hangUp
+        tool task) is cancelled mid-close, a later caller awaits the same
+        outcome instead of assuming success.
+        """
+        if self._closing is None:
+            self.flush()
+            self.closed = True
+            self._closing = asyncio.ensure_future(self._finish())
+        return await asyncio.shield(self._closing)
+
+    async def _finish(self) -> bool:
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self.failed:
+            logger.warning(
+                "Transcript streaming lost a batch (CallSid=%s); not sending completion marker",
+                self.call_sid,
+            )
+            return False
+
+        marker = self._payload(seq=self.seq + 1, data="", turns=self.turns_sent,
+                               final=True)
+        marker["batches"] = self.seq
+        result = await send_to_webhook(marker)
+        if _is_error_result(result):
+            self.failed = True
+            return False
+        logger.info("Transcript stream completed: %d turns in %d batches",
+                    self.turns_sent, self.seq)
+        return True
+
+    def _payload(self, *, seq: int, data: str, turns: int,
+                 final: bool) -> dict[str, Any]:
+        return {
+            "route": N8N_ROUTE_TRANSCRIPT_CHUNK,
+            "number": self.caller_number,
+            "callSid": self.call_sid,
+            "seq": seq,
+            "turns": turns,
+            "final": final,
+            "data": data,
+        }
+
+    async def _send(self, payload: dict[str, Any]) -> None:
+        async with self._semaphore:
+            try:
+                result = await send_to_webhook(payload)
+            except Exception:
+                logger.exception("Error streaming transcript batch seq=%d", payload["seq"])
+                self.failed = True
+                return
+        if _is_error_result(result):
+            logger.warning("n8n rejected transcript batch seq=%d: %s",
+                           payload["seq"], result)
+            self.failed = True
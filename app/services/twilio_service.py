@@ -0,0 +1,99 @@
+"""
+Shared Twilio REST client, kept off the event loop.
+
+The Twilio helper library is synchronous (``requests`` under the hood), so a
+bare ``client.calls(...).update(...)`` inside a coroutine freezes audio for
+every call in the process while the HTTP round trip runs. All REST
+operations here go through one process-wide ``Client`` (one pooled HTTP
+session) and run on a small dedicated thread pool; latency is recorded per
+operation in ``voxflow_twilio_rest_duration_seconds``.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, TypeVar
+
+from app.core.config import (
+    TWILIO_ACCOUNT_SID,
+    TWILIO_AUTH_TOKEN,
+    TWILIO_REST_MAX_WORKERS,
+)
+from app.core.metrics import twilio_rest_duration_seconds
+
+if TYPE_CHECKING:
+    from twilio.rest import Client
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_executor: ThreadPoolExecutor | None = None
+_client: Client | None = None
+
+
+def get_twilio_client() -> Client:
+    """Return the process-wide Twilio client, creating it on first use."""
+    global _client
+    if _client is None:
+        # Imported here: twilio.rest pulls in requests and friends, which the
+        # webhook/media hot paths never need, so keep it off the startup path.
+        from twilio.rest import Client
+
+        _client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
+    return _client
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=max(1, TWILIO_REST_MAX_WORKERS),
+            thread_name_prefix="twilio-rest",
+        )
+    return _executor
+
+
+async def _run(operation: str, fn: Callable[[], T]) -> T:
+    """Run blocking ``fn`` on the Twilio pool and time it as ``operation``."""
+    loop = asyncio.get_running_loop()
+    outcome = "ok"
+    t0 = time.monotonic()
+    try:
+        return await loop.run_in_executor(_get_executor(), fn)
+    except Exception:
+        outcome = "error"
+        raise
+    finally:
+        twilio_rest_duration_seconds.labels(
+            operation=operation, outcome=outcome,
+        ).observe(time.monotonic() - t0)
+
+
+async def create_call(**kwargs: Any) -> Any:
+    """``client.calls.create(**kwargs)`` without blocking the event loop."""
+    return await _run("calls.create", lambda: get_twilio_client().calls.create(**kwargs))
+
+
+async def fetch_call(call_sid: str) -> Any:
+    """``client.calls(call_sid).fetch()`` without blocking the event loop."""
+    return await _run("calls.fetch", lambda: get_twilio_client().calls(call_sid).fetch())
+
+
+async def complete_call(call_sid: str) -> None:
+    """Mark ``call_sid`` completed (hang up) with a single REST request."""
+    await _run(
+        "calls.update",
+        lambda: get_twilio_client().calls(call_sid).update(status='completed'),
+    )
+
+
+def shutdown() -> None:
+    """Stop the worker threads; pending operations are allowed to finish."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+        _executor = None
@@ -3,44 +3,67 @@ Services for interacting with Ultravox voice AI.
 """
 from __future__ import annotations
 
+import asyncio
 import logging
+import time
+from typing import Any
 
 import httpx
 
 from app.core.config import (
     HTTP_TIMEOUT_SECONDS,
     N8N_WEBHOOK_URL,
+    TOOL_TIMEOUT_SECONDS,
     ULTRAVOX_API_KEY,
     ULTRAVOX_BUFFER_SIZE,
     ULTRAVOX_CORPUS_ID,
     ULTRAVOX_MODEL,
+    ULTRAVOX_PREWARM_JOIN_TIMEOUT_SECONDS,
     ULTRAVOX_SAMPLE_RATE,
     ULTRAVOX_TEMPERATURE,
     ULTRAVOX_TURN_ENDPOINT_DELAY,
     ULTRAVOX_VOICE,
 )
+from app.core.deadline import remaining
+from app.core.metrics import PREWARM, deadline_exceeded_total
+from app.core.resilience import (
+    DependencyUnavailableError,
+    ultravox_breaker,
+    ultravox_bulkhead,
+)
+from app.core.tenants import current_tenant
+from app.services import local_corpus
+from app.services.http_client import get_http_client
 
 logger = logging.getLogger(__name__)
 
 ULTRAVOX_CALLS_URL = "https://api.ultravox.ai/api/calls"
 
+# Matches the local supervision timeout in tools_service.run_tool_invocation.
+_TOOL_TIMEOUT = f"{TOOL_TIMEOUT_SECONDS:g}s"
+
 
-async def create_ultravox_call(system_prompt: str, first_message: str) -> str:
+async def create_ultravox_call(system_prompt: str, first_message: str,
+                               join_timeout: float | None = None) -> str:
     """Create an Ultravox call in serverWebSocket mode and return its ``joinUrl``.
 
     Returns an empty string on failure (matching the previous contract); the
-    caller is expected to treat empty as "could not establish call".
+    caller is expected to treat empty as "could not establish call". Fails
+    fast without a request while the Ultravox circuit breaker is open, and
+    bounds the request by the caller's deadline budget. ``join_timeout``
+    (seconds) overrides how long Ultravox keeps an unjoined call.
     """
     headers: dict[str, str] = {
         "X-API-Key": ULTRAVOX_API_KEY or "",
         "Content-Type": "application/json",
     }
 
+    tenant = current_tenant()
     payload = {
         "systemPrompt": system_prompt,
-        "model": ULTRAVOX_MODEL,
-        "voice": ULTRAVOX_VOICE,
-        "temperature": ULTRAVOX_TEMPERATURE,
+        "model": tenant.ultravox_model if tenant else ULTRAVOX_MODEL,
+        "voice": tenant.ultravox_voice if tenant else ULTRAVOX_VOICE,
+        "temperature": tenant.ultravox_temperature if tenant else ULTRAVOX_TEMPERATURE,
         "initialMessages": [
             {
                 "role": "MESSAGE_ROLE_USER",
@@ -59,19 +82,49 @@ async def create_ultravox_call(system_prompt: str, first_message: str) -> str:
             "minimumTurnDuration": "0s",
             "minimumInterruptionDuration": "0.09s",
         },
-        "selectedTools": _build_selected_tools(),
+        "selectedTools": selected_tools(),
     }
+    if join_timeout is not None:
+        payload["joinTimeout"] = f"{join_timeout:g}s"
 
+    timeout = remaining(HTTP_TIMEOUT_SECONDS)
+    if timeout <= 0:
+        deadline_exceeded_total.labels(operation="ultravox_create_call").inc()
+        logger.warning("Ultravox create-call skipped: deadline exceeded")
+        return ""
+
+    probe = False
     try:
-        async with httpx.AsyncClient(timeout=HTTP_TIMEOUT_SECONDS) as client:
-            resp = await client.post(ULTRAVOX_CALLS_URL, headers=headers, json=payload)
+        probe = ultravox_breaker.before_call()
+        async with ultravox_bulkhead, asyncio.timeout(timeout):
+            resp = await get_http_client().post(
+                ULTRAVOX_CALLS_URL, headers=headers, json=payload, timeout=timeout,
+            )
+    except DependencyUnavailableError as e:
+        ultravox_breaker.abandon(probe)
+        logger.warning("Ultravox create-call skipped: %s", e)
+        return ""
+    except asyncio.CancelledError:
+        ultravox_breaker.abandon(probe)
+        raise
+    except TimeoutError:
+        ultravox_breaker.record_failure()
+        deadline_exceeded_total.labels(operation="ultravox_create_call").inc()
+        logger.warning("Ultravox create-call exceeded %.2fs budget", timeout)
+        return ""
     except httpx.TimeoutException as e:
+        ultravox_breaker.record_failure()
         logger.warning("Ultravox create-call timed out: %s", e)
         return ""
     except httpx.HTTPError:
+        ultravox_breaker.record_failure()
         logger.exception("Ultravox create-call request failed")
         return ""
 
+    if resp.status_code >= 500:
+        ultravox_breaker.record_failure()
+    else:
+        ultravox_breaker.record_success()
     if resp.status_code >= 400:
         logger.error(
             "Ultravox create-call error: %d %s", resp.status_code, resp.text
@@ -84,7 +137,93 @@ async def create_ultravox_call(system_prompt: str, first_message: str) -> str:
     return join_url
 
 
-def _build_selected_tools() -> list[dict]:
+class PrewarmedCall:
+    """An Ultravox call created speculatively while the callee's phone rings.
+
+    Creation starts at construction; :meth:`join_url` hands the result to the
+    media stream on pickup and :meth:`release` abandons it (no-answer, busy).
+    An abandoned or expired call is never joined and lapses on the Ultravox
+    side after ``ULTRAVOX_PREWARM_JOIN_TIMEOUT_SECONDS``.
+    """
+
+    __slots__ = ("created", "task")
+
+    # Don't hand out a joinUrl this close to its join timeout.
+    _EXPIRY_MARGIN_SECONDS = 5.0
+
+    def __init__(self, system_prompt: str, first_message: str) -> None:
+        self.created = time.monotonic()
+        self.task: asyncio.Task[str] = asyncio.create_task(
+            create_ultravox_call(system_prompt, first_message,
+                                 join_timeout=ULTRAVOX_PREWARM_JOIN_TIMEOUT_SECONDS),
+            name="ultravox-prewarm",
+        )
+        PREWARM["started"].inc()
+
+    async def join_url(self) -> str:
+        """The pre-created joinUrl, or ``""`` if it failed, expired or timed out.
+
+        Waits for at most half of the remaining deadline budget, so creating a
+        call on answer still has time when the pre-warm is slow.
+        """
+        age = time.monotonic() - self.created
+        if age > ULTRAVOX_PREWARM_JOIN_TIMEOUT_SECONDS - self._EXPIRY_MARGIN_SECONDS:
+            self.task.cancel()
+            PREWARM["expired"].inc()
+            return ""
+        wait = max(0.0, remaining(HTTP_TIMEOUT_SECONDS)) / 2
+        done, _ = await asyncio.wait({self.task}, timeout=wait)
+        join_url = ""
+        if not done:
+            self.task.cancel()
+        elif not self.task.cancelled() and self.task.exception() is None:
+            join_url = self.task.result()
+        PREWARM["used" if join_url else "failed"].inc()
+        return join_url
+
+    def release(self) -> None:
+        self.task.cancel()
+        PREWARM["released"].inc()
+
+
+def _corpus_tools(corpus_id: str = ULTRAVOX_CORPUS_ID) -> list[dict]:
+    """``queryCorpus``: hosted by Ultravox, or answered from the local index.
+
+    With a local corpus the hosted one stays available under the
+    ``queryRemoteCorpus`` name for questions the local index cannot answer.
+    """
+    remote: dict[str, Any] = {
+        "toolName": "queryCorpus",
+        "parameterOverrides": {
+            "corpus_id": corpus_id,
+            "max_results": 5,
+        },
+    }
+    if not local_corpus.enabled():
+        return [remote]
+    local = {
+        "temporaryTool": {
+            "modelToolName": "queryCorpus",
+            "description": "Look up answers about our services, policies and locations.",
+            "dynamicParameters": [
+                {
+                    "name": "question",
+                    "location": "PARAMETER_LOCATION_BODY",
+                    "schema": {
+                        "type": "string",
+                        "description": "The customer's question, in full.",
+                    },
+                    "required": True,
+                },
+            ],
+            "timeout": _TOOL_TIMEOUT,
+            "client": {},
+        },
+    }
+    return [local, {**remote, "nameOverride": "queryRemoteCorpus"}]
+
+
+def _build_selected_tools(corpus_id: str = ULTRAVOX_CORPUS_ID) -> list[dict]:
     """Return the static Ultravox tool registration list."""
     return [
         {
@@ -92,17 +231,11 @@ def _build_selected_tools() -> list[dict]:
                 "modelToolName": "move_to_call_summary",
                 "description": "Transition to the call summary stage when the conversation is ready to conclude",
                 "dynamicParameters": [],
-                "timeout": "20s",
+                "timeout": _TOOL_TIMEOUT,
                 "client": {},
             },
         },
-        {
-            "toolName": "queryCorpus",
-            "parameterOverrides": {
-                "corpus_id": ULTRAVOX_CORPUS_ID,
-                "max_results": 5,
-            },
-        },
+        *_corpus_tools(corpus_id),
         {
             "temporaryTool": {
                 "modelToolName": "schedule_meeting",
@@ -161,7 +294,7 @@ def _build_selected_tools() -> list[dict]:
                         "required": True,
                     },
                 ],
-                "timeout": "20s",
+                "timeout": _TOOL_TIMEOUT,
                 "http": {
                     "baseUrlPattern": N8N_WEBHOOK_URL,
                     "httpMethod": "POST",
@@ -214,9 +347,29 @@ def _build_selected_tools() -> list[dict]:
                         "required": False,
                     },
                 ],
-                "timeout": "20s",
+                "timeout": _TOOL_TIMEOUT,
                 "client": {},
             },
         },
     ]
 
+
+_default_tools: list[dict] | None = None
+
+
+def selected_tools() -> list[dict]:
+    """Tool list for the current tenant, built once per tenant and reused.
+
+    The list is only ever serialised, never mutated, so every call of a
+    tenant shares one copy.
+    """
+    global _default_tools
+    tenant = current_tenant()
+    if tenant is None:
+        if _default_tools is None:
+            _default_tools = _build_selected_tools()
+        return _default_tools
+    tools = tenant.cache.get("tools")
+    if tools is None:
+        tools = tenant.cache["tools"] = _build_selected_tools(tenant.corpus_id)
+    return tools
@@ -0,0 +1,395 @@
+"""
+Customer identity verification for the ``verify`` tool.
+
+A backend answers "which customer names are on file for this phone number";
+:func:`verify` then fuzzy-matches the name the caller gave against them.
+``VERIFY_BACKEND`` selects one:
+
+* ``mock`` (default) — the original behaviour: confirmed whenever both a
+  name and a number were given.
+* ``csv`` / ``sqlite`` — :class:`CustomerIndex`, an in-memory index of
+  ``VERIFY_SOURCE_PATH`` keyed by normalised phone number, loaded at startup
+  and refreshed off the event loop when the file changes (checked at most
+  every ``VERIFY_RELOAD_INTERVAL_SECONDS``). A CSV that was only appended
+  to is read from the previous end; any other change rebuilds the index and
+  swaps it in whole.
+* ``n8n`` — :class:`N8nBackend`, a lookup on n8n route ``5`` with a
+  ``VERIFY_CACHE_SIZE`` LRU (``VERIFY_CACHE_TTL_SECONDS``) in front of it.
+
+Phone numbers are compared on their last ten digits, so ``+1 (555)
+123-4567`` and ``5551234567`` are the same key. Names are case-, accent- and
+punctuation-insensitive; a spoken name matches when its words are a subset
+of the record's (middle names may be omitted) or the word-sorted similarity
+reaches ``VERIFY_NAME_THRESHOLD``.
+"""
+from __future__ import annotations
+
+import abc
+import asyncio
+import csv
+import io
+import json
+import logging
+import os
+import re
+import sqlite3
+import string
+import time
+import unicodedata
+from collections import OrderedDict
+from collections.abc import Iterable, Sequence
+from difflib import SequenceMatcher
+
+from app.core.config import (
+    VERIFY_BACKEND,
+    VERIFY_CACHE_SIZE,
+    VERIFY_CACHE_TTL_SECONDS,
+    VERIFY_NAME_THRESHOLD,
+    VERIFY_RELOAD_INTERVAL_SECONDS,
+    VERIFY_SOURCE_PATH,
+    VERIFY_SQLITE_QUERY,
+)
+from app.core.metrics import VERIFY_LOOKUP_SECONDS, VERIFY_RESULTS
+from app.core.resilience import DependencyUnavailableError
+from app.services.n8n_service import send_to_webhook
+
+logger = logging.getLogger(__name__)
+
+N8N_ROUTE_VERIFY = "5"
+
+_NON_DIGITS = re.compile(r"\D")
+_NON_LETTERS = re.compile(r"[^\w\s]|\d|_")
+_ASCII_NON_LETTERS = str.maketrans(dict.fromkeys(string.punctuation + string.digits, " "))
+
+_PHONE_COLUMNS = ("phone", "phone_number", "phonenumber")
+_NAME_COLUMNS = ("name", "full_name", "fullname")
+
+# Names on file per phone key: one name, or a tuple when a number is shared.
+Names = str | tuple[str, ...]
+
+
+def phone_key(raw: str) -> int | None:
+    """Last ten digits of ``raw`` as an int (``None`` if under seven digits)."""
+    digits = raw.removeprefix("+")
+    if not digits.isdigit():
+        digits = _NON_DIGITS.sub("", raw)
+    if len(digits) < 7:
+        return None
+    return int(digits[-10:])
+
+
+def normalize_name(raw: str) -> str:
+    if raw.isascii():  # the common case; skips Unicode decomposition
+        return " ".join(raw.lower().translate(_ASCII_NON_LETTERS).split())
+    decomposed = unicodedata.normalize("NFKD", raw.casefold())
+    letters = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(_NON_LETTERS.sub(" ", letters).split())
+
+
+def name_matches(spoken: str, recorded: str, threshold: float = VERIFY_NAME_THRESHOLD) -> bool:
+    """Compare two :func:`normalize_name` outputs."""
+    if not spoken or not recorded:
+        return False
+    if spoken == recorded:
+        return True
+    said, on_file = spoken.split(), recorded.split()
+    if len(said) >= 2 and set(said) <= set(on_file):
+        return True
+    ratio = SequenceMatcher(None, " ".join(sorted(said)), " ".join(sorted(on_file))).ratio()
+    return ratio >= threshold
+
+
+def _as_tuple(names: Names | None) -> tuple[str, ...]:
+    if names is None:
+        return ()
+    return (names,) if isinstance(names, str) else names
+
+
+def _add(index: dict[int, Names], key: int, name: str) -> None:
+    existing = index.get(key)
+    if existing is None:
+        index[key] = name
+    elif name not in _as_tuple(existing):
+        index[key] = (*_as_tuple(existing), name)
+
+
+class VerificationBackend(abc.ABC):
+    """Base class: look up the names on file for a phone number.
+
+    ``name`` is the backend's ``voxflow_verify_lookup_seconds`` label.
+    """
+
+    name: str
+
+    @abc.abstractmethod
+    async def names_for(self, phone: str) -> tuple[str, ...]:
+        """Normalised names on file for ``phone``; empty when unknown."""
+
+    async def verify(self, full_name: str, phone: str) -> bool:
+        spoken = normalize_name(full_name)
+        if not spoken:
+            return False
+        return any(name_matches(spoken, n) for n in await self.names_for(phone))
+
+
+class MockBackend(VerificationBackend):
+    """Confirms any non-empty name and number (no customer data)."""
+
+    name = "mock"
+
+    async def names_for(self, phone: str) -> tuple[str, ...]:
+        return ()
+
+    async def verify(self, full_name: str, phone: str) -> bool:
+        return bool(full_name) and bool(phone)
+
+
+def _columns(header: Sequence[str]) -> tuple[int, tuple[int, ...]]:
+    """Indexes of the phone column and the name column(s) in a CSV header."""
+    fields = [h.strip().lower() for h in header]
+    phone = next((fields.index(c) for c in _PHONE_COLUMNS if c in fields), None)
+    name: tuple[int, ...] | None = next(
+        ((fields.index(c),) for c in _NAME_COLUMNS if c in fields), None)
+    if name is None and "first_name" in fields and "last_name" in fields:
+        name = (fields.index("first_name"), fields.index("last_name"))
+    if phone is None or name is None:
+        raise ValueError(f"CSV needs a phone and a name column, got {header!r}")
+    return phone, name
+
+
+class CustomerIndex(VerificationBackend):
+    """Phone-keyed in-memory index over a CSV file or SQLite database."""
+
+    _TAIL = 64  # bytes before the read offset used to detect a pure append
+
+    def __init__(self, path: str, kind: str = "csv", *, query: str = VERIFY_SQLITE_QUERY,
+                 reload_interval: float = VERIFY_RELOAD_INTERVAL_SECONDS) -> None:
+        if kind not in ("csv", "sqlite"):
+            raise ValueError(f"unknown customer index kind {kind!r}")
+        self.path = path
+        self.kind = kind
+        self.name = kind
+        self.query = query
+        self.reload_interval = reload_interval
+        self._index: dict[int, Names] = {}
+        self._signature: tuple[int, ...] | None = None
+        self._columns: tuple[int, tuple[int, ...]] | None = None
+        self._offset = 0
+        self._tail = b""
+        self._checked_at = 0.0
+        self._refreshing: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    # ---- loading (blocking; call via asyncio.to_thread) ------------------------
+
+    def _stat_signature(self) -> tuple[int, ...]:
+        paths = [self.path] + ([f"{self.path}-wal"] if self.kind == "sqlite" else [])
+        signature: list[int] = []
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            signature += (st.st_mtime_ns, st.st_size)
+        return tuple(signature)
+
+    def _rows_from_csv(self, data: bytes) -> Iterable[tuple[str, str]]:
+        assert self._columns is not None
+        phone_col, name_cols = self._columns
+        for row in csv.reader(io.StringIO(data.decode("utf-8-sig"))):
+            if len(row) > max(phone_col, *name_cols):
+                yield row[phone_col], " ".join(row[i] for i in name_cols)
+
+    def _rows_from_sqlite(self) -> Iterable[tuple[str, str]]:
+        conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+        try:
+            for phone, name in conn.execute(self.query):
+                yield str(phone or ""), str(name or "")
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _build(rows: Iterable[tuple[str, str]], index: dict[int, Names]) -> None:
+        # Full names repeat a lot across a customer list; normalising each
+        # distinct one once also makes the index share one string per name.
+        seen: dict[str, str] = {}
+        for phone, name in rows:
+            key = phone_key(phone)
+            normalized = seen.get(name)
+            if normalized is None:
+                normalized = seen[name] = normalize_name(name)
+            if key is not None and normalized:
+                _add(index, key, normalized)
+
+    def load(self) -> int:
+        """Read the whole source and swap the new index in; returns its size."""
+        signature = self._stat_signature()
+        index: dict[int, Names] = {}
+        if self.kind == "sqlite":
+            self._build(self._rows_from_sqlite(), index)
+        else:
+            with open(self.path, "rb") as f:
+                data = f.read()
+            header_end = data.find(b"\n") + 1 or len(data)
+            header = next(csv.reader([data[:header_end].decode("utf-8-sig")]), [])
+            self._columns = _columns(header)
+            self._build(self._rows_from_csv(data[header_end:]), index)
+            # Appends are read from the last line break; an unterminated last
+            # row is read again then, which _add de-duplicates.
+            end = max(data.rfind(b"\n") + 1, header_end)
+            self._offset = end
+            self._tail = data[max(0, end - self._TAIL):end]
+        self._index = index
+        self._signature = signature
+        return len(index)
+
+    def _appended_only(self, f: io.BufferedReader, size: int) -> bool:
+        if self._columns is None or size < self._offset:
+            return False
+        f.seek(self._offset - len(self._tail))
+        return f.read(len(self._tail)) == self._tail
+
+    def refresh(self) -> str:
+        """Pick up changes: ``unchanged``, ``appended`` or ``reloaded``."""
+        signature = self._stat_signature()
+        if signature == self._signature:
+            return "unchanged"
+        if self.kind == "csv":
+            with open(self.path, "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                if self._appended_only(f, size):
+                    data = f.read()
+                    end = data.rfind(b"\n") + 1
+                    # Writes into a live dict: each insert is atomic under the GIL.
+                    self._build(self._rows_from_csv(data[:end]), self._index)
+                    if end:
+                        self._tail = (self._tail + data[:end])[-self._TAIL:]
+                        self._offset += end
+                    self._signature = signature
+                    return "appended"
+        self.load()
+        return "reloaded"
+
+    # ---- lookups ------------------------------------------------------------------
+
+    def _maybe_refresh(self) -> None:
+        now = time.monotonic()
+        if now - self._checked_at < self.reload_interval:
+            return
+        if self._refreshing is not None and not self._refreshing.done():
+            return
+        self._checked_at = now
+        self._refreshing = asyncio.create_task(self._refresh(), name="verify-index-refresh")
+
+    async def _refresh(self) -> None:
+        try:
+            outcome = await asyncio.to_thread(self.refresh)
+        except (OSError, ValueError, sqlite3.Error) as e:
+            logger.warning("Customer index refresh from %s failed: %s", self.path, e)
+            return
+        if outcome != "unchanged":
+            logger.info("Customer index %s (%d numbers)", outcome, len(self._index))
+
+    async def names_for(self, phone: str) -> tuple[str, ...]:
+        self._maybe_refresh()
+        key = phone_key(phone)
+        return _as_tuple(self._index.get(key)) if key is not None else ()
+
+
+class N8nBackend(VerificationBackend):
+    """Names for a number from n8n (route 5), cached in a TTL'd LRU.
+
+    n8n answers ``{"names": ["Jane Doe", ...]}``; an empty list (number
+    unknown) is cached like any other answer.
+    """
+
+    name = "n8n"
+
+    def __init__(self, cache_size: int = VERIFY_CACHE_SIZE,
+                 ttl: float = VERIFY_CACHE_TTL_SECONDS) -> None:
+        self.cache_size = cache_size
+        self.ttl = ttl
+        self._cache: OrderedDict[int, tuple[float, tuple[str, ...]]] = OrderedDict()
+
+    async def names_for(self, phone: str) -> tuple[str, ...]:
+        key = phone_key(phone)
+        if key is None:
+            return ()
+        now = time.monotonic()
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] > now:
+            self._cache.move_to_end(key)
+            return cached[1]
+        names = await self._fetch(key)
+        if self.cache_size > 0:
+            self._cache[key] = (now + self.ttl, names)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return names
+
+    async def _fetch(self, key: int) -> tuple[str, ...]:
+        text = await send_to_webhook({
+            "route": N8N_ROUTE_VERIFY,
+            "number": str(key),
+            "data": "lookup",
+        })
+        try:
+            body = json.loads(text)
+        except json.JSONDecodeError:
+            raise DependencyUnavailableError("n8n", "non-JSON verify response") from None
+        if not isinstance(body, dict) or "names" not in body:
+            reason = body.get("error") if isinstance(body, dict) else None
+            raise DependencyUnavailableError("n8n", str(reason or "malformed verify response"))
+        return tuple(n for n in map(normalize_name, body["names"] or ()) if n)
+
+
+def create_backend(kind: str = VERIFY_BACKEND,
+                   path: str | None = VERIFY_SOURCE_PATH) -> VerificationBackend:
+    if kind == "mock":
+        return MockBackend()
+    if kind == "n8n":
+        return N8nBackend()
+    if kind in ("csv", "sqlite"):
+        if not path:
+            raise ValueError(f"VERIFY_BACKEND={kind} needs VERIFY_SOURCE_PATH")
+        return CustomerIndex(path, kind)
+    raise ValueError(f"unknown VERIFY_BACKEND {kind!r}")
+
+
+_backend: VerificationBackend | None = None
+
+
+def get_backend() -> VerificationBackend:
+    global _backend
+    if _backend is None:
+        _backend = create_backend()
+    return _backend
+
+
+def load() -> None:
+    """Load a file-backed index at startup. Blocking."""
+    backend = get_backend()
+    if isinstance(backend, CustomerIndex):
+        t0 = time.monotonic()
+        count = backend.load()
+        logger.info("Loaded %d customer numbers from %s in %.2fs",
+                    count, backend.path, time.monotonic() - t0)
+
+
+async def verify(full_name: str, phone: str) -> bool:
+    """Whether ``full_name`` is on file for ``phone``; backend errors propagate."""
+    backend = get_backend()
+    lookup_seconds = VERIFY_LOOKUP_SECONDS[backend.name]
+    t0 = time.perf_counter()
+    try:
+        confirmed = await backend.verify(full_name, phone)
+    except Exception:
+        VERIFY_RESULTS["error"].inc()
+        raise
+    finally:
+        lookup_seconds.observe(time.perf_counter() - t0)
+    VERIFY_RESULTS["confirmed" if confirmed else "not_confirmed"].inc()
+    return confirmed
@@ -11,6 +11,7 @@ except ModuleNotFoundError:
 import base64
 import json
 import logging
+import time
 from dataclasses import dataclass, field
 from typing import Any
 
@@ -18,18 +19,39 @@ import websockets
 from fastapi import WebSocket, WebSocketDisconnect
 from websockets.protocol import State
 
-from app.core.config import LOG_EVENT_TYPES, WS_IDLE_TIMEOUT_SECONDS
-from app.core.log_context import bind_call_sid, clear_call_sid
-from app.core.metrics import call_disconnects_total
+from app.core.config import (
+    CALL_SETUP_BUDGET_SECONDS,
+    LOG_EVENT_TYPES,
+    N8N_TRANSCRIPT_STREAMING,
+)
+from app.core.admission import admission
+from app.core.call_analytics import call_analytics
+from app.core.deadline import deadline_scope
+from app.core.log_context import (
+    bind_call_sid,
+    bind_caller_number,
+    call_debug,
+    clear_call_sid,
+    is_call_debug_enabled,
+)
+from app.core.metrics import DISCONNECTS, STREAM_SESSIONS, WEBSOCKETS, calls_active
 from app.core.prompts import get_system_prompt
 from app.core.shared_state import Session, session_manager
+from app.core.stream_token import InvalidStreamTokenError, verify_stream_token
+from app.core.tenants import Tenant, bind_tenant, get_registry, number_key
+from app.core.watchdog import CallWatch, call_watchdog
 from app.services.n8n_service import send_transcript_to_n8n
+from app.services.transcript_stream import TranscriptStreamer
+from app.services.twilio_service import fetch_call
 from app.services.ultravox_service import create_ultravox_call
-from app.services.tools_service import handle_tool_invocation
+from app.services.tools_service import run_tool_invocation
 from app.utils.websocket_utils import safe_close_websocket
 
 logger = logging.getLogger(__name__)
 
+# Strong references to in-progress cleanups that outlived their handler.
+_cleanup_tasks: set[asyncio.Task] = set()
+
 
 @dataclass
 class CallState:
@@ -43,11 +65,15 @@ class CallState:
     twilio_active: bool = True
     ultravox_active: bool = False
     started: asyncio.Event = field(default_factory=asyncio.Event)
+    watch: CallWatch | None = None
+    tenant: Tenant | None = None
+    tool_tasks: set[asyncio.Task] = field(default_factory=set)
 
 
 async def media_stream(websocket: WebSocket) -> None:
     """Bridge a Twilio Media Stream WebSocket to an Ultravox call WebSocket."""
     await websocket.accept()
+    WEBSOCKETS["twilio"].inc()
     logger.info("Client connected to /media-stream (Twilio)")
 
     state = CallState(twilio_ws=websocket)
@@ -60,14 +86,23 @@ async def media_stream(websocket: WebSocket) -> None:
                            name="ultravox-bootstrap")
     except* WebSocketDisconnect:
         logger.info("Twilio WebSocket disconnected (CallSid=%s)", state.call_sid)
-        call_disconnects_total.labels(reason="normal").inc()
+        DISCONNECTS["normal"].inc()
     except* Exception as eg:  # noqa: BLE001 — log any unexpected error groups
         for exc in eg.exceptions:
             logger.exception("Unhandled exception in media_stream", exc_info=exc)
-        call_disconnects_total.labels(reason="error").inc()
+        DISCONNECTS["error"].inc()
     finally:
-        await _cleanup(state)
-        clear_call_sid()
+        # Cleanup must finish even if this handler is cancelled (client gone
+        # mid-close, server shutting down); a cancelled cleanup leaks the
+        # session and its lock.
+        cleanup = asyncio.create_task(_cleanup(state), name="media-stream-cleanup")
+        _cleanup_tasks.add(cleanup)
+        cleanup.add_done_callback(_cleanup_tasks.discard)
+        try:
+            await asyncio.shield(cleanup)
+        finally:
+            WEBSOCKETS["twilio"].dec()
+            clear_call_sid()
 
 
 async def _handle_ultravox_when_ready(state: CallState,
@@ -86,13 +121,22 @@ async def _handle_ultravox_when_ready(state: CallState,
     if state.uv_ws is None:
         return
 
+    # This task was created before the start event bound the call's context
+    # in the Twilio task; bind it here too so debug targeting, and the tool
+    # tasks spawned from here, see the call and its tenant.
+    bind_call_sid(state.call_sid)
+    bind_caller_number((state.session or {}).get('callerNumber'))
+    bind_tenant(state.tenant)
     await _handle_ultravox(state)
 
 
 async def _handle_ultravox(state: CallState) -> None:
     """Receive messages from Ultravox and forward audio to Twilio."""
+    watch = state.watch
     try:
         async for raw_message in state.uv_ws:
+            if watch is not None and watch.ultravox is not None:
+                watch.ultravox += 1
             if state.session and state.session.get('hanging_up', False):
                 logger.debug("hanging_up flag set; exiting ultravox loop")
                 break
@@ -139,7 +183,7 @@ async def _handle_ultravox_text(state: CallState, raw_message: str) -> None:
     try:
         msg_data = json.loads(raw_message)
     except Exception:
-        logger.debug("Ultravox non-JSON text: %s", raw_message)
+        call_debug(logger, "Ultravox non-JSON text: %s", raw_message)
         return
 
     msg_type = msg_data.get("type") or msg_data.get("eventType")
@@ -152,64 +196,90 @@ async def _handle_ultravox_text(state: CallState, raw_message: str) -> None:
             state.session['transcript'] += f"{role_cap}: {text}\n"
             logger.info("[%s] %s", role_cap, text)
             if msg_data.get("final"):
-                logger.debug("Transcript for %s finalized", role_cap)
+                call_debug(logger, "Transcript for %s finalized", role_cap)
+                stream = state.session.get('transcript_stream')
+                if stream is not None:
+                    stream.add_turn(role_cap, text)
 
     elif msg_type == "client_tool_invocation":
-        await handle_tool_invocation(
-            state.uv_ws,
-            msg_data.get("toolName", ""),
-            msg_data.get("invocationId"),
-            msg_data.get("parameters", {}),
-        )
+        _start_tool_task(state, msg_data)
 
     elif msg_type == "state":
         if (agent_state := msg_data.get("state")):
-            logger.debug("Agent state: %s", agent_state)
+            call_debug(logger, "Agent state: %s", agent_state)
 
     elif msg_type == "debug":
-        debug_message = msg_data.get("message")
-        logger.debug("Ultravox debug: %s", debug_message)
-        try:
-            nested = json.loads(debug_message)
-            if nested.get("type") == "toolResult":
-                logger.debug("Tool '%s' result: %s",
-                             nested.get("toolName"), nested.get("output"))
-        except (TypeError, json.JSONDecodeError):
-            pass
+        # Skip the nested JSON parse entirely unless someone will see it.
+        if logger.isEnabledFor(logging.DEBUG) or is_call_debug_enabled():
+            debug_message = msg_data.get("message")
+            call_debug(logger, "Ultravox debug: %s", debug_message)
+            try:
+                nested = json.loads(debug_message)
+                if nested.get("type") == "toolResult":
+                    call_debug(logger, "Tool '%s' result: %s",
+                               nested.get("toolName"), nested.get("output"))
+            except (TypeError, json.JSONDecodeError):
+                pass
 
     elif msg_type == "playback_clear_buffer":
         pass
     elif msg_type in LOG_EVENT_TYPES:
-        logger.debug("Ultravox event %s: %s", msg_type, msg_data)
+        call_debug(logger, "Ultravox event %s: %s", msg_type, msg_data)
     else:
-        logger.debug("Unhandled Ultravox message type: %s", msg_type)
+        call_debug(logger, "Unhandled Ultravox message type: %s", msg_type)
+
+
+def _start_tool_task(state: CallState, msg_data: dict[str, Any]) -> None:
+    """Run a tool invocation beside the receive loop instead of inside it.
+
+    Slow tools (``schedule_meeting`` waiting on n8n) would otherwise stop the
+    loop from reading agent audio. Tasks are tracked on the call state and
+    cancelled in :func:`_cleanup`.
+    """
+    tool_name = msg_data.get("toolName", "")
+    task = asyncio.create_task(
+        run_tool_invocation(
+            state.uv_ws,
+            tool_name,
+            msg_data.get("invocationId", ""),
+            msg_data.get("parameters", {}),
+        ),
+        name=f"tool:{tool_name}",
+    )
+    state.tool_tasks.add(task)
+    task.add_done_callback(state.tool_tasks.discard)
 
 
 async def _handle_twilio(state: CallState) -> None:
-    """Receive messages from Twilio and forward audio to Ultravox."""
+    """Receive messages from Twilio and forward audio to Ultravox.
+
+    Idle, silence and duration limits are enforced by :data:`call_watchdog`,
+    which cancels this task on expiry; no per-message timer is armed.
+    """
+    task = asyncio.current_task()
+    assert task is not None
+    watch = state.watch = call_watchdog.register(task, state.call_sid)
     try:
-        while True:
-            try:
-                message = await asyncio.wait_for(
-                    state.twilio_ws.receive_text(),
-                    timeout=WS_IDLE_TIMEOUT_SECONDS,
-                )
-            except asyncio.TimeoutError:
-                logger.warning(
-                    "Twilio WS idle for %.0fs (CallSid=%s); tearing down",
-                    WS_IDLE_TIMEOUT_SECONDS, state.call_sid,
-                )
-                call_disconnects_total.labels(reason="idle_timeout").inc()
-                # Raise the normal disconnect path so the TaskGroup tears
-                # down the ultravox task and runs cleanup uniformly.
-                raise WebSocketDisconnect(code=1001, reason="idle timeout")
-            data = json.loads(message)
-            event = data.get('event')
-
-            if event == 'start':
-                await _on_twilio_start(state, data)
-            elif event == 'media':
-                await _on_twilio_media(state, data)
+        try:
+            while True:
+                message = await state.twilio_ws.receive_text()
+                watch.twilio += 1
+                data = json.loads(message)
+                event = data.get('event')
+
+                if event == 'start':
+                    await _on_twilio_start(state, data)
+                elif event == 'media':
+                    await _on_twilio_media(state, data)
+        except asyncio.CancelledError:
+            if watch.reason is None:
+                raise
+            # Expired by the watchdog: take the normal disconnect path so the
+            # TaskGroup tears down the ultravox task and runs cleanup uniformly.
+            task.uncancel()
+            raise WebSocketDisconnect(code=1001, reason=watch.reason) from None
+        finally:
+            call_watchdog.unregister(watch)
 
     except WebSocketDisconnect:
         logger.info("Twilio disconnected (CallSid=%s)", state.call_sid)
@@ -221,10 +291,70 @@ async def _handle_twilio(state: CallState) -> None:
         raise  # propagate to TaskGroup so the ultravox task is cancelled
 
 
+async def _rebuild_session(call_sid: str, custom_params: dict[str, Any]) -> Session | None:
+    """Recreate a session another replica started, from its signed stream token."""
+    token = custom_params.get('streamToken')
+    if not token:
+        return None
+    caller_number = custom_params.get('callerNumber', '')
+    first_message = custom_params.get('firstMessage', '')
+    # No webhook reserved a slot on this process for the call; reserve one
+    # here until the session exists and holds it.
+    with admission.reserve() as admitted:
+        if not admitted:
+            STREAM_SESSIONS["shed"].inc()
+            logger.warning("At capacity (%d calls); not rebuilding session for CallSid=%s",
+                           admission.max_calls, call_sid)
+            return None
+        try:
+            claims = verify_stream_token(token, caller_number, first_message, call_sid)
+            if 'c' not in claims:
+                await _check_outbound_call(call_sid, caller_number)
+        except InvalidStreamTokenError as e:
+            STREAM_SESSIONS["rejected"].inc()
+            logger.warning("Rejected stream token for CallSid=%s: %s", call_sid, e)
+            return None
+        STREAM_SESSIONS["rebuilt"].inc()
+        logger.info("Rebuilt session for CallSid=%s from its stream token", call_sid)
+        return await session_manager.create(
+            call_sid,
+            transcript="",
+            callerNumber=caller_number,
+            callDetails={"streamToken": True},
+            direction=claims['d'],
+            tenant=claims.get('t'),
+            firstMessage=first_message,
+            streamSid=None,
+            hanging_up=False,
+            transcript_sent=False,
+        )
+
+
+async def _check_outbound_call(call_sid: str, caller_number: str) -> None:
+    """Outbound tokens name no CallSid; ask Twilio whether this call matches.
+
+    Nonces are only remembered per process, so this is what stops a captured
+    token from opening a stream on another replica for some other call.
+    """
+    try:
+        call = await fetch_call(call_sid)
+    except Exception as e:  # noqa: BLE001 — any lookup failure rejects the token
+        raise InvalidStreamTokenError(f"call lookup failed: {e}") from None
+    if not str(call.direction or '').startswith('outbound'):
+        raise InvalidStreamTokenError("not an outbound call")
+    if number_key(call.to or '') != number_key(caller_number):
+        raise InvalidStreamTokenError("issued for another call")
+    if call.status not in ('ringing', 'in-progress'):
+        raise InvalidStreamTokenError(f"call is {call.status}")
+
+
 async def _on_twilio_start(state: CallState, data: dict[str, Any]) -> None:
+    setup_started = time.monotonic()
     state.stream_sid = data['start']['streamSid']
     state.call_sid = data['start']['callSid']
     bind_call_sid(state.call_sid)
+    if state.watch is not None:
+        state.watch.call_sid = state.call_sid
     custom_params = data['start'].get('customParameters', {})
 
     logger.info("Twilio start: callSid=%s streamSid=%s",
@@ -234,22 +364,41 @@ async def _on_twilio_start(state: CallState, data: dict[str, Any]) -> None:
         'firstMessage', "Hello, how can I assist you?"
     )
     caller_number = custom_params.get('callerNumber', 'Unknown')
+    bind_caller_number(caller_number)
 
     state.session = await session_manager.get(state.call_sid)
+    if state.session is None:
+        state.session = await _rebuild_session(state.call_sid, custom_params)
     if state.session is None:
         logger.warning("Session not found for CallSid=%s", state.call_sid)
         await state.twilio_ws.close()
         return
 
+    # Prompts, Ultravox settings and (via the Ultravox task) tools follow the tenant.
+    state.tenant = get_registry().get(state.session.get('tenant'))
+    bind_tenant(state.tenant)
+
     await session_manager.update(
         state.call_sid,
         callerNumber=caller_number,
         streamSid=state.stream_sid,
     )
+    if N8N_TRANSCRIPT_STREAMING:
+        await session_manager.update(
+            state.call_sid,
+            transcript_stream=TranscriptStreamer(state.call_sid, caller_number),
+        )
 
-    uv_join_url = await create_ultravox_call(
-        system_prompt=get_system_prompt(), first_message=first_message,
-    )
+    # An outbound call may have had its Ultravox call created while ringing.
+    prewarmed = state.session.get('uv_prewarm')
+    if prewarmed is not None:
+        await session_manager.update(state.call_sid, uv_prewarm=None)
+    with deadline_scope(CALL_SETUP_BUDGET_SECONDS):
+        uv_join_url = await prewarmed.join_url() if prewarmed is not None else ""
+        if not uv_join_url:
+            uv_join_url = await create_ultravox_call(
+                system_prompt=get_system_prompt(), first_message=first_message,
+            )
     if not uv_join_url:
         logger.error("Ultravox joinUrl empty; cannot establish WebSocket")
         await state.twilio_ws.close()
@@ -268,6 +417,7 @@ async def _on_twilio_start(state: CallState, data: dict[str, Any]) -> None:
         )
         return
 
+    WEBSOCKETS["ultravox"].inc()
     state.ultravox_active = True
     await session_manager.update(
         state.call_sid,
@@ -277,7 +427,12 @@ async def _on_twilio_start(state: CallState, data: dict[str, Any]) -> None:
     )
     state.session = await session_manager.get(state.call_sid)
 
+    if state.watch is not None:
+        state.watch.arm_ultravox()
     state.started.set()
+    calls_active.inc()
+    call_analytics.record_setup((state.session or {}).get('direction') or "inbound",
+                                time.monotonic() - setup_started)
     logger.info("Ultravox WebSocket connected and handler armed")
 
 
@@ -303,12 +458,22 @@ async def _cleanup(state: CallState) -> None:
     """Close sockets, flush transcript, and remove the session — exactly once."""
     state.twilio_active = False
     state.ultravox_active = False
+    for task in list(state.tool_tasks):
+        task.cancel()
+    if state.tool_tasks:
+        await asyncio.gather(*state.tool_tasks, return_exceptions=True)
     if state.session is not None:
         state.session['twilio_ws_active'] = False
         state.session['ultravox_ws_active'] = False
-
-    if state.uv_ws is not None and getattr(state.uv_ws, 'state', None) == State.OPEN:
-        await safe_close_websocket(state.uv_ws, name="Ultravox WebSocket (cleanup)")
+        if (prewarmed := state.session.get('uv_prewarm')) is not None:
+            prewarmed.release()
+
+    if state.started.is_set():
+        calls_active.dec()
+    if state.uv_ws is not None:
+        WEBSOCKETS["ultravox"].dec()
+        if getattr(state.uv_ws, 'state', None) == State.OPEN:
+            await safe_close_websocket(state.uv_ws, name="Ultravox WebSocket (cleanup)")
 
     if state.session is not None and state.call_sid is not None:
         if not state.session.get('transcript_sent', False):
@@ -0,0 +1,80 @@
+"""
+Local corpus (BM25) benchmark.
+
+Builds an index over a synthetic FAQ corpus, saves and reloads it as the
+prebuilt JSON file, and reports per-query latency — the time a local
+``queryCorpus`` answer adds to a conversational turn.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_corpus [--docs 2000] [--queries 5000]
+    python -m benchmarks.bench_corpus --dir docs/faq
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from app.services.local_corpus import CorpusIndex, tokenize
+
+_TOPICS = ("parking", "insurance", "billing", "cancellation", "hours", "holidays",
+           "x-ray", "whitening", "implants", "braces", "children", "emergency",
+           "payment", "referral", "records", "location", "wheelchair", "covid")
+
+
+def synthetic_documents(count: int, seed: int = 7) -> list[tuple[str, str]]:
+    rng = random.Random(seed)
+    vocab = [f"term{i}" for i in range(5000)]
+    docs = []
+    for i in range(count):
+        topic = rng.choice(_TOPICS)
+        paragraphs = [" ".join(rng.choices(vocab, k=rng.randint(30, 90)) + [topic])
+                      for _ in range(rng.randint(1, 4))]
+        docs.append((f"faq/{i:05d}.md", f"# {topic.title()} {i}\n" + "\n\n".join(paragraphs)))
+    return docs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--dir", help="index this directory instead of a synthetic corpus")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    index = (CorpusIndex.from_directory(args.dir) if args.dir
+             else CorpusIndex.from_documents(synthetic_documents(args.docs)))
+    build = time.perf_counter() - t0
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "index.json"
+        index.save(path)
+        size = path.stat().st_size
+        t0 = time.perf_counter()
+        index = CorpusIndex.load(path)
+        load = time.perf_counter() - t0
+
+    rng = random.Random(11)
+    texts = [text for _, text in index.passages]
+    queries = [" ".join(rng.sample(tokenize(rng.choice(texts)) or ["parking"], 3))
+               for _ in range(args.queries)]
+    latencies = []
+    for query in queries:
+        t0 = time.perf_counter()
+        index.search(query)
+        latencies.append(time.perf_counter() - t0)
+    latencies.sort()
+
+    print(f"{len(index)} passages, {len(index.postings)} terms")
+    print(f"build {build * 1000:.0f}ms, prebuilt file {size / 2**20:.1f} MiB, "
+          f"load {load * 1000:.0f}ms")
+    print(f"query p50 {statistics.median(latencies) * 1e6:.0f}us "
+          f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1e6:.0f}us "
+          f"max {latencies[-1] * 1e6:.0f}us")
+
+
+if __name__ == "__main__":
+    main()
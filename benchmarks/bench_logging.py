@@ -0,0 +1,97 @@
+"""
+Logging throughput benchmark.
+
+Reports records/second for:
+
+* ``JsonFormatter.format`` alone (the writer thread's cost per record);
+* a ``logger.info`` call on the hot path with synchronous writes
+  (``LOG_QUEUE_SIZE=0``) versus the queued pipeline, against a stream that
+  simulates a slow log collector.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_logging [--records 50000] [--write-delay-us 50]
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import logging
+import time
+
+from app.core import logging_config
+from app.core.logging_config import JsonFormatter, configure_logging
+
+
+class _SlowStream(io.StringIO):
+    """A sink whose writes take ``delay`` seconds, like a backed-up pipe."""
+
+    def __init__(self, delay: float) -> None:
+        super().__init__()
+        self._delay = delay
+
+    def write(self, s: str) -> int:
+        if self._delay:
+            time.sleep(self._delay)
+        return len(s)
+
+
+def _record(i: int) -> logging.LogRecord:
+    record = logging.LogRecord(
+        name="app.websockets.media_stream", level=logging.INFO,
+        pathname=__file__, lineno=1, msg="Tool invocation %s for call %s",
+        args=("verify", i), exc_info=None,
+    )
+    record.call_sid = "CA0123456789abcdef"  # type: ignore[attr-defined]
+    record.duration_ms = 12.5  # type: ignore[attr-defined]
+    record.payload = {"tool": "verify", "ok": True}  # type: ignore[attr-defined]
+    return record
+
+
+def bench_formatter(n: int) -> float:
+    formatter = JsonFormatter()
+    records = [_record(i) for i in range(n)]
+    t0 = time.perf_counter()
+    for record in records:
+        formatter.format(record)
+    return n / (time.perf_counter() - t0)
+
+
+def bench_hot_path(n: int, queue_size: int, write_delay: float) -> float:
+    """records/s as seen by the *caller* of ``logger.info``."""
+    configure_logging("INFO", "json", queue_size)
+    root = logging.getLogger()
+    stream = _SlowStream(write_delay)
+    listener = logging_config._listener
+    handlers = listener.handlers if listener is not None else root.handlers
+    for handler in handlers:
+        if isinstance(handler, logging.StreamHandler):
+            handler.setStream(stream)
+
+    log = logging.getLogger("bench")
+    t0 = time.perf_counter()
+    for i in range(n):
+        log.info("Tool invocation %s for call %s", "verify", i,
+                 extra={"duration_ms": 12.5})
+    elapsed = time.perf_counter() - t0
+    logging_config._stop_listener()
+    return n / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--records", type=int, default=50000)
+    parser.add_argument("--write-delay-us", type=float, default=50.0,
+                        help="simulated per-write latency of the log sink")
+    args = parser.parse_args()
+    delay = args.write_delay_us / 1e6
+
+    print(f"JsonFormatter.format        {bench_formatter(args.records):>12,.0f} records/s")
+    sync_rate = bench_hot_path(args.records, 0, delay)
+    print(f"logger.info (synchronous)   {sync_rate:>12,.0f} records/s")
+    queued_rate = bench_hot_path(args.records, args.records, delay)
+    print(f"logger.info (queued)        {queued_rate:>12,.0f} records/s")
+
+
+if __name__ == "__main__":
+    main()
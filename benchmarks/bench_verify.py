@@ -0,0 +1,94 @@
+"""
+Customer verification benchmark (1M records by default).
+
+Writes a synthetic customer CSV, loads it into the phone-keyed
+:class:`~app.services.verification.CustomerIndex` and reports load time,
+resident memory growth, per-lookup latency for known / unknown numbers and
+mistyped names, and the cost of picking up an appended batch.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_verify [--records 1000000] [--lookups 100000]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from app.core.memory import rss_bytes
+from app.services.verification import CustomerIndex
+
+_FIRST = ("James", "Mary", "Robert", "Patricia", "John", "Jennifer", "Michael", "Linda",
+          "David", "Elizabeth", "José", "Chloé", "Wei", "Aisha", "Olga", "Kenji")
+_LAST = ("Smith", "Johnson", "Williams", "Brown", "Jones", "García", "Miller", "Davis",
+         "Rodríguez", "Martínez", "O'Brien", "Nguyen", "Kowalski", "Müller", "Tanaka")
+
+
+def write_customers(path: Path, count: int, rng: random.Random,
+                    mode: str = "w") -> list[tuple[str, str]]:
+    rows = [(f"+1{rng.randrange(2_000_000_000, 9_999_999_999)}",
+             f"{rng.choice(_FIRST)} {rng.choice(_LAST)}") for _ in range(count)]
+    with open(path, mode, encoding="utf-8") as f:
+        if mode == "w":
+            f.write("phone,name\n")
+        f.writelines(f'{phone},"{name}"\n' for phone, name in rows)
+    return rows
+
+
+def _percentiles(samples: list[float]) -> str:
+    samples.sort()
+    return (f"p50 {statistics.median(samples) * 1e6:.1f}us "
+            f"p99 {samples[int(len(samples) * 0.99) - 1] * 1e6:.1f}us")
+
+
+async def _time_lookups(index: CustomerIndex, cases: list[tuple[str, str]]) -> list[float]:
+    latencies = []
+    for name, phone in cases:
+        t0 = time.perf_counter()
+        await index.verify(name, phone)
+        latencies.append(time.perf_counter() - t0)
+    return latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--records", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=100_000)
+    args = parser.parse_args()
+    rng = random.Random(3)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "customers.csv"
+        rows = write_customers(path, args.records, rng)
+        size = path.stat().st_size
+        rss0 = rss_bytes()
+        index = CustomerIndex(str(path), "csv", reload_interval=3600)
+        t0 = time.perf_counter()
+        index.load()
+        load = time.perf_counter() - t0
+        print(f"{args.records:,} records ({size / 2**20:.0f} MiB CSV) -> {len(index):,} numbers "
+              f"in {load:.2f}s, +{(rss_bytes() - rss0) / 2**20:.0f} MiB RSS")
+
+        known = [(name, phone) for phone, name in rng.sample(rows, min(args.lookups, len(rows)))]
+        unknown = [("Jane Doe", f"+1{rng.randrange(1_000_000_000, 1_999_999_999)}")
+                   for _ in range(args.lookups)]
+        typos = [(name[:-1] + "x", phone) for name, phone in known]
+        for label, cases in (("known number, exact name", known),
+                             ("unknown number", unknown),
+                             ("known number, mistyped name", typos)):
+            print(f"{label:<28} {_percentiles(asyncio.run(_time_lookups(index, cases)))}")
+
+        write_customers(path, 10_000, rng, mode="a")
+        t0 = time.perf_counter()
+        outcome = index.refresh()
+        print(f"refresh after appending 10,000 rows: {outcome} in "
+              f"{(time.perf_counter() - t0) * 1000:.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Twilio webhook CPU benchmark.
+
+Reports operations/second for the per-request work on ``/incoming-call``:
+
+* TwiML rendering — a ``VoiceResponse`` tree versus the precompiled template;
+* signature checking — a new ``RequestValidator`` per request versus the
+  shared one;
+* the whole endpoint (signature check, form parse, TwiML) through the ASGI
+  app, with n8n disabled so only local work is timed.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_webhook [--iterations 20000]
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import time
+from collections.abc import Callable
+from typing import Any
+
+from fastapi.testclient import TestClient
+from twilio.request_validator import RequestValidator
+from twilio.twiml.voice_response import Connect, VoiceResponse
+
+from app.api import security
+from app.api.endpoints import calls
+from app.core.shared_state import session_manager
+from app.main import app
+
+_TOKEN = "bench-auth-token"
+_URL = "https://voxflow.example.com/incoming-call"
+_STREAM_URL = "wss://voxflow.example.com/media-stream"
+_FIRST_MESSAGE = 'Hi, this is Sara from "Acme & Sons". How can I help?'
+
+
+def _helper_twiml() -> str:
+    response = VoiceResponse()
+    connect = Connect()
+    stream = connect.stream(url=_STREAM_URL)
+    stream.parameter(name="firstMessage", value=_FIRST_MESSAGE)
+    stream.parameter(name="callerNumber", value="+15551234567")
+    stream.parameter(name="callSid", value="CA0123456789abcdef")
+    response.append(connect)
+    return str(response)
+
+
+def _template_twiml() -> str:
+    return calls._build_stream_twiml(_STREAM_URL, _FIRST_MESSAGE, "+15551234567",
+                                     call_sid="CA0123456789abcdef")
+
+
+def _rate(fn: Callable[[], Any], n: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return n / (time.perf_counter() - t0)
+
+
+def _form(i: int) -> dict[str, str]:
+    return {"CallSid": f"CAbench{i:010d}", "From": "+15551234567",
+            "To": "+15550000000", "CallStatus": "ringing", "Direction": "inbound"}
+
+
+def bench_endpoint(n: int) -> float:
+    security_patches = {"TWILIO_VALIDATE_SIGNATURE": True, "TWILIO_AUTH_TOKEN": _TOKEN,
+                        "TWILIO_REPLAY_WINDOW_SECONDS": 300}
+    originals = {name: getattr(security, name) for name in security_patches}
+    original_n8n = calls.N8N_WEBHOOK_URL
+    for name, value in security_patches.items():
+        setattr(security, name, value)
+    calls.N8N_WEBHOOK_URL = None
+    validator = RequestValidator(_TOKEN)
+    requests = [(form, validator.compute_signature("http://testserver/incoming-call", form))
+                for form in map(_form, range(n))]
+    try:
+        with TestClient(app) as client:
+            t0 = time.perf_counter()
+            for form, signature in requests:
+                resp = client.post("/incoming-call", data=form,
+                                   headers={"X-Twilio-Signature": signature})
+                resp.raise_for_status()
+            elapsed = time.perf_counter() - t0
+            for form, _ in requests:
+                client.portal.call(session_manager.pop, form["CallSid"])
+    finally:
+        for name, value in originals.items():
+            setattr(security, name, value)
+        calls.N8N_WEBHOOK_URL = original_n8n
+    return n / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+    n = args.iterations
+    logging.disable(logging.WARNING)  # per-call log lines would dominate the timing
+    params = _form(0)
+    signature = RequestValidator(_TOKEN).compute_signature(_URL, params)
+    shared = RequestValidator(_TOKEN)
+
+    print(f"TwiML via VoiceResponse     {_rate(_helper_twiml, n):>12,.0f} ops/s")
+    print(f"TwiML via template          {_rate(_template_twiml, n):>12,.0f} ops/s")
+    print(f"validate, new validator     "
+          f"{_rate(lambda: RequestValidator(_TOKEN).validate(_URL, params, signature), n):>12,.0f} ops/s")
+    print(f"validate, shared validator  "
+          f"{_rate(lambda: shared.validate(_URL, params, signature), n):>12,.0f} ops/s")
+    print(f"POST /incoming-call         {bench_endpoint(min(n, 2000)):>12,.0f} req/s")
+
+
+if __name__ == "__main__":
+    main()
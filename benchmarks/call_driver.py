@@ -0,0 +1,296 @@
+"""
+Simulated call driver.
+
+Pushes complete calls through the real app — ``POST /incoming-call``
+followed by a ``/media-stream`` WebSocket carrying a Twilio ``start`` event,
+inbound audio frames and a hang-up — with Ultravox and n8n replaced by local
+stand-ins, and reports per-call latency.
+
+``--soak`` turns it into a leak detector: it runs a warm-up, samples RSS,
+open file descriptors, threads, asyncio tasks and the session manager's
+``_sessions`` / ``_locks`` sizes while thousands of sequential and
+overlapping calls run, and fails (exit status 1) when anything has not
+returned to its baseline once the calls drain.
+
+Run from the repository root::
+
+    python -m benchmarks.call_driver --calls 200 --concurrency 8
+    python -m benchmarks.call_driver --soak --calls 5000 --concurrency 16
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import gc
+import json
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Any
+
+import httpx
+from fastapi.testclient import TestClient
+from websockets.protocol import State
+
+from app.api import security
+from app.api.endpoints import calls as calls_module
+from app.core.memory import rss_bytes
+from app.core.shared_state import session_manager
+from app.main import app
+from app.services import n8n_service
+from app.websockets import media_stream as media_module
+
+# 20ms of mu-law silence, the size of a real Twilio media frame.
+_SILENCE_FRAME = base64.b64encode(b"\xff" * 160).decode("ascii")
+
+
+class FakeUltravoxSocket:
+    """Stand-in for the Ultravox call WebSocket.
+
+    Emits a short scripted exchange (agent audio plus final transcripts) and
+    then idles until closed, like a real agent waiting for the caller.
+    """
+
+    def __init__(self) -> None:
+        self.state = State.OPEN
+        self.received = 0
+        self._closed = asyncio.Event()
+        self._script: list[str | bytes] = [
+            b"\x00\x00" * 320,
+            json.dumps({"type": "transcript", "role": "agent",
+                        "text": "Hi, how can I help?", "final": True}),
+            json.dumps({"type": "transcript", "role": "user",
+                        "text": "I'd like to book a visit.", "final": True}),
+        ]
+
+    def __aiter__(self) -> FakeUltravoxSocket:
+        return self
+
+    async def __anext__(self) -> str | bytes:
+        if self._script and self.state == State.OPEN:
+            return self._script.pop(0)
+        await self._closed.wait()
+        raise StopAsyncIteration
+
+    async def send(self, data: bytes) -> None:
+        self.received += 1
+
+    async def close(self) -> None:
+        self.state = State.CLOSED
+        self._closed.set()
+
+
+@contextmanager
+def stand_ins(n8n_latency: float = 0.002) -> Iterator[None]:
+    """Patch Ultravox and n8n with local fakes for the duration of the block."""
+
+    async def create_ultravox_call(**_kwargs: Any) -> str:
+        return "wss://ultravox.invalid/call"
+
+    async def connect(*_args: Any, **_kwargs: Any) -> FakeUltravoxSocket:
+        return FakeUltravoxSocket()
+
+    async def post_first_message(_body: bytes, _timeout: float) -> httpx.Response:
+        await asyncio.sleep(n8n_latency)
+        return httpx.Response(200, json={"firstMessage": "Hello from the soak test"})
+
+    async def send_to_webhook(_payload: dict[str, Any]) -> str:
+        await asyncio.sleep(n8n_latency)
+        return "ok"
+
+    patches: list[tuple[Any, str, Any]] = [
+        (security, "TWILIO_VALIDATE_SIGNATURE", False),
+        (calls_module, "N8N_WEBHOOK_URL", "http://n8n.invalid/webhook"),
+        (calls_module, "_post_first_message", post_first_message),
+        (n8n_service, "send_to_webhook", send_to_webhook),
+        (media_module, "create_ultravox_call", create_ultravox_call),
+        (media_module.websockets, "connect", connect),
+    ]
+    originals = [(obj, name, getattr(obj, name)) for obj, name, _ in patches]
+    for obj, name, value in patches:
+        setattr(obj, name, value)
+    try:
+        yield
+    finally:
+        for obj, name, value in originals:
+            setattr(obj, name, value)
+
+
+def run_call(client: TestClient, index: int, frames: int) -> float:
+    """One complete inbound call; returns its wall-clock duration."""
+    call_sid = f"CAsoak{index:08d}"
+    caller = f"+1555{index % 10_000_000:07d}"
+    t0 = time.perf_counter()
+    resp = client.post("/incoming-call", data={
+        "CallSid": call_sid, "From": caller, "To": "+15550000000",
+    })
+    resp.raise_for_status()
+    with client.websocket_connect("/media-stream") as ws:
+        ws.send_text(json.dumps({"event": "connected"}))
+        ws.send_text(json.dumps({"event": "start", "start": {
+            "callSid": call_sid,
+            "streamSid": f"MZ{index:08d}",
+            "customParameters": {"callerNumber": caller,
+                                 "firstMessage": "Hello from the soak test"},
+        }}))
+        for _ in range(frames):
+            ws.send_text(json.dumps({"event": "media",
+                                     "media": {"payload": _SILENCE_FRAME}}))
+        ws.send_text(json.dumps({"event": "stop"}))
+    return time.perf_counter() - t0
+
+
+@dataclass
+class Sample:
+    calls: int
+    rss_bytes: int
+    fds: int
+    threads: int
+    tasks: int
+    sessions: int
+    locks: int
+
+
+def _open_fds() -> int:
+    try:
+        return len(os.listdir("/proc/self/fd"))
+    except OSError:
+        return -1
+
+
+async def _task_count() -> int:
+    return len(asyncio.all_tasks())
+
+
+def sample(client: TestClient, calls_done: int) -> Sample:
+    assert client.portal is not None
+    return Sample(
+        calls=calls_done,
+        rss_bytes=rss_bytes(),
+        fds=_open_fds(),
+        threads=threading.active_count(),
+        tasks=client.portal.call(_task_count),
+        sessions=len(session_manager),
+        locks=session_manager.lock_count(),
+    )
+
+
+def run_calls(client: TestClient, count: int, concurrency: int, frames: int,
+              start_index: int = 0) -> list[float]:
+    """Run ``count`` calls, ``concurrency`` at a time (1 = strictly sequential)."""
+    if concurrency <= 1:
+        return [run_call(client, start_index + i, frames) for i in range(count)]
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(lambda i: run_call(client, start_index + i, frames),
+                             range(count)))
+
+
+def settle(client: TestClient, baseline: Sample, timeout: float = 5.0) -> Sample:
+    """Wait for background work to drain, then take the final sample."""
+    deadline = time.monotonic() + timeout
+    while True:
+        gc.collect()
+        current = sample(client, -1)
+        drained = (current.sessions <= baseline.sessions
+                   and current.tasks <= baseline.tasks)
+        if drained or time.monotonic() >= deadline:
+            return current
+        time.sleep(0.05)
+
+
+def find_leaks(baseline: Sample, final: Sample, *, rss_tolerance_mb: float,
+               fd_slack: int, thread_slack: int) -> list[str]:
+    """Resources that did not return to baseline (empty list = clean)."""
+    problems: list[str] = []
+    if final.sessions > baseline.sessions:
+        problems.append(f"sessions: {baseline.sessions} -> {final.sessions}")
+    if final.locks > baseline.locks:
+        problems.append(f"session locks: {baseline.locks} -> {final.locks}")
+    if final.tasks > baseline.tasks:
+        problems.append(f"asyncio tasks: {baseline.tasks} -> {final.tasks}")
+    if final.fds > baseline.fds + fd_slack:
+        problems.append(f"open fds: {baseline.fds} -> {final.fds}")
+    if final.threads > baseline.threads + thread_slack:
+        problems.append(f"threads: {baseline.threads} -> {final.threads}")
+    growth_mb = (final.rss_bytes - baseline.rss_bytes) / 2**20
+    if growth_mb > rss_tolerance_mb:
+        problems.append(f"rss grew {growth_mb:.1f} MiB (> {rss_tolerance_mb:g} MiB)")
+    return problems
+
+
+def soak(client: TestClient, *, calls: int, concurrency: int, frames: int,
+         sample_every: int, rss_tolerance_mb: float,
+         warmup: int | None = None) -> tuple[list[Sample], list[str]]:
+    """Warm up, then alternate sequential and overlapping batches of calls."""
+    run_calls(client, warmup if warmup is not None else max(20, concurrency * 4),
+              concurrency, frames, start_index=10**7)
+    baseline = settle(client, sample(client, 0))
+    samples = [baseline]
+    done = 0
+    batch = 0
+    while done < calls:
+        n = min(sample_every, calls - done)
+        # Even batches overlap calls; odd batches run them back to back.
+        run_calls(client, n, concurrency if batch % 2 == 0 else 1, frames,
+                  start_index=done)
+        done += n
+        batch += 1
+        samples.append(sample(client, done))
+    final = settle(client, baseline)
+    final.calls = done
+    samples.append(final)
+    problems = find_leaks(baseline, final, rss_tolerance_mb=rss_tolerance_mb,
+                          fd_slack=2, thread_slack=concurrency + 2)
+    return samples, problems
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="VoxFlow simulated call driver")
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--frames", type=int, default=50,
+                        help="inbound 20ms media frames per call")
+    parser.add_argument("--soak", action="store_true",
+                        help="sample resources and fail on growth")
+    parser.add_argument("--sample-every", type=int, default=250)
+    parser.add_argument("--rss-tolerance-mb", type=float, default=25.0)
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(args.log_level.upper())
+    with stand_ins(), TestClient(app) as client:
+        if not args.soak:
+            t0 = time.perf_counter()
+            latencies = run_calls(client, args.calls, args.concurrency, args.frames)
+            elapsed = time.perf_counter() - t0
+            latencies.sort()
+            print(f"{args.calls} calls in {elapsed:.2f}s "
+                  f"({args.calls / elapsed:.1f} calls/s, concurrency {args.concurrency})")
+            print(f"per call: p50 {statistics.median(latencies) * 1000:.1f}ms "
+                  f"p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f}ms")
+            return 0
+
+        samples, problems = soak(
+            client, calls=args.calls, concurrency=args.concurrency,
+            frames=args.frames, sample_every=args.sample_every,
+            rss_tolerance_mb=args.rss_tolerance_mb,
+        )
+    for s in samples:
+        print(json.dumps(asdict(s)))
+    if problems:
+        print("LEAK: " + "; ".join(problems), file=sys.stderr)
+        return 1
+    print(f"soak ok: {samples[-1].calls} calls, resources back to baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
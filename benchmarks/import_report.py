@@ -0,0 +1,51 @@
+"""
+Cold-start import report.
+
+Imports ``app.main`` in a fresh interpreter under ``python -X importtime``
+and prints the total import time plus the slowest modules by cumulative
+time, so a new heavy import on the startup path shows up in review.
+
+Run from the repository root::
+
+    python -m benchmarks.import_report [--top 25] [--module app.main]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+
+
+def import_times(module: str) -> list[tuple[str, int, int, int]]:
+    """(module, self us, cumulative us, depth) for every import, in load order."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True, env=os.environ.copy(),
+    )
+    rows: list[tuple[str, int, int, int]] = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|", 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--top", type=int, default=25)
+    args = parser.parse_args()
+
+    rows = import_times(args.module)
+    total = next((cum for name, _, cum, _ in rows if name == args.module), 0)
+    print(f"import {args.module}: {total / 1000:.1f} ms, {len(rows)} modules")
+    print(f"{'cumulative':>12} {'self':>10}  module")
+    for name, self_us, cum_us, depth in sorted(rows, key=lambda r: -r[2])[:args.top]:
+        print(f"{cum_us / 1000:>10.1f}ms {self_us / 1000:>8.1f}ms  {'  ' * depth}{name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Tests for the bearer-protected /admin API."""
+from __future__ import annotations
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.main as main_module
+from app.api import security
+from app.api.endpoints import admin
+from app.core import log_context, tenants
+
+_AUTH = {"Authorization": "Bearer s3cret"}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(security, "ADMIN_API_TOKEN", "s3cret")
+    monkeypatch.setattr(log_context, "_debug_call_sids", {})
+    monkeypatch.setattr(log_context, "_debug_numbers", {})
+    with TestClient(main_module.app) as c:
+        yield c
+
+
+def test_admin_disabled_without_token(monkeypatch):
+    monkeypatch.setattr(security, "ADMIN_API_TOKEN", None)
+    with TestClient(main_module.app) as c:
+        assert c.get("/admin/debug-targets", headers=_AUTH).status_code == 404
+
+
+def test_admin_rejects_bad_token(client):
+    assert client.get("/admin/debug-targets").status_code == 401
+    resp = client.get("/admin/debug-targets", headers={"Authorization": "Bearer nope"})
+    assert resp.status_code == 401
+
+
+def test_debug_target_lifecycle(client):
+    resp = client.post("/admin/debug-targets", headers=_AUTH,
+                       json={"callSid": "CA1", "ttlSeconds": 30})
+    assert resp.status_code == 200
+    assert resp.json()["targets"][0]["callSid"] == "CA1"
+    assert "CA1" in log_context._debug_call_sids
+
+    resp = client.delete("/admin/debug-targets", headers=_AUTH, params={"callSid": "CA1"})
+    assert resp.status_code == 200
+    assert resp.json()["targets"] == []
+    resp = client.delete("/admin/debug-targets", headers=_AUTH, params={"callSid": "CA1"})
+    assert resp.status_code == 404
+
+
+def test_debug_target_requires_sid_or_number(client):
+    resp = client.post("/admin/debug-targets", headers=_AUTH, json={"ttlSeconds": 30})
+    assert resp.status_code == 422
+
+
+def test_loop_and_tasks_endpoints(client):
+    loop = client.get("/admin/loop", headers=_AUTH)
+    assert loop.status_code == 200
+    assert "lastLagSeconds" in loop.json()
+    tasks = client.get("/admin/tasks", headers=_AUTH)
+    assert tasks.status_code == 200
+    assert tasks.json()["total"] >= 1
+
+
+def test_profile_endpoint_returns_collapsed_stacks(client):
+    resp = client.get("/admin/profile", headers=_AUTH,
+                      params={"seconds": 0.1, "interval_ms": 5})
+    assert resp.status_code == 200
+    assert int(resp.headers["X-Profile-Samples"]) > 0
+    assert resp.text.strip()
+    assert client.get("/admin/profile", headers=_AUTH,
+                      params={"seconds": 10_000}).status_code == 422
+
+
+def test_memory_endpoints(client):
+    report = client.get("/admin/memory", headers=_AUTH)
+    assert report.status_code == 200
+    assert report.json()["rssBytes"] > 0
+    assert client.get("/admin/memory/tracemalloc/diff", headers=_AUTH).status_code == 409
+    assert client.post("/admin/memory/tracemalloc/start", headers=_AUTH).json() == {"tracing": True}
+    try:
+        diff = client.get("/admin/memory/tracemalloc/diff", headers=_AUTH,
+                          params={"top": 3})
+        assert diff.status_code == 200
+        assert len(diff.json()["top"]) <= 3
+    finally:
+        client.post("/admin/memory/tracemalloc/stop", headers=_AUTH)
+
+
+def test_analytics_endpoint(client):
+    resp = client.get("/admin/analytics", headers=_AUTH)
+    assert resp.status_code == 200
+    body = resp.json()
+    assert set(body["directions"]) == {"inbound", "outbound"}
+    assert "setupSeconds" in body["directions"]["inbound"]
+
+
+def test_tenant_list_and_reload(client, monkeypatch, tmp_path):
+    assert client.post("/admin/tenants/reload", headers=_AUTH).status_code == 409
+    monkeypatch.setattr(tenants, "registry", tenants.TenantRegistry())
+    monkeypatch.setattr(admin, "TENANT_DIR", str(tmp_path))
+    monkeypatch.setattr(tenants, "TENANT_DIR", str(tmp_path))
+    (tmp_path / "acme.json").write_text(
+        '{"numbers": ["+15551230000"], "calendars": {"Downtown": "cal-1"}}')
+    assert client.post("/admin/tenants/reload", headers=_AUTH).json() == {"tenants": 1}
+    listed = client.get("/admin/tenants", headers=_AUTH).json()["tenants"]
+    assert listed[0]["id"] == "acme"
+    assert listed[0]["locations"] == ["Downtown"]
+
+    (tmp_path / "broken.json").write_text("{")
+    assert client.post("/admin/tenants/reload", headers=_AUTH).status_code == 422
+    assert len(tenants.get_registry()) == 1
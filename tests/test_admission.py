@@ -0,0 +1,87 @@
+"""Tests for admission control and load shedding."""
+from __future__ import annotations
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import security
+from app.api.endpoints import calls as calls_module
+from app.core.admission import AdmissionController, admission
+from app.core.metrics import SHED
+from app.core.shared_state import session_manager
+from app.main import app
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(security, "TWILIO_VALIDATE_SIGNATURE", False)
+    monkeypatch.setattr(calls_module, "N8N_WEBHOOK_URL", None)
+    with TestClient(app) as c:
+        yield c
+
+
+def test_reserve_counts_until_exit_and_refuses_when_full():
+    controller = AdmissionController(max_calls=2, max_loop_lag=0)
+    base = controller.in_use()
+    controller.max_calls = base + 2
+    with controller.reserve() as first, controller.reserve() as second:
+        assert first and second
+        with controller.reserve() as third:
+            assert third is False
+        assert controller.in_use() == base + 2
+    assert controller.in_use() == base
+
+
+def test_unlimited_when_max_calls_is_zero():
+    controller = AdmissionController(max_calls=0, max_loop_lag=0)
+    assert not controller.at_capacity()
+    assert controller.readiness() == {"capacity": True, "loop_lag": True}
+
+
+def test_incoming_call_is_shed_with_message_at_capacity(client, monkeypatch):
+    monkeypatch.setattr(admission, "max_calls", 1)
+    monkeypatch.setattr(calls_module, "CALL_SHED_MODE", "say")
+    monkeypatch.setattr(calls_module, "CALL_SHED_MESSAGE", "Lines are busy & full")
+    before = SHED["inbound"]._value.get()
+
+    first = client.post("/incoming-call", data={"CallSid": "CAadm1", "From": "+15550001"})
+    assert "<Stream" in first.text
+    second = client.post("/incoming-call", data={"CallSid": "CAadm2", "From": "+15550002"})
+    try:
+        assert "<Say>Lines are busy &amp; full</Say>" in second.text
+        assert "<Hangup" in second.text
+        assert "<Stream" not in second.text
+        assert SHED["inbound"]._value.get() == before + 1
+        assert client.portal.call(session_manager.get, "CAadm2") is None
+    finally:
+        client.portal.call(session_manager.pop, "CAadm1")
+
+
+def test_incoming_call_reject_mode(client, monkeypatch):
+    monkeypatch.setattr(admission, "max_calls", 1)
+    monkeypatch.setattr(calls_module, "CALL_SHED_MODE", "reject")
+    monkeypatch.setattr(admission, "in_use", lambda: 1)
+    resp = client.post("/incoming-call", data={"CallSid": "CAadm3", "From": "+15550003"})
+    assert '<Reject reason="busy"' in resp.text
+
+
+def test_outgoing_call_returns_503_at_capacity(client, monkeypatch):
+    monkeypatch.setattr(admission, "max_calls", 1)
+    monkeypatch.setattr(admission, "in_use", lambda: 1)
+    resp = client.post("/outgoing-call", json={"phoneNumber": "+15550004444"})
+    assert resp.status_code == 503
+
+
+def test_ready_reports_capacity_and_loop_lag(client, monkeypatch):
+    monkeypatch.setattr(admission, "max_calls", 1)
+    monkeypatch.setattr(admission, "in_use", lambda: 1)
+    body = client.get("/ready").json()
+    assert body["checks"]["capacity"] is False
+    assert body["ready"] is False
+
+    monkeypatch.setattr(admission, "max_calls", 0)
+    monkeypatch.setattr(admission, "max_loop_lag", 0.5)
+    monkeypatch.setattr("app.core.admission.loop_monitor.last_lag", 2.0)
+    resp = client.get("/ready")
+    assert resp.status_code == 503
+    assert resp.json()["checks"]["loop_lag"] is False
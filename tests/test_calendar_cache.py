@@ -0,0 +1,161 @@
+"""Tests for the schedule_meeting free/busy cache and booking ledger."""
+from __future__ import annotations
+
+import asyncio
+import json
+from datetime import UTC, datetime, timedelta
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.core.resilience import DependencyUnavailableError
+from app.services import calendar_cache
+from app.services.calendar_cache import (
+    AvailabilityCache,
+    BookingLedger,
+    parse_business_days,
+    parse_business_hours,
+    parse_slot,
+)
+
+
+def _next_monday(hour: int, minute: int = 0) -> datetime:
+    today = datetime.now(UTC).replace(hour=hour, minute=minute, second=0, microsecond=0)
+    return today + timedelta(days=7 - today.weekday())
+
+
+class _Fetcher:
+    def __init__(self, busy):
+        self.busy = busy
+        self.calls = 0
+
+    async def __call__(self, calendar_id, start, end):
+        self.calls += 1
+        await asyncio.sleep(0)
+        return list(self.busy)
+
+
+def _cache(busy=(), **kwargs):
+    fetch = kwargs.pop("fetch", None) or _Fetcher(busy)
+    return AvailabilityCache(["cal-1"], fetch=fetch, ttl=60, horizon_days=14,
+                             slot_minutes=30, business_hours="09:00-17:00",
+                             business_days="mon,tue,wed,thu,fri", timezone="UTC",
+                             **kwargs), fetch
+
+
+def test_parsers():
+    assert [t.hour for t in parse_business_hours("09:00-17:30")] == [9, 17]
+    assert parse_business_days("Mon, tue,FRIDAY") == {0, 1, 4}
+    assert parse_slot("2026-01-05", UTC) is None
+    assert parse_slot("next tuesday", UTC) is None
+    assert parse_slot("2026-01-05 10:00", UTC) == datetime(2026, 1, 5, 10, tzinfo=UTC)
+    assert parse_slot("2026-01-05T10:00-05:00", UTC).utcoffset() == timedelta(hours=-5)
+
+
+async def test_busy_slot_is_refused_with_nearest_free_suggestions():
+    ten = _next_monday(10)
+    cache, _ = _cache(busy=[(ten, ten + timedelta(hours=1))])
+    check = await cache.claim("cal-1", ten)
+    assert not check.available
+    assert check.checked
+    assert check.suggestions == (ten - timedelta(minutes=30), ten + timedelta(hours=1),
+                                 ten - timedelta(hours=1))
+
+
+async def test_out_of_hours_and_weekend_slots_are_refused():
+    cache, _ = _cache()
+    assert not (await cache.claim("cal-1", _next_monday(16, 45))).available
+    assert not (await cache.claim("cal-1", _next_monday(8))).available
+    saturday = await cache.claim("cal-1", _next_monday(10) - timedelta(days=2))
+    assert not saturday.available
+    assert all(s.weekday() < 5 for s in saturday.suggestions)
+
+
+async def test_claim_holds_the_slot_until_settled():
+    ten = _next_monday(10)
+    cache, fetch = _cache()
+    assert (await cache.claim("cal-1", ten)).available
+    assert not (await cache.claim("cal-1", ten + timedelta(minutes=15))).available
+    cache.settle("cal-1", ten, booked=False)
+    assert (await cache.claim("cal-1", ten)).available
+
+    cache.settle("cal-1", ten, booked=True)
+    assert not (await cache.claim("cal-1", ten)).available
+    # A snapshot fetched after the booking carries it; the hold is dropped.
+    fetch.busy = [(ten, ten + timedelta(minutes=30))]
+    await cache.refresh("cal-1")
+    assert cache._holds["cal-1"] == {}
+    assert not (await cache.claim("cal-1", ten)).available
+    assert fetch.calls == 2
+
+
+async def test_concurrent_snapshots_share_one_fetch():
+    cache, fetch = _cache()
+    await asyncio.gather(*(cache.snapshot("cal-1") for _ in range(5)))
+    await cache.snapshot("cal-1")
+    assert fetch.calls == 1
+
+
+async def test_unavailable_calendar_leaves_the_slot_unchecked():
+    cache, _ = _cache(fetch=AsyncMock(side_effect=DependencyUnavailableError("n8n", "down")))
+    check = await cache.claim("cal-1", _next_monday(10))
+    assert check.available
+    assert not check.checked
+    beyond = await (_cache()[0]).claim("cal-1", _next_monday(10) + timedelta(days=30))
+    assert beyond.available
+    assert not beyond.checked
+
+
+async def test_fetch_busy_parses_route_6_response(monkeypatch):
+    webhook = AsyncMock(return_value=json.dumps(
+        {"busy": [{"start": "2026-01-05T10:00:00+00:00", "end": "2026-01-05T11:00:00+00:00"}]}))
+    monkeypatch.setattr(calendar_cache, "send_to_webhook", webhook)
+    start = datetime(2026, 1, 5, tzinfo=UTC)
+    busy = await calendar_cache.fetch_busy("cal-1", start, start + timedelta(days=1))
+    assert busy == [(datetime(2026, 1, 5, 10, tzinfo=UTC), datetime(2026, 1, 5, 11, tzinfo=UTC))]
+    payload = webhook.await_args.args[0]
+    assert payload["route"] == "6"
+    assert json.loads(payload["data"])["calendar_id"] == "cal-1"
+
+    webhook.return_value = json.dumps({"error": "N8N webhook returned status 500"})
+    with pytest.raises(DependencyUnavailableError, match="status 500"):
+        await calendar_cache.fetch_busy("cal-1", start, start + timedelta(days=1))
+
+
+async def test_ledger_replays_duplicates_and_forgets_failures():
+    ledger = BookingLedger(size=2)
+    gate = asyncio.Event()
+    calls = 0
+
+    async def book():
+        nonlocal calls
+        calls += 1
+        await gate.wait()
+        return "Booked"
+
+    first = asyncio.create_task(ledger.run("inv1", book))
+    second = asyncio.create_task(ledger.run("inv1", book))
+    await asyncio.sleep(0)
+    gate.set()
+    assert await first == ("Booked", False)
+    assert await second == ("Booked", True)
+    assert calls == 1
+
+    async def boom():
+        raise RuntimeError("n8n down")
+
+    with pytest.raises(RuntimeError):
+        await ledger.run("inv2", boom)
+    assert await ledger.run("inv2", book) == ("Booked", False)
+
+
+async def test_past_slot_is_refused_even_without_calendar_data():
+    yesterday = datetime.now(UTC) - timedelta(days=1)
+    cache, _ = _cache()
+    check = await cache.claim("cal-1", yesterday)
+    assert not check.available
+    assert check.checked
+    assert all(s > datetime.now(UTC) for s in check.suggestions)
+    down, _ = _cache(fetch=AsyncMock(side_effect=DependencyUnavailableError("n8n", "down")))
+    check = await down.claim("cal-1", yesterday)
+    assert (check.available, check.checked, check.suggestions) == (False, True, ())
@@ -0,0 +1,51 @@
+"""Tests for the rolling call analytics aggregate."""
+from __future__ import annotations
+
+from app.core.call_analytics import CallAnalytics, normalize_direction
+
+
+def test_percentiles_and_outcomes_per_direction():
+    analytics = CallAnalytics(window_seconds=60, max_samples=1000)
+    for i in range(1, 101):
+        analytics.record_outcome("inbound", "completed", float(i), now=1000.0)
+        analytics.record_setup("inbound", i / 100, now=1000.0)
+    analytics.record_outcome("inbound", "canceled", now=1000.0)
+
+    inbound = analytics.snapshot(now=1001.0)["directions"]["inbound"]
+    assert inbound["outcomes"] == {"completed": 100, "canceled": 1}
+    assert inbound["answerRate"] == round(100 / 101, 4)
+    assert inbound["durationSeconds"]["count"] == 100
+    assert inbound["durationSeconds"]["p50"] == 50.0
+    assert inbound["durationSeconds"]["p90"] == 90.0
+    assert inbound["durationSeconds"]["p99"] == 99.0
+    assert inbound["durationSeconds"]["max"] == 100.0
+    assert inbound["setupSeconds"]["p50"] == 0.5
+
+
+def test_unanswered_calls_have_no_duration_sample():
+    analytics = CallAnalytics(window_seconds=60, max_samples=10)
+    analytics.record_outcome("outbound", "no-answer", 0.0, now=0.0)
+    outbound = analytics.snapshot(now=1.0)["directions"]["outbound"]
+    assert outbound["durationSeconds"] == {"count": 0}
+    assert outbound["answerRate"] == 0.0
+
+
+def test_samples_expire_with_the_window_and_are_bounded():
+    analytics = CallAnalytics(window_seconds=60, max_samples=5)
+    analytics.record_outcome("inbound", "completed", 10.0, now=0.0)
+    for _ in range(10):
+        analytics.record_outcome("inbound", "completed", 20.0, now=100.0)
+
+    inbound = analytics.snapshot(now=120.0)["directions"]["inbound"]
+    assert inbound["outcomes"] == {"completed": 5}
+    assert inbound["durationSeconds"]["max"] == 20.0
+    empty = analytics.snapshot(now=1000.0)["directions"]["inbound"]
+    assert empty["outcomes"] == {}
+    assert empty["answerRate"] is None
+
+
+def test_normalize_direction():
+    assert normalize_direction("outbound-api") == "outbound"
+    assert normalize_direction("outbound-dial") == "outbound"
+    assert normalize_direction("inbound") == "inbound"
+    assert normalize_direction(None) == "inbound"
@@ -0,0 +1,170 @@
+"""Tests for TwiML rendering in the call webhooks."""
+from __future__ import annotations
+
+import pytest
+from twilio.twiml.voice_response import Connect, VoiceResponse
+
+from app.api.endpoints import calls
+
+
+def _reference_twiml(stream_url, first_message, caller_number, call_sid=None) -> str:
+    response = VoiceResponse()
+    connect = Connect()
+    stream = connect.stream(url=stream_url)
+    stream.parameter(name="firstMessage", value=first_message)
+    stream.parameter(name="callerNumber", value=caller_number)
+    if call_sid is not None:
+        stream.parameter(name="callSid", value=call_sid)
+    response.append(connect)
+    return str(response)
+
+
+@pytest.mark.parametrize(("first_message", "call_sid"), [
+    ("Hello, how can I help?", "CA123"),
+    ('Tom & Jerry <say> "hi" it\'s', None),
+    ("line one\nline two\r\n\ttabbed", "CA9"),
+    ('"/><Hangup/><Say>injected', "CA1"),
+    ("Grüße, ¿qué tal? 👋", "CA2"),
+])
+def test_stream_twiml_matches_twilio_helper(first_message, call_sid):
+    args = ("wss://example.com/media-stream?a=1&b=2", first_message, "+15551234567")
+    assert calls._build_stream_twiml(*args, call_sid=call_sid) == \
+        _reference_twiml(*args, call_sid=call_sid)
+
+
+def test_shed_twiml_follows_mode(monkeypatch):
+    monkeypatch.setattr(calls, "CALL_SHED_MODE", "say")
+    monkeypatch.setattr(calls, "CALL_SHED_MESSAGE", "Busy <now>")
+    assert "<Say>Busy &lt;now&gt;</Say><Hangup />" in calls._build_shed_twiml()
+    monkeypatch.setattr(calls, "CALL_SHED_MODE", "reject")
+    assert '<Reject reason="busy" />' in calls._build_shed_twiml()
+
+
+@pytest.mark.asyncio
+async def test_ringing_prewarms_and_no_answer_releases(monkeypatch):
+    from app.core.shared_state import session_manager
+
+    started = []
+
+    class _FakePrewarm:
+        def __init__(self, system_prompt, first_message):
+            started.append(first_message)
+            self.released = False
+
+        def release(self):
+            self.released = True
+
+    monkeypatch.setattr(calls, "PrewarmedCall", _FakePrewarm)
+    monkeypatch.setattr(calls, "ULTRAVOX_PREWARM_ON_RINGING", True)
+    await session_manager.create("CA-ring", firstMessage="Hello there", streamSid=None)
+    try:
+        await calls._on_call_status("CA-ring", {"CallStatus": "ringing"})
+        await calls._on_call_status("CA-ring", {"CallStatus": "ringing"})  # duplicate
+        prewarmed = (await session_manager.get("CA-ring"))["uv_prewarm"]
+        assert started == ["Hello there"]
+
+        await calls._on_call_status("CA-ring", {"CallStatus": "no-answer"})
+        assert prewarmed.released
+        # No stream will ever attach, so the status callback frees the session.
+        assert await session_manager.get("CA-ring") is None
+    finally:
+        await session_manager.pop("CA-ring")
+
+
+@pytest.mark.asyncio
+async def test_ringing_does_not_prewarm_unless_opted_in(monkeypatch):
+    from app.core.shared_state import session_manager
+
+    assert calls.ULTRAVOX_PREWARM_ON_RINGING is False  # the default
+    monkeypatch.setattr(calls, "PrewarmedCall", lambda *a: pytest.fail("must not prewarm"))
+    await session_manager.create("CA-optout", firstMessage="Hi", streamSid=None)
+    try:
+        await calls._on_call_status("CA-optout", {"CallStatus": "ringing"})
+        assert (await session_manager.get("CA-optout")).get("uv_prewarm") is None
+    finally:
+        await session_manager.pop("CA-optout")
+
+
+@pytest.mark.asyncio
+async def test_ringing_for_unknown_call_is_ignored(monkeypatch):
+    monkeypatch.setattr(calls, "PrewarmedCall", lambda *a: pytest.fail("must not prewarm"))
+    await calls._on_call_status("CA-unknown", {"CallStatus": "ringing"})
+
+
+@pytest.mark.asyncio
+async def test_final_status_records_outcome_and_keeps_streaming_session(monkeypatch):
+    from app.core.call_analytics import CallAnalytics
+    from app.core.shared_state import session_manager
+
+    analytics = CallAnalytics(window_seconds=3600, max_samples=100)
+    monkeypatch.setattr(calls, "call_analytics", analytics)
+    await session_manager.create("CA-live", direction="outbound", streamSid="MZ1")
+    try:
+        await calls._on_call_status("CA-live", {"CallStatus": "completed",
+                                                "CallDuration": "42"})
+        # The media stream owns cleanup (transcript flush) once attached.
+        assert await session_manager.get("CA-live") is not None
+    finally:
+        await session_manager.pop("CA-live")
+    await calls._on_call_status("CA-gone", {"CallStatus": "busy",
+                                            "Direction": "outbound-api"})
+
+    outbound = analytics.snapshot()["directions"]["outbound"]
+    assert outbound["outcomes"] == {"completed": 1, "busy": 1}
+    assert outbound["answerRate"] == 0.5
+    assert outbound["durationSeconds"]["p50"] == 42.0
+
+
+@pytest.mark.asyncio
+async def test_prewarmed_call_past_join_timeout_is_not_used(monkeypatch):
+    import asyncio
+
+    from app.services import ultravox_service
+
+    async def slow_create(*args, **kwargs):
+        await asyncio.sleep(3600)
+
+    monkeypatch.setattr(ultravox_service, "create_ultravox_call", slow_create)
+    prewarmed = ultravox_service.PrewarmedCall("prompt", "Hi")
+    prewarmed.created -= ultravox_service.ULTRAVOX_PREWARM_JOIN_TIMEOUT_SECONDS
+    assert await prewarmed.join_url() == ""
+    await asyncio.sleep(0)
+    assert prewarmed.task.cancelled()
+
+
+@pytest.mark.asyncio
+async def test_slow_prewarm_leaves_budget_for_creating_on_answer(monkeypatch):
+    import asyncio
+
+    from app.core.deadline import deadline_scope, remaining
+    from app.services import ultravox_service
+
+    async def slow_create(*args, **kwargs):
+        await asyncio.sleep(3600)
+
+    monkeypatch.setattr(ultravox_service, "create_ultravox_call", slow_create)
+    prewarmed = ultravox_service.PrewarmedCall("prompt", "Hi")
+    with deadline_scope(0.2):
+        assert await prewarmed.join_url() == ""
+        assert remaining(60) > 0.05
+
+
+def test_stream_twiml_carries_stream_token():
+    twiml = calls._build_stream_twiml("wss://example.com/media-stream", "Hi", "+1555",
+                                      call_sid="CA1", stream_token="abc.def")
+    assert '<Parameter name="streamToken" value="abc.def" />' in twiml
+
+
+@pytest.mark.asyncio
+async def test_unclaimed_session_expires_unless_stream_attached():
+    from app.core.shared_state import session_manager
+
+    await session_manager.create("CA-away", streamSid=None)
+    await session_manager.create("CA-here", streamSid="MZ1")
+    try:
+        await calls._expire_unclaimed("CA-away")
+        await calls._expire_unclaimed("CA-here")
+        assert await session_manager.get("CA-away") is None
+        assert await session_manager.get("CA-here") is not None
+    finally:
+        await session_manager.pop("CA-here")
@@ -0,0 +1,212 @@
+"""Tests for the outbound campaign store, pacing and dispatcher."""
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import security
+from app.api.endpoints import campaigns as campaigns_module
+from app.core.admission import admission
+from app.main import app
+from app.services.campaign_service import CampaignDispatcher, CampaignStore, NumberPool
+
+_AUTH = {"Authorization": "Bearer s3cret"}
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = CampaignStore(str(tmp_path / "campaigns.db"))
+    yield s
+    s.close()
+
+
+def test_store_claims_in_order_and_tracks_progress(store):
+    cid = store.create_campaign("wave", [("+15550001", "hi"), ("+15550002", "yo")])
+    first, second = store.claim_next(), store.claim_next()
+    assert (first.phone_number, second.phone_number) == ("+15550001", "+15550002")
+    assert store.claim_next() is None
+    store.mark_dialed(first.id, "CA1", "+15559999")
+    store.mark_failed(second.id, "boom", "+15559999")
+    progress = store.progress(cid)
+    assert progress["status"] == "completed"
+    assert progress["counts"]["dialed"] == 1
+    assert progress["counts"]["failed"] == 1
+    assert store.failures(cid) == [
+        {"phoneNumber": "+15550002", "fromNumber": "+15559999", "error": "boom"},
+    ]
+
+
+def test_store_cancel_and_recover(store):
+    cid = store.create_campaign(None, [(f"+1555000{i}", "hi") for i in range(4)])
+    store.claim_next()
+    reached_twilio = store.claim_next()
+    store._conn.execute("UPDATE jobs SET call_sid = 'CA1' WHERE id = ?", (reached_twilio.id,))
+    assert store.cancel(cid) == 2
+    assert store.cancel("nope") is None
+    # Never reached Twilio: back in the queue. Has a CallSid: not redialled.
+    assert store.recover() == (1, 1)
+    progress = store.progress(cid)
+    assert progress["counts"] == {"queued": 1, "dialing": 0, "dialed": 0,
+                                  "failed": 1, "cancelled": 2}
+    assert store.failures(cid) == [
+        {"phoneNumber": "+15550001", "fromNumber": None, "error": "interrupted"}]
+
+
+@pytest.mark.asyncio
+async def test_number_pool_paces_each_number():
+    pool = NumberPool(["+1A", "+1B"], cps=20)
+    t0 = time.monotonic()
+    numbers = [await pool.acquire() for _ in range(6)]
+    elapsed = time.monotonic() - t0
+    assert sorted(numbers) == ["+1A"] * 3 + ["+1B"] * 3
+    # Three dials per number at 20 CPS need at least two 50ms gaps.
+    assert elapsed >= 0.09
+
+
+async def _wait_for(predicate, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_dials_every_job_and_records_failures(tmp_path, monkeypatch):
+    monkeypatch.setattr(admission, "max_calls", 0)
+    dialed: list[tuple[str, str, float]] = []
+
+    async def dial(number, message, from_number):
+        dialed.append((number, from_number, time.monotonic()))
+        if number.endswith("3"):
+            raise RuntimeError("Twilio said no")
+        return f"CA{number}"
+
+    path = str(tmp_path / "c.db")
+    dispatcher = CampaignDispatcher(lambda: CampaignStore(path),
+                                    NumberPool(["+1A", "+1B"], cps=50), dial,
+                                    max_in_flight=2, idle_poll=0.05)
+    cid = dispatcher.store.create_campaign("t", [(f"+1555000{i}", "hi") for i in range(6)])
+    await dispatcher.start()
+    await _wait_for(lambda: dispatcher.store.progress(cid)["status"] == "completed")
+    counts = dispatcher.store.progress(cid)["counts"]
+    await dispatcher.stop()
+
+    assert counts["dialed"] == 5 and counts["failed"] == 1
+    for from_number in ("+1A", "+1B"):
+        times = [t for _, f, t in dialed if f == from_number]
+        assert all(b - a >= 0.015 for a, b in itertools.pairwise(times))
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_waits_for_call_capacity(tmp_path, monkeypatch):
+    full = {"value": True}
+    monkeypatch.setattr(admission, "at_capacity", lambda: full["value"])
+    dialed: list[str] = []
+
+    async def dial(number, message, from_number):
+        dialed.append(number)
+        return "CA1"
+
+    path = str(tmp_path / "c.db")
+    dispatcher = CampaignDispatcher(lambda: CampaignStore(path), NumberPool(["+1A"], 0),
+                                    dial, idle_poll=0.05, capacity_poll=0.01)
+    cid = dispatcher.store.create_campaign("t", [("+15550001", "hi")])
+    await dispatcher.start()
+    await asyncio.sleep(0.05)
+    assert dialed == []
+    full["value"] = False
+    await _wait_for(lambda: dispatcher.store.progress(cid)["status"] == "completed")
+    await dispatcher.stop()
+    assert dialed == ["+15550001"]
+
+
+@pytest.mark.asyncio
+async def test_stopping_mid_pacing_requeues_the_claimed_job(tmp_path, monkeypatch):
+    monkeypatch.setattr(admission, "max_calls", 0)
+    dialed: list[str] = []
+
+    async def dial(number, message, from_number):
+        dialed.append(number)
+        return "CA1"
+
+    path = str(tmp_path / "c.db")
+    # One dial every 100s: the second job is claimed, then waits on the pool.
+    dispatcher = CampaignDispatcher(lambda: CampaignStore(path), NumberPool(["+1A"], 0.01),
+                                    dial, idle_poll=0.05)
+    store = await dispatcher.open_store()
+    cid = store.create_campaign("t", [("+15550001", "hi"), ("+15550002", "hi")])
+    await dispatcher.start()
+    await _wait_for(lambda: store.progress(cid)["counts"]["dialing"] == 1 and dialed)
+    await dispatcher.stop()
+
+    check = CampaignStore(path)
+    assert check.progress(cid)["counts"]["queued"] == 1
+    check.close()
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_crash_is_logged(tmp_path, monkeypatch, caplog):
+    async def dial(number, message, from_number):
+        return "CA1"
+
+    def broken():
+        raise RuntimeError("disk gone")
+
+    path = str(tmp_path / "c.db")
+    dispatcher = CampaignDispatcher(lambda: CampaignStore(path), NumberPool(["+1A"], 0),
+                                    dial, idle_poll=0.05)
+    store = await dispatcher.open_store()
+    monkeypatch.setattr(store, "claim_next", broken)
+    with caplog.at_level("ERROR", logger="app.services.campaign_service"):
+        await dispatcher.start()
+        await _wait_for(lambda: not dispatcher.running)
+        await asyncio.sleep(0)
+    assert "Campaign dispatcher crashed" in caplog.text
+    await dispatcher.stop()
+
+
+def test_campaign_api_queues_and_streams_progress(tmp_path, monkeypatch):
+    monkeypatch.setattr(security, "ADMIN_API_TOKEN", "s3cret")
+    monkeypatch.setattr(admission, "max_calls", 0)
+    dialed: list[str] = []
+
+    async def dial(number, message, from_number):
+        dialed.append(f"{number}:{message}")
+        return "CA" + number[1:]
+
+    path = str(tmp_path / "api.db")
+    dispatcher = CampaignDispatcher(lambda: CampaignStore(path),
+                                    NumberPool(["+1A"], 0), dial, idle_poll=0.05)
+    monkeypatch.setattr(campaigns_module, "campaign_dispatcher", dispatcher)
+    monkeypatch.setattr(campaigns_module, "DEFAULT_FIRST_MESSAGE", "default")
+
+    with TestClient(app) as client:
+        assert client.post("/campaigns", json={"calls": []}, headers=_AUTH).status_code == 422
+        resp = client.post("/campaigns", headers=_AUTH, json={
+            "name": "reminders",
+            "calls": [{"phoneNumber": "+15550001", "firstMessage": "Your visit is tomorrow"},
+                      {"phoneNumber": "+15550002"}],
+        })
+        assert resp.status_code == 202
+        cid = resp.json()["campaignId"]
+        with client.stream("GET", f"/campaigns/{cid}/status?interval=0.1",
+                           headers=_AUTH) as stream:
+            lines = [json.loads(line) for line in stream.iter_lines() if line]
+        assert lines[-1]["status"] == "completed"
+        assert lines[-1]["counts"]["dialed"] == 2
+        assert client.get("/campaigns/unknown", headers=_AUTH).status_code == 404
+        assert client.get("/campaigns", headers=_AUTH).json()["campaigns"][0]["campaignId"] == cid
+        client.portal.call(dispatcher.stop)
+
+    assert dialed == ["+15550001:Your visit is tomorrow", "+15550002:default"]
+
+
+def test_campaign_api_requires_admin_token(monkeypatch):
+    monkeypatch.setattr(security, "ADMIN_API_TOKEN", "s3cret")
+    with TestClient(app) as client:
+        assert client.get("/campaigns").status_code == 401
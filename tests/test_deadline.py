@@ -0,0 +1,122 @@
+"""Tests for deadline propagation and hedged requests."""
+import asyncio
+import time
+
+import pytest
+
+from app.api.endpoints import calls
+from app.core.deadline import deadline_scope, get_deadline, remaining
+from app.core.resilience import LatencyTracker, hedged
+
+
+def test_remaining_returns_default_without_deadline():
+    assert get_deadline() is None
+    assert remaining(10.0) == 10.0
+
+
+def test_nested_scope_can_only_shorten():
+    with deadline_scope(1.0):
+        outer = get_deadline()
+        with deadline_scope(60.0):
+            assert get_deadline() == outer
+        with deadline_scope(0.5):
+            assert get_deadline() < outer
+            assert remaining(10.0) <= 0.5
+        assert get_deadline() == outer
+    assert get_deadline() is None
+
+
+def test_remaining_is_zero_after_deadline(monkeypatch):
+    with deadline_scope(0.01):
+        time.sleep(0.02)
+        assert remaining(10.0) == 0.0
+
+
+def test_latency_tracker_needs_min_samples():
+    tracker = LatencyTracker(min_samples=5)
+    for _ in range(4):
+        tracker.observe(0.2)
+    assert tracker.hedge_delay(floor=0.05) is None
+    tracker.observe(0.2)
+    assert tracker.hedge_delay(floor=0.05) == pytest.approx(0.2)
+    assert tracker.hedge_delay(floor=0.5) == 0.5
+
+
+@pytest.mark.asyncio
+async def test_hedged_returns_faster_second_attempt():
+    attempts = {"n": 0}
+
+    async def factory():
+        attempts["n"] += 1
+        if attempts["n"] == 1:
+            await asyncio.sleep(1)
+            return "slow"
+        return "fast"
+
+    assert await hedged(factory, 0.01, "test") == "fast"
+    assert attempts["n"] == 2
+
+
+@pytest.mark.asyncio
+async def test_hedged_without_delay_is_single_attempt():
+    attempts = {"n": 0}
+
+    async def factory():
+        attempts["n"] += 1
+        return "ok"
+
+    assert await hedged(factory, None, "test") == "ok"
+    assert attempts["n"] == 1
+
+
+@pytest.mark.asyncio
+async def test_first_message_degrades_to_default_within_budget(monkeypatch):
+    monkeypatch.setattr(calls, "N8N_WEBHOOK_URL", "http://n8n.test/wh")
+
+    async def slow_post(body, timeout):
+        await asyncio.sleep(5)
+
+    monkeypatch.setattr(calls, "_post_first_message", slow_post)
+    t0 = time.monotonic()
+    with deadline_scope(0.05):
+        message = await calls._fetch_first_message_from_n8n("+1555")
+    assert message == calls.DEFAULT_FIRST_MESSAGE
+    assert time.monotonic() - t0 < 1.0
+
+
+@pytest.mark.asyncio
+async def test_hanging_first_message_counts_against_the_breaker(monkeypatch):
+    from app.core.resilience import CircuitBreaker
+
+    breaker = CircuitBreaker("test-first-message", failure_threshold=1, reset_timeout=60)
+    monkeypatch.setattr(calls, "n8n_breaker", breaker)
+    monkeypatch.setattr(calls, "N8N_WEBHOOK_URL", "http://n8n.test/wh")
+
+    async def hang(*args, **kwargs):
+        await asyncio.sleep(5)
+
+    monkeypatch.setattr(calls, "get_http_client", lambda: type("C", (), {"post": hang})())
+    with deadline_scope(0.05):
+        assert await calls._fetch_first_message_from_n8n("+1555") == calls.DEFAULT_FIRST_MESSAGE
+    assert breaker.state == "open"
+
+
+@pytest.mark.asyncio
+async def test_cancelling_hedged_before_the_hedge_cancels_the_primary():
+    started = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def factory():
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    caller = asyncio.create_task(hedged(factory, 5, "test"))
+    await started.wait()
+    caller.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await caller
+    await asyncio.wait_for(cancelled.wait(), timeout=1)
@@ -41,3 +41,23 @@ def test_ready_returns_503_when_config_missing(monkeypatch):
     body = resp.json()
     assert body["ready"] is False
     assert body["checks"]["twilio"] is False
+
+
+def test_ready_waits_for_warmup(monkeypatch):
+    monkeypatch.setattr(main_module, "TWILIO_ACCOUNT_SID", "AC1")
+    monkeypatch.setattr(main_module, "ULTRAVOX_API_KEY", "uv")
+    monkeypatch.setattr(main_module, "N8N_WEBHOOK_URL", "http://wh")
+    monkeypatch.setattr(main_module, "PUBLIC_URL", "http://pu")
+    monkeypatch.setattr(main_module, "WARMUP_ON_STARTUP", True)
+    started = main_module.asyncio.Event()
+
+    async def _slow_warm_up() -> None:
+        started.set()
+        await main_module.asyncio.sleep(3600)
+
+    monkeypatch.setattr(main_module.warmup, "warm_up", _slow_warm_up)
+    main_module.warmup.reset()
+    with _client() as c:
+        resp = c.get("/ready")
+    assert resp.status_code == 503
+    assert resp.json()["checks"]["warmup"] is False
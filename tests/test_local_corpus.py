@@ -0,0 +1,106 @@
+"""Tests for the local BM25 corpus index."""
+from __future__ import annotations
+
+import pytest
+
+from app.services import local_corpus
+from app.services.local_corpus import CorpusIndex, split_passages, tokenize
+
+_PARKING = ("# Parking\nFree parking is available behind the clinic.\n\n"
+            "Street parking is metered until 6pm.")
+_HOURS = ("# Opening hours\nWe are open Monday to Friday, 8am to 6pm.\n\n"
+          "# Holidays\nThe clinic is closed on public holidays.")
+_CANCELLATION = ("Appointments cancelled with less than 24 hours notice incur a "
+                 "$50 cancellation fee.")
+_DOCS = [
+    ("faq/parking.md", _PARKING),
+    ("faq/hours.md", _HOURS),
+    ("policies/cancellation.txt", _CANCELLATION),
+]
+
+
+def test_tokenize_drops_stopwords_and_punctuation():
+    assert tokenize("What are your opening-hours, please?") == ["opening", "hours"]
+
+
+def test_split_passages_keeps_headings_and_bounds_size():
+    passages = split_passages("# A\none\n\ntwo\n\n# B\nthree")
+    assert passages == ["A\none\n\ntwo", "B\nthree"]
+    long_text = "\n\n".join(f"paragraph {i} " + "x" * 100 for i in range(20))
+    assert all(len(p) <= 700 for p in split_passages(long_text, max_chars=600))
+
+
+def test_search_ranks_the_matching_passage_first():
+    index = CorpusIndex.from_documents(_DOCS)
+    hits = index.search("How much is the cancellation fee?")
+    assert hits[0].source == "policies/cancellation.txt"
+    assert hits[0].score > 0.35
+    assert index.search("holidays closed")[0].text.startswith("Holidays")
+    assert index.search("the and of") == []
+
+
+def test_unknown_words_lower_confidence():
+    index = CorpusIndex.from_documents(_DOCS)
+    focused = index.search("parking")[0].score
+    diluted = index.search("parking for my helicopter spaceship")[0].score
+    assert diluted < focused
+
+
+def test_prebuilt_index_round_trips(tmp_path):
+    index = CorpusIndex.from_documents(_DOCS)
+    path = tmp_path / "index.json"
+    index.save(path)
+    loaded = CorpusIndex.load(path)
+    assert loaded.search("parking") == index.search("parking")
+
+
+def test_load_configured_prefers_prebuilt_index(tmp_path, monkeypatch):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "a.md").write_text("# Fees\nConsultations cost $80.", encoding="utf-8")
+    (docs / "ignored.pdf").write_bytes(b"%PDF")
+    monkeypatch.setattr(local_corpus, "LOCAL_CORPUS_DIR", str(docs))
+    monkeypatch.setattr(local_corpus, "LOCAL_CORPUS_INDEX_PATH", str(tmp_path / "none.json"))
+    monkeypatch.setattr(local_corpus, "_index", None)
+    assert len(local_corpus.load_configured()) == 1
+
+    CorpusIndex.from_documents(_DOCS).save(tmp_path / "prebuilt.json")
+    monkeypatch.setattr(local_corpus, "LOCAL_CORPUS_INDEX_PATH", str(tmp_path / "prebuilt.json"))
+    assert len(local_corpus.load_configured()) == 4
+    hits, confident = local_corpus.answer("cancellation fee")
+    assert confident and hits[0].source == "policies/cancellation.txt"
+    _, confident = local_corpus.answer("do you sell bicycles")
+    assert not confident
+
+
+def test_rejects_unknown_index_version():
+    with pytest.raises(ValueError, match="version"):
+        CorpusIndex.from_json({"version": 99})
+
+
+def test_tool_registration_follows_configuration(monkeypatch):
+    from app.services import ultravox_service
+
+    monkeypatch.setattr(local_corpus, "LOCAL_CORPUS_DIR", None)
+    monkeypatch.setattr(local_corpus, "LOCAL_CORPUS_INDEX_PATH", None)
+    assert [t.get("toolName") for t in ultravox_service._corpus_tools()] == ["queryCorpus"]
+
+    monkeypatch.setattr(local_corpus, "LOCAL_CORPUS_DIR", "/srv/faq")
+    local, remote = ultravox_service._corpus_tools()
+    assert local["temporaryTool"]["modelToolName"] == "queryCorpus"
+    assert "client" in local["temporaryTool"]
+    assert remote["nameOverride"] == "queryRemoteCorpus"
+
+
+def test_unloadable_index_is_logged(tmp_path, monkeypatch, caplog):
+    monkeypatch.setattr(local_corpus, "LOCAL_CORPUS_DIR", None)
+    monkeypatch.setattr(local_corpus, "_index", None)
+    broken = tmp_path / "broken.json"
+    broken.write_text("{not json", encoding="utf-8")
+    for path in (tmp_path / "missing.json", broken):
+        monkeypatch.setattr(local_corpus, "LOCAL_CORPUS_INDEX_PATH", str(path))
+        caplog.clear()
+        with caplog.at_level("WARNING", logger="app.services.local_corpus"):
+            assert local_corpus.load_configured() is None
+        assert f"Cannot load LOCAL_CORPUS_INDEX_PATH={path}" in caplog.text
+        assert "No local corpus loaded" in caplog.text
@@ -48,3 +48,52 @@ def test_filter_injects_dash_when_unbound():
 def test_log_context_contextvar_is_module_state():
     # The contextvar is module-level; bind/clear round-trip is observable.
     assert hasattr(log_context, "_call_sid_var")
+
+
+def _capture(logger: logging.Logger) -> list[logging.LogRecord]:
+    records: list[logging.LogRecord] = []
+
+    class _ListHandler(logging.Handler):
+        def emit(self, record: logging.LogRecord) -> None:
+            records.append(record)
+
+    logger.addHandler(_ListHandler())
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    return records
+
+
+def test_call_debug_only_fires_for_targeted_calls(monkeypatch):
+    monkeypatch.setattr(log_context, "_debug_call_sids", {})
+    monkeypatch.setattr(log_context, "_debug_numbers", {})
+    records = _capture(logging.getLogger("test.call_debug"))
+    logger = logging.getLogger("test.call_debug")
+
+    bind_call_sid("CAother")
+    log_context.call_debug(logger, "hidden %s", 1)
+    assert records == []
+
+    log_context.add_debug_target(call_sid="CAtarget")
+    log_context.call_debug(logger, "hidden %s", 2)
+    assert records == []
+
+    bind_call_sid("CAtarget")
+    log_context.call_debug(logger, "shown %s", 3)
+    clear_call_sid()
+    assert [r.getMessage() for r in records] == ["shown 3"]
+    assert records[0].levelno == logging.DEBUG
+    assert records[0].funcName == "test_call_debug_only_fires_for_targeted_calls"
+
+
+def test_debug_target_by_caller_number_and_expiry(monkeypatch):
+    monkeypatch.setattr(log_context, "_debug_call_sids", {})
+    monkeypatch.setattr(log_context, "_debug_numbers", {})
+    log_context.add_debug_target(caller_number="+1555", ttl_seconds=60)
+    log_context.bind_caller_number("+1555")
+    try:
+        assert log_context.is_call_debug_enabled() is True
+        log_context._debug_numbers["+1555"] = 0.0  # expired
+        assert log_context.is_call_debug_enabled() is False
+        assert log_context.list_debug_targets() == []
+    finally:
+        clear_call_sid()
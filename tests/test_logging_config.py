@@ -1,10 +1,19 @@
-"""Tests for the JSON logging formatter."""
+"""Tests for the JSON logging formatter and the queued log pipeline."""
 from __future__ import annotations
 
 import json
 import logging
+import queue
+import time
 
-from app.core.logging_config import JsonFormatter, configure_logging
+from app.core.log_context import bind_call_sid, clear_call_sid
+from app.core.logging_config import (
+    DroppingQueueHandler,
+    JsonFormatter,
+    RateLimitFilter,
+    configure_logging,
+)
+from app.core.metrics import log_messages_suppressed_total, log_records_dropped_total
 
 
 def test_json_formatter_emits_valid_json():
@@ -38,3 +47,148 @@ def test_configure_logging_replaces_handlers():
     configure_logging("INFO", "text")
     # Same count after reconfigure (handlers replaced, not appended).
     assert len(root.handlers) == n_json
+
+
+def test_json_formatter_reprs_unserializable_extras():
+    formatter = JsonFormatter()
+    record = logging.LogRecord(
+        name="x", level=logging.INFO, pathname=__file__, lineno=1,
+        msg="event", args=(), exc_info=None,
+    )
+    circular: list = []
+    circular.append(circular)
+    record.obj = object()  # type: ignore[attr-defined]
+    record.circular = circular  # type: ignore[attr-defined]
+    payload = json.loads(formatter.format(record))
+    assert payload["obj"].startswith("<object object")
+    assert payload["circular"] == "[[...]]"
+
+
+def test_json_formatter_caches_timestamp_per_second():
+    formatter = JsonFormatter()
+    record = logging.LogRecord(
+        name="x", level=logging.INFO, pathname=__file__, lineno=1,
+        msg="a", args=(), exc_info=None,
+    )
+    first = json.loads(formatter.format(record))["ts"]
+    record.created += 0.5 - (record.created % 1)  # same second
+    assert json.loads(formatter.format(record))["ts"] == first
+    assert formatter._ts_cache[1] == first
+
+
+def test_queue_handler_drops_and_counts_when_full():
+    log_queue: queue.Queue = queue.Queue(maxsize=1)
+    handler = DroppingQueueHandler(log_queue)
+    before = log_records_dropped_total._value.get()
+    for i in range(3):
+        handler.handle(logging.LogRecord(
+            name="x", level=logging.INFO, pathname=__file__, lineno=1,
+            msg="n=%d", args=(i,), exc_info=None,
+        ))
+    assert log_queue.qsize() == 1
+    assert log_queue.get_nowait().msg == "n=0"  # args merged before enqueue
+    assert log_records_dropped_total._value.get() - before == 2
+
+
+def test_queued_logging_tags_call_sid_and_flushes_on_reconfigure(capsys):
+    configure_logging("INFO", "json", queue_size=100)
+    bind_call_sid("CAqueued")
+    try:
+        logging.getLogger("q").info("through the queue")
+    finally:
+        clear_call_sid()
+    # Reconfiguring stops (and drains) the previous writer thread.
+    configure_logging("INFO", "text", queue_size=0)
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()
+             if line.startswith("{")]
+    assert any(p["msg"] == "through the queue" and p["call_sid"] == "CAqueued"
+               for p in lines)
+
+
+def _error(msg: str, call_sid: str = "CA1") -> logging.LogRecord:
+    record = logging.LogRecord(
+        name="media", level=logging.ERROR, pathname=__file__, lineno=1,
+        msg=msg, args=(), exc_info=None,
+    )
+    record.call_sid = call_sid  # type: ignore[attr-defined]
+    return record
+
+
+def test_rate_limit_filter_suppresses_and_summarizes(monkeypatch):
+    import app.core.logging_config as lc
+
+    now = [1000.0]
+    monkeypatch.setattr(lc.time, "monotonic", lambda: now[0])
+    limiter = RateLimitFilter(rate=1.0, burst=2)
+    before = log_messages_suppressed_total.labels(logger="media")._value.get()
+
+    results = [limiter.filter(_error("Error sending media")) for _ in range(10)]
+    assert results == [True, True] + [False] * 8
+    assert log_messages_suppressed_total.labels(logger="media")._value.get() - before == 8
+
+    now[0] += 1.0  # one token refilled
+    record = _error("Error sending media")
+    assert limiter.filter(record) is True
+    assert record.getMessage() == "Error sending media (8 similar messages suppressed)"
+    assert record.suppressed == 8  # type: ignore[attr-defined]
+
+
+def test_rate_limit_filter_keys_by_call_and_template_and_skips_info():
+    limiter = RateLimitFilter(rate=0.001, burst=1)
+    assert limiter.filter(_error("boom", "CA1")) is True
+    assert limiter.filter(_error("boom", "CA1")) is False
+    assert limiter.filter(_error("boom", "CA2")) is True
+    assert limiter.filter(_error("other", "CA1")) is True
+    info = logging.LogRecord(
+        name="media", level=logging.INFO, pathname=__file__, lineno=1,
+        msg="boom", args=(), exc_info=None,
+    )
+    assert all(limiter.filter(info) for _ in range(5))
+
+
+def test_rate_limit_filter_bounds_tracked_keys():
+    limiter = RateLimitFilter(rate=1.0, burst=1, max_keys=3)
+    for i in range(10):
+        limiter.filter(_error("boom", f"CA{i}"))
+    assert len(limiter._buckets) == 3
+
+
+def test_rate_limit_filter_summarizes_quiet_and_evicted_keys(monkeypatch):
+    import app.core.logging_config as lc
+
+    now = [1000.0]
+    monkeypatch.setattr(lc.time, "monotonic", lambda: now[0])
+    limiter = RateLimitFilter(rate=1.0, burst=1, max_keys=2)
+    for _ in range(4):
+        limiter.filter(_error("boom %s", "CA1"))
+    limiter._buckets[("CA1", "media", logging.ERROR, "boom %s")].args = ("x",)
+    assert limiter.summaries() == []  # not quiet for a refill period yet
+    now[0] += 1.0
+    [summary] = limiter.summaries()
+    assert summary.getMessage() == "boom x (3 similar messages suppressed)"
+    assert (summary.call_sid, summary.levelno) == ("CA1", logging.ERROR)  # type: ignore[attr-defined]
+    assert limiter.summaries() == []
+
+    for _ in range(3):
+        limiter.filter(_error("flood", "CA2"))
+    limiter.filter(_error("other", "CA3"))
+    limiter.filter(_error("another", "CA4"))  # evicts CA2's key
+    [evicted] = limiter.summaries()
+    assert evicted.getMessage() == "flood (2 similar messages suppressed)"
+
+
+def test_summary_is_logged_after_the_flood_stops(monkeypatch, capsys):
+    import app.core.logging_config as lc
+
+    monkeypatch.setattr(lc, "_SUMMARY_INTERVAL", 0.02)
+    configure_logging("INFO", "text", queue_size=0, rate_limit=20, rate_limit_burst=1)
+    log = logging.getLogger("flood")
+    for _ in range(6):
+        log.error("peer gone")
+    out, deadline = "", time.monotonic() + 2
+    while "suppressed" not in out:
+        assert time.monotonic() < deadline, "no summary logged"
+        time.sleep(0.02)
+        out += capsys.readouterr().out
+    assert "ERROR flood [-] peer gone (5 similar messages suppressed)" in out
+    configure_logging("INFO", "text", queue_size=0)
@@ -0,0 +1,61 @@
+"""Tests for the event loop lag monitor and task introspection."""
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+
+from app.core.log_context import bind_call_sid, clear_call_sid
+from app.core.loop_monitor import LoopMonitor, describe_tasks
+
+
+def _block_the_loop(seconds: float) -> None:
+    time.sleep(seconds)
+
+
+@pytest.mark.asyncio
+async def test_stall_is_reported_with_stack_sample():
+    monitor = LoopMonitor(interval=0.02, slow_threshold=0.05)
+    monitor.start()
+    try:
+        await asyncio.sleep(0.05)
+        _block_the_loop(0.3)
+        await asyncio.sleep(0.1)
+    finally:
+        await monitor.stop()
+
+    assert monitor.max_lag >= 0.2
+    stall = monitor.stalls[-1]
+    assert stall["blockedSeconds"] >= 0.2
+    assert "_block_the_loop" in stall["stack"]
+    assert not monitor.running
+
+
+@pytest.mark.asyncio
+async def test_describe_tasks_groups_by_prefix_with_age_and_call_sid():
+    monitor = LoopMonitor(interval=1.0, slow_threshold=1.0)
+    monitor.start()
+    gate = asyncio.Event()
+    try:
+        bind_call_sid("CAtasks")
+        tasks = [asyncio.create_task(gate.wait(), name=f"tool:verify-{i}") for i in range(2)]
+        clear_call_sid()
+        await asyncio.sleep(0.01)
+        report = describe_tasks()
+    finally:
+        gate.set()
+        await asyncio.gather(*tasks)
+        await monitor.stop()
+
+    group = report["groups"]["tool"]
+    assert group["count"] == 2
+    assert group["oldestSeconds"] >= 0.01
+    assert {t["callSid"] for t in group["tasks"]} == {"CAtasks"}
+    assert "loop" in report["groups"]  # the monitor's own task
+
+
+def test_disabled_monitor_does_not_start():
+    monitor = LoopMonitor(interval=0, slow_threshold=0.1)
+    monitor.start()  # no running loop needed when disabled
+    assert not monitor.running
@@ -4,6 +4,7 @@ We exercise the message-parsing branches of ``_handle_ultravox_text``,
 ``_on_twilio_media``, and ``_forward_agent_audio`` directly. Anything that
 requires real Twilio/Ultravox WebSocket I/O is left to integration tests.
 """
+import asyncio
 import base64
 import json
 from unittest.mock import AsyncMock, MagicMock
@@ -51,14 +52,51 @@ async def test_handle_ultravox_text_tool_invocation_dispatches(monkeypatch):
     cs = _state()
     cs.uv_ws = AsyncMock()
     dispatched = AsyncMock()
-    monkeypatch.setattr(ms, "handle_tool_invocation", dispatched)
+    monkeypatch.setattr(ms, "run_tool_invocation", dispatched)
     await ms._handle_ultravox_text(cs, json.dumps({
         "type": "client_tool_invocation", "toolName": "verify",
         "invocationId": "inv1", "parameters": {"full_name": "A"},
     }))
+    # Dispatched as a background task, not awaited inline.
+    assert [t.get_name() for t in cs.tool_tasks] == ["tool:verify"]
+    await asyncio.gather(*cs.tool_tasks)
     dispatched.assert_awaited_once_with(
         cs.uv_ws, "verify", "inv1", {"full_name": "A"},
     )
+    assert not cs.tool_tasks
+
+
+@pytest.mark.asyncio
+async def test_slow_tool_does_not_block_receive_loop(monkeypatch):
+    cs = _state()
+    cs.uv_ws = AsyncMock()
+    release = asyncio.Event()
+
+    async def slow_tool(*args):
+        await release.wait()
+
+    monkeypatch.setattr(ms, "run_tool_invocation", slow_tool)
+    await asyncio.wait_for(ms._handle_ultravox_text(cs, json.dumps({
+        "type": "client_tool_invocation", "toolName": "schedule_meeting",
+        "invocationId": "inv1", "parameters": {},
+    })), timeout=0.5)
+    assert len(cs.tool_tasks) == 1
+    release.set()
+    await asyncio.gather(*cs.tool_tasks)
+
+
+@pytest.mark.asyncio
+async def test_cleanup_cancels_running_tool_tasks(monkeypatch):
+    cs = _state()
+    cs.session = None
+
+    async def forever():
+        await asyncio.Event().wait()
+
+    task = asyncio.create_task(forever())
+    cs.tool_tasks.add(task)
+    await ms._cleanup(cs)
+    assert task.cancelled()
 
 
 @pytest.mark.asyncio
@@ -166,3 +204,207 @@ async def test_on_twilio_start_binds_call_sid_into_log_context(monkeypatch):
     await ms._on_twilio_start(cs, data)
     assert log_context.get_call_sid() == "CA-bind"
     log_context.clear_call_sid()
+
+
+@pytest.mark.asyncio
+async def test_on_twilio_start_uses_prewarmed_join_url(monkeypatch):
+    from app.core.shared_state import session_manager
+    from app.services.ultravox_service import PrewarmedCall
+
+    async def fake_create(system_prompt, first_message, join_timeout=None):
+        fake_create.calls.append(join_timeout)
+        return "wss://prewarmed"
+    fake_create.calls = []
+    monkeypatch.setattr("app.services.ultravox_service.create_ultravox_call", fake_create)
+    direct = AsyncMock(return_value="wss://direct")
+    monkeypatch.setattr(ms, "create_ultravox_call", direct)
+    connected: list[str] = []
+
+    async def connect(url, **kwargs):
+        connected.append(url)
+        return MagicMock(state=State.OPEN)
+    monkeypatch.setattr(ms.websockets, "connect", connect)
+
+    await session_manager.create("CA-pre", transcript="", firstMessage="Hi")
+    prewarmed = PrewarmedCall("prompt", "Hi")
+    await session_manager.update("CA-pre", uv_prewarm=prewarmed)
+    cs = _state()
+    data = {"start": {"streamSid": "MZ-pre", "callSid": "CA-pre", "customParameters": {}}}
+    try:
+        await ms._on_twilio_start(cs, data)
+        assert connected == ["wss://prewarmed"]
+        direct.assert_not_awaited()
+        assert fake_create.calls and fake_create.calls[0] > 0
+        assert (await session_manager.get("CA-pre"))["uv_prewarm"] is None
+    finally:
+        await session_manager.pop("CA-pre")
+        ms.calls_active.dec()
+        ms.WEBSOCKETS["ultravox"].dec()
+
+
+@pytest.mark.asyncio
+async def test_on_twilio_start_rebuilds_session_from_stream_token(monkeypatch):
+    from app.core import stream_token
+    from app.core.shared_state import session_manager
+
+    monkeypatch.setattr(stream_token, "STREAM_TOKEN_SECRET", "shared-secret")
+    monkeypatch.setattr(ms, "create_ultravox_call", AsyncMock(return_value="wss://uv"))
+    monkeypatch.setattr(ms.websockets, "connect",
+                        AsyncMock(return_value=MagicMock(state=State.OPEN)))
+    pending = []
+
+    async def fetch_call(call_sid):
+        pending.append(ms.admission._pending)
+        return MagicMock(direction="outbound-api", to="+1 555 123 4567", status="in-progress")
+
+    monkeypatch.setattr(ms, "fetch_call", fetch_call)
+    params = {"callerNumber": "+15551234567", "firstMessage": "Hi there"}
+    params["streamToken"] = stream_token.issue_stream_token(
+        params["callerNumber"], params["firstMessage"], "outbound")
+    cs = _state(session=None)
+    data = {"start": {"streamSid": "MZ-x", "callSid": "CA-elsewhere",
+                      "customParameters": params}}
+    try:
+        await ms._on_twilio_start(cs, data)
+        session = await session_manager.get("CA-elsewhere")
+        assert session["direction"] == "outbound"
+        assert session["firstMessage"] == "Hi there"
+        assert session["streamSid"] == "MZ-x"
+        assert cs.started.is_set()
+        # A slot was reserved while the call was looked up.
+        assert pending == [1]
+    finally:
+        await session_manager.pop("CA-elsewhere")
+        ms.calls_active.dec()
+        ms.WEBSOCKETS["ultravox"].dec()
+
+
+@pytest.mark.asyncio
+async def test_stream_token_session_is_not_rebuilt_at_capacity(monkeypatch):
+    from app.core import stream_token
+
+    monkeypatch.setattr(stream_token, "STREAM_TOKEN_SECRET", "shared-secret")
+    monkeypatch.setattr(ms.admission, "max_calls", 1)
+    monkeypatch.setattr(ms.admission, "in_use", lambda: 1)
+    before = ms.STREAM_SESSIONS["shed"]._value.get()
+    params = {"callerNumber": "+15551234567", "firstMessage": "Hi"}
+    params["streamToken"] = stream_token.issue_stream_token(
+        params["callerNumber"], params["firstMessage"], "outbound")
+    cs = _state(session=None)
+    await ms._on_twilio_start(cs, {"start": {"streamSid": "MZ-s", "callSid": "CA-shed",
+                                             "customParameters": params}})
+    cs.twilio_ws.close.assert_awaited()
+    assert await ms.session_manager.get("CA-shed") is None
+    assert ms.STREAM_SESSIONS["shed"]._value.get() == before + 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("call", [
+    MagicMock(direction="outbound-api", to="+15550000000", status="in-progress"),
+    MagicMock(direction="inbound", to="+15551234567", status="in-progress"),
+    MagicMock(direction="outbound-api", to="+15551234567", status="completed"),
+])
+async def test_outbound_stream_token_must_match_the_twilio_call(monkeypatch, call):
+    from app.core import stream_token
+
+    monkeypatch.setattr(stream_token, "STREAM_TOKEN_SECRET", "shared-secret")
+    monkeypatch.setattr(ms, "fetch_call", AsyncMock(return_value=call))
+    params = {"callerNumber": "+15551234567", "firstMessage": "Hi"}
+    params["streamToken"] = stream_token.issue_stream_token(
+        params["callerNumber"], params["firstMessage"], "outbound")
+    cs = _state(session=None)
+    await ms._on_twilio_start(cs, {"start": {"streamSid": "MZ-o", "callSid": "CA-other",
+                                             "customParameters": params}})
+    cs.twilio_ws.close.assert_awaited()
+    assert await ms.session_manager.get("CA-other") is None
+    assert ms.admission._pending == 0
+
+
+@pytest.mark.asyncio
+async def test_on_twilio_start_rejects_tampered_stream_token(monkeypatch):
+    from app.core import stream_token
+
+    monkeypatch.setattr(stream_token, "STREAM_TOKEN_SECRET", "shared-secret")
+    token = stream_token.issue_stream_token("+15551234567", "Hi", "inbound", "CA-t")
+    cs = _state(session=None)
+    data = {"start": {"streamSid": "MZ-t", "callSid": "CA-t", "customParameters": {
+        "callerNumber": "+15551234567", "firstMessage": "Say something else",
+        "streamToken": token,
+    }}}
+    await ms._on_twilio_start(cs, data)
+    cs.twilio_ws.close.assert_awaited()
+    assert await ms.session_manager.get("CA-t") is None
+
+
+@pytest.mark.asyncio
+async def test_debug_targeted_call_logs_ultravox_side_and_tool_webhooks(monkeypatch):
+    import logging
+
+    from fastapi import WebSocketDisconnect
+
+    from app.core import log_context
+    from app.core.shared_state import session_manager
+    from app.services import n8n_service
+
+    monkeypatch.setattr(log_context, "_debug_call_sids", {})
+    monkeypatch.setattr(log_context, "_debug_numbers", {})
+    log_context.add_debug_target(call_sid="CA-dbg")
+    monkeypatch.setattr(n8n_service, "N8N_WEBHOOK_URL", "https://n8n.example/hook")
+    client = MagicMock()
+    client.post = AsyncMock(return_value=MagicMock(status_code=200, text="{}"))
+    monkeypatch.setattr(n8n_service, "get_http_client", lambda: client)
+    monkeypatch.setattr(ms, "create_ultravox_call", AsyncMock(return_value="wss://uv"))
+    tool_done = asyncio.Event()
+
+    async def tool(uv_ws, name, invocation_id, params):
+        await n8n_service.send_to_webhook({"route": "3", "number": "x", "data": name})
+        tool_done.set()
+    monkeypatch.setattr(ms, "run_tool_invocation", tool)
+
+    class FakeUltravox:
+        state = State.OPEN
+        send = AsyncMock()
+
+        async def __aiter__(self):
+            yield json.dumps({"type": "state", "state": "listening"})
+            yield json.dumps({"type": "client_tool_invocation", "toolName": "verify",
+                              "invocationId": "inv-dbg", "parameters": {}})
+            await tool_done.wait()
+    monkeypatch.setattr(ms.websockets, "connect", AsyncMock(return_value=FakeUltravox()))
+
+    start = json.dumps({"event": "start", "start": {
+        "streamSid": "MZ-dbg", "callSid": "CA-dbg",
+        "customParameters": {"callerNumber": "+15550100", "firstMessage": "Hi"}}})
+
+    async def receive_text():
+        if not receive_text.sent:
+            receive_text.sent = True
+            return start
+        await tool_done.wait()
+        raise WebSocketDisconnect(code=1000)
+    receive_text.sent = False
+    twilio_ws = MagicMock(accept=AsyncMock(), send_text=AsyncMock(), close=AsyncMock(),
+                          receive_text=receive_text)
+
+    records: list[logging.LogRecord] = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    loggers = [ms.logger, n8n_service.logger]
+    levels = [lg.level for lg in loggers]
+    for lg in loggers:
+        lg.addHandler(handler)
+        lg.setLevel(logging.INFO)
+    await session_manager.create("CA-dbg", transcript="", callerNumber="+15550100",
+                                 firstMessage="Hi")
+    try:
+        await asyncio.wait_for(ms.media_stream(twilio_ws), timeout=5)
+    finally:
+        for lg, level in zip(loggers, levels, strict=True):
+            lg.removeHandler(handler)
+            lg.setLevel(level)
+        await session_manager.pop("CA-dbg")
+
+    debug = [r.getMessage() for r in records if r.levelno == logging.DEBUG]
+    assert "Agent state: listening" in debug
+    assert any(m.startswith("POST https://n8n.example/hook") and "'route': '3'" in m
+               for m in debug)
@@ -0,0 +1,67 @@
+"""Tests for memory accounting and tracemalloc diagnostics."""
+from __future__ import annotations
+
+import pytest
+
+from app.core import memory
+from app.core.shared_state import session_manager
+
+
+def test_rss_bytes_is_positive():
+    assert memory.rss_bytes() > 0
+
+
+def test_estimate_session_counts_transcript_and_pending_turns():
+    class _Stream:
+        def __init__(self) -> None:
+            self._pending = ["User: hi\n", "Agent: hello\n"]
+
+    estimate = memory.estimate_session({
+        "transcript": "User: héllo\n",
+        "transcript_stream": _Stream(),
+        "uv_ws": None,
+    })
+    assert estimate["transcriptBytes"] == len("User: héllo\n".encode())
+    assert estimate["pendingTranscriptBytes"] == len("User: hi\n") + len("Agent: hello\n")
+    assert estimate["queuedAudioBytes"] == 0
+    assert estimate["sessionBytes"] > 0
+
+
+@pytest.mark.asyncio
+async def test_memory_report_flags_orphan_locks():
+    await session_manager.create("CAmem", transcript="x" * 1000)
+    try:
+        report = memory.memory_report()
+        assert any(c["callSid"] == "CAmem" and c["transcriptBytes"] == 1000
+                   for c in report["calls"])
+        assert report["orphanLocks"] == report["locks"] - report["sessions"]
+    finally:
+        await session_manager.pop("CAmem")
+
+
+@pytest.mark.asyncio
+async def test_active_calls_counts_bridged_sessions():
+    base = memory.active_calls()
+    await session_manager.create("CAbridged", transcript="", ultravox_ws_active=True)
+    await session_manager.create("CAringing", transcript="")
+    try:
+        assert memory.active_calls() == base + 1
+        assert memory.memory_report()["activeCalls"] == base + 1
+    finally:
+        await session_manager.pop("CAbridged")
+        await session_manager.pop("CAringing")
+
+
+def test_tracemalloc_diff_requires_start_and_reports_growth():
+    memory.stop_tracing()
+    with pytest.raises(RuntimeError):
+        memory.snapshot_diff()
+    memory.start_tracing(frames=1)
+    try:
+        hoard = [bytearray(1024) for _ in range(200)]
+        diff = memory.snapshot_diff(top=5)
+        assert diff["tracedBytes"] > 0
+        assert any(entry["sizeDiffBytes"] > 0 for entry in diff["top"])
+        del hoard
+    finally:
+        memory.stop_tracing()
@@ -1,4 +1,5 @@
 """Tests for Prometheus /metrics endpoint and counters."""
+import pytest
 from fastapi.testclient import TestClient
 
 from app.core import metrics as metrics_mod
@@ -27,3 +28,43 @@ def test_counter_increments_are_observable():
     metrics_mod.calls_total.labels(direction="inbound").inc()
     after = metrics_mod.calls_total.labels(direction="inbound")._value.get()
     assert after == before + 1
+
+
+@pytest.mark.asyncio
+async def test_cached_render_reuses_body_within_ttl():
+    metrics_mod._cache_expires = 0.0
+    first, _ = await metrics_mod.render_metrics_cached(ttl=60)
+    metrics_mod.calls_total.labels(direction="inbound").inc()
+    cached, _ = await metrics_mod.render_metrics_cached(ttl=60)
+    assert cached is first
+    fresh, content_type = await metrics_mod.render_metrics_cached(ttl=0)
+    assert fresh != first
+    assert content_type.startswith("text/plain")
+
+
+def _sample(name: str, labels: dict[str, str] | None = None) -> float | None:
+    return metrics_mod.REGISTRY.get_sample_value(name, labels or {})
+
+
+@pytest.mark.asyncio
+async def test_capacity_gauges_are_read_at_scrape_time():
+    from app.core.resilience import Bulkhead
+    from app.core.shared_state import session_manager
+
+    await session_manager.create("CAgauge", transcript="")
+    try:
+        assert _sample("voxflow_sessions_active") >= 1
+    finally:
+        await session_manager.pop("CAgauge")
+
+    bulkhead = Bulkhead("gauge-test", max_concurrent=3)
+    labels = {"dependency": "gauge-test"}
+    async with bulkhead:
+        assert _sample("voxflow_dependency_in_flight", labels) == 1
+    assert _sample("voxflow_dependency_in_flight", labels) == 0
+    assert _sample("voxflow_dependency_capacity", labels) == 3
+
+
+def test_unknown_n8n_route_shares_other_series():
+    assert metrics_mod.n8n_route_latency("99") is metrics_mod.n8n_route_latency(None)
+    assert metrics_mod.n8n_route_latency("2") is metrics_mod.N8N_ROUTE_LATENCY["2"]
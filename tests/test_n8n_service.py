@@ -4,6 +4,7 @@ import json
 import pytest
 
 import app.services.n8n_service as svc
+from app.core.metrics import n8n_request_duration_seconds
 
 
 @pytest.mark.asyncio
@@ -68,7 +69,7 @@ async def test_send_to_webhook_retries_on_5xx(monkeypatch):
                 return _FakeResp(503, "busy")
             return _FakeResp(200, "ok")
 
-    monkeypatch.setattr(svc.httpx, "AsyncClient", _FakeClient)
+    monkeypatch.setattr(svc, "get_http_client", _FakeClient)
     result = await svc.send_to_webhook({"route": "1", "number": "+1", "data": "x"})
     assert result == "ok"
     assert calls["n"] == 2
@@ -96,7 +97,29 @@ async def test_send_to_webhook_no_retry_on_4xx(monkeypatch):
             calls["n"] += 1
             return _FakeResp(404, "not found")
 
-    monkeypatch.setattr(svc.httpx, "AsyncClient", _FakeClient)
+    monkeypatch.setattr(svc, "get_http_client", _FakeClient)
     result = await svc.send_to_webhook({"route": "1", "number": "+1", "data": "x"})
     assert "404" in result
     assert calls["n"] == 1
+
+
+@pytest.mark.asyncio
+async def test_send_to_webhook_records_latency_per_route(monkeypatch):
+    monkeypatch.setattr(svc, "N8N_WEBHOOK_URL", "http://example.com/wh")
+
+    class _FakeClient:
+        def __init__(self, *a, **kw): pass
+        async def __aenter__(self): return self
+        async def __aexit__(self, *a): return False
+        async def post(self, *a, **kw):
+            return type("R", (), {"status_code": 200, "text": "ok"})()
+
+    monkeypatch.setattr(svc, "get_http_client", _FakeClient)
+    child = n8n_request_duration_seconds.labels(route="3")
+    before = _count(child)
+    await svc.send_to_webhook({"route": "3", "number": "+1", "data": "x"})
+    assert _count(child) == before + 1
+
+
+def _count(histogram_child) -> float:
+    return sum(bucket.get() for bucket in histogram_child._buckets)
@@ -0,0 +1,50 @@
+"""Tests for the stdlib sampling profiler."""
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+from app.core import profiler
+
+
+def _spin_in_worker(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_samples_other_threads_as_collapsed_stacks():
+    stop = threading.Event()
+    worker = threading.Thread(target=_spin_in_worker, args=(stop,), name="spinner")
+    worker.start()
+    try:
+        counts, ticks = profiler.sample_stacks(0.2, 0.005)
+    finally:
+        stop.set()
+        worker.join()
+
+    assert ticks > 5
+    spinner = [stack for stack in counts if stack.startswith("spinner;")]
+    assert spinner and any("_spin_in_worker (test_profiler.py:" in s for s in spinner)
+    text = profiler.format_collapsed(counts)
+    first = text.splitlines()[0]
+    assert first.rsplit(" ", 1)[1].isdigit()
+
+
+def test_only_one_profile_at_a_time():
+    started = threading.Event()
+
+    def run():
+        started.set()
+        profiler.sample_stacks(0.3, 0.01)
+
+    t = threading.Thread(target=run)
+    t.start()
+    started.wait()
+    time.sleep(0.05)
+    try:
+        with pytest.raises(profiler.ProfilerBusyError):
+            profiler.sample_stacks(0.01, 0.01)
+    finally:
+        t.join()
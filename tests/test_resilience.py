@@ -0,0 +1,119 @@
+"""Tests for the circuit breaker, bulkhead and jittered backoff."""
+import asyncio
+import json
+
+import pytest
+
+import app.services.n8n_service as n8n_svc
+from app.core import resilience
+from app.core.metrics import circuit_breaker_state
+from app.core.resilience import (
+    BulkheadFullError,
+    CircuitBreaker,
+    CircuitOpenError,
+    full_jitter_backoff,
+)
+
+
+def test_breaker_opens_after_threshold_and_fails_fast():
+    breaker = CircuitBreaker("test-open", failure_threshold=2, reset_timeout=60)
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == resilience.CLOSED
+    breaker.record_failure()
+    assert breaker.state == resilience.OPEN
+    assert circuit_breaker_state.labels(dependency="test-open")._value.get() == 2
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_breaker_half_open_allows_single_probe(monkeypatch):
+    now = {"t": 1000.0}
+    monkeypatch.setattr(resilience.time, "monotonic", lambda: now["t"])
+    breaker = CircuitBreaker("test-probe", failure_threshold=1, reset_timeout=10)
+    breaker.record_failure()
+    now["t"] += 11
+
+    breaker.before_call()  # the probe
+    assert breaker.state == resilience.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record_success()
+    assert breaker.state == resilience.CLOSED
+    breaker.before_call()
+
+
+def test_breaker_reopens_when_probe_fails(monkeypatch):
+    now = {"t": 1000.0}
+    monkeypatch.setattr(resilience.time, "monotonic", lambda: now["t"])
+    breaker = CircuitBreaker("test-reopen", failure_threshold=3, reset_timeout=10)
+    for _ in range(3):
+        breaker.record_failure()
+    now["t"] += 11
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == resilience.OPEN
+
+
+def test_abandoned_probe_frees_the_half_open_slot(monkeypatch):
+    now = {"t": 1000.0}
+    monkeypatch.setattr(resilience.time, "monotonic", lambda: now["t"])
+    breaker = CircuitBreaker("test-abandon", failure_threshold=1, reset_timeout=10)
+    assert breaker.before_call() is False
+    breaker.record_failure()
+    now["t"] += 11
+    assert breaker.before_call() is True
+    breaker.abandon(True)  # e.g. cancelled before n8n answered
+    assert breaker.before_call() is True
+    breaker.record_success()
+    assert breaker.state == resilience.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_bulkhead_rejects_when_full():
+    bulkhead = resilience.Bulkhead("test-bulkhead", max_concurrent=1, wait_timeout=0.01)
+    async with bulkhead:
+        assert bulkhead.in_flight == 1
+        with pytest.raises(BulkheadFullError):
+            async with bulkhead:
+                pass
+    assert bulkhead.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_bulkhead_waits_for_a_free_slot():
+    bulkhead = resilience.Bulkhead("test-bulkhead-wait", max_concurrent=1, wait_timeout=1)
+    release = asyncio.Event()
+
+    async def holder():
+        async with bulkhead:
+            await release.wait()
+
+    task = asyncio.create_task(holder())
+    await asyncio.sleep(0)
+    asyncio.get_running_loop().call_later(0.01, release.set)
+    async with bulkhead:
+        pass
+    await task
+
+
+def test_full_jitter_backoff_is_bounded():
+    for attempt in range(1, 10):
+        delay = full_jitter_backoff(attempt, base=0.5, cap=2.0)
+        assert 0.0 <= delay <= min(2.0, 0.5 * 2 ** (attempt - 1))
+
+
+@pytest.mark.asyncio
+async def test_send_to_webhook_fails_fast_when_circuit_open(monkeypatch):
+    monkeypatch.setattr(n8n_svc, "N8N_WEBHOOK_URL", "http://example.com/wh")
+    breaker = CircuitBreaker("n8n-test", failure_threshold=1, reset_timeout=60)
+    breaker.record_failure()
+    monkeypatch.setattr(n8n_svc, "n8n_breaker", breaker)
+
+    def _no_client(*a, **kw):
+        raise AssertionError("must not contact n8n while the circuit is open")
+
+    monkeypatch.setattr(n8n_svc, "get_http_client", _no_client)
+    result = await n8n_svc.send_to_webhook({"route": "1", "number": "+1", "data": "x"})
+    assert "unavailable" in json.loads(result)["error"]
@@ -1,6 +1,7 @@
 """Unit tests for the Twilio signature dependency."""
 from __future__ import annotations
 
+from types import SimpleNamespace
 from unittest.mock import AsyncMock, MagicMock
 
 import pytest
@@ -14,6 +15,7 @@ def _make_request(headers: dict[str, str], form: dict[str, str],
                   url: str = "https://example.com/incoming-call") -> MagicMock:
     req = MagicMock()
     req.headers = headers
+    req.state = SimpleNamespace()
     url_mock = MagicMock()
     url_mock.__str__ = lambda self: url
     url_mock.path = url.split("//", 1)[-1].split("/", 1)[-1]
@@ -25,13 +27,21 @@ def _make_request(headers: dict[str, str], form: dict[str, str],
     return req
 
 
+async def _verify(request) -> None:
+    """Run the dependency as FastAPI does for a handler that succeeds."""
+    dependency = security.verify_twilio_signature(request)
+    await anext(dependency)
+    with pytest.raises(StopAsyncIteration):
+        await anext(dependency)
+
+
 @pytest.mark.asyncio
 async def test_signature_check_skipped_when_disabled(monkeypatch):
     monkeypatch.setattr(security, "TWILIO_VALIDATE_SIGNATURE", False)
     monkeypatch.setattr(security, "TWILIO_AUTH_TOKEN", "anything")
     # Even with missing header, no raise.
     req = _make_request(headers={}, form={})
-    await security.verify_twilio_signature(req)
+    await _verify(req)
 
 
 @pytest.mark.asyncio
@@ -39,7 +49,7 @@ async def test_signature_check_skipped_when_token_missing(monkeypatch):
     monkeypatch.setattr(security, "TWILIO_VALIDATE_SIGNATURE", True)
     monkeypatch.setattr(security, "TWILIO_AUTH_TOKEN", None)
     req = _make_request(headers={}, form={})
-    await security.verify_twilio_signature(req)
+    await _verify(req)
 
 
 @pytest.mark.asyncio
@@ -48,7 +58,7 @@ async def test_signature_check_rejects_missing_header(monkeypatch):
     monkeypatch.setattr(security, "TWILIO_AUTH_TOKEN", "token")
     req = _make_request(headers={}, form={"From": "+1"})
     with pytest.raises(HTTPException) as exc:
-        await security.verify_twilio_signature(req)
+        await _verify(req)
     assert exc.value.status_code == 403
 
 
@@ -61,7 +71,7 @@ async def test_signature_check_rejects_bad_signature(monkeypatch):
         form={"From": "+1"},
     )
     with pytest.raises(HTTPException) as exc:
-        await security.verify_twilio_signature(req)
+        await _verify(req)
     assert exc.value.status_code == 403
 
 
@@ -79,4 +89,74 @@ async def test_signature_check_accepts_valid_signature(monkeypatch):
         form=params,
         url=url,
     )
-    await security.verify_twilio_signature(req)  # must not raise
+    await _verify(req)  # must not raise
+
+
+@pytest.mark.asyncio
+async def test_signature_replay_is_rejected(monkeypatch):
+    token = "secret-token"
+    url = "https://example.com/call-status"
+    params = {"CallSid": "CAreplay", "CallStatus": "ringing"}
+    signature = RequestValidator(token).compute_signature(url, params)
+
+    monkeypatch.setattr(security, "TWILIO_VALIDATE_SIGNATURE", True)
+    monkeypatch.setattr(security, "TWILIO_AUTH_TOKEN", token)
+    monkeypatch.setattr(security, "TWILIO_REPLAY_WINDOW_SECONDS", 300)
+    monkeypatch.setattr(security, "_seen_signatures", security.OrderedDict())
+
+    def request():
+        return _make_request({"X-Twilio-Signature": signature}, params, url=url)
+
+    await _verify(request())
+    with pytest.raises(HTTPException) as exc:
+        await _verify(request())
+    assert exc.value.detail == "Replayed Twilio request"
+
+
+@pytest.mark.asyncio
+async def test_signature_of_a_failed_request_can_be_retried(monkeypatch):
+    token = "secret-token"
+    url = "https://example.com/incoming-call"
+    params = {"CallSid": "CAretry", "From": "+15551234567"}
+    signature = RequestValidator(token).compute_signature(url, params)
+
+    monkeypatch.setattr(security, "TWILIO_VALIDATE_SIGNATURE", True)
+    monkeypatch.setattr(security, "TWILIO_AUTH_TOKEN", token)
+    monkeypatch.setattr(security, "TWILIO_REPLAY_WINDOW_SECONDS", 300)
+    monkeypatch.setattr(security, "_seen_signatures", security.OrderedDict())
+
+    def request():
+        return _make_request({"X-Twilio-Signature": signature}, params, url=url)
+
+    failing = security.verify_twilio_signature(request())
+    await anext(failing)
+    # Held while the handler runs: a concurrent copy is refused.
+    with pytest.raises(HTTPException):
+        await _verify(request())
+    with pytest.raises(RuntimeError):
+        await failing.athrow(RuntimeError("handler blew up"))
+    await _verify(request())  # Twilio's retry after the 5xx
+    with pytest.raises(HTTPException):
+        await _verify(request())
+
+
+def test_replay_cache_is_bounded_and_expires(monkeypatch):
+    monkeypatch.setattr(security, "TWILIO_REPLAY_WINDOW_SECONDS", 10)
+    monkeypatch.setattr(security, "TWILIO_REPLAY_CACHE_SIZE", 2)
+    monkeypatch.setattr(security, "_seen_signatures", security.OrderedDict())
+    for i, sig in enumerate(("a", "b", "c")):
+        security._remember(sig, 100.0 + i)
+    assert list(security._seen_signatures) == ["b", "c"]
+    assert security._is_replay("c", 105.0)
+    assert not security._is_replay("c", 112.5)
+    assert not security._seen_signatures
+
+
+@pytest.mark.asyncio
+async def test_twilio_params_parses_form_once():
+    req = _make_request({}, {"CallSid": "CA1", "From": "+1"})
+    first = await security.twilio_params(req)
+    second = await security.twilio_params(req)
+    assert first == {"CallSid": "CA1", "From": "+1"}
+    assert second is first
+    req.form.assert_awaited_once()
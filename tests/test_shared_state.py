@@ -0,0 +1,18 @@
+"""Tests for the session manager."""
+from __future__ import annotations
+
+import pytest
+
+from app.core.shared_state import SessionManager
+
+
+@pytest.mark.asyncio
+async def test_update_after_pop_does_not_leave_a_lock_behind():
+    manager = SessionManager()
+    await manager.create("CA1", transcript="")
+    await manager.pop("CA1")
+    await manager.update("CA1", transcript="late")
+    async with manager.lock("CA1") as session:
+        assert session is None
+    assert len(manager) == 0
+    assert manager.lock_count() == 0
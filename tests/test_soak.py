@@ -0,0 +1,24 @@
+"""Short soak run of the simulated call driver: resources must return to baseline."""
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from benchmarks.call_driver import Sample, find_leaks, soak, stand_ins
+
+
+def test_soak_returns_to_baseline():
+    with stand_ins(), TestClient(app) as client:
+        samples, problems = soak(client, calls=60, concurrency=4, frames=5,
+                                 sample_every=20, rss_tolerance_mb=50, warmup=8)
+    assert problems == []
+    assert samples[-1].calls == 60
+    assert samples[-1].sessions == samples[0].sessions
+    assert samples[-1].locks == samples[0].locks
+
+
+def test_find_leaks_reports_growth():
+    base = Sample(calls=0, rss_bytes=0, fds=5, threads=3, tasks=4, sessions=0, locks=0)
+    leaked = Sample(calls=10, rss_bytes=0, fds=5, threads=3, tasks=4, sessions=0, locks=3)
+    assert find_leaks(base, leaked, rss_tolerance_mb=10, fd_slack=2,
+                      thread_slack=2) == ["session locks: 0 -> 3"]
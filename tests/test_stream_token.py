@@ -0,0 +1,87 @@
+"""Tests for signed stream tokens."""
+from __future__ import annotations
+
+import pytest
+
+from app.core import stream_token
+from app.core.stream_token import (
+    InvalidStreamTokenError,
+    issue_stream_token,
+    verify_stream_token,
+)
+
+
+@pytest.fixture(autouse=True)
+def _secret(monkeypatch):
+    monkeypatch.setattr(stream_token, "STREAM_TOKEN_SECRET", "shared-secret")
+    monkeypatch.setattr(stream_token, "STREAM_TOKEN_TTL_SECONDS", 60)
+    monkeypatch.setattr(stream_token, "_used_nonces", {})
+    monkeypatch.setattr(stream_token, "_nonce_expiry", [])
+
+
+def test_round_trip_binds_call_and_parameters():
+    token = issue_stream_token("+15551234567", "Hi & welcome", "inbound", "CA1", now=1000)
+    claims = verify_stream_token(token, "+15551234567", "Hi & welcome", "CA1", now=1030)
+    assert claims == {"d": "inbound", "e": 1060, "c": "CA1"}
+
+
+def test_outbound_token_is_single_use():
+    token = issue_stream_token("+15551234567", "Hello", "outbound", now=1000)
+    assert verify_stream_token(token, "+15551234567", "Hello", "CA-any", now=1000)["d"] == "outbound"
+    with pytest.raises(InvalidStreamTokenError, match="already used"):
+        verify_stream_token(token, "+15551234567", "Hello", "CA-other", now=1001)
+    other = issue_stream_token("+15551234567", "Hello", "outbound", now=1000)
+    assert other != token
+    verify_stream_token(other, "+15551234567", "Hello", "CA-other", now=1001)
+    # Expired nonces are forgotten along the way.
+    verify_stream_token(issue_stream_token("+1555", "Hi", "outbound", now=2000),
+                        "+1555", "Hi", "CA3", now=2000)
+    assert len(stream_token._used_nonces) == 1
+
+
+def test_nonce_record_is_bounded_and_forgets_soonest_expiring(monkeypatch):
+    monkeypatch.setattr(stream_token, "_MAX_NONCES", 2)
+    assert stream_token._consume_nonce("late", 2000, now=1000)
+    assert stream_token._consume_nonce("early", 1100, now=1000)
+    # Out of expiry order: the full record drops "early", not the older "late".
+    assert stream_token._consume_nonce("third", 1500, now=1000)
+    assert set(stream_token._used_nonces) == {"late", "third"}
+    assert not stream_token._consume_nonce("late", 2000, now=1001)
+    assert stream_token._consume_nonce("fourth", 1600, now=1501)
+    assert set(stream_token._used_nonces) == {"late", "fourth"}
+
+
+def test_rejects_token_bound_to_neither_call_nor_nonce():
+    claims = stream_token._b64encode(b'{"d":"outbound","e":1060}')
+    token = f"{claims}.{stream_token._signature('shared-secret', claims, '+1555', 'Hi')}"
+    with pytest.raises(InvalidStreamTokenError, match="not bound"):
+        verify_stream_token(token, "+1555", "Hi", "CA1", now=1000)
+
+
+@pytest.mark.parametrize(("caller", "message", "call_sid", "now", "reason"), [
+    ("+15550000000", "Hi", "CA1", 1000, "bad signature"),
+    ("+15551234567", "Hi, tampered", "CA1", 1000, "bad signature"),
+    ("+15551234567", "Hi", "CA2", 1000, "another call"),
+    ("+15551234567", "Hi", "CA1", 1061, "expired"),
+])
+def test_rejects_tampering_replay_and_expiry(caller, message, call_sid, now, reason):
+    token = issue_stream_token("+15551234567", "Hi", "inbound", "CA1", now=1000)
+    with pytest.raises(InvalidStreamTokenError, match=reason):
+        verify_stream_token(token, caller, message, call_sid, now=now)
+
+
+def test_rejects_forged_and_malformed_tokens(monkeypatch):
+    token = issue_stream_token("+1555", "Hi", "inbound", "CA1", now=1000)
+    for bad in ("", "garbage", token.split(".")[0], token + "x"):
+        with pytest.raises(InvalidStreamTokenError):
+            verify_stream_token(bad, "+1555", "Hi", "CA1", now=1000)
+    monkeypatch.setattr(stream_token, "STREAM_TOKEN_SECRET", "other-secret")
+    with pytest.raises(InvalidStreamTokenError, match="bad signature"):
+        verify_stream_token(token, "+1555", "Hi", "CA1", now=1000)
+
+
+def test_disabled_without_secret(monkeypatch):
+    monkeypatch.setattr(stream_token, "STREAM_TOKEN_SECRET", None)
+    assert issue_stream_token("+1555", "Hi", "inbound", "CA1") is None
+    with pytest.raises(InvalidStreamTokenError, match="not enabled"):
+        verify_stream_token("a.b", "+1555", "Hi", "CA1")
@@ -0,0 +1,152 @@
+"""Tests for the tenant registry and per-tenant prompts, tools and calendars."""
+from __future__ import annotations
+
+import json
+from unittest.mock import AsyncMock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import security
+from app.api.endpoints import calls as calls_module
+from app.core import config, prompts, stream_token, tenants
+from app.core.shared_state import session_manager
+from app.core.tenants import Tenant, TenantRegistry, bind_tenant
+from app.main import app
+from app.services import tools_service as svc
+from app.services import ultravox_service
+
+
+@pytest.fixture(autouse=True)
+def unbind_tenant():
+    yield
+    bind_tenant(None)
+
+
+@pytest.fixture
+def tenant_dir(tmp_path):
+    (tmp_path / "acme-prompts").mkdir()
+    (tmp_path / "acme-prompts" / "system.md").write_text(
+        "You are {agent_name} of {company_name}. It is {now}.", encoding="utf-8")
+    (tmp_path / "acme.json").write_text(json.dumps({
+        "numbers": ["+1 (555) 123-0000"],
+        "agentName": "Sara",
+        "companyName": "Acme Dental",
+        "promptDir": "acme-prompts",
+        "calendars": {"Downtown": "downtown@acme.example"},
+        "ultravox": {"voice": "acme-voice", "corpusId": "acme-corpus"},
+    }), encoding="utf-8")
+    (tmp_path / "beta.json").write_text(json.dumps({
+        "id": "beta-co", "numbers": ["+15559870000"],
+    }), encoding="utf-8")
+    return tmp_path
+
+
+def test_from_directory_inherits_process_settings(tenant_dir):
+    registry = TenantRegistry.from_directory(tenant_dir)
+    assert len(registry) == 2
+    acme = registry.get("acme")
+    assert acme is not None
+    assert registry.for_number("+15551230000") is acme
+    assert registry.for_number("15551230000") is acme
+    assert registry.for_number("+15550000000") is None
+    assert acme.first_message == "Hey, this is Sara. How can I assist you today?"
+    assert acme.ultravox_voice == "acme-voice"
+    assert acme.ultravox_model == tenants.ULTRAVOX_MODEL
+    assert set(acme.prompt_overrides) == {"system"}
+
+    beta = registry.get("beta-co")
+    assert beta is not None
+    assert beta.first_message == tenants.DEFAULT_FIRST_MESSAGE
+    assert beta.calendars == tenants.CALENDARS_LIST
+
+
+def test_bad_tenant_files_are_rejected(tenant_dir):
+    (tenant_dir / "clash.json").write_text(
+        json.dumps({"numbers": ["+15559870000"]}), encoding="utf-8")
+    with pytest.raises(ValueError, match="belongs to both"):
+        TenantRegistry.from_directory(tenant_dir)
+    (tenant_dir / "clash.json").write_text(json.dumps({"numbers": []}), encoding="utf-8")
+    with pytest.raises(ValueError, match="clash.json"):
+        TenantRegistry.from_directory(tenant_dir)
+
+
+def test_prompt_templates_are_validated_at_load(tenant_dir):
+    # Non-template files (a README with literal braces) are not loaded.
+    (tenant_dir / "acme-prompts" / "README.md").write_text("Use {now} or {{ }} {x}")
+    acme = TenantRegistry.from_directory(tenant_dir).get("acme")
+    assert set(acme.prompt_overrides) == {"system"}
+    assert "prompts" in acme.cache
+
+    (tenant_dir / "acme-prompts" / "main_convo.md").write_text("Hello {caller_name}")
+    with pytest.raises(ValueError, match=r"acme\.json: prompt template 'main_convo'"):
+        TenantRegistry.from_directory(tenant_dir)
+
+
+def test_prompts_follow_the_bound_tenant(tenant_dir):
+    acme = TenantRegistry.from_directory(tenant_dir).get("acme")
+    default = prompts.get_system_prompt()
+    bind_tenant(acme)
+    assert prompts.get_system_prompt().startswith("You are Sara of Acme Dental. It is ")
+    assert prompts.get_stage_prompt("main_convo", "noon") == \
+        prompts._DEFAULT_PROMPTS.render("main_convo", "noon")
+    compiled = acme.cache["prompts"]
+    prompts.get_system_prompt()
+    assert acme.cache["prompts"] is compiled
+    bind_tenant(None)
+    assert prompts.get_system_prompt()[:40] == default[:40]
+
+
+def test_tool_list_is_built_once_per_tenant(monkeypatch):
+    built = []
+
+    def build(corpus_id=config.ULTRAVOX_CORPUS_ID):
+        built.append(corpus_id)
+        return [{"corpus": corpus_id}]
+
+    monkeypatch.setattr(ultravox_service, "_build_selected_tools", build)
+    monkeypatch.setattr(ultravox_service, "_default_tools", None)
+    acme = Tenant(id="acme", numbers=("+15551230000",), corpus_id="acme-corpus")
+    bind_tenant(acme)
+    assert ultravox_service.selected_tools() is ultravox_service.selected_tools()
+    bind_tenant(None)
+    ultravox_service.selected_tools()
+    assert built == ["acme-corpus", config.ULTRAVOX_CORPUS_ID]
+
+
+def test_stream_token_carries_the_tenant(monkeypatch):
+    monkeypatch.setattr(stream_token, "STREAM_TOKEN_SECRET", "shared-secret")
+    token = stream_token.issue_stream_token("+1555", "Hi", "inbound", "CA1", tenant="acme")
+    claims = stream_token.verify_stream_token(token, "+1555", "Hi", "CA1")
+    assert claims["t"] == "acme"
+
+
+async def test_schedule_meeting_uses_the_tenant_calendars(monkeypatch):
+    monkeypatch.setattr(svc.calendar_cache, "bookings", svc.calendar_cache.BookingLedger())
+    monkeypatch.setattr(svc, "CALENDARS_LIST", {"Downtown": "global-cal"})
+    monkeypatch.setattr(svc.session_manager, "find_by_uv_ws",
+                        AsyncMock(return_value=("CA1", {"callerNumber": "+15555550100"})))
+    webhook = AsyncMock(return_value=json.dumps({"message": "Booked"}))
+    monkeypatch.setattr(svc, "send_to_webhook", webhook)
+    bind_tenant(Tenant(id="acme", numbers=("+15551230000",),
+                       calendars={"Uptown": "uptown@acme.example"}))
+    uv_ws = AsyncMock()
+    params = svc.ScheduleMeetingParams(name="A", email="a@b.c", purpose="p",
+                                       datetime="2026-01-01", location="Uptown")
+    await svc.handle_schedule_meeting(uv_ws, "inv-tenant", params)
+    assert json.loads(webhook.await_args.args[0]["data"])["calendar_id"] == "uptown@acme.example"
+
+
+def test_incoming_call_is_routed_by_called_number(monkeypatch, tenant_dir):
+    monkeypatch.setattr(security, "TWILIO_VALIDATE_SIGNATURE", False)
+    monkeypatch.setattr(calls_module, "N8N_WEBHOOK_URL", None)
+    with TestClient(app) as client:
+        monkeypatch.setattr(tenants, "registry", TenantRegistry.from_directory(tenant_dir))
+        resp = client.post("/incoming-call", data={
+            "CallSid": "CAten1", "From": "+15550001", "To": "+15551230000"})
+        try:
+            assert "Hey, this is Sara." in resp.text
+            session = client.portal.call(session_manager.get, "CAten1")
+            assert session["tenant"] == "acme"
+        finally:
+            client.portal.call(session_manager.pop, "CAten1")
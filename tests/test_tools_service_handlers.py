@@ -1,10 +1,10 @@
 """Coverage tests for tool handler dispatch and individual handlers.
 
 Mocks the Ultravox WebSocket with ``AsyncMock`` and patches outbound
-``send_to_webhook`` / Twilio Client / session_manager interactions.
+``send_to_webhook`` / Twilio REST / session_manager interactions.
 """
 import json
-from unittest.mock import AsyncMock, MagicMock
+from unittest.mock import AsyncMock
 
 import pytest
 
@@ -23,6 +23,12 @@ def uv_ws():
     return ws
 
 
+@pytest.fixture(autouse=True)
+def fresh_booking_ledger(monkeypatch):
+    """Tests reuse invocation ids; real ones are unique per invocation."""
+    monkeypatch.setattr(svc.calendar_cache, "bookings", svc.calendar_cache.BookingLedger())
+
+
 def _last_send_payload(uv_ws):
     args, _ = uv_ws.send.call_args
     return json.loads(args[0])
@@ -31,9 +37,24 @@ def _last_send_payload(uv_ws):
 # ----- queryCorpus / verify ---------------------------------------------------
 
 @pytest.mark.asyncio
-async def test_handle_queryCorpus_is_a_noop_send(uv_ws):
+async def test_handle_queryCorpus_without_index_defers_to_remote(monkeypatch, uv_ws):
+    monkeypatch.setattr(svc.local_corpus, "_index", None)
     await svc.handle_queryCorpus(uv_ws, "inv1", svc.QueryCorpusParams(question="hi"))
-    uv_ws.send.assert_not_called()
+    assert "queryRemoteCorpus" in _last_send_payload(uv_ws)["result"]
+
+
+@pytest.mark.asyncio
+async def test_handle_queryCorpus_answers_from_local_index(monkeypatch, uv_ws):
+    index = svc.local_corpus.CorpusIndex.from_documents([
+        ("parking.md", "# Parking\nFree parking is available behind the clinic."),
+        ("hours.md", "# Hours\nWe are open Monday to Friday, 8am to 6pm."),
+    ])
+    monkeypatch.setattr(svc.local_corpus, "_index", index)
+    await svc.handle_queryCorpus(uv_ws, "inv1",
+                                 svc.QueryCorpusParams(question="Is there free parking?"))
+    result = _last_send_payload(uv_ws)["result"]
+    assert result.startswith("[parking.md] Parking")
+    assert "queryRemoteCorpus" not in result
 
 
 @pytest.mark.asyncio
@@ -105,6 +126,82 @@ async def test_handle_schedule_meeting_non_json_webhook(monkeypatch, uv_ws):
     assert "couldn't schedule" in payload["result"]
 
 
+@pytest.mark.asyncio
+async def test_handle_schedule_meeting_refuses_busy_slot_locally(monkeypatch, uv_ws):
+    from datetime import timedelta
+
+    from tests.test_calendar_cache import _cache, _next_monday
+
+    ten = _next_monday(10)
+    cache, _ = _cache(busy=[(ten, ten + timedelta(hours=1))])
+    monkeypatch.setattr(svc, "CALENDARS_LIST", {"Downtown": "cal-1"})
+    monkeypatch.setattr(svc.calendar_cache, "get_cache", lambda: cache)
+    monkeypatch.setattr(svc, "send_to_webhook", AsyncMock())
+    params = svc.ScheduleMeetingParams(
+        name="A", email="a@b.c", purpose="p", datetime=ten.strftime("%Y-%m-%d %H:%M"),
+        location="Downtown",
+    )
+    await svc.handle_schedule_meeting(uv_ws, "inv-busy", params)
+    result = _last_send_payload(uv_ws)["result"]
+    assert "not available" in result
+    assert (ten - timedelta(minutes=30)).strftime("%Y-%m-%dT%H:%M") in result
+    svc.send_to_webhook.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_book_meeting_releases_hold_when_booking_errors(monkeypatch, uv_ws):
+    from tests.test_calendar_cache import _cache, _next_monday
+
+    ten = _next_monday(10)
+    cache, _ = _cache()
+    monkeypatch.setattr(svc, "CALENDARS_LIST", {"Downtown": "cal-1"})
+    monkeypatch.setattr(svc.calendar_cache, "get_cache", lambda: cache)
+    monkeypatch.setattr(svc.session_manager, "find_by_uv_ws",
+                        AsyncMock(side_effect=RuntimeError("lock lost")))
+    params = svc.ScheduleMeetingParams(
+        name="A", email="a@b.c", purpose="p", datetime=ten.strftime("%Y-%m-%d %H:%M"),
+        location="Downtown",
+    )
+    with pytest.raises(RuntimeError):
+        await svc._book_meeting(uv_ws, "inv-err", params, "cal-1")
+    assert (await cache.claim("cal-1", ten)).available
+
+
+@pytest.mark.asyncio
+async def test_handle_schedule_meeting_non_object_webhook(monkeypatch, uv_ws):
+    monkeypatch.setattr(svc, "CALENDARS_LIST", {"Downtown": "cal-1"})
+    monkeypatch.setattr(svc.session_manager, "find_by_uv_ws",
+                        AsyncMock(return_value=(None, None)))
+    monkeypatch.setattr(svc, "send_to_webhook", AsyncMock(return_value='["ok"]'))
+    params = svc.ScheduleMeetingParams(
+        name="A", email="a@b.c", purpose="p", datetime="2026-01-01", location="Downtown",
+    )
+    await svc.handle_schedule_meeting(uv_ws, "inv-list", params)
+    assert _last_send_payload(uv_ws)["result"] == svc._BOOKING_FAILED
+
+
+@pytest.mark.asyncio
+async def test_handle_schedule_meeting_retry_does_not_book_twice(monkeypatch, uv_ws):
+    monkeypatch.setattr(svc, "CALENDARS_LIST", {"Downtown": "cal-1"})
+    monkeypatch.setattr(
+        svc.session_manager, "find_by_uv_ws", AsyncMock(return_value=(None, None)),
+    )
+    monkeypatch.setattr(
+        svc, "send_to_webhook",
+        AsyncMock(return_value=json.dumps({"message": "Booked at 10am"})),
+    )
+    params = svc.ScheduleMeetingParams(
+        name="A", email="a@b.c", purpose="p", datetime="2026-01-01",
+        location="Downtown",
+    )
+    await svc.handle_schedule_meeting(uv_ws, "inv-retry", params)
+    await svc.handle_schedule_meeting(uv_ws, "inv-retry", params)
+    assert _last_send_payload(uv_ws)["result"] == "Booked at 10am"
+    svc.send_to_webhook.assert_awaited_once()
+    data = json.loads(svc.send_to_webhook.await_args.args[0]["data"])
+    assert data["idempotency_key"] == "inv-retry"
+
+
 # ----- move_to_main_convo / move_to_call_summary ------------------------------
 
 @pytest.mark.asyncio
@@ -145,11 +242,11 @@ async def test_handle_hangUp_no_session_returns_early(monkeypatch, uv_ws):
         svc.session_manager, "find_by_uv_ws",
         AsyncMock(return_value=(None, None)),
     )
-    # Should not attempt to construct Twilio Client at all.
-    client_cls = MagicMock()
-    monkeypatch.setattr(svc, "Client", client_cls)
+    # Should not attempt any Twilio REST call at all.
+    complete_call = AsyncMock()
+    monkeypatch.setattr(svc, "complete_call", complete_call)
     await svc.handle_hangUp(uv_ws, "inv1", svc.HangUpParams())
-    client_cls.assert_not_called()
+    complete_call.assert_not_awaited()
 
 
 @pytest.mark.asyncio
@@ -160,8 +257,8 @@ async def test_handle_hangUp_with_session_updates_and_calls_twilio(monkeypatch,
         AsyncMock(return_value=("CA1", {"transcript_sent": True})),
     )
     monkeypatch.setattr(svc.session_manager, "update", update)
-    client_cls = MagicMock()
-    monkeypatch.setattr(svc, "Client", client_cls)
+    complete_call = AsyncMock()
+    monkeypatch.setattr(svc, "complete_call", complete_call)
     monkeypatch.setattr(
         svc, "safe_close_websocket", AsyncMock(),
     )
@@ -169,19 +266,25 @@ async def test_handle_hangUp_with_session_updates_and_calls_twilio(monkeypatch,
     await svc.handle_hangUp(uv_ws, "inv1", svc.HangUpParams())
 
     update.assert_any_await("CA1", hanging_up=True)
-    client_cls.assert_called_once()
-    # .calls("CA1").update(status='completed')
-    client_cls.return_value.calls.assert_any_call("CA1")
+    # One update(status='completed'), no redundant fetch().
+    complete_call.assert_awaited_once_with("CA1")
 
 
 # ----- handle_tool_invocation dispatcher --------------------------------------
 
 @pytest.mark.asyncio
 async def test_handle_tool_invocation_unknown_tool(uv_ws):
-    await svc.handle_tool_invocation(uv_ws, "no_such_tool", "inv1", {})
+    unknown = svc._UNKNOWN_TOOL_METRICS.outcomes["unknown"]
+    before = unknown._value.get()
+    await svc.run_tool_invocation(uv_ws, "no_such_tool", "inv1", {})
     payload = _last_send_payload(uv_ws)
     assert payload["error_type"] == "implementation-error"
     assert "Unknown tool" in payload["error_message"]
+    # Model-supplied names never become label values.
+    assert unknown._value.get() == before + 1
+    tools = {sample.labels["tool"] for metric in svc.tool_invocations_total.collect()
+             for sample in metric.samples}
+    assert "no_such_tool" not in tools
 
 
 @pytest.mark.asyncio
@@ -218,3 +321,27 @@ async def test_handle_tool_invocation_handler_exception_sends_error(monkeypatch,
     payload = _last_send_payload(uv_ws)
     assert payload["error_type"] == "implementation-error"
     assert "verify" in payload["error_message"]
+
+
+# ----- run_tool_invocation supervision ---------------------------------------
+
+@pytest.mark.asyncio
+async def test_run_tool_invocation_times_out_and_reports_error(monkeypatch, uv_ws):
+    import asyncio
+
+    from app.core.metrics import tool_in_flight, tool_invocations_total
+
+    async def hang(*a, **k):
+        await asyncio.sleep(10)
+
+    monkeypatch.setitem(svc.TOOL_HANDLERS, "verify", (svc.VerifyParams, hang))
+    before = tool_invocations_total.labels(tool="verify", outcome="timeout")._value.get()
+
+    await svc.run_tool_invocation(uv_ws, "verify", "inv1", {}, timeout=0.01)
+
+    payload = _last_send_payload(uv_ws)
+    assert payload["error_type"] == "implementation-error"
+    assert "took too long" in payload["error_message"]
+    after = tool_invocations_total.labels(tool="verify", outcome="timeout")._value.get()
+    assert after == before + 1
+    assert tool_in_flight.labels(tool="verify")._value.get() == 0
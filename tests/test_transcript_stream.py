@@ -0,0 +1,132 @@
+"""Tests for incremental transcript streaming to n8n."""
+import json
+from unittest.mock import AsyncMock
+
+import pytest
+
+import app.services.n8n_service as n8n_svc
+import app.services.transcript_stream as ts
+
+
+@pytest.mark.asyncio
+async def test_batches_are_sequenced_and_marker_is_tiny(monkeypatch):
+    sent: list[dict] = []
+
+    async def fake_send(payload):
+        sent.append(payload)
+        return "ok"
+
+    monkeypatch.setattr(ts, "send_to_webhook", fake_send)
+    stream = ts.TranscriptStreamer("CA1", "+1555", batch_turns=2,
+                                   flush_seconds=60, max_in_flight=2)
+    for i in range(5):
+        stream.add_turn("User", f"turn {i}")
+
+    assert await stream.close() is True
+    batches = [p for p in sent if not p["final"]]
+    assert [p["seq"] for p in sorted(batches, key=lambda p: p["seq"])] == [1, 2, 3]
+    assert batches[0]["data"] == "User: turn 0\nUser: turn 1\n"
+    marker = sent[-1]
+    assert marker["final"] is True
+    assert marker["seq"] == 4
+    assert marker["batches"] == 3
+    assert marker["turns"] == 5
+    assert marker["data"] == ""
+    assert all(p["route"] == ts.N8N_ROUTE_TRANSCRIPT_CHUNK for p in sent)
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_skips_marker(monkeypatch):
+    send = AsyncMock(return_value=json.dumps({"error": "boom"}))
+    monkeypatch.setattr(ts, "send_to_webhook", send)
+    stream = ts.TranscriptStreamer("CA1", "+1", batch_turns=1)
+    stream.add_turn("Agent", "hi")
+
+    assert await stream.close() is False
+    assert send.await_count == 1  # the batch only, no completion marker
+
+
+@pytest.mark.asyncio
+async def test_add_turn_after_close_is_ignored(monkeypatch):
+    monkeypatch.setattr(ts, "send_to_webhook", AsyncMock(return_value="ok"))
+    stream = ts.TranscriptStreamer("CA1", "+1", batch_turns=1)
+    await stream.close()
+    stream.add_turn("User", "late")
+    assert stream.seq == 0
+
+
+@pytest.mark.asyncio
+async def test_send_transcript_uses_stream_marker_when_present(monkeypatch):
+    full_upload = AsyncMock(return_value="ok")
+    monkeypatch.setattr(n8n_svc, "send_to_webhook", full_upload)
+    stream = AsyncMock()
+    stream.close = AsyncMock(return_value=True)
+    session = {"callerNumber": "+1", "transcript": "x", "transcript_stream": stream}
+
+    await n8n_svc.send_transcript_to_n8n(session)
+
+    stream.close.assert_awaited_once()
+    full_upload.assert_not_awaited()
+    assert session["transcript_sent"] is True
+
+
+@pytest.mark.asyncio
+async def test_send_transcript_falls_back_to_full_upload(monkeypatch):
+    full_upload = AsyncMock(return_value="ok")
+    monkeypatch.setattr(n8n_svc, "send_to_webhook", full_upload)
+    stream = AsyncMock()
+    stream.close = AsyncMock(return_value=False)
+    session = {"callerNumber": "+1", "transcript": "x", "transcript_stream": stream}
+
+    await n8n_svc.send_transcript_to_n8n(session)
+
+    full_upload.assert_awaited_once()
+    assert full_upload.call_args.args[0]["route"] == "2"
+
+
+@pytest.mark.asyncio
+async def test_close_survives_cancelled_first_caller(monkeypatch):
+    import asyncio
+
+    gate = asyncio.Event()
+    sent: list[dict] = []
+
+    async def slow_send(payload):
+        await gate.wait()
+        sent.append(payload)
+        return "ok"
+
+    monkeypatch.setattr(ts, "send_to_webhook", slow_send)
+    stream = ts.TranscriptStreamer("CA1", "+1", batch_turns=10)
+    stream.add_turn("User", "hi")
+
+    first = asyncio.create_task(stream.close())
+    await asyncio.sleep(0)
+    first.cancel()
+    gate.set()
+
+    assert await stream.close() is True
+    assert sent[-1]["final"] is True
+
+
+@pytest.mark.asyncio
+async def test_partial_batch_is_flushed_by_timer_during_silence(monkeypatch):
+    import asyncio
+
+    sent: list[dict] = []
+
+    async def fake_send(payload):
+        sent.append(payload)
+        return "ok"
+
+    monkeypatch.setattr(ts, "send_to_webhook", fake_send)
+    stream = ts.TranscriptStreamer("CA1", "+1", batch_turns=10, flush_seconds=0.02)
+    stream.add_turn("User", "hello")
+    stream.add_turn("Agent", "hi there")
+    await asyncio.sleep(0.1)
+    assert [(p["seq"], p["turns"]) for p in sent] == [(1, 2)]
+
+    stream.add_turn("User", "bye")
+    assert await stream.close() is True
+    assert stream._flush_timer is None
+    assert [p["seq"] for p in sent] == [1, 2, 3]
@@ -0,0 +1,55 @@
+"""Tests for the shared, off-loop Twilio REST client."""
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.core.metrics import twilio_rest_duration_seconds
+from app.services import twilio_service
+
+
+def _histogram_count(operation: str, outcome: str) -> float:
+    child = twilio_rest_duration_seconds.labels(operation=operation, outcome=outcome)
+    return sum(bucket.get() for bucket in child._buckets)
+
+
+@pytest.fixture
+def fake_client(monkeypatch):
+    client = MagicMock()
+    monkeypatch.setattr(twilio_service, "_client", client)
+    return client
+
+
+@pytest.mark.asyncio
+async def test_complete_call_runs_off_the_event_loop(fake_client):
+    loop_thread = threading.get_ident()
+    seen = {}
+
+    def update(**kwargs):
+        seen["thread"] = threading.get_ident()
+        seen["kwargs"] = kwargs
+
+    fake_client.calls.return_value.update.side_effect = update
+    before = _histogram_count("calls.update", "ok")
+
+    await twilio_service.complete_call("CA1")
+
+    fake_client.calls.assert_called_once_with("CA1")
+    fake_client.calls.return_value.fetch.assert_not_called()
+    assert seen["kwargs"] == {"status": "completed"}
+    assert seen["thread"] != loop_thread
+    assert _histogram_count("calls.update", "ok") == before + 1
+
+
+@pytest.mark.asyncio
+async def test_create_call_records_error_outcome(fake_client):
+    fake_client.calls.create.side_effect = RuntimeError("twilio down")
+    before = _histogram_count("calls.create", "error")
+    with pytest.raises(RuntimeError):
+        await twilio_service.create_call(to="+1", from_="+2", twiml="<Response/>")
+    assert _histogram_count("calls.create", "error") == before + 1
+
+
+def test_client_is_shared(monkeypatch):
+    monkeypatch.setattr(twilio_service, "_client", None)
+    assert twilio_service.get_twilio_client() is twilio_service.get_twilio_client()
@@ -0,0 +1,146 @@
+"""Tests for the verify tool backends."""
+from __future__ import annotations
+
+import sqlite3
+
+import pytest
+
+from app.core.resilience import DependencyUnavailableError
+from app.services import verification
+from app.services.verification import (
+    CustomerIndex,
+    MockBackend,
+    N8nBackend,
+    name_matches,
+    normalize_name,
+    phone_key,
+)
+
+
+def test_phone_key_normalizes_formatting_and_country_code():
+    assert phone_key("+1 (555) 123-4567") == phone_key("555.123.4567") == 5551234567
+    assert phone_key("12345") is None
+
+
+@pytest.mark.parametrize(("spoken", "recorded", "expected"), [
+    ("José Álvarez", "jose alvarez", True),
+    ("Jon Smith", "John Smith", True),
+    ("Smith, John", "John Smith", True),
+    ("Mary O'Brien", "Mary Ann O'Brien", True),
+    ("Jane Doe", "John Doe", False),
+    ("John", "John Smith", False),
+])
+def test_name_matching(spoken, recorded, expected):
+    assert name_matches(normalize_name(spoken), normalize_name(recorded)) is expected
+
+
+def _write_csv(path, rows, mode="w"):
+    with open(path, mode, encoding="utf-8") as f:
+        f.writelines(f"{line}\n" for line in rows)
+
+
+@pytest.mark.asyncio
+async def test_csv_index_lookup_and_shared_numbers(tmp_path):
+    path = tmp_path / "customers.csv"
+    _write_csv(path, ["first_name,last_name,phone", "Jane,Doe,555-123-4567",
+                      "John,Doe,(555) 123 4567", "Ann,Lee,5559876543"])
+    index = CustomerIndex(str(path), "csv", reload_interval=3600)
+    assert index.load() == 2
+    assert await index.verify("jane doe", "+15551234567")
+    assert await index.verify("John Doe", "5551234567")
+    assert not await index.verify("Ann Lee", "5551234567")
+    assert not await index.verify("", "5559876543")
+
+
+def test_csv_refresh_reads_appends_incrementally_and_reloads_rewrites(tmp_path):
+    path = tmp_path / "customers.csv"
+    _write_csv(path, ["name,phone", "Jane Doe,5551234567"])
+    index = CustomerIndex(str(path), "csv", reload_interval=0)
+    index.load()
+    assert index.refresh() == "unchanged"
+
+    _write_csv(path, ["Ann Lee,5559876543"], mode="a")
+    assert index.refresh() == "appended"
+    assert len(index) == 2
+
+    _write_csv(path, ["name,phone", "Bob Ray,5550001111"])
+    assert index.refresh() == "reloaded"
+    assert sorted(index._index) == [5550001111]
+
+
+def test_csv_without_required_columns_is_rejected(tmp_path):
+    path = tmp_path / "bad.csv"
+    _write_csv(path, ["email,phone", "a@b.c,5551234567"])
+    with pytest.raises(ValueError, match="name column"):
+        CustomerIndex(str(path), "csv").load()
+
+
+@pytest.mark.asyncio
+async def test_sqlite_index(tmp_path):
+    path = tmp_path / "crm.db"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE customers (phone TEXT, name TEXT)")
+    conn.execute("INSERT INTO customers VALUES ('+1 555 123 4567', 'Jane Doe')")
+    conn.commit()
+    index = CustomerIndex(str(path), "sqlite", reload_interval=3600)
+    assert index.load() == 1
+    assert await index.verify("Jane Doe", "5551234567")
+
+    conn.execute("INSERT INTO customers VALUES ('5559876543', 'Ann Lee')")
+    conn.commit()
+    conn.close()
+    assert index.refresh() == "reloaded"
+    assert await index.verify("Ann Lee", "5559876543")
+
+
+@pytest.mark.asyncio
+async def test_n8n_backend_caches_lookups(monkeypatch):
+    calls = []
+
+    async def fake_send(payload):
+        calls.append(payload)
+        return '{"names": ["Jane Doe"]}'
+
+    monkeypatch.setattr(verification, "send_to_webhook", fake_send)
+    backend = N8nBackend(cache_size=1, ttl=60)
+    assert await backend.verify("Jane Doe", "+1 555 123 4567")
+    assert await backend.verify("Jane Doe", "5551234567")
+    assert [c["number"] for c in calls] == ["5551234567"]
+    await backend.verify("Jane Doe", "5559876543")  # evicts the first number
+    await backend.verify("Jane Doe", "5551234567")
+    assert len(calls) == 3
+
+
+@pytest.mark.asyncio
+async def test_n8n_backend_errors_are_not_a_mismatch(monkeypatch):
+    async def failing_send(payload):
+        return '{"error": "status 503"}'
+
+    monkeypatch.setattr(verification, "send_to_webhook", failing_send)
+    with pytest.raises(DependencyUnavailableError, match="status 503"):
+        await N8nBackend().verify("Jane Doe", "5551234567")
+
+
+@pytest.mark.asyncio
+async def test_mock_backend_keeps_legacy_behaviour():
+    assert await MockBackend().verify("Jane", "555")
+    assert not await MockBackend().verify("Jane", "")
+
+
+def test_create_backend_validates_configuration():
+    assert isinstance(verification.create_backend("mock"), MockBackend)
+    with pytest.raises(ValueError, match="VERIFY_SOURCE_PATH"):
+        verification.create_backend("csv", None)
+    with pytest.raises(ValueError, match="unknown"):
+        verification.create_backend("ldap", None)
+
+
+@pytest.mark.asyncio
+async def test_verify_records_lookup_time_per_backend(monkeypatch):
+    with pytest.raises(TypeError):
+        verification.VerificationBackend()
+    monkeypatch.setattr(verification, "_backend", MockBackend())
+    child = verification.VERIFY_LOOKUP_SECONDS["mock"]
+    before = child._sum.get()
+    assert await verification.verify("Jane", "555")
+    assert child._sum.get() > before
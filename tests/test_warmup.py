@@ -0,0 +1,59 @@
+"""Tests for the shared HTTP client and startup warm-up."""
+from __future__ import annotations
+
+import asyncio
+
+import httpx
+import pytest
+
+from app.core import warmup
+from app.services import http_client
+
+
+@pytest.mark.asyncio
+async def test_shared_client_is_reused_until_closed():
+    client = http_client.get_http_client()
+    assert http_client.get_http_client() is client
+    await http_client.close_http_client()
+    assert client.is_closed
+    fresh = http_client.get_http_client()
+    assert fresh is not client
+    await http_client.close_http_client()
+
+
+@pytest.mark.asyncio
+async def test_warm_up_connects_to_each_origin(monkeypatch):
+    seen: list[str] = []
+
+    class _FakeClient:
+        async def head(self, url):
+            seen.append(url)
+            if "n8n" in url:
+                raise httpx.ConnectError("refused")
+            return httpx.Response(405)
+
+    monkeypatch.setattr(warmup, "get_http_client", _FakeClient)
+    monkeypatch.setattr(warmup, "N8N_WEBHOOK_URL", "https://n8n.example.com/webhook/x")
+    monkeypatch.setattr(warmup.twilio_service, "get_twilio_client", lambda: object())
+    warmup.reset()
+    await warmup.warm_up(timeout=1.0)
+    assert warmup.is_done()
+    assert sorted(seen) == ["https://api.ultravox.ai/", "https://n8n.example.com/"]
+    assert warmup.results["ultravox"].startswith("ok")
+    assert warmup.results["n8n"] == "error: ConnectError"
+    assert warmup.results["twilio"].startswith("ok")
+
+
+@pytest.mark.asyncio
+async def test_warm_up_timeout_still_marks_done(monkeypatch):
+    class _HangingClient:
+        async def head(self, url):
+            await asyncio.sleep(3600)
+
+    monkeypatch.setattr(warmup, "get_http_client", _HangingClient)
+    monkeypatch.setattr(warmup, "N8N_WEBHOOK_URL", None)
+    monkeypatch.setattr(warmup.twilio_service, "get_twilio_client", lambda: object())
+    warmup.reset()
+    await warmup.warm_up(timeout=0.05)
+    assert warmup.is_done()
+    assert "ultravox" not in warmup.results
@@ -0,0 +1,94 @@
+"""Tests for the per-process call watchdog."""
+from __future__ import annotations
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi import WebSocketDisconnect
+
+from app.core.metrics import DISCONNECTS
+from app.core.watchdog import CallWatchdog
+from app.websockets import media_stream as ms
+from app.websockets.media_stream import CallState
+
+
+async def _forever() -> None:
+    await asyncio.sleep(3600)
+
+
+@pytest.mark.asyncio
+async def test_idle_call_is_expired_and_active_call_is_kept():
+    dog = CallWatchdog(interval=60, twilio_idle=5, ultravox_silence=0, max_duration=0)
+    idle_task = asyncio.create_task(_forever())
+    busy_task = asyncio.create_task(_forever())
+    idle = dog.register(idle_task, "CAidle")
+    busy = dog.register(busy_task, "CAbusy")
+    now = idle.started
+    for tick in range(1, 8):
+        busy.twilio += 1
+        dog.scan(now + tick)
+    await asyncio.sleep(0)
+    assert idle.reason == "idle_timeout"
+    assert idle_task.cancelled()
+    assert busy.reason is None
+    assert len(dog) == 1
+    busy_task.cancel()
+    await dog.stop()
+
+
+@pytest.mark.asyncio
+async def test_ultravox_silence_only_counts_once_armed():
+    dog = CallWatchdog(interval=60, twilio_idle=0, ultravox_silence=5, max_duration=0)
+    task = asyncio.create_task(_forever())
+    watch = dog.register(task)
+    dog.scan(watch.started + 100)
+    assert watch.reason is None
+    watch.arm_ultravox()
+    dog.scan(watch.started + 101)
+    dog.scan(watch.started + 104)
+    assert watch.reason is None
+    dog.scan(watch.started + 107)
+    assert watch.reason == "ultravox_silence"
+    await dog.stop()
+
+
+@pytest.mark.asyncio
+async def test_max_duration_expires_even_with_activity():
+    dog = CallWatchdog(interval=60, twilio_idle=5, ultravox_silence=0, max_duration=30)
+    task = asyncio.create_task(_forever())
+    watch = dog.register(task)
+    before = DISCONNECTS["max_duration"]._value.get()
+    watch.twilio += 1
+    dog.scan(watch.started + 31)
+    assert watch.reason == "max_duration"
+    assert DISCONNECTS["max_duration"]._value.get() == before + 1
+    await dog.stop()
+
+
+@pytest.mark.asyncio
+async def test_handle_twilio_turns_expiry_into_disconnect(monkeypatch):
+    dog = CallWatchdog(interval=0.01, twilio_idle=0.03, ultravox_silence=0,
+                       max_duration=0)
+    monkeypatch.setattr(ms, "call_watchdog", dog)
+    twilio_ws = MagicMock()
+    twilio_ws.receive_text = AsyncMock(side_effect=_forever)
+    state = CallState(twilio_ws=twilio_ws)
+
+    with pytest.raises(WebSocketDisconnect) as exc_info:
+        await asyncio.wait_for(ms._handle_twilio(state), timeout=2)
+    assert exc_info.value.reason == "idle_timeout"
+    assert len(dog) == 0
+    await dog.stop()
+
+
+@pytest.mark.asyncio
+async def test_scanner_stops_when_no_calls_remain():
+    dog = CallWatchdog(interval=0.01, twilio_idle=0, ultravox_silence=0, max_duration=0)
+    task = asyncio.create_task(_forever())
+    watch = dog.register(task)
+    scanner = dog._task
+    assert scanner is not None
+    dog.unregister(watch)
+    await asyncio.wait_for(scanner, timeout=1)
+    task.cancel()